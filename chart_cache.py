@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Кеш графиков по содержимому: график перерисовывается, только если изменились
+его входные данные или настройки построения.
+
+Ключ графика - хеш blake2b от данных периода (выбранные колонки), вершин
+зигзага в периоде и настроек (параметр, границы периода, размер, dpi).
+Ключи лежат в манифесте chart_manifest.json рядом с графиками. После
+ежедневного обновления данных меняется только последний период, и
+перерисовывается только он.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+CHART_MANIFEST = 'chart_manifest.json'
+CHART_CACHE_VERSION = 1
+
+
+def chart_key(period_data, columns, pivots=None, settings=None):
+    """
+    Хеш входных данных графика.
+
+    Параметры:
+    - period_data: данные периода
+    - columns: колонки, которые рисуются на графике
+    - pivots: вершины зигзага в периоде (pivot_index.Pivots) или None
+    - settings: словарь настроек построения (сериализуется в JSON)
+
+    Возвращает:
+    - шестнадцатеричная строка хеша
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps({'version': CHART_CACHE_VERSION, 'settings': settings or {}},
+                             sort_keys=True, default=str).encode('utf-8'))
+    for name in columns:
+        values = np.ascontiguousarray(period_data[name].to_numpy())
+        digest.update(f"{name}:{values.dtype}:{len(values)}".encode('utf-8'))
+        digest.update(values.tobytes())
+    if pivots is not None:
+        for values in pivots:
+            digest.update(np.ascontiguousarray(values).tobytes())
+    return digest.hexdigest()
+
+
+class ChartCache:
+    """
+    Манифест построенных графиков {путь относительно каталога: ключ}.
+    """
+
+    def __init__(self, charts_dir):
+        """
+        Параметры:
+        - charts_dir: каталог графиков, манифест хранится в нем
+        """
+        self.charts_dir = str(charts_dir)
+        self.path = os.path.join(self.charts_dir, CHART_MANIFEST)
+        self.charts = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == CHART_CACHE_VERSION:
+                self.charts = dict(manifest.get('charts', {}))
+        except (OSError, ValueError, AttributeError):
+            self.charts = {}
+
+    def _name(self, chart_path):
+        return os.path.relpath(chart_path, self.charts_dir).replace(os.sep, '/')
+
+    def is_fresh(self, chart_path, key):
+        """
+        График уже построен по тем же данным и файл на месте.
+        """
+        return self.charts.get(self._name(chart_path)) == key and os.path.exists(chart_path)
+
+    def record(self, chart_path, key):
+        """
+        Запоминает ключ построенного графика.
+        """
+        self.charts[self._name(chart_path)] = key
+
+    def save(self):
+        """
+        Записывает манифест атомарно.
+        """
+        os.makedirs(self.charts_dir, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CHART_CACHE_VERSION, 'charts': self.charts},
+                      f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Прореживание рядов для графиков до ширины оси в пикселях (level of detail).
+
+Ряд делится на корзины по числу пиксельных столбцов оси; из каждой корзины
+остаются точки минимума и максимума в исходном порядке, поэтому огибающая
+линии на картинке не меняется. Точки из keep (вершины зигзага) сохраняются
+всегда. Объем сводится к максимуму по корзине и рисуется одной ступенчатой
+областью вместо отдельного столбца на каждую свечу.
+"""
+
+import math
+
+import numpy as np
+
+
+def axes_pixel_width(ax, dpi=None):
+    """
+    Ширина оси в пикселях сохраненной картинки.
+
+    Параметры:
+    - ax: ось matplotlib
+    - dpi: dpi при сохранении (None - dpi фигуры)
+    """
+    fig = ax.figure
+    width_in = ax.get_position().width * fig.get_figwidth()
+    return max(1, int(width_in * (dpi or fig.dpi)))
+
+
+def minmax_indices(values, buckets, keep=None):
+    """
+    Индексы точек ряда, сохраняющих минимум и максимум каждой корзины.
+
+    Параметры:
+    - values: одномерный массив значений
+    - buckets: количество корзин (обычно ширина оси в пикселях)
+    - keep: индексы, которые нужно сохранить в любом случае
+
+    Возвращает:
+    - отсортированный массив индексов int64 (все индексы, если ряд короче 2 * buckets)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n <= 2 * buckets:
+        return np.arange(n, dtype=np.int64)
+
+    size = math.ceil(n / buckets)
+    buckets = math.ceil(n / size)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = values
+    padded = padded.reshape(buckets, size)
+
+    missing = np.isnan(padded)
+    low = np.where(missing, np.inf, padded).argmin(axis=1)
+    high = np.where(missing, -np.inf, padded).argmax(axis=1)
+    start = np.arange(buckets, dtype=np.int64) * size
+
+    parts = [start + low, start + high, [0, n - 1]]
+    if keep is not None:
+        parts.append(np.asarray(keep, dtype=np.int64))
+    indices = np.unique(np.concatenate(parts).astype(np.int64))
+    return indices[(indices >= 0) & (indices < n)]
+
+
+def bucket_max(values, buckets):
+    """
+    Максимум ряда по корзинам (для объема).
+
+    Параметры:
+    - values: одномерный массив значений
+    - buckets: количество корзин
+
+    Возвращает:
+    - (starts, heights): индекс начала каждой корзины и максимум в ней;
+      для короткого ряда - каждая точка отдельно
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n <= buckets:
+        return np.arange(n, dtype=np.int64), values
+
+    size = math.ceil(n / buckets)
+    starts = np.arange(0, n, size, dtype=np.int64)
+    return starts, np.fmax.reduceat(values, starts)
+
+
+def time_positions(times, pivot_times):
+    """
+    Позиции вершин в отсортированном по времени ряду (для параметра keep).
+
+    Параметры:
+    - times: время точек ряда
+    - pivot_times: время вершин
+    """
+    times = np.asarray(times).astype('datetime64[ns]').view('int64')
+    pivot_times = np.asarray(pivot_times).astype('datetime64[ns]').view('int64')
+    return np.searchsorted(times, pivot_times)
+
+
+def plot_lod_line(ax, x, y, dpi=None, keep=None, **kwargs):
+    """
+    Рисует линию, прореженную до ширины оси.
+
+    Параметры:
+    - ax: ось matplotlib
+    - x, y: координаты точек
+    - dpi: dpi при сохранении
+    - keep: индексы точек, которые нужно сохранить (вершины зигзага)
+    - kwargs: параметры ax.plot
+
+    Возвращает:
+    - количество нарисованных точек
+    """
+    y = np.asarray(y)
+    indices = minmax_indices(y, axes_pixel_width(ax, dpi), keep)
+    ax.plot(np.asarray(x)[indices], y[indices], **kwargs)
+    return len(indices)
+
+
+def plot_lod_volume(ax, x, volume, dpi=None, **kwargs):
+    """
+    Рисует объем ступенчатой областью с максимумом по корзинам ширины оси.
+
+    Параметры:
+    - ax: ось matplotlib
+    - x: координаты свечей
+    - volume: объем
+    - dpi: dpi при сохранении
+    - kwargs: параметры ax.fill_between
+    """
+    x = np.asarray(x)
+    starts, heights = bucket_max(volume, axes_pixel_width(ax, dpi))
+    if len(starts) == 0:
+        return
+    # Последняя ступенька продолжается до последней свечи
+    edges = np.append(x[starts], x[-1])
+    heights = np.append(heights, heights[-1])
+    ax.fill_between(edges, heights, step='post', **kwargs)
@@ -3,59 +3,63 @@
 
 import pandas as pd
 import numpy as np
+from data_store import open_column_store
+from pivot_index import find_pivots, load_pivot_index
 
 def analyze_zigzag_period():
     """
     Анализирует зигзаги в периоде 2018-01 для выявления проблемы.
     """
-    # Загружаем данные
-    data = pd.read_csv('processed_data/ml_data.csv')
-    data['datetime'] = pd.to_datetime(data['Open time'])
-    
-    # Фильтруем данные для периода 2018-01 - 2018-04
-    start_date = pd.to_datetime('2018-01-01')
-    end_date = pd.to_datetime('2018-04-01')
-    period_mask = (data['datetime'] >= start_date) & (data['datetime'] < end_date)
-    period_data = data[period_mask].copy()
-    
-    print(f'=== АНАЛИЗ ПЕРИОДА 2018-01 - 2018-04 ===')
-    print(f'Всего записей в периоде: {len(period_data)}')
+    # Открываем колоночное хранилище (mmap, общая копия для всех процессов)
+    store = open_column_store('processed_data/ml_data.csv')
+    # Индекс вершин рядом с таблицей: вершины без прохода по колонке меток
+    pivot_index = load_pivot_index('processed_data/ml_data.csv')
     
     # Ищем колонку зигзага
-    zigzag_columns = [col for col in data.columns if 'zigzag' in col.lower()]
+    zigzag_columns = [col for col in store.columns if 'zigzag' in col.lower()]
     if zigzag_columns:
         zigzag_col = zigzag_columns[0]
-        print(f'Колонка зигзага: {zigzag_col}')
     else:
         print('❌ Колонка зигзага не найдена!')
         return
     
-    # Находим точки зигзага
-    zigzag_points = period_data[period_data[zigzag_col] != 0]
-    print(f'Точек зигзага в периоде: {len(zigzag_points)}')
-    print(f'Максимумов (-1): {len(period_data[period_data[zigzag_col] == -1])}')
-    print(f'Минимумов (1): {len(period_data[period_data[zigzag_col] == 1])}')
+    if pivot_index is not None and zigzag_col in pivot_index:
+        all_pivots = pivot_index[zigzag_col]
+    else:
+        # Читаем только нужные колонки
+        columns = ['Open time', 'High', 'Low', zigzag_col]
+        all_pivots = find_pivots(store.rows(0, len(store), columns=columns), zigzag_col)
+    
+    # Вырезаем период 2018-01 - 2018-04
+    i0, i1 = store.bounds('2018-01-01', '2018-04-01')
+    pivots = all_pivots.between('2018-01-01', '2018-04-01')
+    
+    print(f'=== АНАЛИЗ ПЕРИОДА 2018-01 - 2018-04 ===')
+    print(f'Всего записей в периоде: {i1 - i0}')
+    print(f'Колонка зигзага: {zigzag_col}')
+    
+    # Точки зигзага
+    print(f'Точек зигзага в периоде: {len(pivots.row)}')
+    print(f'Максимумов (-1): {np.count_nonzero(pivots.type == -1)}')
+    print(f'Минимумов (1): {np.count_nonzero(pivots.type == 1)}')
     
     print(f'\n=== ПЕРВЫЕ 15 ТОЧЕК ЗИГЗАГА ===')
-    for i, (idx, row) in enumerate(zigzag_points.head(15).iterrows()):
-        direction = 'MAX' if row[zigzag_col] == -1 else 'MIN'
-        price = row['High'] if row[zigzag_col] == -1 else row['Low']
-        print(f'{i+1:2d}. {direction} {row["datetime"].strftime("%Y-%m-%d %H:%M")} Цена: {price:.2f}')
+    for i in range(min(15, len(pivots.row))):
+        direction = 'MAX' if pivots.type[i] == -1 else 'MIN'
+        time = pd.Timestamp(pivots.time[i])
+        print(f'{i+1:2d}. {direction} {time.strftime("%Y-%m-%d %H:%M")} Цена: {pivots.price[i]:.2f}')
     
     print(f'\n=== ПРОВЕРКА РАССТОЯНИЙ МЕЖДУ СОСЕДНИМИ ТОЧКАМИ ===')
     distances = []
-    for i in range(1, min(11, len(zigzag_points))):
-        prev_row = zigzag_points.iloc[i-1]
-        curr_row = zigzag_points.iloc[i]
-        
-        prev_price = prev_row['High'] if prev_row[zigzag_col] == -1 else prev_row['Low']
-        curr_price = curr_row['High'] if curr_row[zigzag_col] == -1 else curr_row['Low']
+    for i in range(1, min(11, len(pivots.row))):
+        prev_price = pivots.price[i-1]
+        curr_price = pivots.price[i]
         
         change_pct = abs((curr_price - prev_price) / prev_price * 100)
         distances.append(change_pct)
         
-        direction_prev = 'MAX' if prev_row[zigzag_col] == -1 else 'MIN'
-        direction_curr = 'MAX' if curr_row[zigzag_col] == -1 else 'MIN'
+        direction_prev = 'MAX' if pivots.type[i-1] == -1 else 'MIN'
+        direction_curr = 'MAX' if pivots.type[i] == -1 else 'MIN'
         
         print(f'{i:2d}. {direction_prev}({prev_price:.2f}) -> {direction_curr}({curr_price:.2f}) = {change_pct:.3f}%')
         
@@ -73,35 +77,24 @@ def analyze_zigzag_period():
     print(f'\n=== СРАВНЕНИЕ С ДРУГИМИ ПЕРИОДАМИ ===')
     
     # Период 2020-03 - 2020-06 (должен быть нормальным)
-    start_date2 = pd.to_datetime('2020-03-01')
-    end_date2 = pd.to_datetime('2020-06-01')
-    period_mask2 = (data['datetime'] >= start_date2) & (data['datetime'] < end_date2)
-    period_data2 = data[period_mask2].copy()
-    zigzag_points2 = period_data2[period_data2[zigzag_col] != 0]
-    
-    print(f'Период 2020-03 - 2020-06: {len(zigzag_points2)} точек зигзага')
+    zigzag2 = all_pivots.between('2020-03-01', '2020-06-01')
+    print(f'Период 2020-03 - 2020-06: {len(zigzag2.row)} точек зигзага')
     
     # Период 2021-06 - 2021-09
-    start_date3 = pd.to_datetime('2021-06-01')
-    end_date3 = pd.to_datetime('2021-09-01')
-    period_mask3 = (data['datetime'] >= start_date3) & (data['datetime'] < end_date3)
-    period_data3 = data[period_mask3].copy()
-    zigzag_points3 = period_data3[period_data3[zigzag_col] != 0]
-    
-    print(f'Период 2021-06 - 2021-09: {len(zigzag_points3)} точек зигзага')
+    zigzag3 = all_pivots.between('2021-06-01', '2021-09-01')
+    print(f'Период 2021-06 - 2021-09: {len(zigzag3.row)} точек зигзага')
     
     # Анализируем данные в начале файла
     print(f'\n=== АНАЛИЗ НАЧАЛА ДАННЫХ ===')
-    first_100 = data.head(100)
-    first_zigzag = first_100[first_100[zigzag_col] != 0]
-    print(f'Первые 100 записей содержат {len(first_zigzag)} точек зигзага')
+    first_zigzag = all_pivots.take(all_pivots.row < 100)
+    print(f'Первые 100 записей содержат {len(first_zigzag.row)} точек зигзага')
     
-    if len(first_zigzag) > 0:
+    if len(first_zigzag.row) > 0:
         print(f'Первые точки зигзага:')
-        for i, (idx, row) in enumerate(first_zigzag.head(5).iterrows()):
-            direction = 'MAX' if row[zigzag_col] == -1 else 'MIN'
-            price = row['High'] if row[zigzag_col] == -1 else row['Low']
-            print(f'  {i+1}. Индекс {idx}: {direction} {row["datetime"]} Цена: {price:.2f}')
+        for i in range(min(5, len(first_zigzag.row))):
+            direction = 'MAX' if first_zigzag.type[i] == -1 else 'MIN'
+            time = pd.Timestamp(first_zigzag.time[i])
+            print(f'  {i+1}. Индекс {first_zigzag.row[i]}: {direction} {time} Цена: {first_zigzag.price[i]:.2f}')
 
 if __name__ == "__main__":
     analyze_zigzag_period()
\ No newline at end of file
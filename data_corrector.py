@@ -7,39 +7,48 @@ import warnings
 from datetime import datetime, timedelta
 import time
 import os
+import sys
+import argparse
 warnings.filterwarnings('ignore')
 
-def quick_data_check():
+# Действия с найденными проблемами: вариант меню ask_for_fix для каждого
+FIX_ACTIONS = {'full': "1", 'skip': "2", 'streaming': "3"}
+
+def quick_data_check(file_path=None):
     """
     Быстрая проверка целостности исходных данных с выбором файла.
-    """
-    # Показываем доступные файлы в папке data
-    data_files = [f for f in os.listdir('data') if f.endswith('.csv')]
-    
-    if not data_files:
-        print("❌ В папке data не найдены CSV файлы!")
-        return None, None
     
-    print("Доступные файлы для проверки:")
-    for i, file in enumerate(data_files, 1):
-        print(f"  {i}. {file}")
-    
-    while True:
-        try:
-            choice = input(f"\nВыберите файл (1-{len(data_files)}): ").strip()
-            file_index = int(choice) - 1
-            
-            if 0 <= file_index < len(data_files):
-                file_path = f"data/{data_files[file_index]}"
-                print(f"✓ Выбран файл: {file_path}")
-                break
-            else:
-                print("❌ Неверный номер файла!")
-        except ValueError:
-            print("❌ Введите число!")
-        except KeyboardInterrupt:
-            print("\n❌ Операция отменена пользователем")
+    Параметры:
+    - file_path: файл для проверки (None - выбрать из папки data интерактивно)
+    """
+    if file_path is None:
+        # Показываем доступные файлы в папке data
+        data_files = [f for f in os.listdir('data') if f.endswith('.csv')]
+        
+        if not data_files:
+            print("❌ В папке data не найдены CSV файлы!")
             return None, None
+        
+        print("Доступные файлы для проверки:")
+        for i, file in enumerate(data_files, 1):
+            print(f"  {i}. {file}")
+        
+        while True:
+            try:
+                choice = input(f"\nВыберите файл (1-{len(data_files)}): ").strip()
+                file_index = int(choice) - 1
+                
+                if 0 <= file_index < len(data_files):
+                    file_path = f"data/{data_files[file_index]}"
+                    print(f"✓ Выбран файл: {file_path}")
+                    break
+                else:
+                    print("❌ Неверный номер файла!")
+            except ValueError:
+                print("❌ Введите число!")
+            except KeyboardInterrupt:
+                print("\n❌ Операция отменена пользователем")
+                return None, None
     chunk_size = 10000
     
     print("="*60)
@@ -65,6 +74,8 @@ def quick_data_check():
     end_time = None
     interval_minutes = None
     chunk_stats = []
+    gap_frames = []
+    prev_chunk_end = None  # последнее время предыдущей части (разрывы на стыке частей)
     
     print(f"\nНачинаем анализ данных...")
     start_analysis = time.time()
@@ -105,8 +116,11 @@ def quick_data_check():
         chunk_end_time = chunk['Open time'].iloc[-1]
         actual_records = len(chunk)
         
-        # Проверяем пропуски
-        missing = check_missing_in_chunk(chunk, chunk_start_time, chunk_end_time, interval_minutes)
+        # Проверяем пропуски (включая разрыв между предыдущей и текущей частью)
+        missing, gaps = find_time_gaps(chunk['Open time'], interval_minutes, prev_time=prev_chunk_end)
+        if len(gaps) > 0:
+            gap_frames.append(gaps)
+        prev_chunk_end = chunk_end_time
         
         # Проверяем дубликаты
         duplicates = chunk.duplicated(subset=['Open time'], keep=False).sum()
@@ -156,6 +170,8 @@ def quick_data_check():
         expected_records = total_records
         completeness = 100
     
+    gaps = pd.concat(gap_frames, ignore_index=True) if gap_frames else _empty_gaps()
+    
     elapsed_time = time.time() - start_analysis
     
     # Выводим финальный отчет
@@ -183,6 +199,11 @@ def quick_data_check():
     if total_missing > 0:
         missing_percent = (total_missing / expected_records) * 100
         print(f"  - Процент пропусков: {missing_percent:.2f}%")
+        print(f"  - Разрывов во времени: {len(gaps):,}")
+        
+        print(f"\nКрупнейшие разрывы:")
+        for _, gap in gaps.nlargest(10, 'missing').iterrows():
+            print(f"  - {gap['start']} - {gap['end']}: {gap['missing']:,} свечей")
     
     print(f"\nСтруктура данных:")
     print(f"  - Количество столбцов: {len(column_names)}")
@@ -211,10 +232,13 @@ def quick_data_check():
     
     # Возвращаем результаты для дальнейшего использования
     stats = {
+        'file_path': file_path,
         'total_records': total_records,
         'expected_records': expected_records,
         'completeness': completeness,
         'missing_records': total_missing,
+        'gap_count': len(gaps),
+        'gaps': gaps,
         'duplicate_records': total_duplicates,
         'invalid_records': total_invalid,
         'start_time': start_time,
@@ -226,26 +250,64 @@ def quick_data_check():
     
     return column_names, stats
 
-def check_missing_in_chunk(chunk, start_time, end_time, interval_minutes):
+def _empty_gaps():
+    """Пустая таблица разрывов."""
+    return pd.DataFrame({
+        'start': pd.Series(dtype='datetime64[ns]'),
+        'end': pd.Series(dtype='datetime64[ns]'),
+        'missing': pd.Series(dtype='int64'),
+    })
+
+def find_time_gaps(open_times, interval_minutes, prev_time=None):
     """
-    Проверяет пропуски в части данных.
+    Находит разрывы во времени по разностям отсортированных int64 меток.
+    
+    Параметры:
+    - open_times: отсортированные значения 'Open time'
+    - interval_minutes: интервал свечей в минутах
+    - prev_time: последнее время предыдущей части (для разрывов на стыке частей)
+    
+    Возвращает:
+    - missing: общее количество пропущенных свечей
+    - gaps: DataFrame с колонками start, end (первая и последняя пропущенные
+      свечи) и missing (количество пропущенных свечей в разрыве)
     """
     if interval_minutes is None:
-        return 0
+        return 0, _empty_gaps()
+    
+    times = np.asarray(open_times, dtype='datetime64[ns]').astype(np.int64)
+    if prev_time is not None:
+        prev = np.asarray([prev_time], dtype='datetime64[ns]').astype(np.int64)
+        times = np.concatenate((prev, times))
+    
+    step = np.int64(interval_minutes) * 60 * 10**9
+    diffs = np.diff(times)
+    gap_positions = np.flatnonzero(diffs > step)
+    
+    if len(gap_positions) == 0:
+        return 0, _empty_gaps()
+    
+    # Количество точек сетки строго между соседними метками
+    missing = (diffs[gap_positions] - 1) // step
+    gap_start = times[gap_positions] + step
+    gap_end = times[gap_positions] + missing * step
+    
+    gaps = pd.DataFrame({
+        'start': gap_start.astype('datetime64[ns]'),
+        'end': gap_end.astype('datetime64[ns]'),
+        'missing': missing,
+    })
+    return int(missing.sum()), gaps
+
+def check_missing_in_chunk(chunk, start_time, end_time, interval_minutes):
+    """
+    Проверяет пропуски в части данных.
     
+    Возвращает количество пропущенных свечей (см. find_time_gaps).
+    """
     try:
-        # Создаем полный временной ряд для части
-        full_timeline = pd.date_range(
-            start=start_time, 
-            end=end_time, 
-            freq=f'{interval_minutes}T'
-        )
-        
-        # Находим пропущенные записи
-        existing_times = set(chunk['Open time'])
-        missing_times = [t for t in full_timeline if t not in existing_times]
-        
-        return len(missing_times)
+        missing, _ = find_time_gaps(chunk['Open time'], interval_minutes)
+        return missing
     except Exception as e:
         print(f"    ⚠️ Ошибка при проверке пропусков: {e}")
         return 0
@@ -333,6 +395,140 @@ def check_price_jumps(df, jump_threshold=40):
     
     return anomalies
 
+def _find_recovery_index(close, start, base_price, jump_threshold, stop=None, block=64):
+    """
+    Ищет первую свечу начиная со start, цена которой отличается от base_price
+    менее чем на jump_threshold процентов. Поиск идет блоками с удвоением.
+    
+    Параметры:
+    - stop: граница поиска (не включая), по умолчанию конец массива
+    
+    Возвращает:
+    - индекс найденной свечи или stop, если такой нет
+    """
+    n = len(close) if stop is None else min(stop, len(close))
+    pos = start
+    while pos < n:
+        block_stop = min(n, pos + block)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = np.abs((close[pos:block_stop] - base_price) / base_price * 100)
+        hits = np.flatnonzero(change < jump_threshold)
+        if len(hits) > 0:
+            return pos + int(hits[0])
+        pos = block_stop
+        block *= 2
+    return n
+
+def _scan_jump_repairs(close, jump_threshold=40, stop_at_unresolved=False, max_lookahead=None):
+    """
+    Общий проход поиска участков скачков (см. find_jump_repairs).
+    
+    Параметры:
+    - stop_at_unresolved: остановиться на первом скачке, для которого в
+      массиве не нашлось восстановления (потоковый режим - ждем следующую часть)
+    - max_lookahead: максимальная дальность поиска восстановления в свечах
+    
+    Возвращает:
+    - runs, indices, ratios, как find_jump_repairs
+    - pending: индекс скачка, на котором остановились, или None
+    """
+    close = np.array(close, dtype=np.float64)
+    n = len(close)
+    runs = []
+    index_parts = []
+    ratio_parts = []
+    pending = None
+    
+    if n >= 2:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            prev = close[:-1]
+            change = np.abs((close[1:] - prev) / prev * 100)
+        jump_positions = np.flatnonzero(change > jump_threshold) + 1
+    else:
+        jump_positions = np.zeros(0, dtype=np.int64)
+    
+    dirty_until = -1  # последний индекс, измененный исправлением
+    i = 1
+    while i < n:
+        if i <= dirty_until + 1:
+            # Соседи исправленного участка - проверяем по текущим ценам
+            with np.errstate(divide='ignore', invalid='ignore'):
+                is_jump = abs((close[i] - close[i-1]) / close[i-1] * 100) > jump_threshold
+            if not is_jump:
+                i += 1
+                continue
+        else:
+            k = np.searchsorted(jump_positions, i)
+            if k == len(jump_positions):
+                break
+            i = int(jump_positions[k])
+        
+        prev_close = close[i-1]
+        search_stop = n if max_lookahead is None else min(n, i + 1 + max_lookahead)
+        j = _find_recovery_index(close, i + 1, prev_close, jump_threshold, stop=search_stop)
+        if j < search_stop:
+            # Интерполируем все свечи с i по j включительно
+            num_steps = j - i + 1
+            steps = np.arange(1, num_steps + 1)
+            interp = steps / (num_steps + 1)
+            corrected = prev_close + (close[j] - prev_close) * interp
+            indices = np.arange(i, j + 1)
+            ratios = corrected / close[indices]
+            close[indices] *= ratios
+            
+            runs.append((i, j))
+            index_parts.append(indices)
+            ratio_parts.append(ratios)
+            dirty_until = j
+            i = j  # Продолжаем с конца интерполяции
+        elif stop_at_unresolved and search_stop == n:
+            # Восстановление может оказаться в следующей части файла
+            pending = i
+            break
+        else:
+            i += 1
+    
+    if index_parts:
+        return runs, np.concatenate(index_parts), np.concatenate(ratio_parts), pending
+    return runs, np.zeros(0, dtype=np.int64), np.zeros(0), pending
+
+def find_jump_repairs(close, jump_threshold=40):
+    """
+    Движок исправления скачков на массивах NumPy (логика fix_price_jumps_new).
+    
+    Кандидаты скачков находятся одним векторным проходом по исходным ценам,
+    последовательно обрабатываются только сами скачки. Свечи после уже
+    исправленного участка перепроверяются по исправленным ценам.
+    
+    Параметры:
+    - close: массив цен закрытия
+    - jump_threshold: порог скачка в процентах
+    
+    Возвращает:
+    - runs: список (i, j) исправленных участков (включительно)
+    - indices: индексы исправленных свечей в порядке исправления
+    - ratios: коэффициенты, на которые нужно умножить OHLC этих свечей
+    """
+    runs, indices, ratios, _ = _scan_jump_repairs(close, jump_threshold)
+    return runs, indices, ratios
+
+def _apply_jump_repairs(df, runs, indices, ratios):
+    """
+    Применяет найденные коэффициенты ко всем колонкам OHLC (на месте)
+    и выводит исправленные участки.
+    """
+    if len(indices) > 0:
+        for col in ['Open', 'High', 'Low', 'Close']:
+            if col in df.columns:
+                values = df[col].to_numpy(dtype=np.float64, copy=True)
+                # multiply.at применяет коэффициенты последовательно (индексы могут повторяться)
+                np.multiply.at(values, indices, ratios)
+                df[col] = values
+    
+    if 'Open time' in df.columns:
+        for i, j in runs:
+            print(f"  ✅ Исправлено {j - i + 1} свечей с {df['Open time'].iloc[i]} по {df['Open time'].iloc[j]}")
+
 def fix_price_jumps_new(df, jump_threshold=40):
     """
     Исправляет скачки по логике пользователя:
@@ -341,43 +537,14 @@ def fix_price_jumps_new(df, jump_threshold=40):
     - Ищет вперед первую свечу, у которой цена отличается от P1 менее чем на jump_threshold
     - Все свечи между ними (включая скачки) заменяет на линейную интерполяцию между P1 и P2
     - Продолжает с конца интерполяции
+    
+    Участки ищутся на массивах (find_jump_repairs), коэффициенты применяются
+    ко всем колонкам OHLC одной пакетной записью.
     """
     df_fixed = df.copy()
-    fixed_count = 0
-    i = 1
-    n = len(df_fixed)
-    while i < n:
-        prev_close = df_fixed.iloc[i-1]['Close']
-        curr_close = df_fixed.iloc[i]['Close']
-        change_pct = abs((curr_close - prev_close) / prev_close * 100)
-        if change_pct > jump_threshold:
-            # Найти первую нормальную свечу после скачка
-            j = i + 1
-            while j < n:
-                next_close = df_fixed.iloc[j]['Close']
-                next_change = abs((next_close - prev_close) / prev_close * 100)
-                if next_change < jump_threshold:
-                    break
-                j += 1
-            if j < n:
-                # Интерполируем все свечи с i по j-1 включительно
-                num_steps = j - i + 1
-                for k in range(num_steps):
-                    idx = i + k
-                    interp = (k + 1) / (num_steps + 1)
-                    corrected_price = prev_close + (df_fixed.iloc[j]['Close'] - prev_close) * interp
-                    price_ratio = corrected_price / df_fixed.iloc[idx]['Close']
-                    for col in ['Open', 'High', 'Low', 'Close']:
-                        if col in df_fixed.columns:
-                            df_fixed.iloc[idx, df_fixed.columns.get_loc(col)] *= price_ratio
-                    fixed_count += 1
-                print(f"  ✅ Исправлено {num_steps} свечей с {df_fixed.iloc[i]['Open time']} по {df_fixed.iloc[j]['Open time']}")
-                i = j  # Продолжаем с конца интерполяции
-            else:
-                i += 1
-        else:
-            i += 1
-    return df_fixed, fixed_count
+    runs, indices, ratios = find_jump_repairs(df_fixed['Close'].values, jump_threshold)
+    _apply_jump_repairs(df_fixed, runs, indices, ratios)
+    return df_fixed, len(indices)
 
 def find_jump_sequences(anomalies):
     """
@@ -403,9 +570,13 @@ def find_jump_sequences(anomalies):
     
     return sequences
 
-def fix_price_jumps(df, anomalies, jump_threshold=40):
+def fix_price_jumps(df, anomalies, jump_threshold=40, confirm=None):
     """
     Исправляет аномальные скачки цены, обрабатывая последовательности скачков целиком.
+    
+    Параметры:
+    - confirm: None - спрашивать про каждую последовательность,
+      True/False - исправлять все/ни одной без вопросов
     """
     if not anomalies:
         return df, 0
@@ -471,7 +642,10 @@ def fix_price_jumps(df, anomalies, jump_threshold=40):
         
         while True:
             try:
-                choice = input("  🤔 Исправить эту последовательность скачков? (д/н, по умолчанию 'д'): ").strip().lower()
+                if confirm is None:
+                    choice = input("  🤔 Исправить эту последовательность скачков? (д/н, по умолчанию 'д'): ").strip().lower()
+                else:
+                    choice = "д" if confirm else "н"
                 if choice == "" or choice in ["д", "да", "y", "yes"]:
                     # Исправляем все свечи в последовательности
                     num_steps = end_idx - start_idx + 1
@@ -529,33 +703,136 @@ def ask_for_fix():
     print(f"\nВарианты действий:")
     print("1. Создать исправленный файл (удалить дубликаты, невалидные записи, проверить скачки цены, заполнить пропуски)")
     print("2. Пропустить исправление")
+    print("3. Создать исправленный файл в потоковом режиме (по частям, для больших файлов)")
     
     while True:
         try:
-            choice = input("\nВыберите действие (1-2, по умолчанию 1): ").strip()
+            choice = input("\nВыберите действие (1-3, по умолчанию 1): ").strip()
             if choice == "":
                 choice = "1"
             
-            if choice in ["1", "2"]:
+            if choice in ["1", "2", "3"]:
                 return choice
             else:
-                print("❌ Выберите 1 или 2!")
+                print("❌ Выберите 1, 2 или 3!")
                 
         except ValueError:
             print("❌ Введите корректное число!")
 
-def fix_data_file():
+# Числовые колонки, пропуски в которых заполняются интерполяцией
+NUMERIC_FILL_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Quote asset volume',
+                        'Number of trades', 'Taker buy base asset volume',
+                        'Taker buy quote asset volume']
+
+# Остальные колонки, которые заполняются предыдущим значением
+OTHER_FILL_COLUMNS = ['Close time', 'Ignore']
+
+# Строк начала файла, по которым потоковый режим определяет интервал свечей
+# (не зависит от размера части)
+INTERVAL_PROBE_ROWS = 100000
+
+def _fix_invalid_values(df):
     """
-    Исправляет данные: удаляет дубликаты, невалидные записи и заполняет пропуски.
+    Исправляет невалидные значения (High < Low, отрицательные цены и объем).
+    Работает построчно, поэтому применима и к отдельным частям файла.
+    
+    Возвращает:
+    - количество исправленных значений
+    """
+    invalid_count = 0
+    
+    # Исправляем High < Low
+    if 'High' in df.columns and 'Low' in df.columns:
+        invalid_high_low = df['High'] < df['Low']
+        if invalid_high_low.sum() > 0:
+            df.loc[invalid_high_low, 'High'] = df.loc[invalid_high_low, 'Low']
+            invalid_count += invalid_high_low.sum()
+    
+    # Исправляем отрицательные цены
+    price_columns = ['Open', 'High', 'Low', 'Close']
+    for col in price_columns:
+        if col in df.columns:
+            negative_prices = df[col] < 0
+            if negative_prices.sum() > 0:
+                df.loc[negative_prices, col] = abs(df.loc[negative_prices, col])
+                invalid_count += negative_prices.sum()
+    
+    # Исправляем отрицательный объем
+    if 'Volume' in df.columns:
+        negative_volume = df['Volume'] < 0
+        if negative_volume.sum() > 0:
+            df.loc[negative_volume, 'Volume'] = abs(df.loc[negative_volume, 'Volume'])
+            invalid_count += negative_volume.sum()
+    
+    return int(invalid_count)
+
+def _fill_timeline(df, interval_minutes):
+    """
+    Достраивает полный временной ряд от первой до последней свечи df
+    и заполняет пропуски (линейная интерполяция для числовых колонок,
+    предыдущее/следующее значение для остальных).
+    """
+    full_timeline = pd.date_range(
+        start=df['Open time'].iloc[0],
+        end=df['Open time'].iloc[-1],
+        freq=f'{interval_minutes}min'
+    )
+    
+    # Объединяем полный временной ряд с существующими данными
+    full_df = pd.DataFrame({'Open time': full_timeline.astype(df['Open time'].dtype)})
+    merged_df = pd.merge(full_df, df, on='Open time', how='left')
+    
+    for col in NUMERIC_FILL_COLUMNS:
+        if col in merged_df.columns:
+            # Используем интерполяцию для заполнения пропусков
+            merged_df[col] = merged_df[col].interpolate(method='linear')
+            
+            # Если остались пропуски в начале или конце, заполняем ближайшими значениями
+            merged_df[col] = merged_df[col].ffill().bfill()
+    
+    for col in OTHER_FILL_COLUMNS:
+        if col in merged_df.columns:
+            merged_df[col] = merged_df[col].ffill().bfill()
+    
+    return merged_df
+
+def _detect_interval(open_times, default=15):
+    """Определяет интервал свечей в минутах по наиболее частой разнице времени."""
+    time_diff = open_times.diff().dropna()
+    time_diff = time_diff[time_diff > pd.Timedelta(0)]
+    if len(time_diff) > 0:
+        return int(time_diff.mode().iloc[0].total_seconds() / 60)
+    return default
+
+def _detect_file_interval(file_path, rows=INTERVAL_PROBE_ROWS):
+    """Определяет интервал свечей по первым rows строкам файла."""
+    head = pd.read_csv(file_path, usecols=['Open time'], nrows=rows)
+    open_times = pd.to_datetime(head['Open time']).dropna().sort_values()
+    return _detect_interval(open_times)
+
+def fix_data_file(file_path="data/btc_15m_data_2018_to_2025.csv",
+                  output_file="processed_data/input_data.csv",
+                  streaming=False, chunk_size=200000, interval_minutes=None):
     """
-    file_path = "data/btc_15m_data_2018_to_2025.csv"
+    Исправляет данные: удаляет дубликаты, невалидные записи и заполняет пропуски.
     
-    # Создаем папку processed_data если её нет
-    if not os.path.exists('processed_data'):
-        os.makedirs('processed_data')
-        print("📁 Создана папка: processed_data")
+    Параметры:
+    - file_path: исходный CSV файл
+    - output_file: путь для исправленного файла
+    - streaming: обрабатывать файл по частям с ограниченной памятью
+      (см. fix_data_file_streaming)
+    - chunk_size: размер части в потоковом режиме
+    - interval_minutes: интервал свечей (None = определить по данным)
+    """
+    # Создаем папку для результата если её нет
+    output_dir = os.path.dirname(output_file)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+        print(f"📁 Создана папка: {output_dir}")
     
-    output_file = "processed_data/input_data.csv"
+    if streaming:
+        return fix_data_file_streaming(file_path, output_file, chunk_size=chunk_size,
+                                       interval_minutes=interval_minutes)
     
     print(f"\nИсправление данных...")
     print(f"Исходный файл: {file_path}")
@@ -586,31 +863,7 @@ def fix_data_file():
     
     # Исправляем невалидные записи
     print("Исправление невалидных записей...")
-    invalid_count = 0
-    
-    # Исправляем High < Low
-    if 'High' in df.columns and 'Low' in df.columns:
-        invalid_high_low = df['High'] < df['Low']
-        if invalid_high_low.sum() > 0:
-            df.loc[invalid_high_low, 'High'] = df.loc[invalid_high_low, 'Low']
-            invalid_count += invalid_high_low.sum()
-    
-    # Исправляем отрицательные цены
-    price_columns = ['Open', 'High', 'Low', 'Close']
-    for col in price_columns:
-        if col in df.columns:
-            negative_prices = df[col] < 0
-            if negative_prices.sum() > 0:
-                df.loc[negative_prices, col] = abs(df.loc[negative_prices, col])
-                invalid_count += negative_prices.sum()
-    
-    # Исправляем отрицательный объем
-    if 'Volume' in df.columns:
-        negative_volume = df['Volume'] < 0
-        if negative_volume.sum() > 0:
-            df.loc[negative_volume, 'Volume'] = abs(df.loc[negative_volume, 'Volume'])
-            invalid_count += negative_volume.sum()
-    
+    invalid_count = _fix_invalid_values(df)
     print(f"Исправлено {invalid_count:,} невалидных записей")
     
     # Сортируем по времени
@@ -620,48 +873,12 @@ def fix_data_file():
     df, jump_fixes = fix_price_jumps_new(df, jump_threshold=40)
     
     # Определяем интервал
-    time_diff = df['Open time'].diff().dropna()
-    if len(time_diff) > 0:
-        interval_minutes = int(time_diff.mode().iloc[0].total_seconds() / 60)
-    else:
-        interval_minutes = 15
-    
-    # Заполняем пропуски средними значениями
-    print("Заполнение пропусков...")
-    start_time_fill = df['Open time'].iloc[0]
-    end_time_fill = df['Open time'].iloc[-1]
-    
-    # Создаем полный временной ряд
-    full_timeline = pd.date_range(
-        start=start_time_fill, 
-        end=end_time_fill, 
-        freq=f'{interval_minutes}T'
-    )
-    
-    # Создаем DataFrame с полным временным рядом
-    full_df = pd.DataFrame({'Open time': full_timeline})
-    
-    # Объединяем с существующими данными
-    merged_df = pd.merge(full_df, df, on='Open time', how='left')
+    if interval_minutes is None:
+        interval_minutes = _detect_interval(df['Open time'])
     
     # Заполняем пропуски средними значениями между предыдущим и последующим
-    numeric_columns = ['Open', 'High', 'Low', 'Close', 'Volume', 'Quote asset volume', 
-                      'Number of trades', 'Taker buy base asset volume', 
-                      'Taker buy quote asset volume']
-    
-    for col in numeric_columns:
-        if col in merged_df.columns:
-            # Используем интерполяцию для заполнения пропусков
-            merged_df[col] = merged_df[col].interpolate(method='linear')
-            
-            # Если остались пропуски в начале или конце, заполняем методом forward/backward fill
-            merged_df[col] = merged_df[col].fillna(method='ffill').fillna(method='bfill')
-    
-    # Заполняем остальные столбцы методом forward fill
-    other_columns = ['Close time', 'Ignore']
-    for col in other_columns:
-        if col in merged_df.columns:
-            merged_df[col] = merged_df[col].fillna(method='ffill').fillna(method='bfill')
+    print("Заполнение пропусков...")
+    merged_df = _fill_timeline(df, interval_minutes)
     
     filled_count = len(merged_df) - len(df)
     print(f"Заполнено {filled_count:,} пропущенных записей")
@@ -691,46 +908,241 @@ def fix_data_file():
     
     return output_file
 
-if __name__ == "__main__":
-    # Запускаем быструю проверку
-    column_names, stats = quick_data_check()
-    
-    # Сохраняем результаты в файл для дальнейшего использования
-    if column_names and stats:
-        print(f"\nСохранение результатов...")
-        
-        # Сохраняем список столбцов
-        with open('column_names.txt', 'w', encoding='utf-8') as f:
-            f.write("Список столбцов исходного файла:\n")
-            for i, col in enumerate(column_names, 1):
-                f.write(f"{i:2d}. {col}\n")
-        
-        # Сохраняем статистику
-        with open('data_statistics.txt', 'w', encoding='utf-8') as f:
-            f.write("Статистика данных:\n")
-            f.write(f"Всего записей: {stats['total_records']:,}\n")
-            f.write(f"Ожидалось записей: {stats['expected_records']:,}\n")
-            f.write(f"Полнота данных: {stats['completeness']:.2f}%\n")
-            f.write(f"Пропущено записей: {stats['missing_records']:,}\n")
-            f.write(f"Дубликатов: {stats['duplicate_records']:,}\n")
-            f.write(f"Невалидных записей: {stats['invalid_records']:,}\n")
-            f.write(f"Начало данных: {stats['start_time']}\n")
-            f.write(f"Конец данных: {stats['end_time']}\n")
-            f.write(f"Интервал: {stats['interval_minutes']} минут\n")
-            f.write(f"Количество столбцов: {stats['column_count']}\n")
-        
-        print(f"✓ Результаты сохранены в файлы:")
-        print(f"  - column_names.txt (список столбцов)")
-        print(f"  - data_statistics.txt (статистика)")
-        
-        # Спрашиваем о необходимости исправления
-        if stats['missing_records'] > 0 or stats['duplicate_records'] > 0 or stats['invalid_records'] > 0:
+def fix_data_file_streaming(file_path, output_file, chunk_size=200000, jump_threshold=40,
+                            interval_minutes=None, max_jump_lookahead=100000):
+    """
+    Потоковое исправление файла: читает упорядоченные по времени части,
+    исправляет их и сразу дописывает результат, не загружая весь файл.
+    
+    Между частями переносится состояние:
+    - последняя записанная свеча (опора для интерполяции пропусков и
+      проверки скачка на стыке частей);
+    - незавершенный хвост: открытый участок скачка без найденного
+      восстановления и свечи с пропусками в числовых колонках;
+    - окно дедупликации: строки с уже записанным временем отбрасываются.
+    
+    Результат совпадает с fix_data_file, если файл упорядочен по времени
+    и восстановление после каждого скачка находится не дальше
+    max_jump_lookahead свечей. Числовые колонки записываются как float.
+    
+    Параметры:
+    - file_path: исходный CSV файл
+    - output_file: путь для исправленного файла
+    - chunk_size: количество строк в части
+    - jump_threshold: порог скачка цены в процентах
+    - interval_minutes: интервал свечей (None = определить по первым
+      INTERVAL_PROBE_ROWS строкам файла)
+    - max_jump_lookahead: дальность поиска восстановления после скачка
+    """
+    print(f"\nПотоковое исправление данных...")
+    print(f"Исходный файл: {file_path}")
+    print(f"Исправленный файл: {output_file}")
+    print(f"Размер части: {chunk_size:,} записей")
+    
+    start_time = time.time()
+    
+    if interval_minutes is None:
+        interval_minutes = _detect_file_interval(file_path)
+    print(f"✓ Интервал данных: {interval_minutes} минут")
+    
+    stats = {
+        'original': 0, 'invalid_dates': 0, 'duplicates': 0, 'late': 0,
+        'invalid': 0, 'jumps': 0, 'written': 0, 'real_written': 0,
+    }
+    context = None   # последняя записанная свеча (1 строка)
+    pending = None   # незавершенный хвост
+    header_written = False
+    
+    if os.path.exists(output_file):
+        os.remove(output_file)
+    
+    reader = pd.read_csv(file_path, chunksize=chunk_size)
+    chunk = next(reader, None)
+    chunk_num = 0
+    
+    while chunk is not None:
+        next_chunk = next(reader, None)
+        is_last = next_chunk is None
+        chunk_num += 1
+        stats['original'] += len(chunk)
+        
+        # Время и невалидные даты
+        chunk['Open time'] = pd.to_datetime(chunk['Open time'])
+        before = len(chunk)
+        chunk = chunk.dropna(subset=['Open time'])
+        stats['invalid_dates'] += before - len(chunk)
+        
+        # Невалидные значения исправляются построчно
+        stats['invalid'] += _fix_invalid_values(chunk)
+        for col in NUMERIC_FILL_COLUMNS:
+            if col in chunk.columns:
+                chunk[col] = chunk[col].astype(np.float64)
+        
+        # Дедупликация: сначала хвост прошлой части (он встретился в файле раньше)
+        parts = [p for p in (pending, chunk) if p is not None and len(p) > 0]
+        buf = pd.concat(parts, ignore_index=True) if parts else chunk
+        before = len(buf)
+        buf = buf.sort_values('Open time', kind='stable')
+        buf = buf.drop_duplicates(subset=['Open time'], keep='first')
+        stats['duplicates'] += before - len(buf)
+        
+        if context is not None:
+            last_time = context['Open time'].iloc[0]
+            stats['duplicates'] += int((buf['Open time'] == last_time).sum())
+            late = buf['Open time'] < last_time
+            if late.any():
+                stats['late'] += int(late.sum())
+            buf = buf[buf['Open time'] > last_time]
+            buf = pd.concat([context, buf], ignore_index=True)
+        buf = buf.reset_index(drop=True)
+        offset = 0 if context is None else 1  # строка-опора не записывается повторно
+        
+        # Скачки цены: останавливаемся на скачке без восстановления в этой части
+        runs, indices, ratios, jump_pending = _scan_jump_repairs(
+            buf['Close'].values, jump_threshold,
+            stop_at_unresolved=not is_last, max_lookahead=max_jump_lookahead
+        )
+        _apply_jump_repairs(buf, runs, indices, ratios)
+        stats['jumps'] += int(np.sum(indices >= offset))
+        
+        # Граница окончательных строк
+        emit_end = len(buf) if jump_pending is None else jump_pending
+        if not is_last:
+            numeric_cols = [c for c in NUMERIC_FILL_COLUMNS if c in buf.columns]
+            complete = buf[numeric_cols].notna().all(axis=1).values[:emit_end]
+            valid_rows = np.flatnonzero(complete)
+            emit_end = int(valid_rows[-1]) + 1 if len(valid_rows) > 0 else 0
+        
+        if emit_end > offset:
+            final = buf.iloc[:emit_end]
+            filled = _fill_timeline(final, interval_minutes).iloc[offset:]
+            filled.to_csv(output_file, mode='a', header=not header_written, index=False)
+            header_written = True
+            stats['written'] += len(filled)
+            stats['real_written'] += emit_end - offset
+            context = final.iloc[[emit_end - 1]].reset_index(drop=True)
+            pending = buf.iloc[emit_end:].reset_index(drop=True)
+        else:
+            pending = buf.iloc[offset:].reset_index(drop=True)
+        
+        print(f"  ✓ Часть {chunk_num}: записано {stats['written']:,} строк, "
+              f"в ожидании {len(pending):,}")
+        chunk = next_chunk
+    
+    filled_count = stats['written'] - stats['real_written']
+    elapsed_time = time.time() - start_time
+    
+    print(f"\n" + "="*60)
+    print("ПОТОКОВОЕ ИСПРАВЛЕНИЕ ЗАВЕРШЕНО")
+    print("="*60)
+    
+    print(f"Исходный файл: {stats['original']:,} записей")
+    print(f"Исправленный файл: {stats['written']:,} записей")
+    print(f"Изменения:")
+    print(f"  - Удалено невалидных дат: {stats['invalid_dates']:,}")
+    print(f"  - Удалено дубликатов: {stats['duplicates']:,}")
+    if stats['late'] > 0:
+        print(f"  - ⚠️ Отброшено строк вне порядка времени: {stats['late']:,}")
+    print(f"  - Исправлено невалидных записей: {stats['invalid']:,}")
+    print(f"  - Исправлено аномальных скачков цены: {stats['jumps']:,}")
+    print(f"  - Заполнено пропусков: {filled_count:,}")
+    print(f"  - Чистый прирост: {stats['written'] - stats['original']:,}")
+    
+    print(f"\nФайл сохранен: {output_file}")
+    print(f"⏱️ Время исправления: {elapsed_time:.1f} секунд ({elapsed_time/60:.1f} минут)")
+    
+    return output_file
+
+def save_check_results(column_names, stats):
+    """
+    Сохраняет список столбцов и статистику проверки в текстовые файлы.
+    """
+    print(f"\nСохранение результатов...")
+    
+    # Сохраняем список столбцов
+    with open('column_names.txt', 'w', encoding='utf-8') as f:
+        f.write("Список столбцов исходного файла:\n")
+        for i, col in enumerate(column_names, 1):
+            f.write(f"{i:2d}. {col}\n")
+    
+    # Сохраняем статистику
+    with open('data_statistics.txt', 'w', encoding='utf-8') as f:
+        f.write("Статистика данных:\n")
+        f.write(f"Всего записей: {stats['total_records']:,}\n")
+        f.write(f"Ожидалось записей: {stats['expected_records']:,}\n")
+        f.write(f"Полнота данных: {stats['completeness']:.2f}%\n")
+        f.write(f"Пропущено записей: {stats['missing_records']:,}\n")
+        f.write(f"Разрывов во времени: {stats['gap_count']:,}\n")
+        f.write(f"Дубликатов: {stats['duplicate_records']:,}\n")
+        f.write(f"Невалидных записей: {stats['invalid_records']:,}\n")
+        f.write(f"Начало данных: {stats['start_time']}\n")
+        f.write(f"Конец данных: {stats['end_time']}\n")
+        f.write(f"Интервал: {stats['interval_minutes']} минут\n")
+        f.write(f"Количество столбцов: {stats['column_count']}\n")
+    
+    print(f"✓ Результаты сохранены в файлы:")
+    print(f"  - column_names.txt (список столбцов)")
+    print(f"  - data_statistics.txt (статистика)")
+
+def main(argv=None):
+    """
+    Проверка исходных данных и, при необходимости, создание исправленного файла.
+    
+    Без аргументов файл и действие выбираются интерактивно; с --file и --fix
+    скрипт работает без вопросов (cron, пакетные задания).
+    
+    Возвращает:
+    - True, если проверка (и исправление) завершились успешно
+    """
+    parser = argparse.ArgumentParser(description="Проверка и исправление исходных данных")
+    parser.add_argument('--file', default=None,
+                        help="CSV файл для проверки (по умолчанию - выбор из папки data)")
+    parser.add_argument('--fix', choices=['ask'] + list(FIX_ACTIONS), default='ask',
+                        help="действие: full - исправить, streaming - исправить по частям, "
+                             "skip - только проверка (по умолчанию - спросить при проблемах)")
+    parser.add_argument('--output', default="processed_data/input_data.csv",
+                        help="путь для исправленного файла")
+    parser.add_argument('--chunk-size', type=int, default=200000,
+                        help="размер части в потоковом режиме")
+    parser.add_argument('--interval', type=int, default=None,
+                        help="интервал свечей в минутах (по умолчанию - определить по данным)")
+    args = parser.parse_args(argv)
+    
+    try:
+        # Запускаем быструю проверку
+        column_names, stats = quick_data_check(args.file)
+    
+        # Сохраняем результаты в файл для дальнейшего использования
+        if not (column_names and stats):
+            return False
+    
+        save_check_results(column_names, stats)
+    
+        has_problems = stats['missing_records'] > 0 or stats['duplicate_records'] > 0 or stats['invalid_records'] > 0
+        if args.fix != 'ask':
+            # Явно заданное действие выполняется независимо от найденных проблем
+            fix_choice = FIX_ACTIONS[args.fix]
+        elif has_problems:
+            # Спрашиваем о необходимости исправления
             fix_choice = ask_for_fix()
-            
-            if fix_choice == "1":
-                fixed_file = fix_data_file()
-                print(f"\n✓ Исправленный файл создан: {fixed_file}")
-            else:
-                print(f"\n✓ Исправление пропущено.")
         else:
-            print(f"\n✓ Данные в отличном состоянии! Исправления не требуются.") 
\ No newline at end of file
+            print(f"\n✓ Данные в отличном состоянии! Исправления не требуются.")
+            return True
+    
+        if fix_choice in ["1", "3"]:
+            fixed_file = fix_data_file(stats['file_path'], args.output,
+                                       streaming=(fix_choice == "3"), chunk_size=args.chunk_size,
+                                       interval_minutes=args.interval)
+            print(f"\n✓ Исправленный файл создан: {fixed_file}")
+        else:
+            print(f"\n✓ Исправление пропущено.")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Ошибка при проверке данных: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -6,9 +6,22 @@ import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from datetime import datetime
+import argparse
 import warnings
+import os
+import sys
+from zigzag_kernel import ZigZagState, compute_zigzag, compute_zigzag_sweep, resolve_engine
+from data_store import (FORMAT_SUFFIXES, OUTPUT_FORMATS, csv_datetime_units, iter_table, load_table,
+                        save_table, table_format, write_csv_parallel)
+from data_schema import PROFILES
+from feature_engine import add_features, processor_feature_set, warmup_length
+from pivot_index import PivotIndex, concat_pivots, find_pivots, pivot_index_path
+from chart_lod import plot_lod_line, plot_lod_volume
 warnings.filterwarnings('ignore')
 
+# Размер блока для потоковой обработки (строк)
+DEFAULT_CHUNK_SIZE = 100_000
+
 class ZigZag15MProcessor:
     """
     Процессор для создания зигзага на 15-минутных данных BTC.
@@ -17,18 +30,23 @@ class ZigZag15MProcessor:
     0 = обычный бар
     """
     
-    def __init__(self, data_file="processed_data/input_data.csv", deviation=1.0):
+    def __init__(self, data_file="processed_data/input_data.csv", deviation=1.0, dtype_profile='compact', memory_report=False):
         """
         Инициализация процессора.
         
         Параметры:
         - data_file: путь к файлу с данными
         - deviation: минимальное отклонение в процентах (по умолчанию 1%)
+        - dtype_profile: профиль типов данных при загрузке ('default' или 'compact')
+        - memory_report: вывести отчет об экономии памяти при загрузке
         """
         self.data_file = data_file
+        self.dtype_profile = dtype_profile
+        self.memory_report = memory_report
         self.deviation = deviation
         self.data = None
         self.zigzag_points = []
+        self.sweep_points = {}
         
     def load_data(self):
         """
@@ -37,7 +55,7 @@ class ZigZag15MProcessor:
         print(f"Загрузка данных из {self.data_file}...")
         
         try:
-            self.data = pd.read_csv(self.data_file)
+            self.data = load_table(self.data_file, profile=self.dtype_profile, memory_report=self.memory_report)
             print(f"✓ Загружены данные: {len(self.data)} записей")
             
             # Проверяем наличие необходимых колонок
@@ -62,7 +80,7 @@ class ZigZag15MProcessor:
             print(f"❌ Ошибка при загрузке данных: {e}")
             return False
     
-    def calculate_zigzag(self):
+    def calculate_zigzag(self, engine='auto'):
         """
         Правильный алгоритм зигзага по точному описанию пользователя:
         1. Первая точка = Low[0] (зафиксирована)
@@ -72,6 +90,10 @@ class ZigZag15MProcessor:
         
         -1 = максимум (сигнал продажи)
         1 = минимум (сигнал покупки)
+        
+        Параметры:
+        - engine: вычислительный движок ('auto', 'numba', 'numpy', 'python'),
+          см. zigzag_kernel. Все движки дают одинаковый результат.
         """
         print(f"Вычисление зигзага с отклонением {self.deviation}%...")
         
@@ -83,115 +105,18 @@ class ZigZag15MProcessor:
         low = self.data['Low'].values
         n = len(high)
         
-        # Инициализируем массив зигзага
-        zigzag_series = np.zeros(n)
-        zigzag_points = []
-        
         if n < 3:
             print("❌ Недостаточно данных для вычисления зигзага!")
             return False
         
-        # ИНИЦИАЛИЗАЦИЯ согласно алгоритму
-        last_zigzag_price = low[0]       # Первая точка - Low первой свечи
-        last_zigzag_idx = 0              # Индекс первой точки
-        last_zigzag_type = 1             # Тип: 1 = минимум
-        zigzag_series[0] = 1             # Фиксируем первую точку как минимум
-        zigzag_points.append((0, low[0], 1))
-        
-        current_max_price = high[0]      # Текущий максимум
-        current_max_idx = 0              # Индекс текущего максимума
-        max_candidate = False            # Максимум еще не кандидат
-        
-        current_min_price = low[0]       # Текущий минимум 
-        current_min_idx = 0              # Индекс текущего минимума
-        min_candidate = False            # Минимум еще не кандидат
+        try:
+            engine_name = resolve_engine(engine)
+        except (ValueError, ImportError) as e:
+            print(f"❌ {e}")
+            return False
+        print(f"  - Движок: {engine_name}")
         
-        search_direction = -1            # -1 = ищем максимум, 1 = ищем минимум
-        
-        # ОСНОВНОЙ ЦИКЛ
-        for i in range(1, n):
-            
-            if search_direction == -1:  # ИЩЕМ МАКСИМУМ
-                
-                # 1. Обновляем текущий максимум
-                if high[i] > current_max_price:
-                    current_max_price = high[i]
-                    current_max_idx = i
-                
-                # 2. Проверяем, стал ли максимум кандидатом
-                if not max_candidate:
-                    deviation = (current_max_price - last_zigzag_price) / last_zigzag_price * 100
-                    if deviation >= self.deviation:
-                        max_candidate = True  # Максимум стал кандидатом
-                
-                # 3. Если максимум уже кандидат, ищем минимум
-                if max_candidate:
-                    deviation_down = (current_max_price - low[i]) / current_max_price * 100
-                    
-                    if deviation_down >= self.deviation:
-                        # ФИКСИРУЕМ МАКСИМУМ И МИНИМУМ
-                        zigzag_series[current_max_idx] = -1
-                        zigzag_series[i] = 1
-                        zigzag_points.append((current_max_idx, current_max_price, -1))
-                        zigzag_points.append((i, low[i], 1))
-                        
-                        # Обновляем состояние
-                        last_zigzag_price = low[i]
-                        last_zigzag_idx = i
-                        last_zigzag_type = 1
-                        
-                        # Начинаем поиск нового минимума
-                        current_min_price = low[i]
-                        current_min_idx = i
-                        min_candidate = False
-                        search_direction = 1  # Переключаемся на поиск минимума
-                    
-                    else:
-                        # Проверяем, не нашли ли лучший максимум
-                        if high[i] > current_max_price:
-                            current_max_price = high[i]
-                            current_max_idx = i
-            
-            else:  # ИЩЕМ МИНИМУМ (search_direction == 1)
-                
-                # 1. Обновляем текущий минимум
-                if low[i] < current_min_price:
-                    current_min_price = low[i]
-                    current_min_idx = i
-                
-                # 2. Проверяем, стал ли минимум кандидатом
-                if not min_candidate:
-                    deviation = (last_zigzag_price - current_min_price) / last_zigzag_price * 100
-                    if deviation >= self.deviation:
-                        min_candidate = True  # Минимум стал кандидатом
-                
-                # 3. Если минимум уже кандидат, ищем максимум
-                if min_candidate:
-                    deviation_up = (high[i] - current_min_price) / current_min_price * 100
-                    
-                    if deviation_up >= self.deviation:
-                        # ФИКСИРУЕМ МИНИМУМ И МАКСИМУМ
-                        zigzag_series[current_min_idx] = 1
-                        zigzag_series[i] = -1
-                        zigzag_points.append((current_min_idx, current_min_price, 1))
-                        zigzag_points.append((i, high[i], -1))
-                        
-                        # Обновляем состояние
-                        last_zigzag_price = high[i]
-                        last_zigzag_idx = i
-                        last_zigzag_type = -1
-                        
-                        # Начинаем поиск нового максимума
-                        current_max_price = high[i]
-                        current_max_idx = i
-                        max_candidate = False
-                        search_direction = -1  # Переключаемся на поиск максимума
-                    
-                    else:
-                        # Проверяем, не нашли ли лучший минимум
-                        if low[i] < current_min_price:
-                            current_min_price = low[i]
-                            current_min_idx = i
+        zigzag_series, zigzag_points = compute_zigzag(high, low, self.deviation, engine=engine_name)
         
         # Добавляем колонку зигзага к данным с правильным названием
         zigzag_column_name = f"zigzag ({self.deviation}%)"
@@ -209,104 +134,70 @@ class ZigZag15MProcessor:
         
         return True
     
+    def calculate_zigzag_sweep(self, deviations, engine='auto', workers=None):
+        """
+        Вычисляет колонки зигзага сразу для нескольких отклонений
+        за один проход загрузки данных.
+        
+        Параметры:
+        - deviations: список отклонений в процентах (например [0.5, 1, 2, 5])
+        - engine: вычислительный движок, см. calculate_zigzag
+        - workers: количество параллельных потоков (None = авто)
+        
+        Добавляет колонки zigzag (X%) для каждого отклонения, точки
+        сохраняются в self.sweep_points. Для self.deviation (если входит
+        в список) также заполняется self.zigzag_points.
+        """
+        deviations = [float(d) for d in deviations]
+        print(f"Вычисление зигзага для отклонений: {', '.join(f'{d}%' for d in deviations)}...")
+        
+        if self.data is None:
+            print("❌ Данные не загружены!")
+            return False
+        
+        if not deviations:
+            print("❌ Не задано ни одного отклонения!")
+            return False
+        
+        if len(self.data) < 3:
+            print("❌ Недостаточно данных для вычисления зигзага!")
+            return False
+        
+        try:
+            engine_name = resolve_engine(engine)
+        except (ValueError, ImportError) as e:
+            print(f"❌ {e}")
+            return False
+        print(f"  - Движок: {engine_name}")
+        
+        results = compute_zigzag_sweep(
+            self.data['High'].values, self.data['Low'].values,
+            deviations, engine=engine_name, workers=workers
+        )
+        
+        self.sweep_points = {}
+        for deviation, (zigzag_series, zigzag_points) in results.items():
+            self.data[f"zigzag ({deviation}%)"] = zigzag_series
+            self.sweep_points[deviation] = zigzag_points
+            
+            max_count = np.sum(zigzag_series == -1)
+            min_count = np.sum(zigzag_series == 1)
+            print(f"✓ zigzag ({deviation}%): максимумов {max_count}, минимумов {min_count}, "
+                  f"всего точек {len(zigzag_points)}")
+        
+        if float(self.deviation) in self.sweep_points:
+            self.zigzag_points = self.sweep_points[float(self.deviation)]
+        
+        return True
+    
     def create_technical_features(self):
         """
         Создает технические индикаторы для анализа.
         """
         print("Создание технических индикаторов...")
         
-        df = self.data.copy()
-        
-        # Базовые признаки цены
-        df['price_change'] = df['Close'].pct_change()
-        df['price_change_abs'] = df['price_change'].abs()
-        df['high_low_ratio'] = df['High'] / df['Low']
-        df['open_close_ratio'] = df['Open'] / df['Close']
-        df['body_size'] = (df['Close'] - df['Open']) / df['Open']
-        
-        # Волатильность
-        df['volatility_5'] = df['price_change'].rolling(window=5).std()
-        df['volatility_10'] = df['price_change'].rolling(window=10).std()
-        df['volatility_20'] = df['price_change'].rolling(window=20).std()
-        
-        # Скользящие средние
-        df['sma_5'] = df['Close'].rolling(window=5).mean()
-        df['sma_10'] = df['Close'].rolling(window=10).mean()
-        df['sma_20'] = df['Close'].rolling(window=20).mean()
-        df['ema_5'] = df['Close'].ewm(span=5).mean()
-        df['ema_10'] = df['Close'].ewm(span=10).mean()
-        df['ema_20'] = df['Close'].ewm(span=20).mean()
-        
-        # Отклонения от средних
-        df['deviation_sma_5'] = (df['Close'] - df['sma_5']) / df['sma_5']
-        df['deviation_sma_10'] = (df['Close'] - df['sma_10']) / df['sma_10']
-        df['deviation_sma_20'] = (df['Close'] - df['sma_20']) / df['sma_20']
-        df['deviation_ema_5'] = (df['Close'] - df['ema_5']) / df['ema_5']
-        df['deviation_ema_10'] = (df['Close'] - df['ema_10']) / df['ema_10']
-        df['deviation_ema_20'] = (df['Close'] - df['ema_20']) / df['ema_20']
-        
-        # Позиция цены в окне
-        df['high_window_5'] = df['High'].rolling(window=5).max()
-        df['low_window_5'] = df['Low'].rolling(window=5).min()
-        df['position_5'] = (df['Close'] - df['low_window_5']) / (df['high_window_5'] - df['low_window_5'])
-        
-        df['high_window_10'] = df['High'].rolling(window=10).max()
-        df['low_window_10'] = df['Low'].rolling(window=10).min()
-        df['position_10'] = (df['Close'] - df['low_window_10']) / (df['high_window_10'] - df['low_window_10'])
-        
-        df['high_window_20'] = df['High'].rolling(window=20).max()
-        df['low_window_20'] = df['Low'].rolling(window=20).min()
-        df['position_20'] = (df['Close'] - df['low_window_20']) / (df['high_window_20'] - df['low_window_20'])
-        
-        # RSI
-        gains = df['price_change'].where(df['price_change'] > 0, 0)
-        losses = -df['price_change'].where(df['price_change'] < 0, 0)
-        
-        avg_gains_5 = gains.rolling(window=5).mean()
-        avg_losses_5 = losses.rolling(window=5).mean()
-        df['rsi_5'] = 100 - (100 / (1 + avg_gains_5 / avg_losses_5))
-        
-        avg_gains_10 = gains.rolling(window=10).mean()
-        avg_losses_10 = losses.rolling(window=10).mean()
-        df['rsi_10'] = 100 - (100 / (1 + avg_gains_10 / avg_losses_10))
-        
-        avg_gains_20 = gains.rolling(window=20).mean()
-        avg_losses_20 = losses.rolling(window=20).mean()
-        df['rsi_20'] = 100 - (100 / (1 + avg_gains_20 / avg_losses_20))
-        
-        # Тренды
-        df['trend_5'] = df['Close'] - df['Close'].shift(5)
-        df['trend_10'] = df['Close'] - df['Close'].shift(10)
-        df['trend_20'] = df['Close'] - df['Close'].shift(20)
-        
-        # Импульс
-        df['momentum_5'] = df['Close'] / df['Close'].shift(5) - 1
-        df['momentum_10'] = df['Close'] / df['Close'].shift(10) - 1
-        df['momentum_20'] = df['Close'] / df['Close'].shift(20) - 1
-        
-        # Объем
-        df['volume_sma_5'] = df['Volume'].rolling(window=5).mean()
-        df['volume_sma_10'] = df['Volume'].rolling(window=10).mean()
-        df['volume_sma_20'] = df['Volume'].rolling(window=20).mean()
-        df['volume_ratio_5'] = df['Volume'] / df['volume_sma_5']
-        df['volume_ratio_10'] = df['Volume'] / df['volume_sma_10']
-        df['volume_ratio_20'] = df['Volume'] / df['volume_sma_20']
-        
-        # Bollinger Bands
-        df['bb_upper_20'] = df['sma_20'] + 2 * df['volatility_20'] * df['sma_20']
-        df['bb_lower_20'] = df['sma_20'] - 2 * df['volatility_20'] * df['sma_20']
-        df['bb_position_20'] = (df['Close'] - df['bb_lower_20']) / (df['bb_upper_20'] - df['bb_lower_20'])
-        
-        # Stochastic Oscillator
-        df['stoch_k_14'] = 100 * (df['Close'] - df['Low'].rolling(window=14).min()) / (df['High'].rolling(window=14).max() - df['Low'].rolling(window=14).min())
-        df['stoch_d_14'] = df['stoch_k_14'].rolling(window=3).mean()
-        
-        # MACD
-        ema_12 = df['Close'].ewm(span=12).mean()
-        ema_26 = df['Close'].ewm(span=26).mean()
-        df['macd'] = ema_12 - ema_26
-        df['macd_signal'] = df['macd'].ewm(span=9).mean()
-        df['macd_histogram'] = df['macd'] - df['macd_signal']
+        # Все признаки считаются движком: общие промежуточные ряды - один раз
+        df = add_features(self.data, processor_feature_set())
         
         # Удаляем NaN значения
         df = df.dropna()
@@ -316,9 +207,15 @@ class ZigZag15MProcessor:
         
         return True
     
-    def plot_zigzag(self, save_path="zigzag_15m_chart.png"):
+    def plot_zigzag(self, save_path="zigzag_15m_chart.png", rows=10000, lod=True, dpi=300):
         """
         Строит график с зигзагом и сохраняет его.
+        
+        Параметры:
+        - save_path: путь для сохранения
+        - rows: количество последних записей на графике (None - вся история)
+        - lod: прореживать цену и объем до ширины графика в пикселях (вершины сохраняются точно)
+        - dpi: разрешение картинки
         """
         print(f"Создание графика зигзага...")
         
@@ -327,50 +224,53 @@ class ZigZag15MProcessor:
             print("❌ Данные зигзага не найдены!")
             return False
         
-        # Берем только последние 10000 записей для графика
-        plot_data = self.data.tail(10000).copy()
+        # Последние rows записей (или вся история)
+        plot_data = self.data if rows is None else self.data.tail(rows)
+        x = plot_data.index.to_numpy()
+        pivots = find_pivots(plot_data, zigzag_column_name)
+        # Номера вершин внутри plot_data
+        positions = pivots.row
         
         # Создаем график
         fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(16, 12), height_ratios=[3, 1])
         
         # Основной график цены
-        ax1.plot(plot_data.index, plot_data['Close'], color='blue', alpha=0.7, linewidth=1, label='Цена закрытия')
+        if lod:
+            plot_lod_line(ax1, x, plot_data['Close'].to_numpy(), dpi=dpi, keep=positions,
+                          color='blue', alpha=0.7, linewidth=1, label='Цена закрытия')
+        else:
+            ax1.plot(x, plot_data['Close'], color='blue', alpha=0.7, linewidth=1, label='Цена закрытия')
         
         # Отмечаем точки зигзага
-        max_points = plot_data[plot_data[zigzag_column_name] == -1]
-        min_points = plot_data[plot_data[zigzag_column_name] == 1]
+        max_points = pivots.take(pivots.type == -1)
+        min_points = pivots.take(pivots.type == 1)
         
-        if len(max_points) > 0:
-            ax1.scatter(max_points.index, max_points['High'], 
+        if len(max_points.row) > 0:
+            ax1.scatter(x[max_points.row], max_points.price, 
                        color='red', marker='v', s=100, alpha=0.8, 
-                       label=f'Максимумы (продажа) - {len(max_points)}')
+                       label=f'Максимумы (продажа) - {len(max_points.row)}')
         
-        if len(min_points) > 0:
-            ax1.scatter(min_points.index, min_points['Low'], 
+        if len(min_points.row) > 0:
+            ax1.scatter(x[min_points.row], min_points.price, 
                        color='green', marker='^', s=100, alpha=0.8, 
-                       label=f'Минимумы (покупка) - {len(min_points)}')
-        
-        # Соединяем точки зигзага линиями
-        zigzag_indices = plot_data[plot_data[zigzag_column_name] != 0].index
-        zigzag_prices = []
+                       label=f'Минимумы (покупка) - {len(min_points.row)}')
         
-        for idx in zigzag_indices:
-            if plot_data.loc[idx, zigzag_column_name] == -1:  # Максимум
-                zigzag_prices.append(plot_data.loc[idx, 'High'])
-            else:  # Минимум
-                zigzag_prices.append(plot_data.loc[idx, 'Low'])
-        
-        if len(zigzag_indices) > 1:
-            ax1.plot(zigzag_indices, zigzag_prices, color='orange', linewidth=2, alpha=0.8, label='Зигзаг')
+        # Соединяем точки зигзага линиями (High для максимума, Low для минимума)
+        if len(positions) > 1:
+            ax1.plot(x[positions], pivots.price, color='orange', linewidth=2, alpha=0.8, label='Зигзаг')
         
         # Настройки графика
-        ax1.set_title(f'BTC/USDT 15m - ZigZag (отклонение {self.deviation}%) - Последние 10K записей', fontsize=16, fontweight='bold')
+        span = 'Вся история' if rows is None else f'Последние {len(plot_data) // 1000}K записей'
+        ax1.set_title(f'BTC/USDT 15m - ZigZag (отклонение {self.deviation}%) - {span}', fontsize=16, fontweight='bold')
         ax1.set_ylabel('Цена (USDT)', fontsize=12)
         ax1.grid(True, alpha=0.3)
         ax1.legend(loc='upper left')
         
         # График объема
-        ax2.bar(plot_data.index, plot_data['Volume'], color='gray', alpha=0.6, width=1)
+        if lod:
+            plot_lod_volume(ax2, x, plot_data['Volume'].to_numpy(), dpi=dpi, color='gray', alpha=0.6)
+        else:
+            ax2.bar(x, plot_data['Volume'], color='gray', alpha=0.6, width=1)
         ax2.set_ylabel('Объем', fontsize=12)
         ax2.set_xlabel('Время', fontsize=12)
         ax2.grid(True, alpha=0.3)
@@ -384,16 +284,25 @@ class ZigZag15MProcessor:
         plt.tight_layout()
         
         # Сохраняем график
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
+        plt.savefig(save_path, dpi=dpi, bbox_inches='tight')
         print(f"✓ График сохранен: {save_path}")
         
         plt.show()
         return True
     
-    def save_enhanced_data(self, output_file="processed_data/ml_data.csv"):
+    def save_enhanced_data(self, output_file="processed_data/ml_data.csv", format=None, workers=None,
+                           compression=None):
         """
         Сохраняет данные с добавленными признаками.
+        
+        Параметры:
+        - output_file: путь к файлу; при заданном format расширение заменяется
+        - format: 'csv', 'parquet', 'feather' или 'npz' (по умолчанию - по расширению)
+        - workers: процессов для форматирования CSV (None = число ядер)
+        - compression: сжатие для Parquet/Feather/.npz, см. data_store.save_table
         """
+        if format is not None:
+            output_file = os.path.splitext(output_file)[0] + FORMAT_SUFFIXES.get(format, '')
         print(f"Сохранение данных с признаками в {output_file}...")
         
         if self.data is None:
@@ -401,8 +310,15 @@ class ZigZag15MProcessor:
             return False
         
         try:
-            self.data.to_csv(output_file, index=False)
+            report = save_table(self.data, output_file, format=format, compression=compression, workers=workers)
+            # Индекс вершин рядом с таблицей: анализ и графики не сканируют метки заново
+            PivotIndex.from_frame(self.data).save(output_file)
             print(f"✓ Данные сохранены: {len(self.data)} записей, {len(self.data.columns)} колонок")
+            mb = report['bytes'] / 1024 ** 2
+            seconds = max(report['seconds'], 1e-9)
+            print(f"✓ Записано {mb:.1f} МБ ({report['format']}) за {report['seconds']:.2f} с: "
+                  f"{mb / seconds:.1f} МБ/с, {report['rows'] / seconds:,.0f} строк/с")
+            print(f"✓ Индекс вершин: {pivot_index_path(output_file)}")
             
             # Выводим список всех колонок
             print(f"\nКолонки в файле:")
@@ -415,6 +331,122 @@ class ZigZag15MProcessor:
             print(f"❌ Ошибка при сохранении: {e}")
             return False
     
+    def process_in_chunks(self, output_file="processed_data/ml_data.csv", deviations=None,
+                          chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Потоковая обработка: зигзаг, технические индикаторы и запись блоками.
+        
+        Входной файл читается блоками по chunk_size строк, поэтому память
+        не зависит от длины истории. Состояние зигзага переносится между
+        блоками (ZigZagState); строка записывается, только когда ее метка
+        уже не может измениться (до settled_index), до этого в буфере
+        хранятся только исходные колонки. Признаки блока считаются вместе
+        с разогревом из предыдущих строк (warmup_length набора).
+        Результат тот же, что у цепочки load_data -> calculate_zigzag
+        (или calculate_zigzag_sweep) -> create_technical_features ->
+        save_enhanced_data.
+        
+        Параметры:
+        - output_file: путь к выходному CSV
+        - deviations: список отклонений (None = только self.deviation)
+        - chunk_size: количество строк в блоке
+        """
+        if deviations is None:
+            columns = {f"zigzag ({self.deviation}%)": float(self.deviation)}
+        else:
+            columns = {f"zigzag ({float(d)}%)": float(d) for d in deviations}
+        print(f"Потоковая обработка {self.data_file} блоками по {chunk_size} строк...")
+        
+        features = processor_feature_set()
+        warmup = warmup_length(features)
+        states = {name: ZigZagState(deviation) for name, deviation in columns.items()}
+        
+        pending = None      # Строки, метки которых еще могут измениться
+        labels = {name: np.zeros(0) for name in columns}
+        start = 0           # Глобальный индекс первой строки pending
+        total = 0
+        history = None      # Последние warmup строк перед pending (с метками)
+        written = 0
+        width = 0
+        pivot_parts = {name: [] for name in columns}
+        
+        def flush(stop):
+            # Признаки считаются кусками не больше блока, даже если метки
+            # долго не фиксировались и в буфере накопилось много строк
+            while start < stop:
+                write_rows(min(stop, start + chunk_size))
+        
+        def write_rows(stop):
+            nonlocal pending, start, history, written, width
+            size = stop - start
+            block = pending.iloc[:size].copy()
+            pending = pending.iloc[size:]
+            for name in columns:
+                block[name] = labels[name][:size]
+                labels[name] = labels[name][size:]
+            start = stop
+            
+            extended = block if history is None else pd.concat([history, block])
+            enhanced = add_features(extended, features).iloc[len(extended) - size:].dropna()
+            write_csv_parallel(enhanced, output_file, workers=1, mode='a' if written else 'w',
+                               header=not written, units=units)
+            for name in columns:
+                pivot_parts[name].append(find_pivots(enhanced, name, offset=written))
+            written += len(enhanced)
+            width = enhanced.shape[1]
+            history = extended.iloc[-warmup:] if warmup else None
+        
+        try:
+            if os.path.exists(output_file):
+                os.remove(output_file)
+            # Формат времени в CSV зависит от всей колонки, поэтому единицу
+            # выбираем заранее по всему файлу, а не по отдельному блоку
+            units = csv_datetime_units(self.data_file, chunk_size)
+            
+            for chunk in iter_table(self.data_file, chunk_size, profile=self.dtype_profile):
+                if total == 0:
+                    missing_columns = [c for c in ['Open', 'High', 'Low', 'Close', 'Volume'] if c not in chunk.columns]
+                    if missing_columns:
+                        print(f"⚠️ Отсутствуют колонки: {missing_columns}")
+                        return False
+                
+                pending = chunk if pending is None else pd.concat([pending, chunk])
+                high = chunk['High'].to_numpy(dtype=np.float64)
+                low = chunk['Low'].to_numpy(dtype=np.float64)
+                for name, state in states.items():
+                    labels[name] = np.concatenate([labels[name], np.zeros(len(chunk))])
+                    # Новые точки не раньше settled_index, то есть всегда внутри pending
+                    for idx, _, kind in state.update_many(high, low):
+                        labels[name][idx - start] = kind
+                total += len(chunk)
+                
+                settled = min(state.settled_index for state in states.values())
+                if total >= 3 and settled > start:
+                    flush(settled)
+            
+            if total < 3:
+                print("❌ Недостаточно данных для вычисления зигзага!")
+                return False
+            if start < total:
+                flush(total)
+            
+            pivot_index = PivotIndex({name: concat_pivots(parts) for name, parts in pivot_parts.items()}, written)
+            pivot_index.save(output_file)
+            
+        except FileNotFoundError:
+            print(f"❌ Файл {self.data_file} не найден!")
+            return False
+        except Exception as e:
+            print(f"❌ Ошибка при потоковой обработке: {e}")
+            return False
+        
+        for name in columns:
+            types = pivot_index[name].type
+            print(f"✓ {name}: максимумов {np.count_nonzero(types == -1)}, минимумов {np.count_nonzero(types == 1)}")
+        print(f"✓ Данные сохранены: {written} записей, {width} колонок")
+        print(f"✓ Индекс вершин: {pivot_index_path(output_file)}")
+        return True
+    
     def get_statistics(self):
         """
         Выводит статистику по данным.
@@ -455,65 +487,122 @@ class ZigZag15MProcessor:
         
         print("="*60)
 
-def main():
+def parse_deviations(text):
+    """
+    Разбирает отклонения зигзага из строки через запятую ("1.0" или "0.5,1,2").
+    
+    Возвращает:
+    - список положительных отклонений (ValueError при некорректном вводе)
+    """
+    deviations = [float(x.strip()) for x in text.split(',') if x.strip()]
+    if not deviations or any(d <= 0 for d in deviations):
+        raise ValueError("Отклонение должно быть положительным числом")
+    return deviations
+
+def main(argv=None):
     """
     Основная функция для обработки 15-минутных данных.
+    
+    Без --deviation отклонение запрашивается интерактивно.
+    
+    Возвращает:
+    - True, если данные обработаны и сохранены
     """
+    parser = argparse.ArgumentParser(description="Обработка 15-минутных данных BTC с зигзагом")
+    parser.add_argument('--dtype-profile', choices=PROFILES, default='compact',
+                        help="профиль типов данных при загрузке (по умолчанию compact)")
+    parser.add_argument('--memory-report', action='store_true',
+                        help="вывести отчет об экономии памяти при загрузке")
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help="потоковая обработка блоками по N строк (память не зависит от длины истории)")
+    parser.add_argument('--output-format', choices=OUTPUT_FORMATS, default='csv',
+                        help="формат файла с признаками (по умолчанию csv)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="процессов для записи CSV (по умолчанию - число ядер)")
+    parser.add_argument('--deviation', type=parse_deviations, default=None,
+                        help="отклонение зигзага в процентах, несколько - через запятую (без вопроса)")
+    parser.add_argument('--input', default="processed_data/input_data.csv",
+                        help="файл с исправленными свечами")
+    parser.add_argument('--output', default=None,
+                        help="файл с признаками (по умолчанию processed_data/ml_data + расширение формата)")
+    args = parser.parse_args(argv)
+    output_file = args.output or "processed_data/ml_data" + FORMAT_SUFFIXES[args.output_format]
+    
     print("Обработка 15-минутных данных BTC с зигзагом")
     print("="*80)
     
     try:
-        # Запрашиваем отклонение зигзага
-        while True:
+        # Запрашиваем отклонение зигзага (одно или несколько через запятую)
+        deviations = args.deviation
+        while deviations is None:
+            deviation_input = input("Введите отклонение зигзага в процентах (по умолчанию 1.0, несколько - через запятую): ").strip()
+            if deviation_input == "":
+                deviations = [1.0]
+                break
             try:
-                deviation_input = input("Введите отклонение зигзага в процентах (по умолчанию 1.0): ").strip()
-                if deviation_input == "":
-                    deviation = 1.0
-                    break
-                else:
-                    deviation = float(deviation_input)
-                    if deviation > 0:
-                        break
-                    else:
-                        print("❌ Отклонение должно быть положительным числом!")
+                deviations = parse_deviations(deviation_input)
             except ValueError:
-                print("❌ Введите корректное число!")
+                print("❌ Отклонение должно быть положительным числом!")
         
-        print(f"✓ Используется отклонение: {deviation}%")
+        deviation = deviations[0]
+        print(f"✓ Используется отклонение: {', '.join(f'{d}%' for d in deviations)}")
         
         # Создаем процессор
         processor = ZigZag15MProcessor(
-            data_file="processed_data/input_data.csv",
-            deviation=deviation
+            data_file=args.input,
+            deviation=deviation,
+            dtype_profile=args.dtype_profile,
+            memory_report=args.memory_report
         )
         
+        # Потоковый режим: зигзаг, признаки и запись блоками
+        if args.chunk_size:
+            if table_format(output_file) != 'csv':
+                print("⚠️ Потоковый режим записывает только CSV")
+                output_file = os.path.splitext(output_file)[0] + FORMAT_SUFFIXES['csv']
+            if not processor.process_in_chunks(output_file,
+                                               deviations=deviations if len(deviations) > 1 else None,
+                                               chunk_size=args.chunk_size):
+                return False
+            print("\n" + "="*80)
+            print("✓ Обработка данных завершена успешно!")
+            print(f"✓ Сохранены данные: {output_file}")
+            return True
+        
         # Загружаем данные
         if not processor.load_data():
-            return
+            return False
         
-        # Вычисляем зигзаг
-        if not processor.calculate_zigzag():
-            return
+        # Вычисляем зигзаг (для нескольких отклонений - за один проход)
+        if len(deviations) > 1:
+            if not processor.calculate_zigzag_sweep(deviations):
+                return False
+        elif not processor.calculate_zigzag():
+            return False
         
         # Создаем технические индикаторы
         if not processor.create_technical_features():
-            return
+            return False
         
         # Выводим статистику
         processor.get_statistics()
         
         # Сохраняем данные с признаками
-        processor.save_enhanced_data("processed_data/ml_data.csv")
+        if not processor.save_enhanced_data(output_file, format=None if args.output else args.output_format,
+                                            workers=args.workers):
+            return False
         
         print("\n" + "="*80)
         print("✓ Обработка данных завершена успешно!")
-        print("✓ Сохранены данные: processed_data/ml_data.csv")
+        print(f"✓ Сохранены данные: {output_file}")
         print("\n💡 Для создания графиков по периодам запустите: python create_period_charts.py")
+        return True
         
     except Exception as e:
         print(f"❌ Ошибка: {e}")
         import traceback
         traceback.print_exc()
+        return False
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(0 if main() else 1)
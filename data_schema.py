@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Схема колонок OHLCV/ml_data и профили типов данных для загрузки.
+
+Профиль 'default' оставляет типы такими, какими их выдал парсер CSV
+(float64 для всех чисел). Профиль 'compact' уменьшает память:
+- метки зигзага (-1/0/1) -> int8
+- рассчитанные признаки -> float32
+- счетчики -> int32
+- строковые колонки (символ пары и т.п.) -> category
+- время -> datetime64[ns] (int64 от эпохи)
+Рыночные колонки (OHLC и объемы) остаются float64, чтобы расчет зигзага
+и признаков давал те же значения, что и раньше.
+"""
+
+import numpy as np
+import pandas as pd
+
+PROFILES = ('default', 'compact')
+
+TIME_COLUMNS = ('Open time', 'datetime')
+TIMESTAMP_COLUMNS = ('Close time',)
+MARKET_COLUMNS = (
+    'Open', 'High', 'Low', 'Close', 'Volume',
+    'Quote asset volume', 'Taker buy base asset volume', 'Taker buy quote asset volume',
+)
+COUNT_COLUMNS = ('Number of trades',)
+SYMBOL_COLUMNS = ('Symbol', 'symbol', 'Pair', 'pair')
+LABEL_MARKER = 'zigzag'
+
+ROLES = ('time', 'timestamp', 'market', 'count', 'label', 'symbol', 'feature', 'other')
+
+
+def column_role(name, dtype):
+    """
+    Определяет роль колонки в схеме данных.
+
+    Параметры:
+    - name: название колонки
+    - dtype: тип колонки
+
+    Возвращает:
+    - одно из значений ROLES
+    """
+    if name in TIME_COLUMNS:
+        return 'time'
+    if name in TIMESTAMP_COLUMNS:
+        return 'timestamp'
+    if name in MARKET_COLUMNS:
+        return 'market'
+    if name in COUNT_COLUMNS:
+        return 'count'
+    if LABEL_MARKER in str(name).lower():
+        return 'label'
+    if name in SYMBOL_COLUMNS or not (pd.api.types.is_numeric_dtype(dtype)
+                                      or pd.api.types.is_datetime64_any_dtype(dtype)):
+        return 'symbol'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'feature'
+    return 'other'
+
+
+def _compact_column(series, role):
+    """
+    Возвращает колонку в компактном типе или None, если менять тип нельзя.
+    """
+    dtype = series.dtype
+    if role == 'time':
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            return None if dtype == 'datetime64[ns]' else series.astype('datetime64[ns]')
+        return pd.to_datetime(series).astype('datetime64[ns]')
+
+    if role == 'label':
+        values = series.to_numpy()
+        if dtype == np.int8 or not pd.api.types.is_numeric_dtype(dtype) or series.isna().any():
+            return None
+        if not np.isin(values, (-1, 0, 1)).all():
+            return None
+        return series.astype(np.int8)
+
+    if role == 'feature':
+        return None if dtype == np.float32 else series.astype(np.float32)
+
+    if role == 'count':
+        if not pd.api.types.is_integer_dtype(dtype) or len(series) == 0:
+            return None
+        info = np.iinfo(np.int32)
+        if series.min() < info.min or series.max() > info.max:
+            return None
+        return series.astype(np.int32)
+
+    if role == 'symbol':
+        return None if isinstance(dtype, pd.CategoricalDtype) else series.astype('category')
+
+    return None
+
+
+def apply_profile(df, profile='compact'):
+    """
+    Приводит колонки DataFrame к типам профиля.
+
+    Параметры:
+    - df: исходные данные (не изменяются)
+    - profile: 'default' или 'compact'
+
+    Возвращает:
+    - DataFrame с новыми типами (для 'default' - тот же объект)
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Неизвестный профиль типов: {profile}. Доступны: {', '.join(PROFILES)}")
+    if profile == 'default':
+        return df
+
+    converted = {}
+    for name in df.columns:
+        column = _compact_column(df[name], column_role(name, df[name].dtype))
+        if column is not None:
+            converted[name] = column
+
+    if not converted:
+        return df
+    return df.assign(**converted)
+
+
+def memory_by_role(df):
+    """
+    Считает занимаемую память по ролям колонок.
+
+    Возвращает:
+    - словарь {роль: байты}
+    """
+    usage = df.memory_usage(deep=True, index=False)
+    result = {}
+    for name in df.columns:
+        role = column_role(name, df[name].dtype)
+        result[role] = result.get(role, 0) + int(usage[name])
+    return result
+
+
+def print_memory_report(before, after, title="Память данных"):
+    """
+    Выводит сравнение памяти до и после применения профиля.
+
+    Параметры:
+    - before: DataFrame в исходных типах
+    - after: DataFrame в типах профиля
+    - title: заголовок отчета
+
+    Возвращает:
+    - словарь с итогами в байтах: before, after, saved
+    """
+    mb = 1024 ** 2
+    before_roles = memory_by_role(before)
+    after_roles = memory_by_role(after)
+
+    print(f"\n{title}:")
+    print(f"  {'Роль':<10} {'Колонок':>8} {'До, МБ':>10} {'После, МБ':>10}")
+    for role in ROLES:
+        if role not in before_roles:
+            continue
+        count = sum(1 for name in before.columns if column_role(name, before[name].dtype) == role)
+        print(f"  {role:<10} {count:>8} {before_roles[role] / mb:>10.1f} {after_roles.get(role, 0) / mb:>10.1f}")
+
+    total_before = sum(before_roles.values())
+    total_after = sum(after_roles.values())
+    saved = total_before - total_after
+    percent = saved / total_before * 100 if total_before else 0.0
+    print(f"  {'Итого':<10} {len(before.columns):>8} {total_before / mb:>10.1f} {total_after / mb:>10.1f}")
+    print(f"✓ Экономия памяти: {saved / mb:.1f} МБ ({percent:.1f}%)")
+
+    return {'before': total_before, 'after': total_after, 'saved': saved}
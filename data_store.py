@@ -0,0 +1,745 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Общий слой доступа к табличным данным (OHLCV и ml_data).
+
+Рядом с каждым CSV создается бинарная колоночная копия в формате
+Feather/Arrow IPC (<file>.csv.arrow) и файл метаданных (<file>.csv.cache.json).
+Пока размер, время изменения и хеш CSV не меняются, данные читаются из копии,
+а не разбираются из текста заново. Без pyarrow используется обычный CSV.
+
+Для анализа по периодам есть ColumnStore - каталог <file>.csv.cols с одним
+.npy на колонку, который открывается через mmap и режется по времени
+бинарным поиском без копирования.
+
+Таблицы можно сохранять не только в CSV (save_table): Parquet, Feather и
+.npz с массивом на колонку. load_table определяет формат по расширению и,
+если файла нет, находит таблицу с тем же именем в другом формате
+(ml_data.csv -> ml_data.parquet).
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from data_schema import apply_profile, print_memory_report
+
+try:
+    import pyarrow  # noqa: F401 - нужен pandas для to_feather/read_feather
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+CACHE_VERSION = 1
+CACHE_SUFFIX = '.arrow'
+META_SUFFIX = '.cache.json'
+TIME_COLUMNS = ('Open time',)
+HASH_BLOCK_SIZE = 1 << 20
+STORE_VERSION = 1
+STORE_SUFFIX = '.cols'
+# Файлы хранилища, которых нет ни в одном манифесте, удаляются не раньше,
+# чем через сутки: до этого они могут принадлежать параллельной сборке
+STALE_STORE_FILE_SECONDS = 24 * 3600
+
+OUTPUT_FORMATS = ('csv', 'parquet', 'feather', 'npz')
+FORMAT_SUFFIXES = {'csv': '.csv', 'parquet': '.parquet', 'feather': '.feather', 'npz': '.npz'}
+DEFAULT_COMPRESSION = {'parquet': 'zstd', 'feather': 'lz4'}
+CSV_BLOCK_ROWS = 100_000
+# Единицы, которыми to_csv пишет datetime-колонку: самая грубая, в которой
+# все значения колонки целые (как в pandas)
+DATETIME_UNITS = (('D', 86_400 * 10**9), ('s', 10**9), ('ms', 10**6), ('us', 10**3), ('ns', 1))
+
+
+def cache_paths(csv_path):
+    """
+    Возвращает пути к бинарной копии и к файлу метаданных для CSV.
+    """
+    csv_path = str(csv_path)
+    return csv_path + CACHE_SUFFIX, csv_path + META_SUFFIX
+
+
+def file_hash(path):
+    """
+    Считает blake2b-хеш содержимого файла блоками по 1 МБ.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_csv_typed(path, time_columns=TIME_COLUMNS):
+    """
+    Читает CSV и приводит колонки времени к datetime64[ns].
+
+    Параметры:
+    - path: путь к CSV файлу
+    - time_columns: колонки, которые нужно разобрать как время
+
+    Возвращает:
+    - DataFrame
+    """
+    return _parse_time_columns(pd.read_csv(path), time_columns)
+
+
+def _parse_time_columns(df, time_columns):
+    for col in time_columns:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col]).astype('datetime64[ns]')
+    return df
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta_path, meta):
+    # Свое временное имя у каждой записи: параллельные записи не портят друг друга
+    tmp_path = f"{meta_path}.{os.getpid()}.{os.urandom(4).hex()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, meta_path)
+
+
+def _source_fingerprint(csv_path, stat=None):
+    """
+    Возвращает размер, время изменения и хеш исходного CSV.
+    """
+    if stat is None:
+        stat = os.stat(csv_path)
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'hash': file_hash(csv_path),
+    }
+
+
+def _source_unchanged(csv_path, fingerprint):
+    """
+    Проверяет, что CSV не изменился с момента создания копии.
+
+    Размер сравнивается всегда. Если время изменения совпадает, файл
+    считается прежним без чтения; иначе сравнивается хеш, и при совпадении
+    в fingerprint записывается новое время изменения.
+    """
+    stat = os.stat(csv_path)
+    if fingerprint.get('size') != stat.st_size:
+        return False
+    if fingerprint.get('mtime_ns') == stat.st_mtime_ns:
+        return True
+
+    if fingerprint.get('hash') != file_hash(csv_path):
+        return False
+
+    fingerprint['mtime_ns'] = stat.st_mtime_ns
+    return True
+
+
+def _cache_is_valid(csv_path, meta, time_columns):
+    """
+    Проверяет, что бинарная копия соответствует текущему CSV.
+    """
+    if meta.get('version') != CACHE_VERSION:
+        return False
+    if list(meta.get('time_columns', [])) != list(time_columns):
+        return False
+
+    mtime_ns = meta.get('mtime_ns')
+    if not _source_unchanged(csv_path, meta):
+        return False
+    if meta['mtime_ns'] != mtime_ns:
+        _write_meta(cache_paths(csv_path)[1], meta)
+    return True
+
+
+def write_cache(df, csv_path, stat=None, time_columns=TIME_COLUMNS):
+    """
+    Записывает бинарную копию DataFrame рядом с CSV.
+
+    Параметры:
+    - df: данные, прочитанные из csv_path
+    - csv_path: путь к исходному CSV
+    - stat: os.stat CSV до чтения (по умолчанию берется текущий)
+    - time_columns: колонки времени, разобранные при чтении
+
+    Возвращает:
+    - путь к бинарной копии
+    """
+    arrow_path, meta_path = cache_paths(csv_path)
+    if stat is None:
+        stat = os.stat(csv_path)
+
+    meta = {
+        'version': CACHE_VERSION,
+        'format': 'feather',
+        **_source_fingerprint(csv_path, stat),
+        'rows': len(df),
+        'time_columns': list(time_columns),
+    }
+
+    tmp_path = arrow_path + '.tmp'
+    df.reset_index(drop=True).to_feather(tmp_path)
+    os.replace(tmp_path, arrow_path)
+    _write_meta(meta_path, meta)
+    return arrow_path
+
+
+def load_table(path, time_columns=TIME_COLUMNS, use_cache=True, profile='default', memory_report=False,
+               prefer_fresh=False):
+    """
+    Загружает таблицу из CSV, используя бинарную копию, если она актуальна.
+    Таблицы Parquet/Feather/.npz читаются напрямую (см. resolve_table_path).
+
+    Колонки времени возвращаются как datetime64[ns] (int64 внутри), числовые
+    колонки сохраняют типы, полученные при разборе CSV, либо приводятся
+    к типам профиля (см. data_schema). Копия всегда хранит исходные типы.
+
+    Параметры:
+    - path: путь к таблице
+    - time_columns: колонки, которые нужно разобрать как время
+    - use_cache: использовать и обновлять бинарную копию (для CSV)
+    - profile: профиль типов данных ('default' или 'compact')
+    - memory_report: вывести сравнение памяти до и после профиля
+    - prefer_fresh: читать самый свежий формат таблицы, даже если path существует
+
+    Возвращает:
+    - DataFrame
+    """
+    path = resolve_table_path(path, prefer_fresh=prefer_fresh)
+    fmt = table_format(path)
+    if fmt == 'csv':
+        df = _load_full(path, tuple(time_columns), use_cache)
+    else:
+        df = _parse_time_columns(_read_binary(path, fmt), time_columns)
+    compact = apply_profile(df, profile)
+    if memory_report:
+        print_memory_report(df, compact, title=f"Память данных ({profile})")
+    return compact
+
+
+def iter_table(path, chunk_size, time_columns=TIME_COLUMNS, profile='default'):
+    """
+    Читает CSV блоками, не загружая файл целиком.
+
+    Типы колонок выводятся по каждому блоку отдельно; индекс строк сквозной
+    (как у таблицы, прочитанной целиком).
+
+    Параметры:
+    - path: путь к CSV файлу
+    - chunk_size: количество строк в блоке
+    - time_columns: колонки, которые нужно разобрать как время
+    - profile: профиль типов данных ('default' или 'compact')
+
+    Возвращает:
+    - итератор DataFrame
+    """
+    with pd.read_csv(path, chunksize=chunk_size) as reader:
+        for chunk in reader:
+            yield apply_profile(_parse_time_columns(chunk, time_columns), profile)
+
+
+def _load_full(path, time_columns, use_cache):
+    if not use_cache or not ARROW_AVAILABLE:
+        return read_csv_typed(path, time_columns)
+
+    arrow_path, meta_path = cache_paths(path)
+    meta = _read_meta(meta_path)
+    if meta is not None and os.path.isfile(arrow_path):
+        try:
+            if _cache_is_valid(path, meta, time_columns):
+                return pd.read_feather(arrow_path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Не удалось прочитать кэш {arrow_path}: {e}")
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        stat = None
+
+    df = read_csv_typed(path, time_columns)
+
+    if stat is not None:
+        try:
+            write_cache(df, path, stat=stat, time_columns=time_columns)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Не удалось сохранить кэш для {path}: {e}")
+    return df
+
+
+def table_format(path):
+    """
+    Формат таблицы по расширению файла (неизвестное расширение - CSV).
+    """
+    suffix = os.path.splitext(str(path))[1].lower()
+    for fmt, fmt_suffix in FORMAT_SUFFIXES.items():
+        if suffix == fmt_suffix:
+            return fmt
+    return 'csv'
+
+
+def resolve_table_path(path, prefer_fresh=False):
+    """
+    Путь к файлу таблицы: существующий path используется как есть, иначе
+    берется самый свежий файл с тем же именем в другом формате
+    (ml_data.csv -> ml_data.parquet, ...).
+
+    Параметры:
+    - path: путь к таблице
+    - prefer_fresh: выбрать самый свежий файл среди path и других форматов,
+      даже если path существует
+
+    Возвращает:
+    - путь к найденному файлу или path, если ничего не найдено
+    """
+    path = str(path)
+    if not prefer_fresh and os.path.isfile(path):
+        return path
+    stem = os.path.splitext(path)[0]
+    candidates = [path] + [stem + suffix for suffix in FORMAT_SUFFIXES.values() if stem + suffix != path]
+    existing = [candidate for candidate in candidates if os.path.isfile(candidate)]
+    if not existing:
+        return path
+    return max(existing, key=lambda candidate: os.stat(candidate).st_mtime_ns)
+
+
+def _read_binary(path, fmt):
+    if fmt == 'npz':
+        with np.load(path, allow_pickle=False) as data:
+            names = [str(name) for name in data['columns']]
+            return pd.DataFrame({name: data[f'c{i}'] for i, name in enumerate(names)}, columns=names)
+    if not ARROW_AVAILABLE:
+        raise ImportError(f"pyarrow не установлен: формат {fmt} недоступен")
+    if fmt == 'parquet':
+        return pd.read_parquet(path)
+    return pd.read_feather(path)
+
+
+def _write_npz(df, path, compressed):
+    arrays = {'columns': np.array([str(name) for name in df.columns])}
+    for i, name in enumerate(df.columns):
+        values = df[name].to_numpy()
+        if values.dtype == object or not isinstance(df[name].dtype, np.dtype):
+            # Строки и категории сохраняются как строки фиксированной длины
+            values = df[name].astype(str).to_numpy(dtype=str)
+        arrays[f'c{i}'] = values
+    with open(path, 'wb') as f:
+        (np.savez_compressed if compressed else np.savez)(f, **arrays)
+
+
+def datetime_unit(values):
+    """
+    Единица, с которой to_csv записал бы datetime-колонку целиком.
+
+    Параметры:
+    - values: Series или массив datetime64
+
+    Возвращает:
+    - 'D', 's', 'ms', 'us' или 'ns'
+    """
+    ticks = np.asarray(values, dtype='datetime64[ns]').view(np.int64)
+    ticks = ticks[ticks != np.iinfo(np.int64).min]
+    for unit, step in DATETIME_UNITS:
+        if (ticks % step == 0).all():
+            return unit
+    return 'ns'
+
+
+def format_datetime(values, unit):
+    """
+    Форматирует datetime-значения так же, как to_csv (NaT -> пропуск).
+    """
+    values = np.asarray(values, dtype='datetime64[ns]')
+    text = np.datetime_as_string(values, unit=unit)
+    if unit != 'D':
+        text = np.char.replace(text, 'T', ' ')
+    text = text.astype(object)
+    text[np.isnat(values)] = np.nan
+    return text
+
+
+def csv_datetime_units(path, chunk_size=CSV_BLOCK_ROWS, time_columns=TIME_COLUMNS):
+    """
+    Единицы datetime_unit для колонок времени CSV по всему файлу
+    (читаются только колонки времени, блоками).
+
+    Возвращает:
+    - словарь {колонка: единица}
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    columns = [name for name in time_columns if name in header]
+    if not columns:
+        return {}
+
+    order = [unit for unit, _ in DATETIME_UNITS]
+    units = {name: order[0] for name in columns}
+    with pd.read_csv(path, usecols=columns, chunksize=chunk_size) as reader:
+        for chunk in reader:
+            _parse_time_columns(chunk, columns)
+            for name in columns:
+                units[name] = max(units[name], datetime_unit(chunk[name]), key=order.index)
+    return units
+
+
+def _format_csv_block(block, units):
+    if units:
+        block = block.assign(**{name: format_datetime(block[name], unit) for name, unit in units.items()})
+    return block.to_csv(index=False, header=False)
+
+
+def write_csv_parallel(df, path, workers=None, block_rows=CSV_BLOCK_ROWS, mode='w', header=True, units=None):
+    """
+    Записывает DataFrame в CSV, форматируя блоки строк в нескольких процессах.
+
+    Текст совпадает с df.to_csv(path, index=False): блоки пишутся в исходном
+    порядке, а формат колонок времени выбирается по колонке целиком,
+    а не по отдельному блоку.
+
+    Параметры:
+    - df: данные
+    - path: путь к CSV
+    - workers: количество процессов (None = число ядер, 1 = без процессов)
+    - block_rows: строк в блоке
+    - mode: 'w' - перезаписать файл, 'a' - дописать
+    - header: записать заголовок
+    - units: {колонка: единица времени} (по умолчанию - datetime_unit по df)
+    """
+    if units is None:
+        units = {name: datetime_unit(df[name]) for name in df.columns
+                 if pd.api.types.is_datetime64_dtype(df[name].dtype)}
+    if workers is None:
+        workers = os.cpu_count() or 1
+    blocks = (df.iloc[i:i + block_rows] for i in range(0, len(df), block_rows))
+
+    with open(path, mode, encoding='utf-8', newline='') as f:
+        if header:
+            f.write(df.iloc[:0].to_csv(index=False))
+        if workers <= 1 or len(df) <= block_rows:
+            for block in blocks:
+                f.write(_format_csv_block(block, units))
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Не больше двух блоков на процесс в очереди, чтобы не держать весь текст в памяти
+            pending = deque()
+            for block in blocks:
+                pending.append(executor.submit(_format_csv_block, block, units))
+                if len(pending) >= 2 * workers:
+                    f.write(pending.popleft().result())
+            while pending:
+                f.write(pending.popleft().result())
+
+
+def save_table(df, path, format=None, compression=None, workers=None):
+    """
+    Сохраняет таблицу в CSV, Parquet, Feather или .npz.
+
+    Файл сначала пишется во временный и затем атомарно заменяет старый.
+
+    Параметры:
+    - df: данные
+    - path: путь к файлу
+    - format: один из OUTPUT_FORMATS (по умолчанию - по расширению path)
+    - compression: сжатие для Parquet/Feather (по умолчанию DEFAULT_COMPRESSION);
+      для .npz любое значение, кроме None, включает сжатие zip
+    - workers: процессов для записи CSV (см. write_csv_parallel)
+
+    Возвращает:
+    - словарь: format, path, rows, bytes, seconds
+    """
+    fmt = format or table_format(path)
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Неизвестный формат: {fmt}. Доступны: {', '.join(OUTPUT_FORMATS)}")
+    if fmt in ('parquet', 'feather') and not ARROW_AVAILABLE:
+        raise ImportError(f"pyarrow не установлен: формат {fmt} недоступен")
+    if compression is None:
+        compression = DEFAULT_COMPRESSION.get(fmt)
+
+    path = str(path)
+    tmp_path = path + '.tmp'
+    started = time.perf_counter()
+    try:
+        if fmt == 'csv':
+            write_csv_parallel(df, tmp_path, workers=workers)
+        elif fmt == 'parquet':
+            df.to_parquet(tmp_path, compression=compression, index=False)
+        elif fmt == 'feather':
+            df.reset_index(drop=True).to_feather(tmp_path, compression=compression)
+        else:
+            _write_npz(df, tmp_path, compressed=compression is not None)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return {
+        'format': fmt,
+        'path': path,
+        'rows': len(df),
+        'bytes': os.path.getsize(path),
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def to_ns(value):
+    """
+    Приводит метку времени (строка, datetime, np.datetime64) к int64 наносекундам.
+    """
+    return pd.Timestamp(value).as_unit('ns').value
+
+
+def time_slice_bounds(times, start=None, end=None):
+    """
+    Находит границы полуинтервала [start, end) в отсортированном массиве времени.
+
+    Параметры:
+    - times: отсортированные метки времени (datetime64 или int64 нс)
+    - start: начало периода включительно (None - с начала)
+    - end: конец периода не включительно (None - до конца)
+
+    Возвращает:
+    - (i0, i1) - позиции для среза times[i0:i1]
+    """
+    times = np.asarray(times)
+    if times.dtype.kind == 'M':
+        times = times.astype('datetime64[ns]', copy=False).view('int64')
+
+    i0 = 0 if start is None else int(np.searchsorted(times, to_ns(start), side='left'))
+    i1 = len(times) if end is None else int(np.searchsorted(times, to_ns(end), side='left'))
+    return i0, max(i0, i1)
+
+
+def time_slice(df, start=None, end=None, column='datetime'):
+    """
+    Возвращает строки DataFrame за период [start, end) без копирования данных.
+
+    Параметры:
+    - df: DataFrame, отсортированный по колонке времени
+    - start, end: границы периода
+    - column: колонка времени
+
+    Возвращает:
+    - срез df.iloc[i0:i1]
+    """
+    i0, i1 = time_slice_bounds(df[column].values, start, end)
+    return df.iloc[i0:i1]
+
+
+class ColumnStore:
+    """
+    Колоночное хранилище на диске с отсортированным индексом времени.
+
+    Каждая колонка лежит в отдельном .npy и открывается через
+    np.load(mmap_mode='r'), поэтому несколько процессов используют одну
+    физическую копию данных через page cache. Срезы по времени - это
+    представления mmap-массивов, найденные бинарным поиском.
+    """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, path, manifest):
+        """
+        Открывает хранилище по готовому манифесту (см. ColumnStore.open).
+
+        Параметры:
+        - path: каталог хранилища
+        - manifest: содержимое manifest.json
+        """
+        self.path = str(path)
+        self.manifest = manifest
+        self.time_column = manifest['time_column']
+        self._files = {col['name']: col['file'] for col in manifest['columns']}
+        # Все колонки открываются сразу: пересборка удаляет файлы старой
+        # версии, а открытый mmap остается рабочим и после удаления файла
+        self._arrays = {name: np.load(os.path.join(self.path, file_name), mmap_mode='r')
+                        for name, file_name in self._files.items()}
+        self.times = self._array(self.time_column).view('int64')
+
+    @classmethod
+    def build(cls, df, path, time_column='Open time', source=None, profile='default'):
+        """
+        Записывает числовые колонки и колонку времени DataFrame в хранилище.
+
+        Колонки пишутся под новыми именами, манифест заменяется атомарно,
+        после этого удаляются файлы предыдущего манифеста. Хранилище, открытое
+        по старому манифесту, продолжает работать: ColumnStore открывает все
+        колонки через mmap сразу при создании. Файлы параллельной сборки того
+        же хранилища не трогаются; неиспользуемые файлы удаляются, только
+        когда они старше STALE_STORE_FILE_SECONDS.
+
+        Параметры:
+        - df: данные, отсортированные по time_column
+        - path: каталог хранилища
+        - time_column: колонка времени
+        - source: отпечаток исходного CSV (размер, mtime, хеш)
+        - profile: профиль типов, с которым загружен df (записывается в манифест)
+
+        Возвращает:
+        - открытый ColumnStore
+        """
+        path = str(path)
+        times = pd.to_datetime(df[time_column]).to_numpy(dtype='datetime64[ns]')
+        if len(times) > 1 and (np.diff(times.view('int64')) < 0).any():
+            raise ValueError(f"Колонка '{time_column}' не отсортирована по времени")
+
+        os.makedirs(path, exist_ok=True)
+        manifest_path = os.path.join(path, cls.MANIFEST)
+        previous = _read_meta(manifest_path) or {}
+        token = os.urandom(4).hex()
+        columns = []
+        skipped = []
+        for k, name in enumerate(df.columns):
+            if name == time_column:
+                values = times
+            else:
+                values = df[name].to_numpy()
+                if values.dtype.kind not in 'biufM':
+                    skipped.append(name)
+                    continue
+            file_name = f"col_{k:03d}.{token}.npy"
+            np.save(os.path.join(path, file_name), np.ascontiguousarray(values))
+            columns.append({'name': name, 'file': file_name, 'dtype': str(values.dtype)})
+
+        manifest = {
+            'version': STORE_VERSION,
+            'rows': len(df),
+            'time_column': time_column,
+            'columns': columns,
+            'skipped': skipped,
+            'source': source or {},
+            'profile': profile,
+        }
+        _write_meta(manifest_path, manifest)
+        cls._remove_unused(path, previous, keep={col['file'] for col in columns})
+
+        return cls(path, manifest)
+
+    @classmethod
+    def _remove_unused(cls, path, previous, keep):
+        """
+        Удаляет файлы предыдущего манифеста и давно брошенные файлы
+        (прерванные сборки), кроме keep.
+        """
+        replaced = {col.get('file') for col in previous.get('columns', [])}
+        stale_before = time.time() - STALE_STORE_FILE_SECONDS
+        for file_name in os.listdir(path):
+            if file_name in keep or file_name == cls.MANIFEST:
+                continue
+            file_path = os.path.join(path, file_name)
+            try:
+                if file_name in replaced or os.path.getmtime(file_path) < stale_before:
+                    os.remove(file_path)
+            except FileNotFoundError:
+                # Файл уже удалила параллельная сборка
+                pass
+
+    @classmethod
+    def open(cls, path):
+        """
+        Открывает существующее хранилище.
+        """
+        manifest = _read_meta(os.path.join(str(path), cls.MANIFEST))
+        if manifest is None or manifest.get('version') != STORE_VERSION:
+            raise FileNotFoundError(f"Хранилище {path} не найдено или устарело")
+        return cls(path, manifest)
+
+    @property
+    def columns(self):
+        return list(self._files)
+
+    def __len__(self):
+        return self.manifest['rows']
+
+    def __contains__(self, name):
+        return name in self._files
+
+    def _array(self, name):
+        if name not in self._arrays:
+            raise KeyError(f"Колонка '{name}' отсутствует в хранилище")
+        return self._arrays[name]
+
+    def bounds(self, start=None, end=None):
+        """
+        Позиции строк периода [start, end).
+        """
+        return time_slice_bounds(self.times, start, end)
+
+    def column(self, name, start=None, end=None):
+        """
+        Возвращает колонку за период [start, end) как представление mmap без копирования.
+        """
+        i0, i1 = self.bounds(start, end)
+        return self._array(name)[i0:i1]
+
+    def slice(self, start=None, end=None, columns=None):
+        """
+        Возвращает словарь {колонка: представление} за период [start, end).
+        """
+        i0, i1 = self.bounds(start, end)
+        names = self.columns if columns is None else columns
+        return {name: self._array(name)[i0:i1] for name in names}
+
+    def rows(self, i0, i1, columns=None):
+        """
+        Копирует строки [i0, i1) в DataFrame с исходной нумерацией строк.
+        """
+        i1 = min(i1, len(self))
+        i0 = min(i0, i1)
+        names = self.columns if columns is None else columns
+        data = {name: np.array(self._array(name)[i0:i1]) for name in names}
+        return pd.DataFrame(data, index=pd.RangeIndex(i0, i1))
+
+    def frame(self, start=None, end=None, columns=None):
+        """
+        Копирует период [start, end) в DataFrame (только выбранные колонки).
+        """
+        i0, i1 = self.bounds(start, end)
+        return self.rows(i0, i1, columns)
+
+
+def open_column_store(csv_path, time_column='Open time', data=None, profile='default'):
+    """
+    Открывает колоночное хранилище для CSV, пересобирая его при изменении CSV
+    или другом профиле типов.
+
+    Параметры:
+    - csv_path: путь к исходному CSV (или к той же таблице в другом формате,
+      см. resolve_table_path)
+    - time_column: колонка времени, по которой отсортированы данные
+    - data: уже загруженная из csv_path таблица; при пересборке хранилище
+      строится из нее, без повторного чтения файла
+    - profile: профиль типов данных (см. data_schema), с которым загружена
+      data или будет загружена таблица; колонки хранилища имеют его типы
+
+    Возвращает:
+    - ColumnStore
+    """
+    csv_path = resolve_table_path(csv_path)
+    store_path = csv_path + STORE_SUFFIX
+    manifest = _read_meta(os.path.join(store_path, ColumnStore.MANIFEST))
+
+    if (manifest is not None and manifest.get('version') == STORE_VERSION
+            and manifest.get('time_column') == time_column
+            and manifest.get('profile', 'default') == profile):
+        source = manifest.get('source', {})
+        mtime_ns = source.get('mtime_ns')
+        if _source_unchanged(csv_path, source):
+            if source['mtime_ns'] != mtime_ns:
+                _write_meta(os.path.join(store_path, ColumnStore.MANIFEST), manifest)
+            return ColumnStore(store_path, manifest)
+
+    stat = os.stat(csv_path)
+    df = data if data is not None else load_table(csv_path, time_columns=(time_column,), profile=profile)
+    store = ColumnStore.build(df, store_path, time_column, source=_source_fingerprint(csv_path, stat),
+                              profile=profile)
+    print(f"✓ Создано колоночное хранилище: {store_path}")
+    return store
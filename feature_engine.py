@@ -0,0 +1,851 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Декларативный движок технических признаков.
+
+Индикаторы регистрируются в реестре INDICATORS под именем. Узел расчета
+описывается ссылкой Ref(имя индикатора, параметры); параметры-ссылки - это
+зависимости узла. FeatureEngine вычисляет каждый узел один раз и переиспользует
+результат: например, Low.rolling(14).min() для stoch_k_14 или SMA(20),
+общая для sma_20 и полос Боллинджера.
+
+Набор признаков - упорядоченный список (имя колонки, Ref). Наборы для
+ZigZag15MProcessor, ZigZagMLModel и src/utils/helpers собраны в FEATURE_SETS,
+поэтому обучение и торговля используют одни и те же формулы.
+"""
+
+import math
+from collections import deque, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from rolling_extrema import RollingExtremaState, rolling_extrema
+
+Ref = namedtuple('Ref', ['name', 'params'])
+
+INDICATORS = {}
+
+
+def ref(kind, /, **params):
+    """
+    Создает ссылку на узел расчета.
+
+    Параметры:
+    - kind: имя индикатора из INDICATORS
+    - params: параметры индикатора; значения-ссылки считаются зависимостями
+
+    Возвращает:
+    - Ref
+    """
+    return Ref(kind, tuple(sorted(params.items())))
+
+
+def col(name):
+    """
+    Ссылка на исходную колонку данных.
+    """
+    return ref('column', name=name)
+
+
+def indicator(name):
+    """
+    Декоратор регистрации индикатора в реестре.
+
+    Функция получает значения зависимостей (Series) и обычные параметры
+    как именованные аргументы.
+    """
+    def decorator(func):
+        INDICATORS[name] = func
+        return func
+    return decorator
+
+
+def dependencies(node):
+    """
+    Возвращает прямые зависимости узла.
+    """
+    return [value for _, value in node.params if isinstance(value, Ref)]
+
+
+# --- Базовые операции над колонками -----------------------------------------
+
+@indicator('pct_change')
+def _pct_change(source):
+    return source.pct_change()
+
+
+@indicator('diff')
+def _diff(source):
+    return source.diff()
+
+
+@indicator('shift')
+def _shift(source, periods):
+    return source.shift(periods)
+
+
+@indicator('abs')
+def _abs(source):
+    return source.abs()
+
+
+@indicator('sub')
+def _sub(left, right):
+    return left - right
+
+
+@indicator('div')
+def _div(left, right):
+    return left / right
+
+
+@indicator('relative_diff')
+def _relative_diff(value, base):
+    return (value - base) / base
+
+
+@indicator('momentum')
+def _momentum(value, base):
+    return value / base - 1
+
+
+@indicator('rolling_mean')
+def _rolling_mean(source, window):
+    return source.rolling(window=window).mean()
+
+
+@indicator('rolling_std')
+def _rolling_std(source, window):
+    return source.rolling(window=window).std()
+
+
+@indicator('rolling_max')
+def _rolling_max(source, window):
+    return source.rolling(window=window).max()
+
+
+@indicator('rolling_min')
+def _rolling_min(source, window):
+    return source.rolling(window=window).min()
+
+
+@indicator('ewm_mean')
+def _ewm_mean(source, span, adjust=True):
+    return source.ewm(span=span, adjust=adjust).mean()
+
+
+# --- Составные индикаторы ---------------------------------------------------
+
+@indicator('gains')
+def _gains(source):
+    return source.where(source > 0, 0)
+
+
+@indicator('losses')
+def _losses(source):
+    return -source.where(source < 0, 0)
+
+
+@indicator('rsi')
+def _rsi(avg_gains, avg_losses, loss_floor=None):
+    if loss_floor is not None:
+        # Избегаем деления на ноль
+        avg_losses = avg_losses.replace(0, loss_floor)
+    return 100 - (100 / (1 + avg_gains / avg_losses))
+
+
+@indicator('position')
+def _position(value, low, high):
+    return (value - low) / (high - low)
+
+
+@indicator('stochastic')
+def _stochastic(value, low, high):
+    return 100 * (value - low) / (high - low)
+
+
+@indicator('bollinger_upper')
+def _bollinger_upper(center, std, num_std):
+    return center + (std * num_std)
+
+
+@indicator('bollinger_lower')
+def _bollinger_lower(center, std, num_std):
+    return center - (std * num_std)
+
+
+@indicator('relative_band_upper')
+def _relative_band_upper(center, volatility, num_std):
+    return center + num_std * volatility * center
+
+
+@indicator('relative_band_lower')
+def _relative_band_lower(center, volatility, num_std):
+    return center - num_std * volatility * center
+
+
+# --- Конструкторы часто используемых узлов ------------------------------------
+
+def sma(source, window):
+    return ref('rolling_mean', source=source, window=window)
+
+
+def ema(source, span, adjust=True):
+    return ref('ewm_mean', source=source, span=span, adjust=adjust)
+
+
+def rsi(changes, window, loss_floor=None):
+    """
+    RSI по ряду изменений цены (pct_change или diff).
+    """
+    return ref('rsi',
+               avg_gains=sma(ref('gains', source=changes), window),
+               avg_losses=sma(ref('losses', source=changes), window),
+               loss_floor=loss_floor)
+
+
+# --- Наборы признаков ----------------------------------------------------------
+
+def processor_feature_set():
+    """
+    Признаки ZigZag15MProcessor.create_technical_features (в порядке колонок).
+    """
+    close, high, low, open_, volume = col('Close'), col('High'), col('Low'), col('Open'), col('Volume')
+    price_change = ref('pct_change', source=close)
+    windows = (5, 10, 20)
+
+    features = [
+        ('price_change', price_change),
+        ('price_change_abs', ref('abs', source=price_change)),
+        ('high_low_ratio', ref('div', left=high, right=low)),
+        ('open_close_ratio', ref('div', left=open_, right=close)),
+        ('body_size', ref('relative_diff', value=close, base=open_)),
+    ]
+    features += [(f'volatility_{w}', ref('rolling_std', source=price_change, window=w)) for w in windows]
+    features += [(f'sma_{w}', sma(close, w)) for w in windows]
+    features += [(f'ema_{w}', ema(close, w)) for w in windows]
+    features += [(f'deviation_sma_{w}', ref('relative_diff', value=close, base=sma(close, w))) for w in windows]
+    features += [(f'deviation_ema_{w}', ref('relative_diff', value=close, base=ema(close, w))) for w in windows]
+
+    for w in windows:
+        high_window = ref('rolling_max', source=high, window=w)
+        low_window = ref('rolling_min', source=low, window=w)
+        features += [
+            (f'high_window_{w}', high_window),
+            (f'low_window_{w}', low_window),
+            (f'position_{w}', ref('position', value=close, low=low_window, high=high_window)),
+        ]
+
+    features += [(f'rsi_{w}', rsi(price_change, w)) for w in windows]
+    features += [(f'trend_{w}', ref('sub', left=close, right=ref('shift', source=close, periods=w))) for w in windows]
+    features += [(f'momentum_{w}', ref('momentum', value=close, base=ref('shift', source=close, periods=w)))
+                 for w in windows]
+    features += [(f'volume_sma_{w}', sma(volume, w)) for w in windows]
+    features += [(f'volume_ratio_{w}', ref('div', left=volume, right=sma(volume, w))) for w in windows]
+
+    volatility_20 = ref('rolling_std', source=price_change, window=20)
+    bb_upper = ref('relative_band_upper', center=sma(close, 20), volatility=volatility_20, num_std=2)
+    bb_lower = ref('relative_band_lower', center=sma(close, 20), volatility=volatility_20, num_std=2)
+    stoch_k = ref('stochastic', value=close,
+                  low=ref('rolling_min', source=low, window=14),
+                  high=ref('rolling_max', source=high, window=14))
+    macd = ref('sub', left=ema(close, 12), right=ema(close, 26))
+    macd_signal = ema(macd, 9)
+
+    features += [
+        ('bb_upper_20', bb_upper),
+        ('bb_lower_20', bb_lower),
+        ('bb_position_20', ref('position', value=close, low=bb_lower, high=bb_upper)),
+        ('stoch_k_14', stoch_k),
+        ('stoch_d_14', sma(stoch_k, 3)),
+        ('macd', macd),
+        ('macd_signal', macd_signal),
+        ('macd_histogram', ref('sub', left=macd, right=macd_signal)),
+    ]
+    return features
+
+
+def ml_feature_set(window_sizes=(5, 10, 20, 50), volume=True):
+    """
+    Признаки ZigZagMLModel.create_features (в порядке колонок).
+
+    Параметры:
+    - window_sizes: размеры окон для технических индикаторов
+    - volume: добавлять признаки объема (если в данных есть Volume)
+    """
+    close, high, low, open_ = col('Close'), col('High'), col('Low'), col('Open')
+    price_change = ref('pct_change', source=close)
+
+    features = [
+        ('price_change', price_change),
+        ('high_low_ratio', ref('div', left=high, right=low)),
+        ('open_close_ratio', ref('div', left=open_, right=close)),
+        ('volatility', ref('rolling_std', source=price_change, window=20)),
+    ]
+
+    for w in window_sizes:
+        high_window = ref('rolling_max', source=high, window=w)
+        low_window = ref('rolling_min', source=low, window=w)
+        features += [
+            (f'sma_{w}', sma(close, w)),
+            (f'ema_{w}', ema(close, w)),
+            (f'deviation_sma_{w}', ref('relative_diff', value=close, base=sma(close, w))),
+            (f'deviation_ema_{w}', ref('relative_diff', value=close, base=ema(close, w))),
+            (f'high_{w}', high_window),
+            (f'low_{w}', low_window),
+            (f'position_high_{w}', ref('position', value=close, low=low_window, high=high_window)),
+            (f'rsi_{w}', rsi(price_change, w)),
+        ]
+
+    features += [(f'trend_{w}', ref('sub', left=close, right=ref('shift', source=close, periods=w)))
+                 for w in (5, 10, 20)]
+    features += [(f'momentum_{w}', ref('momentum', value=close, base=ref('shift', source=close, periods=w)))
+                 for w in (5, 10, 20)]
+
+    if volume:
+        volume_column = col('Volume')
+        features += [
+            ('volume_sma_20', sma(volume_column, 20)),
+            ('volume_ratio', ref('div', left=volume_column, right=sma(volume_column, 20))),
+        ]
+    return features
+
+
+def helpers_feature_set(source='close'):
+    """
+    Признаки src/utils/helpers.calculate_indicators (в порядке колонок).
+    """
+    close = col(source)
+    sma_20 = sma(close, 20)
+    std_20 = ref('rolling_std', source=close, window=20)
+    return [
+        ('SMA_14', sma(close, 14)),
+        ('SMA_50', sma(close, 50)),
+        ('EMA_14', ema(close, 14, adjust=False)),
+        ('EMA_50', ema(close, 50, adjust=False)),
+        ('RSI', rsi(ref('diff', source=close), 14, loss_floor=0.0001)),
+        ('BB_upper', ref('bollinger_upper', center=sma_20, std=std_20, num_std=2)),
+        ('BB_lower', ref('bollinger_lower', center=sma_20, std=std_20, num_std=2)),
+    ]
+
+
+def merge_feature_sets(*feature_sets):
+    """
+    Объединяет наборы признаков; одноименный признак из более позднего
+    набора заменяет предыдущий (как повторное присваивание колонки).
+    """
+    merged = {}
+    for features in feature_sets:
+        merged.update(features)
+    return list(merged.items())
+
+
+FEATURE_SETS = {
+    'processor': processor_feature_set,
+    'ml_model': ml_feature_set,
+    'helpers': helpers_feature_set,
+}
+
+
+def get_feature_set(name, **params):
+    """
+    Возвращает набор признаков по имени из FEATURE_SETS.
+    """
+    if name not in FEATURE_SETS:
+        raise ValueError(f"Неизвестный набор признаков: {name}. Доступны: {', '.join(FEATURE_SETS)}")
+    return FEATURE_SETS[name](**params)
+
+
+class FeatureEngine:
+    """
+    Вычисляет узлы расчета с мемоизацией: каждый промежуточный ряд
+    считается ровно один раз на экземпляр движка.
+    """
+
+    def __init__(self, data):
+        """
+        Параметры:
+        - data: DataFrame с исходными колонками (OHLCV)
+        """
+        self.data = data
+        self.cache = {}
+        self.computed = []
+
+    def get(self, node):
+        """
+        Возвращает значение узла, вычисляя его и зависимости при необходимости.
+
+        Параметры:
+        - node: Ref или имя исходной колонки
+
+        Возвращает:
+        - pandas.Series
+        """
+        if isinstance(node, str):
+            node = col(node)
+        if node in self.cache:
+            return self.cache[node]
+
+        if node.name == 'column':
+            value = self.data[dict(node.params)['name']]
+        else:
+            if node.name not in INDICATORS:
+                raise ValueError(f"Неизвестный индикатор: {node.name}")
+            params = {key: self.get(val) if isinstance(val, Ref) else val for key, val in node.params}
+            value = INDICATORS[node.name](**params)
+            self.computed.append(node)
+
+        self.cache[node] = value
+        return value
+
+    def compute(self, features):
+        """
+        Вычисляет набор признаков.
+
+        Параметры:
+        - features: список (имя колонки, Ref)
+
+        Возвращает:
+        - словарь {имя колонки: Series} в порядке набора
+        """
+        self._prefetch_extrema(features)
+        return {name: self.get(node) for name, node in features}
+
+    def _prefetch_extrema(self, features):
+        """
+        Считает все окна rolling_max/rolling_min одного ряда за один проход
+        (см. rolling_extrema) и кладет результаты в кэш.
+        """
+        for (source, mode), nodes in _extrema_groups(_stream_order(features)).items():
+            nodes = [node for node in nodes if node not in self.cache]
+            if not nodes:
+                continue
+            series = self.get(source)
+            windows = [dict(node.params)['window'] for node in nodes]
+            values = rolling_extrema(series.to_numpy(dtype=np.float64), windows, mode)
+            for node, window in zip(nodes, windows):
+                self.cache[node] = pd.Series(values[window], index=series.index, name=series.name)
+                self.computed.append(node)
+
+
+def _extrema_groups(nodes):
+    """
+    Группирует узлы rolling_max/rolling_min по источнику и режиму.
+    """
+    groups = {}
+    for node in nodes:
+        if node.name in ('rolling_max', 'rolling_min'):
+            key = (dict(node.params)['source'], node.name[len('rolling_'):])
+            groups.setdefault(key, []).append(node)
+    return groups
+
+
+def add_features(df, features, engine=None):
+    """
+    Возвращает копию df с признаками набора.
+
+    Существующие колонки с теми же именами заменяются на своих местах,
+    новые добавляются в конец в порядке набора - так же, как при
+    последовательном присваивании df[name] = ...
+
+    Параметры:
+    - df: исходные данные
+    - features: список (имя колонки, Ref)
+    - engine: FeatureEngine над df (если нужно сохранить промежуточные ряды)
+
+    Возвращает:
+    - DataFrame
+    """
+    values = (engine or FeatureEngine(df)).compute(features)
+    existing = {name: value for name, value in values.items() if name in df.columns}
+    new = {name: value for name, value in values.items() if name not in df.columns}
+
+    result = df.assign(**existing) if existing else df.copy()
+    if new:
+        result = pd.concat([result, pd.DataFrame(new, index=df.index)], axis=1)
+    return result
+
+
+# Вес отброшенной истории EMA должен быть меньше квадрата машинного эпсилон,
+# чтобы расчет с разогревом совпадал с расчетом по всей истории
+EWM_WARMUP_BITS = 106
+
+
+def _own_lookback(node):
+    """
+    Сколько предыдущих значений зависимостей нужно узлу для одной точки.
+    """
+    params = dict(node.params)
+    if node.name in ('rolling_mean', 'rolling_std', 'rolling_max', 'rolling_min'):
+        return params['window'] - 1
+    if node.name == 'shift':
+        return abs(params['periods'])
+    if node.name in ('pct_change', 'diff'):
+        return 1
+    if node.name == 'ewm_mean':
+        alpha = 2.0 / (params['span'] + 1.0)
+        return math.ceil(EWM_WARMUP_BITS * math.log(2) / -math.log1p(-alpha))
+    return 0
+
+
+def warmup_length(features):
+    """
+    Длина разогрева: сколько свечей перед блоком нужно, чтобы признаки
+    блока совпали с расчетом по всей истории (окна складываются по цепочке
+    зависимостей, для EMA - пока вес отброшенной истории не станет пренебрежимым).
+
+    Параметры:
+    - features: список (имя колонки, Ref)
+
+    Возвращает:
+    - количество свечей
+    """
+    lookback = {}
+    for node in _stream_order(features):
+        lookback[node] = _own_lookback(node) + max(
+            (lookback[dependency] for dependency in dependencies(node)), default=0)
+    return max((lookback[node] for _, node in features), default=0)
+
+
+# --- Инкрементальный расчет --------------------------------------------------
+#
+# Для каждого узла с состоянием есть потоковый аналог: prime() переносит
+# состояние из пакетного расчета (последние значения окна, вес EMA),
+# step() считает значение узла для одной новой свечи.
+
+STREAMING = {}
+
+
+def streaming(name):
+    """
+    Декоратор регистрации потокового аналога индикатора.
+    """
+    def decorator(cls):
+        STREAMING[name] = cls
+        return cls
+    return decorator
+
+
+class _WindowState:
+    """Кольцевой буфер последних window значений с учетом NaN."""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.nan_count = 0
+
+    def push(self, value):
+        if len(self.values) == self.window and math.isnan(self.values[0]):
+            self.nan_count -= 1
+        if math.isnan(value):
+            self.nan_count += 1
+        self.values.append(value)
+        # Как rolling(window) с min_periods=window: нужно полное окно без NaN
+        return len(self.values) == self.window and self.nan_count == 0
+
+    def prime(self, source):
+        for value in source[-self.window:]:
+            self.push(float(value))
+
+
+@streaming('pct_change')
+class _PctChangeStream:
+    def __init__(self):
+        self.prev = np.nan
+
+    def prime(self, inputs, output):
+        if len(inputs['source']):
+            self.prev = np.float64(inputs['source'][-1])
+
+    def step(self, source):
+        value = source / self.prev - 1
+        self.prev = source
+        return value
+
+
+@streaming('diff')
+class _DiffStream(_PctChangeStream):
+    def step(self, source):
+        value = source - self.prev
+        self.prev = source
+        return value
+
+
+@streaming('shift')
+class _ShiftStream:
+    def __init__(self, periods):
+        self.values = deque([np.nan] * periods, maxlen=periods)
+
+    def prime(self, inputs, output):
+        for value in inputs['source'][-self.values.maxlen:]:
+            self.values.append(np.float64(value))
+
+    def step(self, source, periods):
+        value = self.values[0]
+        self.values.append(source)
+        return value
+
+
+@streaming('abs')
+class _AbsStream:
+    def step(self, source):
+        return np.abs(source)
+
+
+@streaming('gains')
+class _GainsStream:
+    def step(self, source):
+        return source if source > 0 else np.float64(0)
+
+
+@streaming('losses')
+class _LossesStream:
+    def step(self, source):
+        return -(source if source < 0 else np.float64(0))
+
+
+@streaming('rsi')
+class _RsiStream:
+    def step(self, avg_gains, avg_losses, loss_floor=None):
+        if loss_floor is not None and avg_losses == 0:
+            avg_losses = np.float64(loss_floor)
+        return 100 - (100 / (1 + avg_gains / avg_losses))
+
+
+class _RollingStream:
+    def __init__(self, window):
+        self.state = _WindowState(window)
+
+    def prime(self, inputs, output):
+        self.state.prime(inputs['source'])
+
+    def step(self, source, window):
+        if not self.state.push(float(source)):
+            return np.float64(np.nan)
+        return np.float64(self.aggregate(self.state.values))
+
+
+@streaming('rolling_mean')
+class _RollingMeanStream(_RollingStream):
+    def aggregate(self, values):
+        return math.fsum(values) / len(values)
+
+
+@streaming('rolling_std')
+class _RollingStdStream(_RollingStream):
+    def aggregate(self, values):
+        n = len(values)
+        if n < 2:
+            return np.nan
+        mean = math.fsum(values) / n
+        return math.sqrt(math.fsum((v - mean) ** 2 for v in values) / (n - 1))
+
+
+class _ExtremaWindowStream:
+    """
+    Окно из общего RollingExtremaState: все окна одного ряда обновляются
+    одной монотонной очередью, значение добавляется один раз на свечу.
+    """
+
+    def __init__(self, shared, window, engine):
+        self.shared = shared
+        self.window = window
+        self.engine = engine
+
+    def prime(self, inputs, output):
+        if self.shared.index < 0:
+            self.shared.prime(inputs['source'])
+
+    def step(self, source, window):
+        if self.shared.row != self.engine.rows:
+            self.shared.push(source)
+            self.shared.row = self.engine.rows
+        return np.float64(self.shared.get(self.window))
+
+
+@streaming('ewm_mean')
+class _EwmMeanStream:
+    """Повторяет алгоритм pandas ewm().mean() (ignore_na=False, min_periods=0)."""
+
+    def __init__(self, span, adjust=True):
+        alpha = 2.0 / (span + 1.0)
+        self.factor = 1.0 - alpha
+        self.new_weight = 1.0 if adjust else alpha
+        self.adjust = adjust
+        self.weighted = np.nan
+        self.old_weight = 1.0
+
+    def prime(self, inputs, output):
+        source = np.asarray(inputs['source'], dtype=np.float64)
+        observed = ~np.isnan(source)
+        if not observed.any():
+            return
+        self.weighted = np.float64(output[-1])
+        if not self.adjust:
+            return
+
+        # Вес истории не зависит от значений: считаем его с первого наблюдения
+        # до сходимости к неподвижной точке (дальше он не меняется)
+        start = int(np.argmax(observed))
+        nan_positions = np.flatnonzero(~observed[start:])
+        last_nan = start + nan_positions[-1] if len(nan_positions) else start
+        weight = 1.0
+        for i in range(start + 1, len(source)):
+            new = weight * self.factor
+            if observed[i]:
+                new += self.new_weight
+            if new == weight and i > last_nan:
+                break
+            weight = new
+        self.old_weight = weight
+
+    def step(self, source, span, adjust=True):
+        observed = not math.isnan(source)
+        if not math.isnan(self.weighted):
+            self.old_weight *= self.factor
+            if observed:
+                if self.weighted != source:
+                    self.weighted = (self.old_weight * self.weighted + self.new_weight * source) / (self.old_weight + self.new_weight)
+                if self.adjust:
+                    self.old_weight += self.new_weight
+                else:
+                    self.old_weight = 1.0
+        elif observed:
+            self.weighted = source
+        return np.float64(self.weighted)
+
+
+class _ElementwiseStream:
+    """Узел без состояния: та же формула, что и в пакетном расчете."""
+
+    def __init__(self, func):
+        self.func = func
+
+    def step(self, **params):
+        return self.func(**params)
+
+
+def _stream_order(features):
+    """
+    Узлы набора в порядке зависимостей (исходные колонки - первыми).
+    """
+    order = []
+    seen = set()
+
+    def visit(node):
+        if node in seen:
+            return
+        seen.add(node)
+        for dependency in dependencies(node):
+            visit(dependency)
+        order.append(node)
+
+    for _, node in features:
+        visit(node)
+    return order
+
+
+class IncrementalFeatureEngine:
+    """
+    Инкрементальный расчет набора признаков для новых свечей.
+
+    Состояние каждого узла (кольцевые буферы окон, текущие значения EMA,
+    суммы прибылей/убытков для RSI через их окна) переносится из пакетного
+    расчета по истории, после чего добавление N свечей стоит O(N x признаки)
+    вместо пересчета всей истории.
+    """
+
+    def __init__(self, features):
+        """
+        Параметры:
+        - features: список (имя колонки, Ref)
+        """
+        self.features = list(features)
+        self.order = _stream_order(self.features)
+        self.columns = [dict(node.params)['name'] for node in self.order if node.name == 'column']
+        self.streams = {}
+        self.rows = 0
+        # Признаки последней обработанной свечи (None - свечей не было)
+        self.last = None
+        for (_, mode), nodes in _extrema_groups(self.order).items():
+            windows = [dict(node.params)['window'] for node in nodes]
+            shared = RollingExtremaState(windows, mode)
+            shared.row = None
+            for node, window in zip(nodes, windows):
+                self.streams[node] = _ExtremaWindowStream(shared, window, self)
+        for node in self.order:
+            if node.name == 'column' or node in self.streams:
+                continue
+            if node.name in STREAMING:
+                params = {key: val for key, val in node.params if not isinstance(val, Ref)}
+                init_params = {key: params[key] for key in ('window', 'periods', 'span', 'adjust') if key in params}
+                self.streams[node] = STREAMING[node.name](**init_params)
+            elif node.name in INDICATORS:
+                self.streams[node] = _ElementwiseStream(INDICATORS[node.name])
+            else:
+                raise ValueError(f"Неизвестный индикатор: {node.name}")
+
+    @classmethod
+    def from_engine(cls, engine, features):
+        """
+        Создает инкрементальный движок с состоянием на конец данных engine.
+
+        Параметры:
+        - engine: FeatureEngine, в котором набор уже вычислен
+        - features: список (имя колонки, Ref)
+        """
+        incremental = cls(features)
+        engine.compute(incremental.features)
+        for node, stream in incremental.streams.items():
+            if hasattr(stream, 'prime'):
+                inputs = {key: engine.get(val).to_numpy(dtype=np.float64)
+                          for key, val in node.params if isinstance(val, Ref)}
+                stream.prime(inputs, engine.get(node).to_numpy(dtype=np.float64))
+        incremental.rows = len(engine.data)
+        if incremental.rows:
+            incremental.last = {name: float(engine.get(ref).iloc[-1]) for name, ref in incremental.features}
+        return incremental
+
+    @classmethod
+    def from_frame(cls, data, features):
+        """
+        Создает инкрементальный движок по истории свечей.
+        """
+        return cls.from_engine(FeatureEngine(data), features)
+
+    def update(self, candle):
+        """
+        Считает признаки для одной новой свечи.
+
+        Параметры:
+        - candle: словарь или Series с исходными колонками
+
+        Возвращает:
+        - словарь {имя признака: значение}
+        """
+        values = {}
+        with np.errstate(all='ignore'):
+            for node in self.order:
+                if node.name == 'column':
+                    values[node] = np.float64(candle[dict(node.params)['name']])
+                    continue
+                params = {key: values[val] if isinstance(val, Ref) else val for key, val in node.params}
+                values[node] = self.streams[node].step(**params)
+        self.rows += 1
+        self.last = {name: float(values[node]) for name, node in self.features}
+        return self.last
+
+    def append(self, candles):
+        """
+        Считает признаки для нескольких новых свечей.
+
+        Параметры:
+        - candles: DataFrame с исходными колонками
+
+        Возвращает:
+        - DataFrame признаков с индексом candles
+        """
+        rows = [self.update(candle) for candle in candles[self.columns].to_dict('records')]
+        return pd.DataFrame(rows, index=candles.index, columns=[name for name, _ in self.features])
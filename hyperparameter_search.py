@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Параллельный подбор гиперпараметров моделей ZigZagMLModel.
+
+Кандидаты параметров выбираются случайно из пространства поиска своей
+модели (SEARCH_SPACES или JSON-файл). Каждая пара кандидат × фолд
+кросс-валидации - отдельная задача пула процессов model_tournament:
+масштабированная матрица признаков кладется в разделяемую память один раз
+на весь поиск.
+
+Методы:
+- 'random' - все кандидаты оцениваются на полных обучающих окнах;
+- 'halving' - последовательное деление: кандидаты сначала обучаются на
+  последних 1/factor^k строк каждого обучающего окна, на следующий шаг
+  проходит лучшая 1/factor часть кандидатов каждой модели, доля строк
+  растет в factor раз до полной.
+
+Каталог поиска:
+- search.json - настройки поиска (при продолжении должны совпадать);
+- trials.jsonl - журнал: параметры, оценки фолдов и время каждого кандидата
+  на каждом шаге. Строка дописывается сразу после оценки кандидата, поэтому
+  прерванный поиск продолжается без повторных обучений;
+- features.npz и scaler.pkl - масштабированная матрица признаков и scaler,
+  общие для всех кандидатов и повторных запусков;
+- best_params.json - лучшие параметры каждой модели (для zigzag_ml_model --params).
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import as_completed
+from contextlib import ExitStack
+
+import joblib
+import numpy as np
+from scipy.stats import loguniform, randint, uniform
+from sklearn.base import clone
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import ParameterSampler, TimeSeriesSplit, check_cv
+
+from model_backends import BACKENDS, build_models
+from model_tournament import fit_job, fit_pool
+from data_schema import PROFILES
+from walk_forward import DEFAULT_EMBARGO, WalkForwardSplit, contiguous_rows
+
+SEARCH_METHODS = ('random', 'halving')
+DEFAULT_SEARCH_DIR = "processed_data/hpo"
+
+# Пространства поиска по названиям моделей model_backends.build_models
+SEARCH_SPACES = {
+    'Random Forest': {
+        'n_estimators': [100, 200, 400],
+        'max_depth': [None, 8, 16, 32],
+        'min_samples_leaf': [1, 5, 20, 50],
+        'max_features': ['sqrt', 0.3, 0.6],
+    },
+    'Gradient Boosting': {
+        'n_estimators': [100, 200, 300],
+        'learning_rate': loguniform(0.01, 0.3),
+        'max_depth': [2, 3, 5],
+        'subsample': uniform(0.5, 0.5),
+    },
+    'Hist Gradient Boosting': {
+        'learning_rate': loguniform(0.01, 0.3),
+        'max_leaf_nodes': [15, 31, 63, 127],
+        'min_samples_leaf': [20, 50, 100, 200],
+        'l2_regularization': loguniform(1e-4, 10),
+    },
+    'Logistic Regression': {
+        'C': loguniform(1e-3, 100),
+    },
+}
+
+
+def parse_search_space(spec):
+    """
+    Пространство поиска из JSON-описания.
+
+    Значение параметра - список вариантов или распределение:
+    {"log-uniform": [a, b]}, {"uniform": [a, b]}, {"int": [a, b]} (b включительно).
+
+    Параметры:
+    - spec: словарь {модель: {параметр: описание}}
+
+    Возвращает:
+    - словарь в формате SEARCH_SPACES
+    """
+    distributions = {
+        'log-uniform': lambda a, b: loguniform(a, b),
+        'uniform': lambda a, b: uniform(a, b - a),
+        'int': lambda a, b: randint(a, b + 1),
+    }
+    spaces = {}
+    for model, params in spec.items():
+        spaces[model] = {}
+        for name, value in params.items():
+            if isinstance(value, dict):
+                if len(value) != 1 or next(iter(value)) not in distributions:
+                    raise ValueError(f"{model}.{name}: ожидается одно из {', '.join(distributions)}")
+                kind, (low, high) = next(iter(value.items()))
+                spaces[model][name] = distributions[kind](low, high)
+            elif isinstance(value, list) and value:
+                spaces[model][name] = value
+            else:
+                raise ValueError(f"{model}.{name}: ожидается непустой список или распределение")
+    return spaces
+
+
+def load_search_space(path):
+    """
+    Загружает пространство поиска из JSON-файла (см. parse_search_space).
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_search_space(json.load(f))
+
+
+def _jsonable(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _describe_space(space):
+    """
+    Описание пространства для сравнения настроек при продолжении поиска.
+    """
+    described = {}
+    for name, value in sorted(space.items()):
+        if hasattr(value, 'rvs'):
+            described[name] = f"{value.dist.name}{tuple(_jsonable(v) for v in value.args)}"
+        else:
+            described[name] = [_jsonable(v) for v in value]
+    return described
+
+
+def _tail_rows(rows, fraction):
+    """
+    Последние строки обучающего окна (самые свежие свечи).
+    """
+    if fraction >= 1:
+        return rows
+    if isinstance(rows, slice):
+        size = max(1, math.ceil((rows.stop - rows.start) * fraction))
+        return slice(rows.stop - size, rows.stop)
+    size = max(1, math.ceil(len(rows) * fraction))
+    return rows[-size:]
+
+
+class HyperparameterSearch:
+    """
+    Случайный поиск или последовательное деление с журналом на диске.
+    """
+
+    def __init__(self, models, search_dir=DEFAULT_SEARCH_DIR, spaces=None, method='random', n_iter=20,
+                 factor=3, cv=5, scoring='balanced_accuracy', workers=1, random_state=42):
+        """
+        Параметры:
+        - models: словарь {название: модель sklearn} (например, build_models)
+        - search_dir: каталог журнала и кеша признаков
+        - spaces: пространства поиска {название: {параметр: варианты}}
+          (по умолчанию SEARCH_SPACES); модели без пространства пропускаются
+        - method: 'random' или 'halving'
+        - n_iter: кандидатов на модель
+        - factor: во сколько раз сокращается число кандидатов на шаге halving
+        - cv: число фолдов или разбиение (например, WalkForwardSplit)
+        - scoring: оценка sklearn; по умолчанию balanced_accuracy, так как
+          точность почти не различает модели при редких вершинах
+        - workers: количество процессов (1 - без процессов, None - число ядер)
+        - random_state: зерно выбора кандидатов
+        """
+        if method not in SEARCH_METHODS:
+            raise ValueError(f"Неизвестный метод поиска: {method} (доступны: {', '.join(SEARCH_METHODS)})")
+        if factor < 2:
+            raise ValueError("factor должен быть не меньше 2")
+        spaces = SEARCH_SPACES if spaces is None else spaces
+        self.models = {name: model for name, model in models.items() if spaces.get(name)}
+        self.spaces = {name: spaces[name] for name in self.models}
+        self.search_dir = str(search_dir)
+        self.method = method
+        self.n_iter = int(n_iter)
+        self.factor = int(factor)
+        self.cv = cv
+        self.scoring = scoring
+        self.workers = workers or (os.cpu_count() or 1)
+        self.random_state = random_state
+        self.log_path = os.path.join(self.search_dir, 'trials.jsonl')
+        self.config_path = os.path.join(self.search_dir, 'search.json')
+        self.trials = {}
+        self.records = {}
+
+    def candidates(self):
+        """
+        Кандидаты всех моделей; выбор детерминирован random_state.
+
+        Возвращает:
+        - словарь {id кандидата: (модель, параметры)}
+        """
+        trials = {}
+        for name in self.models:
+            sampler = ParameterSampler(self.spaces[name], n_iter=self.n_iter, random_state=self.random_state)
+            with warnings.catch_warnings():
+                # Сетка меньше n_iter - берутся все ее варианты
+                warnings.simplefilter('ignore', UserWarning)
+                sampled = list(sampler)
+            for k, params in enumerate(sampled):
+                trials[f"{name}#{k}"] = (name, {key: _jsonable(value) for key, value in params.items()})
+        return trials
+
+    def rungs(self):
+        """
+        Доли обучающих строк по шагам поиска.
+        """
+        if self.method == 'random' or self.n_iter < self.factor:
+            return [1.0]
+        steps = int(math.floor(math.log(self.n_iter, self.factor) + 1e-9))
+        return [self.factor ** (k - steps) for k in range(steps + 1)]
+
+    def config(self, n_samples):
+        return {
+            'method': self.method,
+            'n_iter': self.n_iter,
+            'factor': self.factor,
+            'cv': repr(self.cv),
+            'scoring': self.scoring,
+            'random_state': self.random_state,
+            'n_samples': int(n_samples),
+            'spaces': {name: _describe_space(space) for name, space in self.spaces.items()},
+        }
+
+    def _open_log(self, n_samples):
+        """
+        Создает каталог поиска или проверяет, что журнал от тех же настроек.
+        """
+        os.makedirs(self.search_dir, exist_ok=True)
+        config = self.config(n_samples)
+        if os.path.exists(self.config_path):
+            with open(self.config_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            if saved != config:
+                changed = sorted(key for key in set(saved) | set(config) if saved.get(key) != config.get(key))
+                raise ValueError(f"Журнал в {self.search_dir} создан с другими настройками ({', '.join(changed)}); "
+                                 f"укажите другой каталог или удалите старый")
+        else:
+            with open(self.config_path, 'w', encoding='utf-8') as f:
+                json.dump(config, f, ensure_ascii=False, indent=2)
+
+        self.records = {}
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+            valid = []
+            for line in lines:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Недописанная строка прерванного запуска
+                    continue
+                valid.append(line if line.endswith('\n') else line + '\n')
+                self.records[(record['trial'], record['rung'])] = record
+            if valid != lines:
+                # Убираем оборванные строки, чтобы новые записи не склеились с ними
+                tmp_path = self.log_path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.writelines(valid)
+                os.replace(tmp_path, self.log_path)
+
+    def _write(self, record):
+        self.records[(record['trial'], record['rung'])] = record
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def run(self, X, y):
+        """
+        Выполняет поиск (продолжает, если журнал уже есть).
+
+        Параметры:
+        - X: масштабированная матрица признаков
+        - y: метки
+
+        Возвращает:
+        - словарь {модель: лучшая запись журнала} на последнем шаге
+        """
+        X = np.ascontiguousarray(X)
+        y = np.asarray(y)
+        self._open_log(len(y))
+        splits = [(contiguous_rows(train_idx), contiguous_rows(test_idx))
+                  for train_idx, test_idx in check_cv(self.cv, y, classifier=True).split(X, y)]
+        scorer = get_scorer(self.scoring)
+        self.trials = self.candidates()
+        rungs = self.rungs()
+
+        print(f"Поиск гиперпараметров: {self.method}, моделей: {len(self.models)}, "
+              f"кандидатов на модель: {self.n_iter}, фолдов: {len(splits)}, процессов: {self.workers}")
+        if self.records:
+            print(f"✓ Журнал найден, уже оценено: {len(self.records)}")
+
+        started = time.perf_counter()
+        alive = list(self.trials)
+        with ExitStack() as stack:
+            # Один пул и одна копия матрицы в разделяемой памяти на весь поиск
+            executor = stack.enter_context(fit_pool(X, y, self.workers)) if self.workers > 1 else None
+            for rung, fraction in enumerate(rungs):
+                todo = [trial for trial in alive if (trial, rung) not in self.records]
+                print(f"\nШаг {rung + 1}/{len(rungs)}: доля строк {fraction:.3f}, кандидатов {len(alive)}, "
+                      f"осталось оценить {len(todo)}")
+                self._evaluate(todo, rung, fraction, splits, scorer, X, y, executor)
+                if rung + 1 < len(rungs):
+                    alive = self._select(alive, rung)
+
+        best = self.best()
+        print(f"\n✓ Поиск завершен за {time.perf_counter() - started:.1f} с")
+        return best
+
+    def _evaluate(self, trials, rung, fraction, splits, scorer, X, y, executor):
+        """
+        Оценивает кандидатов на фолдах и пишет результаты в журнал.
+        """
+        folds = [(_tail_rows(train_rows, fraction), test_rows) for train_rows, test_rows in splits]
+        pending = {trial: [None] * len(folds) for trial in trials}
+
+        def finish(trial):
+            name, params = self.trials[trial]
+            jobs = pending.pop(trial)
+            errors = [job['error'] for job in jobs if 'error' in job]
+            scores = [job['score'] for job in jobs if 'error' not in job]
+            record = {
+                'trial': trial, 'model': name, 'params': params, 'rung': rung, 'resource': fraction,
+                'fold_scores': scores, 'score': float(np.mean(scores)) if not errors else None,
+                'fit_time': round(sum(job['fit_time'] for job in jobs), 4),
+                'cpu_time': round(sum(job['cpu_time'] for job in jobs), 4),
+            }
+            if errors:
+                record['error'] = errors[0]
+            self._write(record)
+            status = f"{record['score']:.4f}" if record['score'] is not None else f"ошибка: {record['error']}"
+            print(f"  {trial}: {status} ({record['fit_time']:.1f} с)")
+
+        def collect(trial, fold, job):
+            pending[trial][fold] = job
+            if all(job is not None for job in pending[trial]):
+                finish(trial)
+
+        def failed(error):
+            return {'error': str(error), 'fit_time': 0.0, 'cpu_time': 0.0}
+
+        jobs = [(trial, fold) for trial in trials for fold in range(len(folds))]
+        estimators = {trial: clone(self.models[self.trials[trial][0]]).set_params(**self.trials[trial][1])
+                      for trial in trials}
+        if executor is None:
+            for trial, fold in jobs:
+                try:
+                    job = fit_job(estimators[trial], *folds[fold], X, y, scorer=scorer)
+                except Exception as e:
+                    job = failed(e)
+                collect(trial, fold, job)
+            return
+
+        futures = {executor.submit(fit_job, estimators[trial], *folds[fold], scorer=scorer): (trial, fold)
+                   for trial, fold in jobs}
+        for future in as_completed(futures):
+            trial, fold = futures[future]
+            try:
+                job = future.result()
+            except Exception as e:
+                job = failed(e)
+            collect(trial, fold, job)
+
+    def _select(self, trials, rung):
+        """
+        Лучшая 1/factor часть кандидатов каждой модели для следующего шага.
+        """
+        selected = []
+        for name in self.models:
+            scored = [trial for trial in trials if self.trials[trial][0] == name]
+            scored.sort(key=lambda trial: self._score(trial, rung), reverse=True)
+            selected += scored[:max(1, len(scored) // self.factor)]
+        return selected
+
+    def _score(self, trial, rung):
+        score = self.records.get((trial, rung), {}).get('score')
+        return -np.inf if score is None else score
+
+    def best(self):
+        """
+        Лучший кандидат каждой модели на последнем оцененном шаге.
+
+        Возвращает:
+        - словарь {модель: запись журнала}, по убыванию оценки
+        """
+        best = {}
+        for record in self.records.values():
+            if record.get('score') is None or record['trial'] not in self.trials:
+                continue
+            current = best.get(record['model'])
+            if current is None or (record['rung'], record['score']) > (current['rung'], current['score']):
+                best[record['model']] = record
+        return dict(sorted(best.items(), key=lambda item: item[1]['score'], reverse=True))
+
+    def save_best_params(self, path=None):
+        """
+        Записывает лучшие параметры моделей в JSON {модель: параметры}.
+        """
+        path = path or os.path.join(self.search_dir, 'best_params.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({name: record['params'] for name, record in self.best().items()},
+                      f, ensure_ascii=False, indent=2)
+        return path
+
+
+def save_search_data(search_dir, key, X, y, scaler, feature_names):
+    """
+    Сохраняет масштабированную матрицу признаков и scaler для повторных запусков.
+
+    Параметры:
+    - search_dir: каталог поиска
+    - key: словарь, описывающий исходные данные и разделение
+    """
+    os.makedirs(search_dir, exist_ok=True)
+    path = os.path.join(search_dir, 'features.npz')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, X=np.asarray(X), y=np.asarray(y), feature_names=np.array(feature_names),
+                 key=np.array(json.dumps(key, sort_keys=True)))
+    os.replace(tmp_path, path)
+    joblib.dump(scaler, os.path.join(search_dir, 'scaler.pkl'))
+
+
+def load_search_data(search_dir, key):
+    """
+    Загружает кеш признаков, если он построен по тем же данным.
+
+    Возвращает:
+    - (X, y, scaler, feature_names) или None
+    """
+    path = os.path.join(search_dir, 'features.npz')
+    scaler_path = os.path.join(search_dir, 'scaler.pkl')
+    if not (os.path.exists(path) and os.path.exists(scaler_path)):
+        return None
+    with np.load(path, allow_pickle=False) as data:
+        if str(data['key']) != json.dumps(key, sort_keys=True):
+            return None
+        X, y, feature_names = data['X'], data['y'], [str(name) for name in data['feature_names']]
+    return X, y, joblib.load(scaler_path), feature_names
+
+
+def print_leaderboard(best):
+    """
+    Печатает лучших кандидатов моделей.
+    """
+    print(f"\n{'Модель':<24} {'оценка':>8} {'время, с':>9}  параметры")
+    print("-" * 80)
+    for name, record in best.items():
+        print(f"{name:<24} {record['score']:>8.4f} {record['fit_time']:>9.1f}  {record['params']}")
+
+
+def main(argv=None):
+    """
+    Подбор гиперпараметров из командной строки.
+
+    Возвращает:
+    - True, если поиск выполнен
+    """
+    # Импорт здесь: zigzag_ml_model сам импортирует этот модуль
+    from zigzag_ml_model import ZigZagMLModel
+
+    parser = argparse.ArgumentParser(description="Подбор гиперпараметров моделей вершин зигзага")
+    parser.add_argument('--data-file', default="processed_data/ml_data.csv",
+                        help="файл с признаками и метками зигзага")
+    parser.add_argument('--deviation', type=float, default=1.0,
+                        help="отклонение зигзага в процентах")
+    parser.add_argument('--dtype-profile', choices=PROFILES, default='compact',
+                        help="профиль типов данных при загрузке (по умолчанию compact)")
+    parser.add_argument('--backend', choices=BACKENDS, default='hist',
+                        help="набор моделей (по умолчанию hist)")
+    parser.add_argument('--models', default=None,
+                        help="модели через запятую (по умолчанию все модели набора)")
+    parser.add_argument('--method', choices=SEARCH_METHODS, default='halving',
+                        help="random - случайный поиск, halving - последовательное деление")
+    parser.add_argument('--n-iter', type=int, default=27,
+                        help="кандидатов на модель")
+    parser.add_argument('--factor', type=int, default=3,
+                        help="сокращение числа кандидатов на шаге halving")
+    parser.add_argument('--scoring', default='balanced_accuracy',
+                        help="оценка sklearn (например, balanced_accuracy, f1_macro, accuracy)")
+    parser.add_argument('--space', default=None,
+                        help="JSON-файл с пространствами поиска по моделям")
+    parser.add_argument('--search-dir', default=DEFAULT_SEARCH_DIR,
+                        help="каталог журнала и кеша признаков")
+    parser.add_argument('--refresh-features', action='store_true',
+                        help="пересчитать кеш признаков")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="процессов (по умолчанию 0 - число ядер)")
+    parser.add_argument('--cv', type=int, default=5,
+                        help="фолдов по времени (расширяющиеся окна)")
+    parser.add_argument('--wf-test-days', type=float, default=None,
+                        help="walk-forward: длина проверочного окна в днях (вместо --cv)")
+    parser.add_argument('--wf-train-days', type=float, default=None,
+                        help="walk-forward: длина обучающего окна в днях")
+    parser.add_argument('--wf-step-days', type=float, default=None,
+                        help="walk-forward: сдвиг окон в днях")
+    parser.add_argument('--embargo', type=int, default=DEFAULT_EMBARGO,
+                        help=f"свечей между обучением и проверкой (по умолчанию {DEFAULT_EMBARGO})")
+    args = parser.parse_args(argv)
+
+    print("Подбор гиперпараметров")
+    print("=" * 80)
+
+    try:
+        model = ZigZagMLModel(data_file=args.data_file, deviation=args.deviation, dtype_profile=args.dtype_profile)
+        X, y = model.search_data(args.search_dir, embargo=args.embargo, refresh=args.refresh_features)
+
+        models = build_models(args.backend)
+        if args.models:
+            names = [name.strip() for name in args.models.split(',')]
+            unknown = [name for name in names if name not in models]
+            if unknown:
+                print(f"❌ Неизвестные модели: {', '.join(unknown)} (доступны: {', '.join(models)})")
+                return False
+            models = {name: models[name] for name in names}
+
+        if args.wf_test_days:
+            cv = WalkForwardSplit.from_days(args.wf_test_days, args.wf_train_days, args.wf_step_days,
+                                            embargo=args.embargo)
+        else:
+            cv = TimeSeriesSplit(n_splits=args.cv, gap=args.embargo)
+
+        spaces = load_search_space(args.space) if args.space else None
+        search = HyperparameterSearch(models, args.search_dir, spaces=spaces, method=args.method,
+                                      n_iter=args.n_iter, factor=args.factor, cv=cv, scoring=args.scoring,
+                                      workers=args.workers or None)
+        best = search.run(X, y)
+        print_leaderboard(best)
+        path = search.save_best_params()
+
+        print("\n" + "=" * 80)
+        print(f"✓ Лучшие параметры сохранены: {path}")
+        print(f"💡 Обучение с ними: python zigzag_ml_model.py --params {path} --backend {args.backend}")
+        return True
+
+    except Exception as e:
+        print(f"❌ Ошибка: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Наборы моделей для турнира ZigZagMLModel.train_models.
+
+- 'sklearn' - Random Forest, Gradient Boosting и Logistic Regression;
+- 'hist' - Gradient Boosting заменен градиентным бустингом на гистограммах
+  (HistGradientBoostingClassifier). Он обучается в несколько потоков
+  (OpenMP), останавливается по проверочной части и взвешивает редкие
+  классы вершин -1/1 (class_weight='balanced');
+- 'all' - все четыре модели.
+
+Ранняя остановка проверяется на последних по времени строках обучающей
+выборки, а не на случайной части: строки идут подряд, и случайная часть
+соседствовала бы с обучающими свечами.
+"""
+
+import inspect
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+BACKENDS = ('sklearn', 'hist', 'all')
+
+# Явная проверочная выборка (X_val) появилась в новых версиях sklearn
+_FIT_ACCEPTS_VALIDATION = 'X_val' in inspect.signature(HistGradientBoostingClassifier.fit).parameters
+
+
+class TimeOrderedHistGradientBoosting(HistGradientBoostingClassifier):
+    """
+    HistGradientBoostingClassifier, у которого ранняя остановка проверяется
+    на последних validation_fraction строк обучающей выборки.
+    """
+
+    def fit(self, X, y, sample_weight=None, **kwargs):
+        if self.early_stopping is True and self.validation_fraction and _FIT_ACCEPTS_VALIDATION \
+                and 'X_val' not in kwargs:
+            y = np.asarray(y)
+            n_val = int(np.ceil(len(y) * self.validation_fraction))
+            split = len(y) - n_val
+            # Все классы проверочной части должны быть и в обучающей
+            if 0 < split < len(y) and np.isin(y[split:], y[:split]).all():
+                if sample_weight is not None:
+                    sample_weight = np.asarray(sample_weight)
+                    kwargs['sample_weight_val'] = sample_weight[split:]
+                    sample_weight = sample_weight[:split]
+                return super().fit(X[:split], y[:split], sample_weight=sample_weight,
+                                   X_val=X[split:], y_val=y[split:], **kwargs)
+        return super().fit(X, y, sample_weight=sample_weight, **kwargs)
+
+
+def hist_gradient_boosting(random_state=42, max_iter=500, learning_rate=0.1, validation_fraction=0.1,
+                           n_iter_no_change=10, class_weight='balanced'):
+    """
+    Градиентный бустинг на гистограммах с ранней остановкой.
+
+    Параметры:
+    - random_state: зерно
+    - max_iter: максимум итераций (деревьев на класс)
+    - learning_rate: шаг обучения
+    - validation_fraction: доля последних строк для ранней остановки
+    - n_iter_no_change: итераций без улучшения до остановки
+    - class_weight: веса классов ('balanced' - обратно частоте, None - без весов)
+    """
+    return TimeOrderedHistGradientBoosting(max_iter=max_iter, learning_rate=learning_rate,
+                                           early_stopping=True, validation_fraction=validation_fraction,
+                                           n_iter_no_change=n_iter_no_change, class_weight=class_weight,
+                                           random_state=random_state)
+
+
+def build_models(backend='sklearn', random_state=42):
+    """
+    Модели для турнира.
+
+    Параметры:
+    - backend: один из BACKENDS
+    - random_state: зерно моделей
+
+    Возвращает:
+    - словарь {название: модель sklearn}
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Неизвестный набор моделей: {backend} (доступны: {', '.join(BACKENDS)})")
+
+    models = {'Random Forest': RandomForestClassifier(n_estimators=100, random_state=random_state)}
+    if backend in ('sklearn', 'all'):
+        models['Gradient Boosting'] = GradientBoostingClassifier(n_estimators=100, random_state=random_state)
+    if backend in ('hist', 'all'):
+        models['Hist Gradient Boosting'] = hist_gradient_boosting(random_state=random_state)
+    models['Logistic Regression'] = LogisticRegression(random_state=random_state, max_iter=1000)
+    return models
@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Параллельный турнир моделей для ZigZagMLModel.
+
+Каждое обучение - модель на всей обучающей выборке и модель на каждом фолде
+кросс-валидации - отдельная задача. Задачи всех моделей выполняются вместе
+в пуле процессов. Масштабированная матрица признаков и метки один раз
+кладутся в разделяемую память (multiprocessing.shared_memory). Процессы
+подключаются к ним по имени и берут строки фолда по индексам, так что
+матрица не копируется в каждую задачу. Для задачи замеряются время по часам
+и процессорное время ее процесса.
+
+Без итогового обучения (refit=False) модели фолдов сохраняются, а их
+предсказания на проверочных строках собираются в out-of-fold (OOF)
+вероятности. Итоговой моделью становится FoldEnsemble, который усредняет
+модели фолдов, так что модель не обучается заново на всей выборке.
+
+При warm_start фолды модели, поддерживающей warm_start, обучаются цепочкой
+в одной задаче: следующий фолд продолжает модель предыдущего (линейные
+модели - с прежних коэффициентов, ансамбли - добавляя деревья). Цепочки
+можно резать на отрезки по chain_length фолдов, чтобы они шли параллельно.
+"""
+
+import copy
+import os
+import time
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.model_selection import check_cv
+from threadpoolctl import threadpool_limits
+
+from walk_forward import check_forward_splits, contiguous_rows
+
+FULL_FIT = -1
+# Доля n_estimators, которую ансамбль добавляет на каждом следующем фолде при warm start
+WARM_START_GROWTH = 0.25
+
+
+class SharedArray:
+    """
+    Копия массива NumPy в разделяемой памяти.
+    """
+
+    def __init__(self, array):
+        """
+        Параметры:
+        - array: массив, который нужно разделить между процессами
+        """
+        array = np.ascontiguousarray(array)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        self.array = np.ndarray(array.shape, dtype=array.dtype, buffer=self.shm.buf)
+        self.array[...] = array
+
+    @property
+    def descriptor(self):
+        """
+        Описание для подключения из другого процесса: (имя, форма, тип).
+        """
+        return self.shm.name, self.array.shape, self.array.dtype.str
+
+    @staticmethod
+    def attach(descriptor):
+        """
+        Подключается к массиву по описанию.
+
+        Возвращает:
+        - (SharedMemory, массив); SharedMemory нужно держать, пока используется массив
+        """
+        name, shape, dtype = descriptor
+        shm = shared_memory.SharedMemory(name=name)
+        return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+    def close(self):
+        """
+        Освобождает разделяемую память.
+        """
+        self.array = None
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_worker_data = None
+
+
+def _init_fit_worker(X_descriptor, y_descriptor, threads):
+    """
+    Инициализация процесса: подключение к матрице признаков и меткам и
+    ограничение потоков OpenMP/BLAS, чтобы процессы не делили ядра.
+    """
+    global _worker_data
+    x_shm, X = SharedArray.attach(X_descriptor)
+    y_shm, y = SharedArray.attach(y_descriptor)
+    limits = threadpool_limits(limits=threads)
+    _worker_data = (X, y, (x_shm, y_shm, limits))
+
+
+@contextmanager
+def fit_pool(X, y, workers):
+    """
+    Пул процессов, в котором X и y лежат в разделяемой памяти.
+
+    Задачи fit_job и fit_chain в этом пуле вызываются без X и y. Потоки
+    OpenMP/BLAS делятся между процессами поровну.
+
+    Параметры:
+    - X: матрица признаков
+    - y: метки
+    - workers: количество процессов
+    """
+    with SharedArray(X) as shared_X, SharedArray(y) as shared_y:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_fit_worker,
+                                 initargs=(shared_X.descriptor, shared_y.descriptor, threads)) as executor:
+            yield executor
+
+
+def continue_model(model, estimator, growth=WARM_START_GROWTH):
+    """
+    Готовит обученную модель к продолжению обучения на следующем фолде.
+
+    Параметры:
+    - model: обученная модель с параметром warm_start (изменяется)
+    - estimator: исходная модель; ансамбль растет на долю ее n_estimators
+      (у HistGradientBoostingClassifier - max_iter)
+    - growth: доля исходного размера, которую ансамбль добавляет за фолд
+    """
+    model.set_params(warm_start=True)
+    params = estimator.get_params()
+    # Бустинг на гистограммах растет по max_iter, остальные ансамбли - по n_estimators
+    size = 'max_iter' if isinstance(estimator, HistGradientBoostingClassifier) else 'n_estimators'
+    if size in params:
+        model.set_params(**{size: model.get_params()[size] + max(1, int(params[size] * growth))})
+    return model
+
+
+def class_proba(model, X):
+    """
+    Вероятности модели по столбцу на каждый класс model.classes_.
+
+    HistGradientBoostingClassifier, обученный на одном классе, возвращает
+    два столбца при одном классе в classes_; лишние столбцы отбрасываются.
+    """
+    return model.predict_proba(X)[:, :len(model.classes_)]
+
+
+def fit_job(estimator, train_idx=None, test_idx=None, X=None, y=None, keep_model=False, warm_from=None,
+            return_model=False, scorer=None, error_score='raise'):
+    """
+    Обучает копию модели на строках train_idx и оценивает на test_idx.
+
+    Параметры:
+    - estimator: модель sklearn (не изменяется)
+    - train_idx: индексы или срез обучающих строк (None - все строки)
+    - test_idx: индексы или срез проверочных строк (None - без оценки)
+    - X, y: данные (None - данные процесса из разделяемой памяти)
+    - keep_model: вернуть модель фолда и ее вероятности на test_idx
+    - warm_from: обученная модель, которую нужно продолжить вместо новой копии
+      estimator (изменяется)
+    - return_model: вернуть обученную модель без вероятностей (для warm start)
+    - scorer: оценка sklearn (sklearn.metrics.get_scorer); None - model.score (точность)
+    - error_score: 'raise' - ошибка обучения фолда прерывает задачу; число
+      (например, np.nan) - оценка фолда при ошибке, как error_score у
+      cross_val_score. Ошибка обучения на всей выборке прерывает задачу всегда
+
+    Возвращает:
+    - словарь: 'model' (обученная модель без test_idx, при keep_model или
+      return_model), 'score', 'proba' (вероятности на test_idx при keep_model),
+      'fit_time' (секунды по часам), 'cpu_time' (процессорные секунды);
+      при ошибке обучения фолда - 'error' (текст ошибки), модели нет; при
+      keep_model и error_score ошибкой считается и фолд с одним классом в
+      обучающих строках
+    """
+    if X is None:
+        X, y = _worker_data[:2]
+    rows = slice(None) if train_idx is None else train_idx
+
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+
+    def failed(error):
+        return {
+            'model': None,
+            'score': float(error_score),
+            'proba': None,
+            'error': error,
+            'fit_time': time.perf_counter() - wall_started,
+            'cpu_time': time.process_time() - cpu_started,
+        }
+
+    model = clone(estimator) if warm_from is None else continue_model(warm_from, estimator)
+    try:
+        model.fit(X[rows], y[rows])
+    except Exception as e:
+        if error_score == 'raise' or test_idx is None:
+            raise
+        # Например, в раннем окне разбиения по времени есть только один класс
+        return failed(f"{type(e).__name__}: {e}")
+    if keep_model and test_idx is not None and error_score != 'raise' and len(model.classes_) < 2:
+        # Модель одного класса не дает вероятностей для OOF и ансамбля фолдов
+        return failed(f"в обучающих строках только класс {model.classes_[0]}")
+    score = proba = None
+    if test_idx is not None and scorer is not None:
+        score = float(scorer(model, X[test_idx], y[test_idx]))
+        if keep_model:
+            proba = class_proba(model, X[test_idx])
+    elif test_idx is not None and keep_model:
+        # Предсказание по вероятностям, чтобы не считать их дважды
+        proba = class_proba(model, X[test_idx])
+        score = float(np.mean(model.classes_[proba.argmax(axis=1)] == y[test_idx]))
+    elif test_idx is not None:
+        score = float(model.score(X[test_idx], y[test_idx]))
+    return {
+        'model': model if test_idx is None or keep_model or return_model else None,
+        'score': score,
+        'proba': proba,
+        'fit_time': time.perf_counter() - wall_started,
+        'cpu_time': time.process_time() - cpu_started,
+    }
+
+
+def fit_chain(estimator, folds, X=None, y=None, keep_model=False, warm_start=False, error_score='raise'):
+    """
+    Обучает фолды по порядку в одной задаче.
+
+    Параметры:
+    - estimator: модель sklearn (не изменяется)
+    - folds: список (train_idx, test_idx), см. fit_job
+    - X, y: данные (None - данные процесса из разделяемой памяти)
+    - keep_model: вернуть модели фолдов и их вероятности
+    - warm_start: каждый следующий фолд продолжает модель предыдущего
+      (после ошибки обучения фолда цепочка начинается заново)
+    - error_score: см. fit_job
+
+    Возвращает:
+    - список результатов fit_job в порядке folds
+    """
+    results = []
+    previous = None
+    for train_idx, test_idx in folds:
+        if previous is not None and keep_model:
+            # Модель предыдущего фолда возвращается как есть, продолжается копия
+            previous = copy.deepcopy(previous)
+        job = fit_job(estimator, train_idx, test_idx, X, y, keep_model=keep_model, warm_from=previous,
+                      return_model=warm_start, error_score=error_score)
+        if warm_start:
+            previous = job['model']
+        if not keep_model and test_idx is not None:
+            job['model'] = None
+        results.append(job)
+    return results
+
+
+def run_tournament(models, X, y, cv=5, workers=1, refit=True, warm_start=False, chain_length=None):
+    """
+    Обучает модели на фолдах кросс-валидации и, при refit, на всей выборке.
+
+    Фолды те же, что у cross_val_score(cv=cv), поэтому оценки совпадают с
+    последовательным расчетом. Как и у cross_val_score(error_score=np.nan),
+    фолд, на котором модель не обучилась, получает оценку NaN, а турнир
+    продолжается.
+
+    Параметры:
+    - models: словарь {название: модель sklearn}
+    - X: масштабированная матрица признаков
+    - y: метки
+    - cv: число фолдов или разбиение sklearn
+    - workers: количество процессов (1 - без процессов, None - число ядер);
+      потоки моделей (OpenMP/BLAS) делятся между процессами поровну
+    - refit: обучить итоговую модель на всей выборке; без него итоговая
+      модель - FoldEnsemble из моделей фолдов, и собираются OOF-вероятности
+    - warm_start: фолды моделей с параметром warm_start продолжают модель
+      предыдущего фолда; только для разбиения по времени, иначе ValueError
+      (см. walk_forward.check_forward_splits)
+    - chain_length: фолдов в одной цепочке warm start (None - все фолды модели)
+
+    Возвращает:
+    - словарь {название: {'model', 'cv_scores', 'jobs', 'fit_time', 'cpu_time',
+      'wall_time', 'fold_fit_time', 'fold_cpu_time', 'oof_fold'}}; fit_time и
+      cpu_time - суммы по задачам модели, wall_time - время от начала турнира
+      до завершения последней задачи модели, oof_fold - номер фолда, в котором
+      строка была проверочной (-1 - ни в одном, при перекрытии окон - последний).
+      Без refit добавляются
+      'classes', 'fold_models', 'oof_proba', 'oof_pred' и 'oof_score'; у фолда
+      без модели (ошибка или один класс в обучающих строках) модель None,
+      оценка и OOF-вероятности его строк - NaN, oof_score их не учитывает
+    """
+    X = np.ascontiguousarray(X)
+    y = np.asarray(y)
+    splits = list(check_cv(cv, y, classifier=True).split(X, y))
+    if warm_start:
+        check_forward_splits(splits)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    classes = np.unique(y)
+
+    oof_fold = np.full(len(y), -1, dtype=np.int32)
+    for fold, (_, test_idx) in enumerate(splits):
+        oof_fold[test_idx] = fold
+
+    def fold_groups(estimator):
+        if warm_start and 'warm_start' in estimator.get_params():
+            size = chain_length or len(splits)
+            return [list(range(k, min(k + size, len(splits)))) for k in range(0, len(splits), size)]
+        return [[fold] for fold in range(len(splits))]
+
+    # Задача - цепочка фолдов одной модели. Сначала обучения на всей выборке
+    # и длинные цепочки - они самые долгие
+    jobs = [(name, [FULL_FIT]) for name in models] if refit else []
+    jobs += sorted(((name, group) for name in models for group in fold_groups(models[name])),
+                   key=lambda job: -len(job[1]))
+    # Непрерывные окна передаются срезами: строки берутся без копирования
+    rows = [(contiguous_rows(train_idx), contiguous_rows(test_idx)) for train_idx, test_idx in splits]
+
+    def job_folds(group):
+        return [(None, None) if fold == FULL_FIT else rows[fold] for fold in group]
+
+    results = {}
+    for name in models:
+        results[name] = {'model': None, 'cv_scores': np.zeros(len(splits)), 'jobs': 0,
+                         'fit_time': 0.0, 'cpu_time': 0.0, 'wall_time': 0.0,
+                         'fold_fit_time': np.zeros(len(splits)), 'fold_cpu_time': np.zeros(len(splits)),
+                         'oof_fold': oof_fold}
+        if not refit:
+            results[name].update({'classes': classes, 'fold_models': [None] * len(splits),
+                                  'oof_proba': np.full((len(y), len(classes)), np.nan)})
+    started = time.perf_counter()
+
+    def collect(name, fold, job):
+        result = results[name]
+        if fold == FULL_FIT:
+            result['model'] = job['model']
+        else:
+            result['cv_scores'][fold] = job['score']
+            result['fold_fit_time'][fold] = job['fit_time']
+            result['fold_cpu_time'][fold] = job['cpu_time']
+            if 'error' in job:
+                print(f"⚠️ {name}, фолд {fold + 1}: модель не обучена, оценка NaN ({job['error']})")
+            elif not refit:
+                result['fold_models'][fold] = job['model']
+                test_idx = splits[fold][1]
+                proba = np.zeros((len(test_idx), len(classes)))
+                proba[:, np.searchsorted(classes, job['model'].classes_)] = job['proba']
+                result['oof_proba'][test_idx] = proba
+        result['jobs'] += 1
+        result['fit_time'] += job['fit_time']
+        result['cpu_time'] += job['cpu_time']
+        result['wall_time'] = time.perf_counter() - started
+
+    if workers <= 1 or len(jobs) <= 1:
+        for name, group in jobs:
+            chain = fit_chain(models[name], job_folds(group), X, y, keep_model=not refit,
+                              warm_start=len(group) > 1, error_score=np.nan)
+            for fold, job in zip(group, chain):
+                collect(name, fold, job)
+    else:
+        with fit_pool(X, y, workers) as executor:
+            futures = {executor.submit(fit_chain, models[name], job_folds(group), keep_model=not refit,
+                                       warm_start=len(group) > 1, error_score=np.nan): (name, group)
+                       for name, group in jobs}
+            for future in as_completed(futures):
+                name, group = futures[future]
+                for fold, job in zip(group, future.result()):
+                    collect(name, fold, job)
+
+    if not refit:
+        for result in results.values():
+            result['model'] = FoldEnsemble([model for model in result['fold_models'] if model is not None], classes)
+            result['oof_pred'] = classes[np.nan_to_num(result['oof_proba'], nan=-1.0).argmax(axis=1)]
+            # Строки вне проверочных окон и строки фолдов без модели (NaN) не оцениваются
+            scored = ~np.isnan(result['oof_proba']).any(axis=1)
+            result['oof_score'] = (float(np.mean(result['oof_pred'][scored] == y[scored])) if scored.any()
+                                   else float('nan'))
+    return results
+
+
+class FoldEnsemble:
+    """
+    Модели фолдов кросс-валидации как одна модель: вероятности усредняются.
+    """
+
+    def __init__(self, models, classes):
+        """
+        Параметры:
+        - models: обученные модели фолдов
+        - classes: все классы меток (в фолде какого-то класса может не быть)
+        """
+        self.models = list(models)
+        self.classes_ = np.asarray(classes)
+
+    def predict_proba(self, X):
+        if not self.models:
+            raise ValueError("Нет обученных моделей фолдов: ни на одном фолде модель не обучилась")
+        proba = np.zeros((len(X), len(self.classes_)))
+        for model in self.models:
+            proba[:, np.searchsorted(self.classes_, model.classes_)] += class_proba(model, X)
+        return proba / len(self.models)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def score(self, X, y):
+        return float(np.mean(self.predict(X) == np.asarray(y)))
+
+    @property
+    def feature_importances_(self):
+        if not all(hasattr(model, 'feature_importances_') for model in self.models):
+            raise AttributeError("feature_importances_")
+        return np.mean([model.feature_importances_ for model in self.models], axis=0)
+
+
+def save_oof_results(results, path, index=None):
+    """
+    Сохраняет по моделям оценки и время фолдов и OOF-вероятности в .npz.
+
+    Ключи файла: 'models', 'oof_fold', 'index' и '<поле>[<модель>]' для полей
+    cv_scores, fold_fit_time, fold_cpu_time, classes, oof_proba.
+
+    Параметры:
+    - results: результат run_tournament
+    - path: путь к файлу .npz
+    - index: метки строк обучающей выборки (например, индекс y_train)
+    """
+    names = list(results)
+    arrays = {'models': np.array(names)}
+    if names:
+        arrays['oof_fold'] = results[names[0]]['oof_fold']
+        arrays['index'] = np.asarray(index if index is not None else np.arange(len(arrays['oof_fold'])))
+    for name in names:
+        for field in ('cv_scores', 'fold_fit_time', 'fold_cpu_time', 'classes', 'oof_proba'):
+            if field in results[name]:
+                arrays[f"{field}[{name}]"] = np.asarray(results[name][field])
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_oof_results(path):
+    """
+    Загружает файл save_oof_results.
+
+    Возвращает:
+    - (словарь {модель: {поле: массив}}, общие массивы {'oof_fold', 'index'})
+    """
+    with np.load(path, allow_pickle=False) as data:
+        names = [str(name) for name in data['models']]
+        shared = {key: data[key] for key in ('oof_fold', 'index') if key in data.files}
+        results = {name: {} for name in names}
+        for key in data.files:
+            if '[' in key:
+                field, name = key[:-1].split('[', 1)
+                results[name][field] = data[key]
+    return results, shared
+
+
+def print_timing_table(results, total_time=None):
+    """
+    Печатает время по часам и процессорное время по моделям.
+
+    Параметры:
+    - results: результат run_tournament
+    - total_time: общее время турнира по часам
+    """
+    print(f"\n{'Модель':<22} {'задач':>6} {'по часам, с':>12} {'сумма задач, с':>15} {'CPU, с':>9}")
+    print("-" * 68)
+    for name, result in results.items():
+        print(f"{name:<22} {result['jobs']:>6} {result['wall_time']:>12.2f} "
+              f"{result['fit_time']:>15.2f} {result['cpu_time']:>9.2f}")
+    if total_time is not None:
+        cpu_total = sum(result['cpu_time'] for result in results.values())
+        print("-" * 68)
+        print(f"{'Всего':<22} {sum(r['jobs'] for r in results.values()):>6} {total_time:>12.2f} "
+              f"{'':>15} {cpu_total:>9.2f}")
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Пакетный запуск всей цепочки без вопросов:
+исправление данных -> признаки и зигзаг -> обучение -> анализ -> графики.
+
+Каждый этап вызывает main() своего скрипта с аргументами командной строки.
+Этап пропускается, если его результаты новее входных файлов и он уже
+выполнялся с теми же аргументами (состояние - pipeline_state.json в рабочей папке),
+поэтому прерванный запуск продолжается с первого неактуального этапа.
+Графики перерисовываются выборочно через кеш графиков (chart_cache).
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+
+import data_corrector
+import data_for_ml_maker
+import plot_all_chart
+import plot_zigzag_chart
+import zigzag_analyzer
+import zigzag_ml_model
+from data_for_ml_maker import parse_deviations
+from data_store import FORMAT_SUFFIXES, OUTPUT_FORMATS
+from data_schema import PROFILES
+
+STAGES = ('correct', 'features', 'train', 'analyze', 'plot')
+STATE_FILE = 'pipeline_state.json'
+
+
+def _stage_list(text):
+    stages = [name.strip() for name in text.split(',') if name.strip()]
+    unknown = [name for name in stages if name not in STAGES]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"неизвестные этапы: {', '.join(unknown)} (доступны: {', '.join(STAGES)})")
+    return stages
+
+
+def build_stages(args):
+    """
+    Описание этапов: входные файлы, результаты и команды запуска.
+
+    Возвращает:
+    - словарь {этап: {'inputs', 'outputs', 'commands'}}; commands - список
+      (функция main, argv)
+    """
+    input_file = os.path.join(args.work_dir, 'input_data.csv')
+    output_format = 'csv' if args.chunk_size else args.output_format
+    ml_file = os.path.join(args.work_dir, 'ml_data' + FORMAT_SUFFIXES[output_format])
+    deviations = ','.join(str(d) for d in args.deviation)
+
+    features = ['--deviation', deviations, '--input', input_file, '--output', ml_file,
+                '--dtype-profile', args.dtype_profile]
+    if args.chunk_size:
+        features += ['--chunk-size', str(args.chunk_size)]
+    if args.workers:
+        features += ['--workers', str(args.workers)]
+
+    train = ['--deviation', str(args.deviation[0]), '--data-file', ml_file, '--model-file', args.model_file,
+             '--dtype-profile', args.dtype_profile]
+    if args.workers:
+        train += ['--workers', str(args.workers)]
+
+    plot = ['--data-file', ml_file, '--periods', 'all', '--charts-dir', args.charts_dir]
+    if args.plot_parameters:
+        plot += ['--parameters', args.plot_parameters]
+    else:
+        plot += ['--categories', args.plot_categories]
+    if args.workers:
+        plot += ['--workers', str(args.workers)]
+    period_plot = ['--data-file', ml_file, '--charts-dir', os.path.join(args.charts_dir, 'zigzag')]
+    if args.force:
+        plot.append('--force')
+        period_plot.append('--force')
+
+    return {
+        'correct': {
+            'inputs': [args.raw_file],
+            'outputs': [input_file],
+            'commands': [(data_corrector.main, ['--file', args.raw_file, '--fix', args.fix_mode,
+                                                '--output', input_file])],
+        },
+        'features': {
+            'inputs': [input_file],
+            'outputs': [ml_file],
+            'commands': [(data_for_ml_maker.main, features)],
+        },
+        'train': {
+            'inputs': [ml_file],
+            'outputs': [args.model_file],
+            'commands': [(zigzag_ml_model.main, train)],
+        },
+        'analyze': {
+            'inputs': [ml_file],
+            'outputs': ['zigzag_analysis_detailed.txt'],
+            'commands': [(zigzag_analyzer.main, ['--data-file', ml_file, '--dtype-profile', args.dtype_profile])],
+        },
+        # Графики без списка результатов: этап запускается всегда, а
+        # неизменившиеся графики пропускает кеш графиков
+        'plot': {
+            'inputs': [ml_file],
+            'outputs': [],
+            'commands': [(plot_zigzag_chart.main, period_plot), (plot_all_chart.main, plot)],
+        },
+    }
+
+
+def load_state(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def stage_up_to_date(stage, state_entry):
+    """
+    Результаты этапа есть, новее входных файлов и получены с теми же аргументами.
+    """
+    if not stage['outputs'] or state_entry is None:
+        return False
+    if state_entry.get('commands') != [argv for _, argv in stage['commands']]:
+        return False
+    if not all(os.path.exists(path) for path in stage['outputs']):
+        return False
+    inputs = [path for path in stage['inputs'] if os.path.exists(path)]
+    if not inputs:
+        return True
+    newest_input = max(os.path.getmtime(path) for path in inputs)
+    return min(os.path.getmtime(path) for path in stage['outputs']) >= newest_input
+
+
+def run_command(run, argv):
+    """
+    Вызывает main() скрипта этапа; исключение и выход через sys.exit
+    (например, ошибка аргументов argparse) считаются ошибкой этапа.
+
+    Возвращает:
+    - True, если main() завершилась успешно
+    """
+    try:
+        return bool(run(list(argv)))
+    except SystemExit as e:
+        if e.code in (0, None):
+            return True
+        print(f"❌ {run.__module__}: выход с кодом {e.code}")
+        return False
+    except Exception as e:
+        print(f"❌ {run.__module__}: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def select_stages(args):
+    """
+    Этапы для запуска с учетом --stages, --skip и --from.
+    """
+    stages = args.stages or list(STAGES)
+    if args.start_from:
+        stages = [name for name in stages if STAGES.index(name) >= STAGES.index(args.start_from)]
+    return [name for name in STAGES if name in stages and name not in (args.skip or [])]
+
+
+def main(argv=None):
+    """
+    Запускает выбранные этапы по порядку и печатает время каждого.
+
+    Возвращает:
+    - True, если все этапы выполнены или актуальны
+    """
+    parser = argparse.ArgumentParser(description="Пакетный запуск цепочки обработки данных и обучения")
+    parser.add_argument('--raw-file', default="data/btc_15m_data_2018_to_2025.csv",
+                        help="исходный CSV со свечами")
+    parser.add_argument('--work-dir', default="processed_data",
+                        help="папка для промежуточных файлов")
+    parser.add_argument('--deviation', type=parse_deviations, default=[1.0],
+                        help="отклонение зигзага в процентах, несколько - через запятую (модель - по первому)")
+    parser.add_argument('--fix-mode', choices=['full', 'streaming'], default='full',
+                        help="режим исправления данных")
+    parser.add_argument('--dtype-profile', choices=PROFILES, default='compact',
+                        help="профиль типов данных при загрузке")
+    parser.add_argument('--output-format', choices=OUTPUT_FORMATS, default='csv',
+                        help="формат файла с признаками")
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help="потоковый расчет признаков блоками по N строк")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="процессов для записи CSV, обучения и графиков")
+    parser.add_argument('--model-file', default='zigzag_model.pkl',
+                        help="файл обученной модели")
+    parser.add_argument('--charts-dir', default="charts",
+                        help="папка для графиков")
+    parser.add_argument('--plot-categories', default='all',
+                        help="категории параметров для графиков: 'all' или номера через запятую")
+    parser.add_argument('--plot-parameters', default=None,
+                        help="параметры для графиков через запятую (вместо категорий)")
+    parser.add_argument('--stages', type=_stage_list, default=None,
+                        help=f"этапы через запятую (по умолчанию все: {','.join(STAGES)})")
+    parser.add_argument('--skip', type=_stage_list, default=None,
+                        help="пропустить этапы (через запятую)")
+    parser.add_argument('--from', dest='start_from', choices=STAGES, default=None,
+                        help="начать с этапа (предыдущие берутся из готовых файлов)")
+    parser.add_argument('--force', action='store_true',
+                        help="выполнить этапы и перерисовать графики, даже если результаты актуальны")
+    args = parser.parse_args(argv)
+
+    stages = build_stages(args)
+    selected = select_stages(args)
+    state_path = os.path.join(args.work_dir, STATE_FILE)
+    state = load_state(state_path)
+    timings = []
+
+    print("Пакетный запуск цепочки")
+    print("=" * 80)
+    print(f"Этапы: {', '.join(selected) if selected else '-'}")
+
+    ok = True
+    started = time.perf_counter()
+    for name in selected:
+        stage = stages[name]
+        print(f"\n{'=' * 80}\n▶ Этап: {name}\n{'=' * 80}")
+
+        if not args.force and stage_up_to_date(stage, state.get(name)):
+            print(f"✓ Результаты актуальны, этап пропущен: {', '.join(stage['outputs'])}")
+            timings.append((name, 'актуален', 0.0))
+            continue
+
+        stage_started = time.perf_counter()
+        success = all(run_command(run, argv) for run, argv in stage['commands'])
+        elapsed = time.perf_counter() - stage_started
+
+        if not success:
+            print(f"❌ Этап {name} завершился с ошибкой")
+            timings.append((name, 'ошибка', elapsed))
+            ok = False
+            break
+
+        state[name] = {'commands': [argv for _, argv in stage['commands']], 'finished': time.time(),
+                       'seconds': round(elapsed, 3)}
+        save_state(state, state_path)
+        timings.append((name, 'выполнен', elapsed))
+
+    total = time.perf_counter() - started
+    print(f"\n{'=' * 80}\nВРЕМЯ ПО ЭТАПАМ\n{'=' * 80}")
+    for name, status, elapsed in timings:
+        print(f"  {name:<10} {status:<10} {elapsed:8.1f} с")
+    print(f"  {'всего':<10} {'':<10} {total:8.1f} с")
+
+    if ok:
+        print("\n✓ Цепочка завершена успешно!")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Индекс вершин зигзага, который хранится рядом с таблицей ml_data.
+
+Для каждой колонки зигзага индекс содержит только вершины (строки с меткой
+!= 0) в виде непрерывных массивов: номер строки в таблице, время, цена
+вершины (High для максимума, Low для минимума), цена закрытия и тип вершины.
+Вершин меньше 1% строк, поэтому анализ и графики зигзага читают индекс
+(<таблица>.pivots.npz) вместо полного прохода по колонке меток.
+
+Индекс записывается вместе с таблицей и действует, пока файл таблицы не
+изменился (размер и время изменения); иначе load_pivot_index возвращает None
+и потребители ищут вершины в данных, как раньше.
+"""
+
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from data_schema import LABEL_MARKER
+from data_store import resolve_table_path, time_slice_bounds
+
+PIVOT_SUFFIX = '.pivots.npz'
+PIVOT_VERSION = 1
+PIVOT_FIELDS = ('row', 'time', 'price', 'close', 'type')
+
+
+class Pivots(namedtuple('Pivots', PIVOT_FIELDS)):
+    """
+    Вершины одной колонки зигзага в порядке строк таблицы.
+
+    - row: номер строки в таблице (int64)
+    - time: время свечи (datetime64[ns], NaT без колонки времени)
+    - price: цена вершины - High для максимума, Low для минимума
+    - close: цена закрытия свечи (NaN без колонки Close)
+    - type: -1 = максимум, 1 = минимум (int8)
+    """
+
+    __slots__ = ()
+
+    def take(self, selection):
+        """Вершины по срезу или маске."""
+        return Pivots(*(values[selection] for values in self))
+
+    def between(self, start=None, end=None):
+        """Вершины в полуинтервале времени [start, end) (время должно быть отсортировано)."""
+        i0, i1 = time_slice_bounds(self.time, start, end)
+        return self.take(slice(i0, i1))
+
+
+def find_pivots(data, zigzag_column, time_column='Open time', offset=0):
+    """
+    Находит вершины зигзага в данных.
+
+    Параметры:
+    - data: DataFrame с колонками High, Low и колонкой зигзага
+    - zigzag_column: название колонки зигзага
+    - time_column: колонка времени
+    - offset: номер первой строки data в таблице (для записи блоками)
+
+    Возвращает:
+    - Pivots
+    """
+    labels = data[zigzag_column].to_numpy()
+    positions = np.flatnonzero(labels != 0)
+    types = labels[positions].astype(np.int8)
+    price = np.where(types == -1,
+                     data['High'].to_numpy(dtype=np.float64)[positions],
+                     data['Low'].to_numpy(dtype=np.float64)[positions])
+    if time_column in data.columns:
+        time = data[time_column].to_numpy(dtype='datetime64[ns]')[positions]
+    else:
+        time = np.full(len(positions), np.datetime64('NaT', 'ns'))
+    if 'Close' in data.columns:
+        close = data['Close'].to_numpy(dtype=np.float64)[positions]
+    else:
+        close = np.full(len(positions), np.nan)
+    return Pivots(positions.astype(np.int64) + offset, time, price, close, types)
+
+
+def zigzag_columns(columns):
+    """Колонки зигзага среди названий колонок."""
+    return [name for name in columns if LABEL_MARKER in str(name).lower()]
+
+
+def concat_pivots(parts):
+    """Объединяет вершины, найденные по блокам таблицы."""
+    return Pivots(*(np.concatenate(values) for values in zip(*parts)))
+
+
+class PivotIndex:
+    """
+    Индекс вершин для всех колонок зигзага одной таблицы.
+    """
+
+    def __init__(self, pivots, rows):
+        """
+        Параметры:
+        - pivots: словарь {колонка зигзага: Pivots}
+        - rows: количество строк в таблице
+        """
+        self.pivots = dict(pivots)
+        self.rows = int(rows)
+
+    @property
+    def columns(self):
+        return list(self.pivots)
+
+    def __contains__(self, column):
+        return column in self.pivots
+
+    def __getitem__(self, column):
+        return self.pivots[column]
+
+    @classmethod
+    def from_frame(cls, data, time_column='Open time'):
+        """Строит индекс по всем колонкам зигзага DataFrame."""
+        return cls({name: find_pivots(data, name, time_column) for name in zigzag_columns(data.columns)},
+                   len(data))
+
+    def save(self, table_path):
+        """
+        Записывает индекс рядом с уже сохраненной таблицей.
+
+        Возвращает:
+        - путь к файлу индекса
+        """
+        table_path = str(table_path)
+        stat = os.stat(table_path)
+        arrays = {
+            'version': np.int64(PIVOT_VERSION),
+            'columns': np.array([str(name) for name in self.pivots]),
+            'rows': np.int64(self.rows),
+            'source_size': np.int64(stat.st_size),
+            'source_mtime_ns': np.int64(stat.st_mtime_ns),
+        }
+        for i, pivots in enumerate(self.pivots.values()):
+            for field, values in zip(PIVOT_FIELDS, pivots):
+                arrays[f'{i}_{field}'] = values
+
+        path = pivot_index_path(table_path)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+        return path
+
+
+def pivot_index_path(table_path):
+    """Путь к индексу вершин для файла таблицы."""
+    return str(table_path) + PIVOT_SUFFIX
+
+
+def load_pivot_index(table_path):
+    """
+    Загружает индекс вершин таблицы (с автоопределением формата таблицы).
+
+    Возвращает:
+    - PivotIndex или None, если индекса нет или таблица изменилась после его записи
+    """
+    table_path = resolve_table_path(table_path)
+    path = pivot_index_path(table_path)
+    try:
+        stat = os.stat(table_path)
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != PIVOT_VERSION:
+                return None
+            if int(data['source_size']) != stat.st_size or int(data['source_mtime_ns']) != stat.st_mtime_ns:
+                return None
+            pivots = {
+                str(name): Pivots(*(data[f'{i}_{field}'] for field in PIVOT_FIELDS))
+                for i, name in enumerate(data['columns'])
+            }
+            return PivotIndex(pivots, int(data['rows']))
+    except (OSError, KeyError, ValueError):
+        return None
@@ -6,26 +6,92 @@ import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import os
+import sys
+import time
+import argparse
 import warnings
+from data_store import ColumnStore, load_table, open_column_store, resolve_table_path, time_slice, time_slice_bounds
+from pivot_index import find_pivots, load_pivot_index
+from chart_cache import ChartCache, chart_key
+from chart_lod import plot_lod_line, time_positions
 warnings.filterwarnings('ignore')
 
+def parse_selection(choice, count):
+    """
+    Разбирает выбор пунктов списка: 'all' или номера через запятую (с 1).
+    
+    Возвращает:
+    - список индексов с 0 (ValueError при некорректном выборе)
+    """
+    if choice.strip().lower() == 'all':
+        return list(range(count))
+    indices = [int(x.strip()) for x in choice.split(',')]
+    if not all(1 <= i <= count for i in indices):
+        raise ValueError(f"Используйте числа от 1 до {count}")
+    return [i - 1 for i in indices]
+
+
+# Плоттер процесса-рендерера, создается один раз в _init_render_worker
+_worker_plotter = None
+
+
+def _init_render_worker(store_path, zigzag_column, pivots, charts_base_dir, figsize, dpi, lod):
+    """
+    Инициализация процесса-рендерера: Agg и общее колоночное хранилище (mmap).
+    """
+    global _worker_plotter
+    plt.switch_backend('Agg')
+    plotter = UniversalParameterPlotter()
+    plotter.store = ColumnStore.open(store_path)
+    plotter.zigzag_column = zigzag_column
+    plotter.pivots = pivots
+    plotter.charts_base_dir = charts_base_dir
+    plotter.figsize = figsize
+    plotter.dpi = dpi
+    plotter.lod = lod
+    _worker_plotter = plotter
+
+
+def _render_chart(parameter, period_info):
+    """
+    Строит один график в процессе-рендерере.
+
+    Возвращает:
+    - (успех, текст ошибки или None)
+    """
+    try:
+        return _worker_plotter.plot_parameter_for_period(parameter, period_info), None
+    except Exception as e:
+        return False, str(e)
+
+
 class UniversalParameterPlotter:
     """
     Универсальный плоттер для построения графиков всех параметров по периодам.
     """
     
-    def __init__(self, data_file="processed_data/ml_data.csv"):
+    def __init__(self, data_file="processed_data/ml_data.csv", dtype_profile='compact', memory_report=False):
         """
         Инициализация плоттера.
         
         Параметры:
         - data_file: путь к файлу с данными
+        - dtype_profile: профиль типов данных при загрузке ('default' или 'compact')
+        - memory_report: вывести отчет об экономии памяти при загрузке
         """
         self.data_file = data_file
+        self.dtype_profile = dtype_profile
+        self.memory_report = memory_report
         self.data = None
         self.zigzag_column = None
+        self.pivots = None
+        self.store = None
         self.charts_base_dir = "charts"
+        self.figsize = (16, 8)
+        self.dpi = 300
+        self.lod = True
         self.selected_parameters = []
         self.selected_periods = []
         self.all_periods = []
@@ -37,11 +103,12 @@ class UniversalParameterPlotter:
         print("Загрузка данных...")
         print("=" * 60)
         
-        if not os.path.exists(self.data_file):
+        if not os.path.exists(resolve_table_path(self.data_file)):
             raise FileNotFoundError(f"Файл {self.data_file} не найден!")
         
         # Загружаем данные
-        self.data = pd.read_csv(self.data_file)
+        self.data = load_table(self.data_file, profile=self.dtype_profile, memory_report=self.memory_report)
+        pivot_index = load_pivot_index(self.data_file)
         
         # Проверяем наличие необходимых колонок
         if 'Open time' not in self.data.columns:
@@ -58,6 +125,19 @@ class UniversalParameterPlotter:
         # Преобразуем время в datetime
         self.data['datetime'] = pd.to_datetime(self.data['Open time'])
         
+        # Периоды вырезаются бинарным поиском, поэтому время должно быть отсортировано
+        if not self.data['datetime'].is_monotonic_increasing:
+            print("⚠️ Данные не отсортированы по времени, сортируем...")
+            self.data = self.data.sort_values('datetime', kind='stable').reset_index(drop=True)
+            # Номера строк в индексе вершин относятся к исходному порядку
+            pivot_index = None
+        
+        # Вершины зигзага один раз на всю таблицу; графики берут их срезом по времени
+        if pivot_index is not None and self.zigzag_column in pivot_index:
+            self.pivots = pivot_index[self.zigzag_column]
+        else:
+            self.pivots = find_pivots(self.data, self.zigzag_column)
+        
         print(f"✓ Загружены данные: {len(self.data)} записей")
         print(f"✓ Период: {self.data['datetime'].min()} - {self.data['datetime'].max()}")
         
@@ -123,12 +203,26 @@ class UniversalParameterPlotter:
         
         return parameters
     
-    def select_parameters(self):
+    def select_parameters(self, choice=None, names=None, show_details=None):
         """
-        Интерактивный выбор параметров для построения графиков.
+        Выбор параметров для построения графиков.
+        
+        Параметры:
+        - choice: категории ('all' или номера через запятую); None - спросить
+        - names: явный список параметров (вместо категорий)
+        - show_details: показать список параметров; None - спросить
         """
         parameters = self.get_available_parameters()
         
+        if names is not None:
+            available = {name for params in parameters.values() for name in params}
+            unknown = [name for name in names if name not in available]
+            if unknown:
+                raise ValueError(f"Параметры не найдены: {', '.join(unknown)}")
+            self.selected_parameters = list(names)
+            print(f"\n✓ Всего выбрано параметров: {len(self.selected_parameters)}")
+            return True
+        
         print(f"\n" + "=" * 60)
         print("ВЫБОР ПАРАМЕТРОВ ДЛЯ ПОСТРОЕНИЯ ГРАФИКОВ")
         print("=" * 60)
@@ -138,22 +232,16 @@ class UniversalParameterPlotter:
         for i, category in enumerate(categories, 1):
             print(f"  {i:2d}. {category} ({len(parameters[category])} параметров)")
         
-        while True:
+        if choice is not None:
+            selected_categories = [categories[i] for i in parse_selection(choice, len(categories))]
+        
+        while choice is None:
             try:
                 choice = input(f"\nВыберите категории (1-{len(categories)}, через запятую, или 'all' для всех): ").strip()
-                
-                if choice.lower() == 'all':
-                    selected_categories = categories
-                    break
-                else:
-                    selected_indices = [int(x.strip()) for x in choice.split(',')]
-                    if all(1 <= i <= len(categories) for i in selected_indices):
-                        selected_categories = [categories[i-1] for i in selected_indices]
-                        break
-                    else:
-                        print(f"❌ Некорректный выбор! Используйте числа от 1 до {len(categories)}")
-            except ValueError:
-                print("❌ Введите корректные числа через запятую!")
+                selected_categories = [categories[i] for i in parse_selection(choice, len(categories))]
+            except ValueError as e:
+                choice = None
+                print(f"❌ Некорректный выбор! {e}")
         
         print(f"\n✓ Выбранные категории:")
         for category in selected_categories:
@@ -167,8 +255,9 @@ class UniversalParameterPlotter:
         print(f"\n✓ Всего выбрано параметров: {len(self.selected_parameters)}")
         
         # Спрашиваем, показать ли подробный список
-        show_details = input("Показать подробный список параметров? (y/n): ").strip().lower()
-        if show_details == 'y':
+        if show_details is None:
+            show_details = input("Показать подробный список параметров? (y/n): ").strip().lower() == 'y'
+        if show_details:
             for i, param in enumerate(self.selected_parameters, 1):
                 print(f"  {i:2d}. {param}")
         
@@ -196,18 +285,17 @@ class UniversalParameterPlotter:
             if current_end > end_date:
                 current_end = end_date
             
-            # Фильтруем данные для текущего периода
-            period_mask = (self.data['datetime'] >= current_start) & (self.data['datetime'] < current_end)
-            period_data = self.data[period_mask]
+            # Считаем записи периода по границам в отсортированном времени
+            i0, i1 = time_slice_bounds(self.data['datetime'].values, current_start, current_end)
             
-            if len(period_data) > 0:
+            if i1 > i0:
                 period_info = {
                     'period_num': period_num,
                     'start_date': current_start,
                     'end_date': current_end,
                     'start_str': current_start.strftime('%Y-%m'),
                     'end_str': current_end.strftime('%Y-%m'),
-                    'data_count': len(period_data)
+                    'data_count': i1 - i0
                 }
                 periods.append(period_info)
                 period_num += 1
@@ -216,9 +304,12 @@ class UniversalParameterPlotter:
         
         return periods
     
-    def select_periods(self):
+    def select_periods(self, choice=None):
         """
-        Интерактивный выбор периодов для построения графиков.
+        Выбор периодов для построения графиков.
+        
+        Параметры:
+        - choice: периоды ('all' или номера через запятую); None - спросить
         """
         self.all_periods = self.get_time_periods(months=3)
         
@@ -230,22 +321,16 @@ class UniversalParameterPlotter:
         for i, period in enumerate(self.all_periods, 1):
             print(f"  {i:2d}. {period['start_str']} - {period['end_str']} ({period['data_count']:,} записей)")
         
-        while True:
+        if choice is not None:
+            self.selected_periods = [self.all_periods[i] for i in parse_selection(choice, len(self.all_periods))]
+        
+        while choice is None:
             try:
                 choice = input(f"\nВыберите периоды (1-{len(self.all_periods)}, через запятую, или 'all' для всех): ").strip()
-                
-                if choice.lower() == 'all':
-                    self.selected_periods = self.all_periods
-                    break
-                else:
-                    selected_indices = [int(x.strip()) for x in choice.split(',')]
-                    if all(1 <= i <= len(self.all_periods) for i in selected_indices):
-                        self.selected_periods = [self.all_periods[i-1] for i in selected_indices]
-                        break
-                    else:
-                        print(f"❌ Некорректный выбор! Используйте числа от 1 до {len(self.all_periods)}")
-            except ValueError:
-                print("❌ Введите корректные числа через запятую!")
+                self.selected_periods = [self.all_periods[i] for i in parse_selection(choice, len(self.all_periods))]
+            except ValueError as e:
+                choice = None
+                print(f"❌ Некорректный выбор! {e}")
         
         print(f"\n✓ Выбрано периодов: {len(self.selected_periods)}")
         for period in self.selected_periods:
@@ -281,36 +366,35 @@ class UniversalParameterPlotter:
             return self.plot_zigzag_price_chart(period_info)
         
         # Фильтруем данные для периода
-        period_mask = (self.data['datetime'] >= period_info['start_date']) & (self.data['datetime'] < period_info['end_date'])
-        period_data = self.data[period_mask].copy()
+        period_data = self._period_frame(period_info, [parameter])
         
         if len(period_data) == 0:
             print(f"⚠️ Нет данных для периода {period_info['start_str']}-{period_info['end_str']}")
             return False
         
-        # Находим точки зигзага
-        zigzag_max = period_data[period_data[self.zigzag_column] == -1]  # Максимумы
-        zigzag_min = period_data[period_data[self.zigzag_column] == 1]   # Минимумы
+        # Находим точки зигзага (номера строк совпадают с индексом period_data)
+        pivots = self.pivots.between(period_info['start_date'], period_info['end_date'])
+        zigzag_max = pivots.take(pivots.type == -1)  # Максимумы
+        zigzag_min = pivots.take(pivots.type == 1)   # Минимумы
         
         # Создаем график
-        fig, ax = plt.subplots(1, 1, figsize=(16, 8))
+        fig, ax = plt.subplots(1, 1, figsize=self.figsize)
         
         # График параметра
-        ax.plot(period_data['datetime'], period_data[parameter], 
-                color='blue', alpha=0.7, linewidth=1, label=parameter)
+        self._plot_series(ax, period_data, parameter, pivots, color='blue', alpha=0.7, linewidth=1, label=parameter)
         
         # Отмечаем точки зигзага на графике параметра
-        if len(zigzag_max) > 0:
+        if len(zigzag_max.row) > 0:
             # Красные точки для максимумов
-            ax.scatter(zigzag_max['datetime'], zigzag_max[parameter], 
+            ax.scatter(zigzag_max.time, period_data.loc[zigzag_max.row, parameter], 
                       color='red', marker='o', s=30, alpha=0.8, 
-                      label=f'Максимумы ZigZag ({len(zigzag_max)})', zorder=5)
+                      label=f'Максимумы ZigZag ({len(zigzag_max.row)})', zorder=5)
         
-        if len(zigzag_min) > 0:
+        if len(zigzag_min.row) > 0:
             # Зеленые точки для минимумов
-            ax.scatter(zigzag_min['datetime'], zigzag_min[parameter], 
+            ax.scatter(zigzag_min.time, period_data.loc[zigzag_min.row, parameter], 
                       color='green', marker='o', s=30, alpha=0.8, 
-                      label=f'Минимумы ZigZag ({len(zigzag_min)})', zorder=5)
+                      label=f'Минимумы ZigZag ({len(zigzag_min.row)})', zorder=5)
         
         # Настройки графика
         ax.set_title(f'{parameter} ({period_info["start_str"]} - {period_info["end_str"]})', 
@@ -326,11 +410,7 @@ class UniversalParameterPlotter:
         plt.tight_layout()
         
         # Сохраняем график
-        safe_param_name = parameter.replace('/', '_').replace('\\', '_').replace(':', '_')
-        filename = f"{safe_param_name}_{period_info['start_str']}.png"
-        save_path = os.path.join(self.charts_base_dir, safe_param_name, filename)
-        
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
+        plt.savefig(self.chart_path(parameter, period_info), dpi=self.dpi, bbox_inches='tight')
         plt.close()  # Закрываем график для экономии памяти
         
         return True
@@ -340,51 +420,42 @@ class UniversalParameterPlotter:
         Создает специальный график зигзага с ценой и линиями зигзага.
         """
         # Фильтруем данные для периода
-        period_mask = (self.data['datetime'] >= period_info['start_date']) & (self.data['datetime'] < period_info['end_date'])
-        period_data = self.data[period_mask].copy()
+        period_data = self._period_frame(period_info, ['Close'])
         
         if len(period_data) == 0:
             print(f"⚠️ Нет данных для периода {period_info['start_str']}-{period_info['end_str']}")
             return False
         
         # Находим точки зигзага
-        zigzag_max = period_data[period_data[self.zigzag_column] == -1]  # Максимумы
-        zigzag_min = period_data[period_data[self.zigzag_column] == 1]   # Минимумы
-        zigzag_points = period_data[period_data[self.zigzag_column] != 0]  # Все точки
+        zigzag_points = self.pivots.between(period_info['start_date'], period_info['end_date'])  # Все точки
+        zigzag_max = zigzag_points.take(zigzag_points.type == -1)  # Максимумы
+        zigzag_min = zigzag_points.take(zigzag_points.type == 1)   # Минимумы
         
         # Создаем график
-        fig, ax = plt.subplots(1, 1, figsize=(16, 8))
+        fig, ax = plt.subplots(1, 1, figsize=self.figsize)
         
         # График цены закрытия
-        ax.plot(period_data['datetime'], period_data['Close'], 
-                color='blue', alpha=0.7, linewidth=1, label='Цена закрытия')
+        self._plot_series(ax, period_data, 'Close', zigzag_points,
+                          color='blue', alpha=0.7, linewidth=1, label='Цена закрытия')
         
         # Соединяем точки зигзага линиями
-        if len(zigzag_points) > 1:
-            zigzag_prices = []
-            zigzag_times = []
-            for _, row in zigzag_points.iterrows():
-                if row[self.zigzag_column] == -1:  # Максимум
-                    zigzag_prices.append(row['High'])
-                else:  # Минимум
-                    zigzag_prices.append(row['Low'])
-                zigzag_times.append(row['datetime'])
-            
-            ax.plot(zigzag_times, zigzag_prices, 
+        # Цена вершины: High для максимума, Low для минимума
+        if len(zigzag_points.row) > 1:
+            ax.plot(zigzag_points.time, zigzag_points.price, 
                     color='orange', linewidth=2, alpha=0.9, label='Линии ZigZag')
         
         # Отмечаем точки зигзага
-        if len(zigzag_max) > 0:
+        if len(zigzag_max.row) > 0:
             # Красные точки для максимумов
-            ax.scatter(zigzag_max['datetime'], zigzag_max['High'], 
+            ax.scatter(zigzag_max.time, zigzag_max.price, 
                       color='red', marker='o', s=50, alpha=0.9, 
-                      label=f'Максимумы ZigZag ({len(zigzag_max)})', zorder=5)
+                      label=f'Максимумы ZigZag ({len(zigzag_max.row)})', zorder=5)
         
-        if len(zigzag_min) > 0:
+        if len(zigzag_min.row) > 0:
             # Зеленые точки для минимумов
-            ax.scatter(zigzag_min['datetime'], zigzag_min['Low'], 
+            ax.scatter(zigzag_min.time, zigzag_min.price, 
                       color='green', marker='o', s=50, alpha=0.9, 
-                      label=f'Минимумы ZigZag ({len(zigzag_min)})', zorder=5)
+                      label=f'Минимумы ZigZag ({len(zigzag_min.row)})', zorder=5)
         
         # Настройки графика
         ax.set_title(f'ZigZag + Цена BTC/USDT ({period_info["start_str"]} - {period_info["end_str"]})', 
@@ -400,14 +471,68 @@ class UniversalParameterPlotter:
         plt.tight_layout()
         
         # Сохраняем график
-        filename = f"ZigZag_Price_{period_info['start_str']}.png"
-        save_path = os.path.join(self.charts_base_dir, "ZIGZAG_PRICE_CHART", filename)
-        
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
+        plt.savefig(self.chart_path('ZIGZAG_PRICE_CHART', period_info), dpi=self.dpi, bbox_inches='tight')
         plt.close()  # Закрываем график для экономии памяти
         
         return True
     
+    def chart_path(self, parameter, period_info):
+        """
+        Путь к файлу графика параметра за период.
+        """
+        if parameter == 'ZIGZAG_PRICE_CHART':
+            return os.path.join(self.charts_base_dir, "ZIGZAG_PRICE_CHART",
+                                f"ZigZag_Price_{period_info['start_str']}.png")
+        safe_param_name = parameter.replace('/', '_').replace('\\', '_').replace(':', '_')
+        filename = f"{safe_param_name}_{period_info['start_str']}.png"
+        return os.path.join(self.charts_base_dir, safe_param_name, filename)
+    
+    def chart_key(self, parameter, period_info):
+        """
+        Хеш данных периода, вершин зигзага и настроек графика (см. chart_cache).
+        """
+        period_data = time_slice(self.data, period_info['start_date'], period_info['end_date'])
+        pivots = self.pivots.between(period_info['start_date'], period_info['end_date'])
+        column = 'Close' if parameter == 'ZIGZAG_PRICE_CHART' else parameter
+        settings = {
+            'parameter': parameter,
+            'zigzag_column': self.zigzag_column,
+            'start': period_info['start_date'],
+            'end': period_info['end_date'],
+            'figsize': self.figsize,
+            'dpi': self.dpi,
+            'lod': self.lod,
+        }
+        return chart_key(period_data, ['datetime', column], pivots, settings)
+    
+    def _plot_series(self, ax, period_data, column, pivots, **kwargs):
+        """
+        Рисует колонку периода; при self.lod - прореженной до ширины графика с точными вершинами.
+        """
+        if self.lod:
+            plot_lod_line(ax, period_data['datetime'].to_numpy(), period_data[column].to_numpy(), dpi=self.dpi,
+                          keep=time_positions(period_data['datetime'], pivots.time), **kwargs)
+        else:
+            ax.plot(period_data['datetime'], period_data[column], **kwargs)
+    
+    def _period_frame(self, period_info, columns):
+        """
+        Данные периода: из колоночного хранилища в процессе-рендерере или срез self.data.
+        
+        Параметры:
+        - period_info: информация о периоде
+        - columns: нужные колонки (кроме времени)
+        
+        Возвращает:
+        - DataFrame с колонкой datetime и нумерацией строк исходной таблицы
+        """
+        if self.store is None:
+            return time_slice(self.data, period_info['start_date'], period_info['end_date'])
+        period_data = self.store.frame(period_info['start_date'], period_info['end_date'],
+                                       columns=[self.store.time_column] + list(columns))
+        period_data['datetime'] = period_data[self.store.time_column]
+        return period_data
+    
     def _format_time_axis(self, ax, period_data):
         """
         Форматирует ось времени - только 1, 10, 20 числа месяцев.
@@ -441,16 +566,22 @@ class UniversalParameterPlotter:
         ax.set_xticklabels([date.strftime('%Y-%m-%d') for date in tick_dates], 
                           rotation=45, ha='right', fontsize=10)
     
-    def create_all_charts(self):
+    def create_all_charts(self, workers=1, force=False):
         """
         Создает все выбранные графики для всех выбранных периодов.
+        
+        Графики, входные данные и настройки которых не изменились с прошлого
+        запуска (см. chart_cache), пропускаются.
+        
+        Параметры:
+        - workers: количество процессов для построения графиков (None - число ядер)
+        - force: перерисовать все графики, не проверяя кеш
         """
         print(f"\n" + "=" * 60)
         print("СОЗДАНИЕ ГРАФИКОВ")
         print("=" * 60)
         
         total_charts = len(self.selected_parameters) * len(self.selected_periods)
-        created_charts = 0
         
         print(f"Всего будет создано графиков: {total_charts}")
         print(f"Параметров: {len(self.selected_parameters)}")
@@ -459,65 +590,178 @@ class UniversalParameterPlotter:
         # Создаем папки
         self.create_parameter_directories()
         
-        print(f"\nНачинаем создание графиков...")
+        # Отбираем графики, входные данные которых изменились
+        cache = ChartCache(self.charts_base_dir)
+        tasks = []
+        skipped_charts = 0
+        for parameter in self.selected_parameters:
+            for period in self.selected_periods:
+                path = self.chart_path(parameter, period)
+                key = self.chart_key(parameter, period)
+                if not force and cache.is_fresh(path, key):
+                    skipped_charts += 1
+                else:
+                    tasks.append((parameter, period, path, key))
         
-        for i, parameter in enumerate(self.selected_parameters, 1):
-            print(f"\n[{i}/{len(self.selected_parameters)}] Обработка параметра: {parameter}")
-            
-            for j, period in enumerate(self.selected_periods, 1):
+        if skipped_charts:
+            print(f"✓ Без изменений (пропущено): {skipped_charts}, к построению: {len(tasks)}")
+        
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, len(tasks)))
+        
+        print(f"\nНачинаем создание графиков...")
+        started = time.perf_counter()
+        
+        done = None
+        if workers > 1:
+            done = self._create_charts_parallel(tasks, workers)
+            if done is None:
+                workers = 1
+        
+        if done is None:
+            done = []
+            current = None
+            for parameter, period, _, _ in tasks:
+                if parameter != current:
+                    current = parameter
+                    print(f"\n[{self.selected_parameters.index(parameter) + 1}/{len(self.selected_parameters)}] "
+                          f"Обработка параметра: {parameter}")
                 try:
                     success = self.plot_parameter_for_period(parameter, period)
                     if success:
-                        created_charts += 1
-                        print(f"  ✓ {period['start_str']}-{period['end_str']} ({j}/{len(self.selected_periods)})")
+                        print(f"  ✓ {period['start_str']}-{period['end_str']}")
                     else:
                         print(f"  ❌ {period['start_str']}-{period['end_str']} - ошибка создания")
                 except Exception as e:
+                    success = False
                     print(f"  ❌ {period['start_str']}-{period['end_str']} - ошибка: {e}")
+                done.append(success)
+        
+        for (_, _, path, key), success in zip(tasks, done):
+            if success:
+                cache.record(path, key)
+        cache.save()
+        
+        elapsed = time.perf_counter() - started
+        created_charts = sum(done)
         
         print(f"\n" + "=" * 60)
         print("РЕЗУЛЬТАТЫ СОЗДАНИЯ ГРАФИКОВ")
         print("=" * 60)
-        print(f"✓ Успешно создано графиков: {created_charts}/{total_charts}")
+        print(f"✓ Успешно создано графиков: {created_charts}/{len(tasks)}")
+        if skipped_charts:
+            print(f"✓ Пропущено без изменений: {skipped_charts}")
+        print(f"✓ Время: {elapsed:.1f} с, процессов: {workers}, "
+              f"{created_charts / max(elapsed, 1e-9):.2f} графиков/с")
         
-        if created_charts < total_charts:
-            print(f"⚠️ Не удалось создать: {total_charts - created_charts} графиков")
+        if created_charts < len(tasks):
+            print(f"⚠️ Не удалось создать: {len(tasks) - created_charts} графиков")
         
         print(f"✓ Графики сохранены в папке: {self.charts_base_dir}")
         
-        return created_charts > 0
+        return created_charts + skipped_charts > 0
+    
+    def _create_charts_parallel(self, tasks, workers):
+        """
+        Строит графики в пуле процессов; каждый процесс читает данные из
+        колоночного хранилища через mmap, а не загружает таблицу заново.
+        Хранилище собирается из уже загруженной self.data (с ее профилем
+        типов), поэтому процессы рисуют те же данные, что и один процесс.
+        
+        Параметры:
+        - tasks: список (параметр, период, путь, ключ)
+        - workers: количество процессов
+        
+        Возвращает:
+        - список успехов в порядке tasks или None, если хранилище недоступно
+        """
+        try:
+            columns = [name for name in self.data.columns if name != 'datetime']
+            store = open_column_store(self.data_file, data=self.data[columns], profile=self.dtype_profile)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Колоночное хранилище недоступно ({e}), строим графики в одном процессе")
+            return None
+        
+        done = [False] * len(tasks)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker,
+                                 initargs=(store.path, self.zigzag_column, self.pivots,
+                                           self.charts_base_dir, self.figsize, self.dpi, self.lod)) as executor:
+            futures = {executor.submit(_render_chart, parameter, period): k
+                       for k, (parameter, period, _, _) in enumerate(tasks)}
+            for n, future in enumerate(as_completed(futures), 1):
+                k = futures[future]
+                parameter, period = tasks[k][:2]
+                success, error = future.result()
+                done[k] = success
+                label = f"{parameter} {period['start_str']}-{period['end_str']}"
+                if success:
+                    print(f"  ✓ {label} ({n}/{len(tasks)})")
+                elif error:
+                    print(f"  ❌ {label} - ошибка: {error}")
+                else:
+                    print(f"  ❌ {label} - ошибка создания")
+        return done
 
-def main():
+def main(argv=None):
     """
     Основная функция для создания графиков параметров.
+    
+    Без --categories/--parameters и --periods выбор делается интерактивно.
+    
+    Возвращает:
+    - True, если графики построены
     """
+    parser = argparse.ArgumentParser(description="Графики параметров с точками ZigZag по периодам")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="процессов для построения графиков (по умолчанию - число ядер)")
+    parser.add_argument('--force', action='store_true',
+                        help="перерисовать все графики, даже если данные не изменились")
+    parser.add_argument('--data-file', default="processed_data/ml_data.csv",
+                        help="файл с признаками")
+    parser.add_argument('--categories', default=None,
+                        help="категории параметров: 'all' или номера через запятую (без вопроса)")
+    parser.add_argument('--parameters', default=None,
+                        help="параметры через запятую, например rsi_14,ZIGZAG_PRICE_CHART (вместо категорий)")
+    parser.add_argument('--periods', default=None,
+                        help="периоды: 'all' или номера через запятую (без вопроса)")
+    parser.add_argument('--charts-dir', default="charts",
+                        help="папка для графиков")
+    args = parser.parse_args(argv)
+    names = [name.strip() for name in args.parameters.split(',')] if args.parameters else None
+    
     print("Универсальный плоттер параметров с точками ZigZag")
     print("=" * 80)
     
     try:
         # Создаем плоттер
-        plotter = UniversalParameterPlotter("processed_data/ml_data.csv")
+        plotter = UniversalParameterPlotter(args.data_file)
+        plotter.charts_base_dir = args.charts_dir
         
         # Загружаем данные
         plotter.load_data()
         
-        # Выбираем параметры
-        plotter.select_parameters()
+        # Выбираем параметры (в пакетном режиме без вопросов)
+        batch = names is not None or args.categories is not None
+        plotter.select_parameters(args.categories, names, show_details=False if batch else None)
         
         # Выбираем периоды
-        plotter.select_periods()
+        plotter.select_periods(args.periods)
         
         # Создаем все графики
-        plotter.create_all_charts()
+        if not plotter.create_all_charts(workers=args.workers, force=args.force):
+            return False
         
         print("\n" + "=" * 80)
         print("✓ Процесс завершен успешно!")
         print("✓ Все графики созданы и сохранены в соответствующие папки")
+        return True
         
     except Exception as e:
         print(f"❌ Ошибка: {e}")
         import traceback
         traceback.print_exc()
+        return False
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(0 if main() else 1)
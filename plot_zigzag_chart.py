@@ -7,7 +7,13 @@ import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from datetime import datetime, timedelta
 import os
+import sys
+import argparse
 import warnings
+from data_store import load_table, time_slice
+from pivot_index import find_pivots, load_pivot_index
+from chart_cache import ChartCache, chart_key
+from chart_lod import plot_lod_line, time_positions
 warnings.filterwarnings('ignore')
 
 class ZigZagPeriodPlotter:
@@ -15,17 +21,25 @@ class ZigZagPeriodPlotter:
     Класс для создания периодных графиков зигзага с отчетами.
     """
     
-    def __init__(self, data_file="processed_data/ml_data.csv"):
+    def __init__(self, data_file="processed_data/ml_data.csv", dtype_profile='compact', memory_report=False):
         """
         Инициализация плоттера.
         
         Параметры:
         - data_file: путь к файлу с данными для ML
+        - dtype_profile: профиль типов данных при загрузке ('default' или 'compact')
+        - memory_report: вывести отчет об экономии памяти при загрузке
         """
         self.data_file = data_file
+        self.dtype_profile = dtype_profile
+        self.memory_report = memory_report
         self.data = None
         self.zigzag_column = None
+        self.pivot_index = None
         self.charts_dir = "charts/zigzag"
+        self.figsize = (16, 8)
+        self.dpi = 300
+        self.lod = True
         self.report_data = []
         
     def load_data(self):
@@ -35,25 +49,36 @@ class ZigZagPeriodPlotter:
         print(f"Загрузка данных из {self.data_file}...")
         
         try:
-            self.data = pd.read_csv(self.data_file)
+            self.data = load_table(self.data_file, profile=self.dtype_profile, memory_report=self.memory_report)
+            self.pivot_index = load_pivot_index(self.data_file)
             
-                    # Проверяем наличие необходимых колонок
-        if 'Open time' not in self.data.columns:
-            print("❌ Колонка 'Open time' не найдена!")
-            return False
+            # Проверяем наличие необходимых колонок
+            if 'Open time' not in self.data.columns:
+                print("❌ Колонка 'Open time' не найдена!")
+                return False
             
-        # Ищем колонку зигзага
-        zigzag_columns = [col for col in self.data.columns if 'zigzag' in col.lower()]
-        if zigzag_columns:
-            self.zigzag_column = zigzag_columns[0]
-            print(f"✓ Найдена колонка зигзага: {self.zigzag_column}")
-        else:
-            print("❌ Колонка зигзага не найдена!")
-            return False
+            # Ищем колонку зигзага
+            zigzag_columns = [col for col in self.data.columns if 'zigzag' in col.lower()]
+            if zigzag_columns:
+                self.zigzag_column = zigzag_columns[0]
+                print(f"✓ Найдена колонка зигзага: {self.zigzag_column}")
+            else:
+                print("❌ Колонка зигзага не найдена!")
+                return False
             
             # Преобразуем время в datetime
             self.data['datetime'] = pd.to_datetime(self.data['Open time'])
             
+            # Периоды вырезаются бинарным поиском, поэтому время должно быть отсортировано
+            if not self.data['datetime'].is_monotonic_increasing:
+                print("⚠️ Данные не отсортированы по времени, сортируем...")
+                self.data = self.data.sort_values('datetime', kind='stable').reset_index(drop=True)
+                # Номера строк в индексе вершин относятся к исходному порядку
+                self.pivot_index = None
+            
+            if self.pivot_index is not None and self.zigzag_column in self.pivot_index:
+                print(f"✓ Индекс вершин: {len(self.pivot_index[self.zigzag_column].row)} точек зигзага")
+            
             # Создаем папку для графиков
             if not os.path.exists(self.charts_dir):
                 os.makedirs(self.charts_dir)
@@ -101,15 +126,15 @@ class ZigZagPeriodPlotter:
                 current_end = end_date
             
             # Фильтруем данные для текущего периода
-            period_mask = (self.data['datetime'] >= current_start) & (self.data['datetime'] < current_end)
-            period_data = self.data[period_mask].copy()
+            period_data = time_slice(self.data, current_start, current_end)
             
             if len(period_data) > 0:
                 period_info = {
                     'period_num': period_num,
                     'start_date': current_start,
                     'end_date': current_end,
-                    'data': period_data
+                    'data': period_data,
+                    'pivots': self.period_pivots(period_data, current_start, current_end)
                 }
                 periods.append(period_info)
                 period_num += 1
@@ -119,20 +144,36 @@ class ZigZagPeriodPlotter:
         print(f"✓ Данные разбиты на {len(periods)} периодов по {months} месяца")
         return periods
     
-    def analyze_zigzag_period(self, period_data):
+    def period_pivots(self, period_data, start, end):
+        """
+        Вершины зигзага в периоде [start, end).
+        
+        Параметры:
+        - period_data: данные периода (используются, если индекса вершин нет)
+        - start, end: границы периода
+        
+        Возвращает:
+        - Pivots
+        """
+        if self.pivot_index is not None and self.zigzag_column in self.pivot_index:
+            return self.pivot_index[self.zigzag_column].between(start, end)
+        return find_pivots(period_data, self.zigzag_column)
+    
+    def analyze_zigzag_period(self, period_data, pivots=None):
         """
         Анализирует зигзаги в периоде.
         
         Параметры:
         - period_data: данные периода
+        - pivots: вершины периода (None - найти в period_data)
         
         Возвращает:
         - словарь с анализом зигзагов
         """
-        # Находим точки зигзага
-        zigzag_points = period_data[period_data[self.zigzag_column] != 0]
+        if pivots is None:
+            pivots = find_pivots(period_data, self.zigzag_column)
         
-        if len(zigzag_points) == 0:
+        if len(pivots.row) == 0:
             return {
                 'zigzag_count': 0,
                 'avg_distance': 0,
@@ -141,14 +182,9 @@ class ZigZagPeriodPlotter:
             }
         
         # Вычисляем расстояния между точками зигзага
-        distances = []
-        for i in range(1, len(zigzag_points)):
-            prev_price = zigzag_points.iloc[i-1]['Close']
-            curr_price = zigzag_points.iloc[i]['Close']
-            distance = abs(curr_price - prev_price)
-            distances.append(distance)
-        
-        if distances:
+        distances = np.abs(np.diff(pivots.close))
+        
+        if len(distances):
             avg_distance = np.mean(distances)
             min_distance = np.min(distances)
             max_distance = np.max(distances)
@@ -156,13 +192,13 @@ class ZigZagPeriodPlotter:
             avg_distance = min_distance = max_distance = 0
         
         return {
-            'zigzag_count': len(zigzag_points),
+            'zigzag_count': len(pivots.row),
             'avg_distance': avg_distance,
             'min_distance': min_distance,
             'max_distance': max_distance
         }
     
-    def plot_period_chart(self, period_data, period_info, save_path):
+    def plot_period_chart(self, period_data, period_info, save_path, pivots=None):
         """
         Создает график для периода.
         
@@ -170,25 +206,27 @@ class ZigZagPeriodPlotter:
         - period_data: данные периода
         - period_info: информация о периоде
         - save_path: путь для сохранения
+        - pivots: вершины периода (None - найти в period_data)
         """
+        if pivots is None:
+            pivots = find_pivots(period_data, self.zigzag_column)
+        
         # Создаем график
-        fig, ax = plt.subplots(1, 1, figsize=(16, 8))
+        fig, ax = plt.subplots(1, 1, figsize=self.figsize)
         
-        # График цены
-        ax.plot(period_data['datetime'], period_data['Close'], 
-                color='blue', alpha=0.7, linewidth=1, label='Цена закрытия')
+        # График цены (прореженный до ширины графика, вершины сохраняются)
+        if self.lod:
+            plot_lod_line(ax, period_data['datetime'].to_numpy(), period_data['Close'].to_numpy(), dpi=self.dpi,
+                          keep=time_positions(period_data['datetime'], pivots.time),
+                          color='blue', alpha=0.7, linewidth=1, label='Цена закрытия')
+        else:
+            ax.plot(period_data['datetime'], period_data['Close'], 
+                    color='blue', alpha=0.7, linewidth=1, label='Цена закрытия')
         
         # Соединяем точки зигзага линиями
-        zigzag_data = period_data[period_data[self.zigzag_column] != 0]
-        if len(zigzag_data) > 1:
-            zigzag_prices = []
-            for _, row in zigzag_data.iterrows():
-                if row[self.zigzag_column] == -1:  # Максимум
-                    zigzag_prices.append(row['High'])
-                else:  # Минимум
-                    zigzag_prices.append(row['Low'])
-            
-            ax.plot(zigzag_data['datetime'], zigzag_prices, 
+        # Цена вершины: High для максимума, Low для минимума
+        if len(pivots.row) > 1:
+            ax.plot(pivots.time, pivots.price, 
                     color='orange', linewidth=2, alpha=0.8, label='Зигзаг')
         
         # Настройки графика
@@ -209,7 +247,7 @@ class ZigZagPeriodPlotter:
         plt.tight_layout()
         
         # Сохраняем график
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
+        plt.savefig(save_path, dpi=self.dpi, bbox_inches='tight')
         plt.close()  # Закрываем график для экономии памяти
         
         print(f"✓ График сохранен: {save_path}")
@@ -258,25 +296,33 @@ class ZigZagPeriodPlotter:
         
         print(f"✓ Отчет сохранен: {report_path}")
     
-    def create_period_charts(self):
+    def create_period_charts(self, force=False):
         """
         Основной метод для создания периодных графиков и отчетов.
+        
+        Отчет считается по всем периодам, а перерисовываются только графики
+        периодов, данные которых изменились с прошлого запуска (см. chart_cache).
+        
+        Параметры:
+        - force: перерисовать все графики, не проверяя кеш
         """
         print("Создание периодных графиков зигзага")
         print("=" * 60)
         
         # Загружаем данные
         if not self.load_data():
-            return
+            return False
         
         # Разбиваем на периоды
         periods = self.split_data_into_periods(months=3)
         
         if not periods:
             print("❌ Не удалось разбить данные на периоды!")
-            return
+            return False
         
         total_zigzags = 0
+        created_charts = 0
+        cache = ChartCache(self.charts_dir)
         
         # Обрабатываем каждый период
         for period_info in periods:
@@ -286,7 +332,7 @@ class ZigZagPeriodPlotter:
             end_date = period_info['end_date']
             
             # Анализируем зигзаги в периоде
-            analysis = self.analyze_zigzag_period(period_data)
+            analysis = self.analyze_zigzag_period(period_data, period_info['pivots'])
             zigzag_count = analysis['zigzag_count']
             avg_distance = analysis['avg_distance']
             
@@ -311,7 +357,22 @@ class ZigZagPeriodPlotter:
             # Создаем график для периода
             chart_filename = f"zigzag_{start_str}.png"
             chart_path = os.path.join(self.charts_dir, chart_filename)
-            self.plot_period_chart(period_data, period_info, chart_path)
+            settings = {
+                'zigzag_column': self.zigzag_column,
+                'start': start_date,
+                'end': end_date,
+                'figsize': self.figsize,
+                'dpi': self.dpi,
+                'lod': self.lod,
+            }
+            key = chart_key(period_data, ['datetime', 'Close'], period_info['pivots'], settings)
+            if not force and cache.is_fresh(chart_path, key):
+                continue
+            self.plot_period_chart(period_data, period_info, chart_path, period_info['pivots'])
+            cache.record(chart_path, key)
+            created_charts += 1
+        
+        cache.save()
         
         # Выводим итоговую статистику
         print(f"\n" + "=" * 60)
@@ -319,32 +380,52 @@ class ZigZagPeriodPlotter:
         print("=" * 60)
         print(f"Общее количество зигзагов: {total_zigzags}")
         print(f"Среднее количество зигзагов на период: {total_zigzags/len(periods):.2f}")
-        print(f"Создано графиков: {len(periods)}")
+        print(f"Создано графиков: {created_charts}")
+        if created_charts < len(periods):
+            print(f"Пропущено без изменений: {len(periods) - created_charts}")
         
         # Сохраняем полный отчет
-        self.save_report()
+        report_path = os.path.join(self.charts_dir, "zigzag_analysis_report.txt")
+        self.save_report(report_path)
         
         print(f"\n✓ Все графики сохранены в папку: {self.charts_dir}")
-        print("✓ Полный отчет сохранен в файл: charts/zigzag/zigzag_analysis_report.txt")
+        print(f"✓ Полный отчет сохранен в файл: {report_path}")
+        return True
 
-def main():
+def main(argv=None):
     """
     Основная функция для создания периодных графиков.
+    
+    Возвращает:
+    - True, если графики и отчет созданы
     """
+    parser = argparse.ArgumentParser(description="Периодные графики зигзага с отчетом")
+    parser.add_argument('--force', action='store_true',
+                        help="перерисовать все графики, даже если данные не изменились")
+    parser.add_argument('--data-file', default="processed_data/ml_data.csv",
+                        help="файл с признаками")
+    parser.add_argument('--charts-dir', default="charts/zigzag",
+                        help="папка для графиков и отчета")
+    args = parser.parse_args(argv)
+    
     try:
         # Создаем плоттер
-        plotter = ZigZagPeriodPlotter("processed_data/ml_data.csv")
+        plotter = ZigZagPeriodPlotter(args.data_file)
+        plotter.charts_dir = args.charts_dir
         
         # Создаем графики и отчеты
-        plotter.create_period_charts()
+        if not plotter.create_period_charts(force=args.force):
+            return False
         
         print("\n" + "=" * 60)
         print("✓ Процесс завершен успешно!")
+        return True
         
     except Exception as e:
         print(f"❌ Ошибка: {e}")
         import traceback
         traceback.print_exc()
+        return False
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Скользящие максимумы/минимумы сразу для нескольких окон.
+
+Пакетный расчет строит разреженную таблицу (sparse table): уровень k хранит
+экстремум по 2^k последним значениям, и экстремум окна w получается из двух
+перекрывающихся блоков уровня floor(log2 w). Таблица строится один раз на ряд
+и обслуживает все окна, вместо отдельного rolling().max() на каждое окно.
+
+Потоковый расчет держит монотонную очередь по самому большому окну; экстремум
+любого меньшего окна - первый элемент очереди, попадающий в окно.
+
+NaN обрабатываются как в pandas rolling(window) с min_periods=window:
+если в окне есть NaN, результат NaN.
+"""
+
+from bisect import bisect_left
+import math
+
+import numpy as np
+
+EXTREMA_MODES = ('max', 'min')
+
+
+def _reducer(mode):
+    if mode not in EXTREMA_MODES:
+        raise ValueError(f"Неизвестный режим экстремума: {mode}. Доступны: {', '.join(EXTREMA_MODES)}")
+    return np.maximum if mode == 'max' else np.minimum
+
+
+def rolling_extrema(values, windows, mode='max'):
+    """
+    Скользящий максимум или минимум для набора окон за один проход.
+
+    Параметры:
+    - values: одномерный массив значений
+    - windows: размеры окон (целые >= 1)
+    - mode: 'max' или 'min'
+
+    Возвращает:
+    - словарь {окно: массив float64 той же длины}; первые window-1 значений - NaN
+    """
+    reduce = _reducer(mode)
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    windows = sorted({int(w) for w in windows})
+    if windows and windows[0] < 1:
+        raise ValueError("Размер окна должен быть >= 1")
+
+    result = {}
+    if not windows:
+        return result
+
+    # levels[k][i] - экстремум values[i - 2^k + 1 .. i]
+    levels = [values]
+    max_level = int(math.log2(windows[-1]))
+    for k in range(1, max_level + 1):
+        prev = levels[-1]
+        step = 1 << (k - 1)
+        level = np.full(n, np.nan)
+        if n > step:
+            level[step:] = reduce(prev[step:], prev[:-step])
+        levels.append(level)
+
+    for w in windows:
+        k = int(math.log2(w))
+        block = 1 << k
+        out = np.full(n, np.nan)
+        if n >= w:
+            level = levels[k]
+            # Два блока длиной 2^k: заканчивающийся в i и заканчивающийся в i - w + 2^k
+            out[w - 1:] = reduce(level[w - 1:], level[block - 1:n - w + block])
+        result[w] = out
+    return result
+
+
+class RollingExtremaState:
+    """
+    Потоковые скользящие экстремумы для набора окон.
+
+    Монотонная очередь хранит кандидатов (индекс, значение) по самому
+    большому окну; обновление - амортизированно O(1), ответ для окна -
+    бинарный поиск по индексам очереди.
+    """
+
+    def __init__(self, windows, mode='max'):
+        """
+        Параметры:
+        - windows: размеры окон
+        - mode: 'max' или 'min'
+        """
+        _reducer(mode)
+        self.windows = sorted({int(w) for w in windows})
+        self.max_window = self.windows[-1]
+        self.mode = mode
+        self.index = -1
+        self.last_nan = -1 - self.max_window
+        self._indices = []
+        self._values = []
+        self._head = 0
+
+    def _dominates(self, new, old):
+        return new >= old if self.mode == 'max' else new <= old
+
+    def push(self, value):
+        """
+        Добавляет новое значение ряда.
+        """
+        self.index += 1
+        value = float(value)
+        if math.isnan(value):
+            self.last_nan = self.index
+            return
+
+        # Убираем кандидатов, которые уже никогда не станут экстремумом
+        while len(self._values) > self._head and self._dominates(value, self._values[-1]):
+            self._values.pop()
+            self._indices.pop()
+        self._indices.append(self.index)
+        self._values.append(value)
+
+        # Убираем кандидатов, вышедших из самого большого окна
+        oldest = self.index - self.max_window + 1
+        while self._indices[self._head] < oldest:
+            self._head += 1
+        if self._head > 64 and self._head * 2 > len(self._indices):
+            del self._indices[:self._head]
+            del self._values[:self._head]
+            self._head = 0
+
+    def get(self, window):
+        """
+        Экстремум по последним window значениям (NaN, если окно неполное или содержит NaN).
+        """
+        start = self.index - window + 1
+        if start < 0 or self.last_nan >= start:
+            return np.nan
+        pos = bisect_left(self._indices, start, self._head)
+        return self._values[pos]
+
+    def update(self, value):
+        """
+        Добавляет значение и возвращает экстремумы для всех окон.
+
+        Возвращает:
+        - словарь {окно: значение}
+        """
+        self.push(value)
+        return {w: self.get(w) for w in self.windows}
+
+    def prime(self, values):
+        """
+        Заполняет состояние последними значениями истории.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        offset = max(len(values) - self.max_window, 0)
+        # Индексы продолжают нумерацию истории, чтобы get() видел полные окна
+        self.index = offset - 1
+        self.last_nan = -1 - self.max_window
+        for value in values[offset:]:
+            self.push(value)
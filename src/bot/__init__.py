@@ -1,7 +1,12 @@
+import pandas as pd
+
+
 class CryptoBot:
     def __init__(self, config, data=None):
         self.config = config
         self.data = data
+        self.indicator_state = None
+        self.indicators = None
         self.api_client = self.initialize_api_client()
         self.trading_model = self.load_trading_model()
 
@@ -20,10 +25,20 @@ class CryptoBot:
         # TODO: Implement market data fetching
         pass
 
-    def analyze_market(self):
-        # Analyze market data and generate trading signals
-        # TODO: Implement market analysis
-        pass
+    def analyze_market(self, new_candles=None):
+        # Indicators of the last candle; new candles are processed incrementally
+        # and appended to self.data, so the history and the state stay in sync
+        if self.data is None:
+            return None
+
+        from utils.helpers import create_indicator_state
+        if self.indicator_state is None:
+            self.indicator_state = create_indicator_state(self.data)
+            self.indicators = self.indicator_state.last
+        if new_candles is not None and len(new_candles) > 0:
+            self.indicators = self.indicator_state.append(new_candles).iloc[-1].to_dict()
+            self.data = pd.concat([self.data, new_candles])
+        return self.indicators
 
     def execute_trade(self, signal):
         # Execute a trade based on the generated signal
@@ -2,6 +2,9 @@ import pandas as pd
 import requests
 import logging
 
+# Движок признаков лежит в корне проекта (корень должен быть в PYTHONPATH)
+from feature_engine import FeatureEngine, IncrementalFeatureEngine, col, helpers_feature_set, ref, rsi, sma
+
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -44,19 +47,9 @@ def calculate_indicators(data):
             logger.error("Колонка 'close' отсутствует в данных")
             return data
             
-        # Простые скользящие средние
-        data['SMA_14'] = data['close'].rolling(window=14).mean()
-        data['SMA_50'] = data['close'].rolling(window=50).mean()
-        
-        # Экспоненциальные скользящие средние
-        data['EMA_14'] = data['close'].ewm(span=14, adjust=False).mean()
-        data['EMA_50'] = data['close'].ewm(span=50, adjust=False).mean()
-        
-        # RSI
-        data['RSI'] = compute_rsi(data['close'], window=14)
-        
-        # Bollinger Bands
-        data['BB_upper'], data['BB_lower'] = compute_bollinger_bands(data['close'])
+        # SMA, EMA, RSI и полосы Боллинджера - одним набором движка признаков
+        for name, values in FeatureEngine(data).compute(helpers_feature_set('close')).items():
+            data[name] = values
         
         logger.info("Технические индикаторы рассчитаны успешно")
         return data
@@ -65,21 +58,20 @@ def calculate_indicators(data):
         logger.error(f"Ошибка при расчете индикаторов: {e}")
         return data
 
+def create_indicator_state(data):
+    """
+    Состояние индикаторов calculate_indicators для инкрементального расчета
+    по новым свечам (см. IncrementalFeatureEngine.append)
+    """
+    return IncrementalFeatureEngine.from_frame(data, helpers_feature_set('close'))
+
 def compute_rsi(series, window=14):
     """
     Расчет RSI (Relative Strength Index)
     """
     try:
-        delta = series.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
-        
-        # Избегаем деления на ноль
-        loss = loss.replace(0, 0.0001)
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        return rsi
+        engine = FeatureEngine(pd.DataFrame({'close': series}))
+        return engine.get(rsi(ref('diff', source=col('close')), window, loss_floor=0.0001))
         
     except Exception as e:
         logger.error(f"Ошибка при расчете RSI: {e}")
@@ -90,11 +82,11 @@ def compute_bollinger_bands(series, window=20, num_std=2):
     Расчет полос Боллинджера
     """
     try:
-        sma = series.rolling(window=window).mean()
-        std = series.rolling(window=window).std()
-        
-        upper_band = sma + (std * num_std)
-        lower_band = sma - (std * num_std)
+        engine = FeatureEngine(pd.DataFrame({'close': series}))
+        center = sma(col('close'), window)
+        std = ref('rolling_std', source=col('close'), window=window)
+        upper_band = engine.get(ref('bollinger_upper', center=center, std=std, num_std=num_std))
+        lower_band = engine.get(ref('bollinger_lower', center=center, std=std, num_std=num_std))
         
         return upper_band, lower_band
         
@@ -0,0 +1,39 @@
+import pytest
+import numpy as np
+
+
+@pytest.fixture
+def make_dataset():
+    """
+    Синтетическая задача вершин: признаки float32 и метки -1/0/1 по
+    линейной оценке первых двух признаков (с шумом noise и порогом threshold).
+    """
+    def make(n=3000, features=6, seed=0, noise=0.0, threshold=1.2):
+        rng = np.random.default_rng(seed)
+        X = rng.normal(size=(n, features)).astype(np.float32)
+        score = X[:, 0] + 0.5 * X[:, 1]
+        if noise:
+            score = score + rng.normal(0, noise, n)
+        y = np.where(score > threshold, 1, np.where(score < -threshold, -1, 0)).astype(np.int8)
+        return X, y
+    return make
+
+
+@pytest.fixture
+def make_input():
+    """Свечи 15m (как processed_data/input_data.csv) со случайным блужданием цены."""
+    import pandas as pd
+
+    def make(n=3000, seed=0):
+        rng = np.random.default_rng(seed)
+        close = np.round(40000 + np.cumsum(rng.normal(0, 150, n)), 2)
+        return pd.DataFrame({
+            'Open time': pd.date_range('2020-01-01', periods=n, freq='15min'),
+            'Open': np.round(close + rng.normal(0, 20, n), 2),
+            'High': np.round(close + np.abs(rng.normal(0, 60, n)), 2),
+            'Low': np.round(close - np.abs(rng.normal(0, 60, n)), 2),
+            'Close': close,
+            'Volume': np.round(rng.uniform(1, 100, n), 3),
+            'Number of trades': rng.integers(0, 5000, n),
+        })
+    return make
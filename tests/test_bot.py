@@ -73,3 +73,34 @@ class TestCryptoBot:
         # Should complete without exception
         bot.trade()
         # No assertion needed as it just prints completion message
+    
+    @pytest.mark.skipif(not BOT_AVAILABLE, reason="CryptoBot module not available")
+    def test_analyze_market_updates_indicators(self, bot):
+        """Indicators for new candles are computed from the saved state."""
+        pytest.importorskip("requests")
+        import numpy as np
+        import pandas as pd
+        close = 40000 + np.cumsum(np.random.default_rng(0).normal(0, 50, 300))
+        bot.data = pd.DataFrame({'close': close[:250]})
+        
+        result = bot.analyze_market(pd.DataFrame({'close': close[250:]}, index=range(250, 300)))
+        
+        assert set(result) == {'SMA_14', 'SMA_50', 'EMA_14', 'EMA_50', 'RSI', 'BB_upper', 'BB_lower'}
+        assert result['SMA_14'] == pytest.approx(close[-14:].mean(), rel=1e-12)
+    
+    @pytest.mark.skipif(not BOT_AVAILABLE, reason="CryptoBot module not available")
+    def test_analyze_market_history_and_sync(self, bot):
+        """Without new candles the last history candle is returned; appended candles extend data."""
+        pytest.importorskip("requests")
+        import numpy as np
+        import pandas as pd
+        close = 40000 + np.cumsum(np.random.default_rng(0).normal(0, 50, 300))
+        bot.data = pd.DataFrame({'close': close[:250]})
+        
+        result = bot.analyze_market()
+        assert result['SMA_14'] == pytest.approx(close[236:250].mean(), rel=1e-12)
+        
+        bot.analyze_market(pd.DataFrame({'close': close[250:]}, index=range(250, 300)))
+        assert len(bot.data) == 300
+        np.testing.assert_array_equal(bot.data['close'].values, close)
+        assert bot.indicator_state.rows == len(bot.data)
@@ -0,0 +1,99 @@
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+try:
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from chart_lod import (axes_pixel_width, bucket_max, minmax_indices, plot_lod_line, plot_lod_volume,
+                           time_positions)
+    LOD_AVAILABLE = True
+except ImportError:
+    LOD_AVAILABLE = False
+
+
+def make_series(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.cumsum(rng.normal(0, 1, n))
+
+
+@pytest.mark.skipif(not LOD_AVAILABLE, reason="chart_lod module not available")
+class TestMinMaxDecimation:
+    """Прореживание сохраняет огибающую ряда и вершины."""
+
+    @pytest.mark.parametrize("n,buckets", [(100_000, 1000), (12_345, 777), (5001, 2500)])
+    def test_envelope_preserved(self, n, buckets):
+        values = make_series(n)
+        indices = minmax_indices(values, buckets)
+
+        assert len(indices) <= 2 * buckets + 2
+        assert np.all(np.diff(indices) > 0)
+        assert indices[0] == 0 and indices[-1] == n - 1
+        # Минимум и максимум каждой корзины остаются в прореженном ряду
+        size = int(np.ceil(n / buckets))
+        kept = np.zeros(n, dtype=bool)
+        kept[indices] = True
+        for start in range(0, n, size):
+            block = values[start:start + size]
+            assert kept[start + block.argmin()]
+            assert kept[start + block.argmax()]
+
+    def test_keep_indices_always_present(self):
+        values = make_series(50_000, 1)
+        keep = np.array([3, 777, 12_000, 49_998])
+
+        indices = minmax_indices(values, 200, keep)
+
+        assert np.isin(keep, indices).all()
+
+    def test_short_series_unchanged(self):
+        values = make_series(100)
+        np.testing.assert_array_equal(minmax_indices(values, 50), np.arange(100))
+
+    def test_nan_buckets(self):
+        values = make_series(10_000)
+        values[:500] = np.nan
+        values[7000] = np.nan
+
+        indices = minmax_indices(values, 100)
+
+        assert np.nanmax(values[indices]) == np.nanmax(values)
+        assert np.nanmin(values[indices]) == np.nanmin(values)
+
+    def test_bucket_max(self):
+        volume = np.arange(10, dtype=float)
+        starts, heights = bucket_max(volume, 4)
+        np.testing.assert_array_equal(starts, [0, 3, 6, 9])
+        np.testing.assert_array_equal(heights, [2, 5, 8, 9])
+
+        starts, heights = bucket_max(volume, 20)
+        np.testing.assert_array_equal(starts, np.arange(10))
+
+    def test_time_positions(self):
+        times = np.arange('2020-01-01T00:00', '2020-01-02T00:00', np.timedelta64(15, 'm'), dtype='datetime64[ns]')
+        np.testing.assert_array_equal(time_positions(times, times[[5, 40]]), [5, 40])
+
+
+@pytest.mark.skipif(not LOD_AVAILABLE, reason="chart_lod module not available")
+class TestLodPlot:
+    """Линия и объем на оси рисуются не больше чем по ширине оси в пикселях."""
+
+    def test_plot_lod_line_and_volume(self):
+        fig, ax = plt.subplots(figsize=(10, 4))
+        values = make_series(200_000)
+        width = axes_pixel_width(ax, dpi=100)
+
+        points = plot_lod_line(ax, np.arange(len(values)), values, dpi=100, keep=[123])
+        plot_lod_volume(ax, np.arange(len(values)), np.abs(values), dpi=100)
+
+        assert width == int(ax.get_position().width * 10 * 100)
+        assert points <= 2 * width + 3
+        line = ax.get_lines()[0]
+        assert 123 in line.get_xdata()
+        assert line.get_ydata().max() == values.max()
+        plt.close(fig)
@@ -0,0 +1,224 @@
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+try:
+    import pandas as pd
+    from data_corrector import (fix_price_jumps_new, find_jump_repairs, find_time_gaps,
+                                check_missing_in_chunk, fix_data_file)
+    CORRECTOR_AVAILABLE = True
+except ImportError:
+    CORRECTOR_AVAILABLE = False
+
+
+def legacy_fix_price_jumps(df, jump_threshold=40):
+    """Исходный построчный fix_price_jumps_new - эталон для сравнения."""
+    df_fixed = df.copy()
+    fixed_count = 0
+    i = 1
+    n = len(df_fixed)
+    while i < n:
+        prev_close = df_fixed.iloc[i-1]['Close']
+        curr_close = df_fixed.iloc[i]['Close']
+        change_pct = abs((curr_close - prev_close) / prev_close * 100)
+        if change_pct > jump_threshold:
+            j = i + 1
+            while j < n:
+                next_close = df_fixed.iloc[j]['Close']
+                next_change = abs((next_close - prev_close) / prev_close * 100)
+                if next_change < jump_threshold:
+                    break
+                j += 1
+            if j < n:
+                num_steps = j - i + 1
+                for k in range(num_steps):
+                    idx = i + k
+                    interp = (k + 1) / (num_steps + 1)
+                    corrected_price = prev_close + (df_fixed.iloc[j]['Close'] - prev_close) * interp
+                    price_ratio = corrected_price / df_fixed.iloc[idx]['Close']
+                    for col in ['Open', 'High', 'Low', 'Close']:
+                        if col in df_fixed.columns:
+                            df_fixed.iloc[idx, df_fixed.columns.get_loc(col)] *= price_ratio
+                    fixed_count += 1
+                i = j
+            else:
+                i += 1
+        else:
+            i += 1
+    return df_fixed, fixed_count
+
+
+def make_candles(close):
+    """Свечи вокруг заданных цен закрытия."""
+    close = np.asarray(close, dtype=float)
+    n = len(close)
+    return pd.DataFrame({
+        'Open time': pd.date_range('2023-01-01', periods=n, freq='15min'),
+        'Open': close * 0.999,
+        'High': close * 1.002,
+        'Low': close * 0.997,
+        'Close': close,
+        'Volume': np.linspace(1, 2, n),
+    })
+
+
+@pytest.mark.skipif(not CORRECTOR_AVAILABLE, reason="data_corrector module not available")
+class TestFixPriceJumps:
+    """Векторный движок исправления скачков совпадает с исходной функцией."""
+
+    @pytest.fixture
+    def random_close(self):
+        rng = np.random.default_rng(0)
+        close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.01, 3000)))
+        # Одиночные скачки, серии скачков и скачок без восстановления в конце
+        for start, length, factor in [(100, 1, 3.0), (400, 5, 0.2), (401, 1, 1.0),
+                                      (1200, 30, 2.5), (1231, 2, 0.1), (2990, 10, 4.0)]:
+            close[start:start + length] *= factor
+        return close
+
+    def test_matches_legacy(self, random_close):
+        df = make_candles(random_close)
+
+        expected, expected_count = legacy_fix_price_jumps(df)
+        fixed, count = fix_price_jumps_new(df)
+
+        assert count == expected_count
+        assert count > 0
+        for col in ['Open', 'High', 'Low', 'Close']:
+            assert np.array_equal(fixed[col].values, expected[col].values)
+
+    @pytest.mark.parametrize("threshold", [5, 20, 40])
+    def test_matches_legacy_thresholds(self, threshold):
+        rng = np.random.default_rng(threshold)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.05, 1500)))
+        df = make_candles(close)
+
+        expected, expected_count = legacy_fix_price_jumps(df, threshold)
+        fixed, count = fix_price_jumps_new(df, threshold)
+
+        assert count == expected_count
+        assert np.array_equal(fixed['Close'].values, expected['Close'].values)
+        assert np.array_equal(fixed['High'].values, expected['High'].values)
+
+    def test_no_jumps(self):
+        close = np.linspace(100, 110, 50)
+        runs, indices, ratios = find_jump_repairs(close)
+        assert runs == []
+        assert len(indices) == 0 and len(ratios) == 0
+
+    def test_input_not_modified(self, random_close):
+        df = make_candles(random_close)
+        original = df['Close'].values.copy()
+        fix_price_jumps_new(df)
+        assert np.array_equal(df['Close'].values, original)
+
+
+@pytest.mark.skipif(not CORRECTOR_AVAILABLE, reason="data_corrector module not available")
+class TestTimeGaps:
+    """Поиск разрывов по разностям меток времени."""
+
+    @pytest.fixture
+    def times(self):
+        full = pd.date_range('2023-01-01', periods=200, freq='15min')
+        drop = list(range(10, 13)) + [50] + list(range(120, 160))
+        return full.delete(drop)
+
+    def test_gap_ranges(self, times):
+        missing, gaps = find_time_gaps(times, 15)
+
+        assert missing == 44
+        assert list(gaps['missing']) == [3, 1, 40]
+        assert gaps['start'].iloc[0] == pd.Timestamp('2023-01-01 02:30')
+        assert gaps['end'].iloc[0] == pd.Timestamp('2023-01-01 03:00')
+
+    def test_matches_date_range_count(self, times):
+        chunk = pd.DataFrame({'Open time': times})
+        full_timeline = pd.date_range(times[0], times[-1], freq='15min')
+        expected = len(set(full_timeline) - set(times))
+
+        assert check_missing_in_chunk(chunk, times[0], times[-1], 15) == expected
+
+    def test_gap_across_chunk_boundary(self, times):
+        first, second = times[:115], times[115:]
+
+        missing_first, _ = find_time_gaps(first, 15)
+        missing_second, gaps = find_time_gaps(second, 15, prev_time=first[-1])
+
+        assert missing_first + missing_second == 44
+        assert gaps['missing'].iloc[0] == 40
+
+    def test_duplicates_are_not_gaps(self):
+        times = pd.to_datetime(['2023-01-01 00:00', '2023-01-01 00:15',
+                                '2023-01-01 00:15', '2023-01-01 00:30'])
+        missing, gaps = find_time_gaps(times, 15)
+        assert missing == 0
+        assert len(gaps) == 0
+
+
+@pytest.mark.skipif(not CORRECTOR_AVAILABLE, reason="data_corrector module not available")
+class TestStreamingFix:
+    """Потоковый режим fix_data_file совпадает с обработкой в памяти."""
+
+    @pytest.fixture
+    def raw_file(self, tmp_path):
+        rng = np.random.default_rng(42)
+        n = 3000
+        times = pd.date_range('2023-01-01', periods=n, freq='15min')
+        close = 20000 * np.exp(np.cumsum(rng.normal(0, 0.005, n)))
+        # Серии скачков, в том числе на стыках частей и без восстановления в конце
+        for start, length, factor in [(150, 3, 2.0), (495, 12, 0.3), (1990, 25, 3.0), (2950, 50, 5.0)]:
+            close[start:start + length] *= factor
+        df = pd.DataFrame({
+            'Open time': times,
+            'Open': close * 0.999,
+            'High': close * 1.002,
+            'Low': close * 0.998,
+            'Close': close,
+            'Volume': rng.uniform(1, 100, n),
+            'Number of trades': rng.integers(10, 1000, n),
+            'Close time': times + pd.Timedelta(minutes=15) - pd.Timedelta(milliseconds=1),
+        })
+        df.loc[[700, 1000, 1001], 'Close'] = np.nan
+        df.loc[1500, 'High'] = df.loc[1500, 'Low'] - 1
+        # Пропуски во времени (в том числе на стыке частей) и дубликаты
+        df = df.drop(index=list(range(300, 340)) + list(range(998, 1003)) + [2100])
+        df = pd.concat([df, df.iloc[[10, 500, 501]]]).sort_values('Open time', kind='stable')
+        path = tmp_path / "raw.csv"
+        df.to_csv(path, index=False)
+        return path
+
+    @pytest.mark.parametrize("chunk_size", [97, 500, 5000])
+    def test_streaming_matches_in_memory(self, raw_file, tmp_path, chunk_size):
+        expected_path = tmp_path / "expected.csv"
+        streamed_path = tmp_path / f"streamed_{chunk_size}.csv"
+
+        fix_data_file(str(raw_file), str(expected_path))
+        fix_data_file(str(raw_file), str(streamed_path), streaming=True, chunk_size=chunk_size)
+
+        expected = pd.read_csv(expected_path)
+        streamed = pd.read_csv(streamed_path)
+        pd.testing.assert_frame_equal(streamed, expected, check_dtype=False, check_exact=True)
+
+    def test_interval_independent_of_chunk_size(self, tmp_path):
+        # В начале файла каждая вторая свеча пропущена: первая часть выглядит как 30-минутная
+        times = pd.date_range('2023-01-01', periods=400, freq='15min')
+        times = times[list(range(0, 40, 2)) + list(range(40, 400))]
+        close = np.linspace(100, 110, len(times))
+        df = pd.DataFrame({'Open time': times, 'Open': close, 'High': close + 1, 'Low': close - 1,
+                           'Close': close, 'Volume': 1.0})
+        raw_file = tmp_path / "raw.csv"
+        df.to_csv(raw_file, index=False)
+
+        fix_data_file(str(raw_file), str(tmp_path / "expected.csv"))
+        fix_data_file(str(raw_file), str(tmp_path / "streamed.csv"), streaming=True, chunk_size=10)
+        fix_data_file(str(raw_file), str(tmp_path / "explicit.csv"), streaming=True, chunk_size=10,
+                      interval_minutes=15)
+
+        expected = pd.read_csv(tmp_path / "expected.csv")
+        assert len(expected) == 400
+        for name in ("streamed.csv", "explicit.csv"):
+            pd.testing.assert_frame_equal(pd.read_csv(tmp_path / name), expected, check_dtype=False)
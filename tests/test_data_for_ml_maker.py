@@ -0,0 +1,93 @@
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+try:
+    import pandas as pd
+    from data_for_ml_maker import ZigZag15MProcessor
+    from data_store import load_table
+    PROCESSOR_AVAILABLE = True
+except ImportError:
+    PROCESSOR_AVAILABLE = False
+
+
+# Признаки на EMA совпадают побитово; скользящие суммы pandas накапливают
+# округление от начала расчета, поэтому для них сравнение с допуском
+EXACT_PREFIXES = ('zigzag', 'ema_', 'macd', 'high_window', 'low_window', 'position_', 'stoch_k',
+                  'trend_', 'momentum_', 'price_change', 'high_low', 'open_close', 'body_size')
+
+
+def run_in_memory(csv_path, output_file, deviations=None):
+    processor = ZigZag15MProcessor(data_file=str(csv_path), deviation=1.0)
+    assert processor.load_data()
+    if deviations:
+        assert processor.calculate_zigzag_sweep(deviations)
+    else:
+        assert processor.calculate_zigzag()
+    assert processor.create_technical_features()
+    assert processor.save_enhanced_data(str(output_file))
+    return pd.read_csv(output_file)
+
+
+@pytest.mark.skipif(not PROCESSOR_AVAILABLE, reason="data_for_ml_maker module not available")
+class TestChunkedProcessing:
+    """Потоковая обработка блоками совпадает с обработкой в памяти."""
+
+    @pytest.mark.parametrize("chunk_size", [50, 700, 5000])
+    @pytest.mark.parametrize("deviations", [None, [0.5, 1.0, 2.0]])
+    def test_matches_in_memory(self, tmp_path, chunk_size, deviations, make_input):
+        csv_path = tmp_path / "input_data.csv"
+        make_input().to_csv(csv_path, index=False)
+        expected = run_in_memory(csv_path, tmp_path / "full.csv", deviations)
+
+        processor = ZigZag15MProcessor(data_file=str(csv_path), deviation=1.0)
+        assert processor.process_in_chunks(str(tmp_path / "chunked.csv"), deviations=deviations,
+                                           chunk_size=chunk_size)
+        result = pd.read_csv(tmp_path / "chunked.csv")
+
+        assert list(result.columns) == list(expected.columns)
+        assert len(result) == len(expected)
+        for name in expected.columns:
+            if name.startswith(EXACT_PREFIXES) or expected[name].dtype.kind != 'f':
+                np.testing.assert_array_equal(result[name].values, expected[name].values, err_msg=name)
+            else:
+                np.testing.assert_allclose(result[name].values, expected[name].values,
+                                           rtol=1e-8, atol=1e-12, err_msg=name)
+
+    def test_labels_spanning_chunks(self, tmp_path, make_input):
+        # Долгий боковик без разворота: метки остаются в буфере несколько блоков
+        data = make_input(600)
+        for name in ['Open', 'High', 'Low', 'Close']:
+            data.loc[100:400, name] = data.loc[99, 'Close']
+        csv_path = tmp_path / "input_data.csv"
+        data.to_csv(csv_path, index=False)
+        expected = run_in_memory(csv_path, tmp_path / "full.csv")
+
+        processor = ZigZag15MProcessor(data_file=str(csv_path), deviation=1.0)
+        assert processor.process_in_chunks(str(tmp_path / "chunked.csv"), chunk_size=40)
+        result = pd.read_csv(tmp_path / "chunked.csv")
+
+        np.testing.assert_array_equal(result['zigzag (1.0%)'].values, expected['zigzag (1.0%)'].values)
+
+    def test_missing_file(self, tmp_path):
+        processor = ZigZag15MProcessor(data_file=str(tmp_path / "missing.csv"))
+        assert not processor.process_in_chunks(str(tmp_path / "out.csv"))
+
+    @pytest.mark.parametrize("fmt", ['csv', 'npz'])
+    def test_save_formats_autodetected(self, tmp_path, fmt, make_input):
+        csv_path = tmp_path / "input_data.csv"
+        make_input(400).to_csv(csv_path, index=False)
+        processor = ZigZag15MProcessor(data_file=str(csv_path), deviation=1.0, dtype_profile='default')
+        assert processor.load_data() and processor.calculate_zigzag() and processor.create_technical_features()
+
+        assert processor.save_enhanced_data(str(tmp_path / "ml_data.csv"), format=fmt, workers=1)
+
+        assert (tmp_path / f"ml_data.{fmt}").exists()
+        loaded = load_table(tmp_path / "ml_data.csv")
+        np.testing.assert_array_equal(loaded['zigzag (1.0%)'].values, processor.data['zigzag (1.0%)'].values)
+        # Разбор CSV в pandas не гарантирует точного обратного преобразования float
+        np.testing.assert_allclose(loaded['macd'].values, processor.data['macd'].values, rtol=1e-14)
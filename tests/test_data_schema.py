@@ -0,0 +1,113 @@
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+try:
+    import pandas as pd
+    from data_schema import apply_profile, column_role, print_memory_report
+    from data_store import load_table
+    from data_for_ml_maker import ZigZag15MProcessor
+    SCHEMA_AVAILABLE = True
+except ImportError:
+    SCHEMA_AVAILABLE = False
+
+
+def make_ml_frame(n=1000, seed=0):
+    """Данные в типах парсера CSV: float64 признаки и метки."""
+    rng = np.random.default_rng(seed)
+    close = np.round(40000 + np.cumsum(rng.normal(0, 50, n)), 2)
+    return pd.DataFrame({
+        'Open time': pd.date_range('2020-01-01', periods=n, freq='15min'),
+        'Open': close,
+        'High': close + 10.5,
+        'Low': close - 10.25,
+        'Close': close,
+        'Volume': rng.uniform(1, 100, n),
+        'Number of trades': rng.integers(0, 5000, n),
+        'Symbol': ['BTCUSDT'] * n,
+        'rsi_14': rng.uniform(0, 100, n),
+        'sma_5': close + rng.normal(0, 1, n),
+        'zigzag (1.0%)': rng.choice([-1.0, 0.0, 1.0], n),
+    })
+
+
+@pytest.mark.skipif(not SCHEMA_AVAILABLE, reason="data_schema module not available")
+class TestCompactProfile:
+    """Компактный профиль типов данных."""
+
+    def test_roles(self):
+        df = make_ml_frame(10)
+        roles = {name: column_role(name, df[name].dtype) for name in df.columns}
+
+        assert roles['Open time'] == 'time'
+        assert roles['Close'] == 'market'
+        assert roles['Number of trades'] == 'count'
+        assert roles['Symbol'] == 'symbol'
+        assert roles['rsi_14'] == 'feature'
+        assert roles['zigzag (1.0%)'] == 'label'
+
+    def test_compact_dtypes(self):
+        df = make_ml_frame()
+        compact = apply_profile(df, 'compact')
+
+        assert compact['zigzag (1.0%)'].dtype == np.int8
+        assert compact['rsi_14'].dtype == np.float32
+        assert compact['Close'].dtype == np.float64
+        assert compact['Number of trades'].dtype == np.int32
+        assert isinstance(compact['Symbol'].dtype, pd.CategoricalDtype)
+        assert compact['Open time'].dtype == 'datetime64[ns]'
+        assert (compact['zigzag (1.0%)'].values == df['zigzag (1.0%)'].values).all()
+        # Исходные данные не изменяются
+        assert df['rsi_14'].dtype == np.float64
+
+    def test_label_with_other_values_kept(self):
+        df = pd.DataFrame({'zigzag (1.0%)': [0.0, 1.0, np.nan], 'zigzag (2.0%)': [0.0, 2.0, -1.0]})
+        compact = apply_profile(df, 'compact')
+
+        assert compact['zigzag (1.0%)'].dtype == np.float64
+        assert compact['zigzag (2.0%)'].dtype == np.float64
+
+    def test_default_profile_is_noop(self):
+        df = make_ml_frame(10)
+        assert apply_profile(df, 'default') is df
+        with pytest.raises(ValueError):
+            apply_profile(df, 'tiny')
+
+    def test_memory_report(self, capsys):
+        df = make_ml_frame()
+        report = print_memory_report(df, apply_profile(df, 'compact'))
+
+        assert report['after'] < report['before']
+        assert report['saved'] == report['before'] - report['after']
+        assert 'Экономия памяти' in capsys.readouterr().out
+
+    def test_load_table_profile(self, tmp_path):
+        csv_path = tmp_path / "ml_data.csv"
+        make_ml_frame(200).to_csv(csv_path, index=False)
+
+        full = load_table(csv_path)
+        compact = load_table(csv_path, profile='compact')
+
+        assert full['rsi_14'].dtype == np.float64
+        assert compact['rsi_14'].dtype == np.float32
+        assert compact['zigzag (1.0%)'].dtype == np.int8
+        np.testing.assert_array_equal(compact['Close'].values, full['Close'].values)
+
+    def test_processor_features_unchanged(self, tmp_path):
+        csv_path = tmp_path / "input_data.csv"
+        make_ml_frame(300).drop(columns=['rsi_14', 'sma_5', 'zigzag (1.0%)']).to_csv(csv_path, index=False)
+
+        results = {}
+        for profile in ['default', 'compact']:
+            processor = ZigZag15MProcessor(data_file=str(csv_path), dtype_profile=profile)
+            assert processor.load_data()
+            assert processor.calculate_zigzag()
+            assert processor.create_technical_features()
+            results[profile] = processor.data
+
+        features = [col for col in results['default'].columns if col not in ('Symbol', 'Number of trades')]
+        pd.testing.assert_frame_equal(results['compact'][features], results['default'][features], check_exact=True)
@@ -0,0 +1,287 @@
+import pytest
+import numpy as np
+import sys
+import os
+from unittest.mock import patch
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+try:
+    import pandas as pd
+    import data_store
+    from data_store import (load_table, read_csv_typed, cache_paths, save_table, write_csv_parallel,
+                            resolve_table_path, ARROW_AVAILABLE)
+    DATA_STORE_AVAILABLE = True
+except ImportError:
+    DATA_STORE_AVAILABLE = False
+    ARROW_AVAILABLE = False
+
+
+def write_ml_csv(path, n=500, seed=0):
+    """Небольшой ml_data.csv: время, OHLC, признак и метка зигзага."""
+    rng = np.random.default_rng(seed)
+    close = np.round(40000 + np.cumsum(rng.normal(0, 50, n)), 2)
+    df = pd.DataFrame({
+        'Open time': pd.date_range('2020-01-01', periods=n, freq='15min').strftime('%Y-%m-%d %H:%M:%S'),
+        'Open': close,
+        'High': close + 10.5,
+        'Low': close - 10.25,
+        'Close': close,
+        'rsi_14': rng.uniform(0, 100, n),
+        'zigzag (1.0%)': rng.choice([-1, 0, 1], n),
+    })
+    df.to_csv(path, index=False)
+    return df
+
+
+@pytest.mark.skipif(not DATA_STORE_AVAILABLE, reason="data_store module not available")
+class TestLoadTable:
+    """Загрузка таблиц через бинарную копию."""
+
+    def test_without_cache_parses_time(self, tmp_path):
+        csv_path = tmp_path / "ml_data.csv"
+        write_ml_csv(csv_path)
+
+        df = load_table(csv_path, use_cache=False)
+
+        assert df['Open time'].dtype == 'datetime64[ns]'
+        assert df['zigzag (1.0%)'].dtype == np.int64
+        assert not os.path.exists(cache_paths(csv_path)[0])
+
+    @pytest.mark.skipif(not ARROW_AVAILABLE, reason="pyarrow not available")
+    def test_cache_matches_csv(self, tmp_path):
+        csv_path = tmp_path / "ml_data.csv"
+        write_ml_csv(csv_path)
+        expected = read_csv_typed(csv_path)
+
+        first = load_table(csv_path)
+        assert os.path.exists(cache_paths(csv_path)[0])
+        with patch.object(data_store.pd, 'read_csv', side_effect=AssertionError("CSV re-parsed")):
+            second = load_table(csv_path)
+
+        pd.testing.assert_frame_equal(first, expected, check_exact=True)
+        pd.testing.assert_frame_equal(second, expected, check_exact=True)
+
+    @pytest.mark.skipif(not ARROW_AVAILABLE, reason="pyarrow not available")
+    def test_touched_file_with_same_content_reuses_cache(self, tmp_path):
+        csv_path = tmp_path / "ml_data.csv"
+        write_ml_csv(csv_path)
+        load_table(csv_path)
+
+        stat = os.stat(csv_path)
+        os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        with patch.object(data_store.pd, 'read_csv', side_effect=AssertionError("CSV re-parsed")):
+            load_table(csv_path)
+
+    @pytest.mark.skipif(not ARROW_AVAILABLE, reason="pyarrow not available")
+    def test_changed_csv_rebuilds_cache(self, tmp_path):
+        csv_path = tmp_path / "ml_data.csv"
+        write_ml_csv(csv_path, seed=0)
+        load_table(csv_path)
+
+        stat = os.stat(csv_path)
+        write_ml_csv(csv_path, seed=1)
+        # Тот же размер и время изменения не должны маскировать новые данные
+        os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        df = load_table(csv_path)
+        pd.testing.assert_frame_equal(df, read_csv_typed(csv_path), check_exact=True)
+
+    @pytest.mark.skipif(not ARROW_AVAILABLE, reason="pyarrow not available")
+    def test_corrupt_cache_falls_back_to_csv(self, tmp_path):
+        csv_path = tmp_path / "ml_data.csv"
+        write_ml_csv(csv_path)
+        load_table(csv_path)
+
+        with open(cache_paths(csv_path)[0], 'wb') as f:
+            f.write(b'not an arrow file')
+
+        df = load_table(csv_path)
+        pd.testing.assert_frame_equal(df, read_csv_typed(csv_path), check_exact=True)
+
+
+@pytest.mark.skipif(not DATA_STORE_AVAILABLE, reason="data_store module not available")
+class TestColumnStore:
+    """Колоночное хранилище с mmap и срезами по времени."""
+
+    def test_slice_matches_boolean_mask(self, tmp_path):
+        csv_path = tmp_path / "ml_data.csv"
+        write_ml_csv(csv_path, n=2000)
+        df = read_csv_typed(csv_path)
+
+        store = data_store.open_column_store(csv_path)
+        start, end = '2020-01-03 10:07', '2020-01-10'
+        mask = (df['Open time'] >= start) & (df['Open time'] < end)
+
+        close = store.column('Close', start, end)
+        assert isinstance(close, np.memmap)
+        assert np.array_equal(close, df.loc[mask, 'Close'].values)
+
+        frame = store.frame(start, end, columns=['Open time', 'zigzag (1.0%)'])
+        pd.testing.assert_frame_equal(frame, df.loc[mask, ['Open time', 'zigzag (1.0%)']], check_exact=True)
+
+    def test_empty_and_open_ranges(self, tmp_path):
+        csv_path = tmp_path / "ml_data.csv"
+        write_ml_csv(csv_path, n=100)
+        store = data_store.open_column_store(csv_path)
+
+        assert len(store.column('Close', '2030-01-01', None)) == 0
+        assert len(store.column('Close', '2020-01-02', '2020-01-01')) == 0
+        assert len(store.column('Close')) == 100
+
+    def test_reopen_and_rebuild(self, tmp_path):
+        csv_path = tmp_path / "ml_data.csv"
+        write_ml_csv(csv_path, seed=0)
+        data_store.open_column_store(csv_path)
+
+        with patch.object(data_store, 'load_table', side_effect=AssertionError("store rebuilt")):
+            data_store.open_column_store(csv_path)
+
+        write_ml_csv(csv_path, n=600, seed=1)
+        store = data_store.open_column_store(csv_path)
+        assert len(store) == 600
+        assert np.array_equal(store.column('rsi_14'), read_csv_typed(csv_path)['rsi_14'].values)
+        assert len(os.listdir(str(csv_path) + data_store.STORE_SUFFIX)) == len(store.columns) + 1
+
+    def test_rebuild_keeps_concurrent_build_files(self, tmp_path):
+        csv_path = tmp_path / "ml_data.csv"
+        write_ml_csv(csv_path, n=100)
+        df = read_csv_typed(csv_path)
+        store_path = tmp_path / "store"
+        first = data_store.ColumnStore.build(df, store_path)
+
+        # Файлы параллельной сборки, которая еще не записала манифест, и брошенный файл
+        in_flight = ['col_000.0badf00d.npy', 'manifest.json.123.0badf00d.tmp']
+        for name in in_flight + ['col_001.deadbeef.npy']:
+            (store_path / name).write_bytes(b'')
+        os.utime(store_path / 'col_001.deadbeef.npy', (1, 1))
+
+        second = data_store.ColumnStore.build(df.head(50), store_path)
+
+        files = set(os.listdir(store_path))
+        assert files == {data_store.ColumnStore.MANIFEST, *in_flight, *second._files.values()}
+        assert not files & set(first._files.values())
+        assert len(data_store.ColumnStore.open(store_path)) == 50
+
+    def test_open_store_survives_rebuild(self, tmp_path):
+        csv_path = tmp_path / "ml_data.csv"
+        write_ml_csv(csv_path, n=100)
+        df = read_csv_typed(csv_path)
+        store_path = tmp_path / "store"
+        data_store.ColumnStore.build(df, store_path)
+        old = data_store.ColumnStore.open(store_path)
+
+        data_store.ColumnStore.build(df.head(50), store_path)
+
+        # Файлы старой версии удалены, но открытое хранилище читает любые колонки
+        assert not set(old._files.values()) & set(os.listdir(store_path))
+        np.testing.assert_array_equal(old.column('rsi_14'), df['rsi_14'].values)
+        assert len(old.frame(columns=['Close', 'zigzag (1.0%)'])) == 100
+
+    def test_unsorted_time_rejected(self, tmp_path):
+        df = pd.DataFrame({
+            'Open time': pd.to_datetime(['2020-01-01 00:15', '2020-01-01 00:00']),
+            'Close': [1.0, 2.0],
+        })
+        with pytest.raises(ValueError):
+            data_store.ColumnStore.build(df, tmp_path / "store")
+
+    def test_time_slice_is_view(self):
+        df = pd.DataFrame({
+            'datetime': pd.date_range('2020-01-01', periods=10, freq='h'),
+            'value': np.arange(10.0),
+        })
+        part = data_store.time_slice(df, '2020-01-01 02:00', '2020-01-01 05:00')
+        assert list(part['value']) == [2.0, 3.0, 4.0]
+        assert np.shares_memory(part['value'].values, df['value'].values)
+
+
+def make_mixed_frame(n=50, seed=0):
+    """Все типы колонок ml_data: время, float32/64 с NaN/inf, целые, строки."""
+    rng = np.random.default_rng(seed)
+    values = rng.normal(0, 1000, n)
+    values[[3, 7]] = np.nan
+    values[5] = np.inf
+    return pd.DataFrame({
+        'Open time': pd.date_range('2020-01-01', periods=n, freq='15min'),
+        'Close': np.round(40000 + values, 2),
+        'rsi_14': rng.uniform(0, 100, n).astype(np.float32),
+        'ratio': values / 3,
+        'Number of trades': rng.integers(0, 5000, n),
+        'zigzag (1.0%)': rng.choice([-1, 0, 1], n).astype(np.int8),
+        'Symbol': pd.Categorical(['BTCUSDT'] * n),
+        'note': ['a, "b"'] * (n - 1) + [None],
+    })
+
+
+@pytest.mark.skipif(not DATA_STORE_AVAILABLE, reason="data_store module not available")
+class TestSaveTable:
+    """Запись таблиц в разные форматы и автоопределение формата при загрузке."""
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_parallel_csv_matches_to_csv(self, tmp_path, workers):
+        df = make_mixed_frame()
+        csv_path = tmp_path / "out.csv"
+
+        write_csv_parallel(df, csv_path, workers=workers, block_rows=7)
+
+        assert csv_path.read_text(encoding='utf-8') == df.to_csv(index=False)
+
+    @pytest.mark.parametrize("times", [
+        pd.date_range('2020-01-01', periods=20, freq='D'),
+        pd.date_range('2020-01-01', periods=20, freq='1500ms'),
+        pd.date_range('2020-01-01', periods=20, freq='7us'),
+        pd.DatetimeIndex(['2020-01-01 10:00', 'NaT'] + ['2020-01-02'] * 18),
+    ])
+    def test_time_format_chosen_by_whole_column(self, tmp_path, times):
+        # В каждом блоке, кроме первого, все значения - полночь
+        df = pd.DataFrame({'Open time': times, 'Close': np.arange(20) / 3})
+        csv_path = tmp_path / "out.csv"
+
+        write_csv_parallel(df, csv_path, workers=1, block_rows=3)
+
+        assert csv_path.read_text(encoding='utf-8') == df.to_csv(index=False)
+
+    @pytest.mark.parametrize("fmt", [
+        pytest.param('parquet', marks=pytest.mark.skipif(not ARROW_AVAILABLE, reason="pyarrow not available")),
+        pytest.param('feather', marks=pytest.mark.skipif(not ARROW_AVAILABLE, reason="pyarrow not available")),
+        'npz',
+    ])
+    def test_binary_roundtrip(self, tmp_path, fmt):
+        df = make_mixed_frame().drop(columns=['note'])
+        df.index = df.index + 10  # после dropna индекс не с нуля
+
+        report = save_table(df, tmp_path / f"ml_data.{fmt}")
+        loaded = load_table(tmp_path / f"ml_data.{fmt}")
+
+        assert report['format'] == fmt and report['rows'] == len(df) and report['bytes'] > 0
+        assert list(loaded.columns) == list(df.columns)
+        for name in ['Open time', 'Close', 'rsi_14', 'ratio', 'Number of trades', 'zigzag (1.0%)']:
+            np.testing.assert_array_equal(loaded[name].to_numpy(), df[name].to_numpy())
+        assert list(loaded['Symbol'].astype(str)) == list(df['Symbol'].astype(str))
+
+    def test_loader_honours_explicit_path(self, tmp_path):
+        csv_path = tmp_path / "ml_data.csv"
+        write_ml_csv(csv_path, n=50)
+        npz_path = tmp_path / "ml_data.npz"
+
+        assert resolve_table_path(csv_path) == str(csv_path)
+        save_table(load_table(csv_path).head(20), npz_path)
+        os.utime(csv_path, ns=(1, 1))
+
+        # Существующий файл читается, даже если другой формат свежее
+        assert resolve_table_path(csv_path) == str(csv_path)
+        assert len(load_table(csv_path)) == 50
+        assert resolve_table_path(csv_path, prefer_fresh=True) == str(npz_path)
+        assert len(load_table(csv_path, prefer_fresh=True)) == 20
+
+        # Без CSV берется таблица в другом формате
+        os.remove(csv_path)
+        assert resolve_table_path(csv_path) == str(npz_path)
+        assert len(load_table(csv_path)) == 20
+        assert resolve_table_path(tmp_path / "missing.csv") == str(tmp_path / "missing.csv")
+
+    def test_unknown_format(self, tmp_path):
+        with pytest.raises(ValueError):
+            save_table(make_mixed_frame(), tmp_path / "out.bin", format='xlsx')
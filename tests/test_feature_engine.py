@@ -0,0 +1,370 @@
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+try:
+    import pandas as pd
+    from feature_engine import (FeatureEngine, IncrementalFeatureEngine, add_features, col, ref,
+                                processor_feature_set, ml_feature_set, helpers_feature_set, get_feature_set,
+                                sma, ema, rsi, warmup_length)
+    from data_for_ml_maker import ZigZag15MProcessor
+    from zigzag_ml_model import ZigZagMLModel
+    ENGINE_AVAILABLE = True
+except ImportError:
+    ENGINE_AVAILABLE = False
+
+try:
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+    from utils.helpers import calculate_indicators, compute_rsi, compute_bollinger_bands
+    HELPERS_AVAILABLE = True
+except ImportError:
+    HELPERS_AVAILABLE = False
+
+
+def legacy_processor_features(data):
+    """Исходный create_technical_features до движка признаков."""
+    df = data.copy()
+    
+    # Базовые признаки цены
+    df['price_change'] = df['Close'].pct_change()
+    df['price_change_abs'] = df['price_change'].abs()
+    df['high_low_ratio'] = df['High'] / df['Low']
+    df['open_close_ratio'] = df['Open'] / df['Close']
+    df['body_size'] = (df['Close'] - df['Open']) / df['Open']
+    
+    # Волатильность
+    df['volatility_5'] = df['price_change'].rolling(window=5).std()
+    df['volatility_10'] = df['price_change'].rolling(window=10).std()
+    df['volatility_20'] = df['price_change'].rolling(window=20).std()
+    
+    # Скользящие средние
+    df['sma_5'] = df['Close'].rolling(window=5).mean()
+    df['sma_10'] = df['Close'].rolling(window=10).mean()
+    df['sma_20'] = df['Close'].rolling(window=20).mean()
+    df['ema_5'] = df['Close'].ewm(span=5).mean()
+    df['ema_10'] = df['Close'].ewm(span=10).mean()
+    df['ema_20'] = df['Close'].ewm(span=20).mean()
+    
+    # Отклонения от средних
+    df['deviation_sma_5'] = (df['Close'] - df['sma_5']) / df['sma_5']
+    df['deviation_sma_10'] = (df['Close'] - df['sma_10']) / df['sma_10']
+    df['deviation_sma_20'] = (df['Close'] - df['sma_20']) / df['sma_20']
+    df['deviation_ema_5'] = (df['Close'] - df['ema_5']) / df['ema_5']
+    df['deviation_ema_10'] = (df['Close'] - df['ema_10']) / df['ema_10']
+    df['deviation_ema_20'] = (df['Close'] - df['ema_20']) / df['ema_20']
+    
+    # Позиция цены в окне
+    df['high_window_5'] = df['High'].rolling(window=5).max()
+    df['low_window_5'] = df['Low'].rolling(window=5).min()
+    df['position_5'] = (df['Close'] - df['low_window_5']) / (df['high_window_5'] - df['low_window_5'])
+    
+    df['high_window_10'] = df['High'].rolling(window=10).max()
+    df['low_window_10'] = df['Low'].rolling(window=10).min()
+    df['position_10'] = (df['Close'] - df['low_window_10']) / (df['high_window_10'] - df['low_window_10'])
+    
+    df['high_window_20'] = df['High'].rolling(window=20).max()
+    df['low_window_20'] = df['Low'].rolling(window=20).min()
+    df['position_20'] = (df['Close'] - df['low_window_20']) / (df['high_window_20'] - df['low_window_20'])
+    
+    # RSI
+    gains = df['price_change'].where(df['price_change'] > 0, 0)
+    losses = -df['price_change'].where(df['price_change'] < 0, 0)
+    
+    avg_gains_5 = gains.rolling(window=5).mean()
+    avg_losses_5 = losses.rolling(window=5).mean()
+    df['rsi_5'] = 100 - (100 / (1 + avg_gains_5 / avg_losses_5))
+    
+    avg_gains_10 = gains.rolling(window=10).mean()
+    avg_losses_10 = losses.rolling(window=10).mean()
+    df['rsi_10'] = 100 - (100 / (1 + avg_gains_10 / avg_losses_10))
+    
+    avg_gains_20 = gains.rolling(window=20).mean()
+    avg_losses_20 = losses.rolling(window=20).mean()
+    df['rsi_20'] = 100 - (100 / (1 + avg_gains_20 / avg_losses_20))
+    
+    # Тренды
+    df['trend_5'] = df['Close'] - df['Close'].shift(5)
+    df['trend_10'] = df['Close'] - df['Close'].shift(10)
+    df['trend_20'] = df['Close'] - df['Close'].shift(20)
+    
+    # Импульс
+    df['momentum_5'] = df['Close'] / df['Close'].shift(5) - 1
+    df['momentum_10'] = df['Close'] / df['Close'].shift(10) - 1
+    df['momentum_20'] = df['Close'] / df['Close'].shift(20) - 1
+    
+    # Объем
+    df['volume_sma_5'] = df['Volume'].rolling(window=5).mean()
+    df['volume_sma_10'] = df['Volume'].rolling(window=10).mean()
+    df['volume_sma_20'] = df['Volume'].rolling(window=20).mean()
+    df['volume_ratio_5'] = df['Volume'] / df['volume_sma_5']
+    df['volume_ratio_10'] = df['Volume'] / df['volume_sma_10']
+    df['volume_ratio_20'] = df['Volume'] / df['volume_sma_20']
+    
+    # Bollinger Bands
+    df['bb_upper_20'] = df['sma_20'] + 2 * df['volatility_20'] * df['sma_20']
+    df['bb_lower_20'] = df['sma_20'] - 2 * df['volatility_20'] * df['sma_20']
+    df['bb_position_20'] = (df['Close'] - df['bb_lower_20']) / (df['bb_upper_20'] - df['bb_lower_20'])
+    
+    # Stochastic Oscillator
+    df['stoch_k_14'] = 100 * (df['Close'] - df['Low'].rolling(window=14).min()) / (df['High'].rolling(window=14).max() - df['Low'].rolling(window=14).min())
+    df['stoch_d_14'] = df['stoch_k_14'].rolling(window=3).mean()
+    
+    # MACD
+    ema_12 = df['Close'].ewm(span=12).mean()
+    ema_26 = df['Close'].ewm(span=26).mean()
+    df['macd'] = ema_12 - ema_26
+    df['macd_signal'] = df['macd'].ewm(span=9).mean()
+    df['macd_histogram'] = df['macd'] - df['macd_signal']
+    return df
+
+
+def legacy_ml_features(data, window_sizes=[5, 10, 20, 50]):
+    """Исходный ZigZagMLModel.create_features до движка признаков."""
+    df = data.copy()
+    
+    # Базовые признаки цены
+    df['price_change'] = df['Close'].pct_change()
+    df['high_low_ratio'] = df['High'] / df['Low']
+    df['open_close_ratio'] = df['Open'] / df['Close']
+    
+    # Волатильность
+    df['volatility'] = df['price_change'].rolling(window=20).std()
+    
+    # Технические индикаторы для разных окон
+    for window in window_sizes:
+        # Скользящие средние
+        df[f'sma_{window}'] = df['Close'].rolling(window=window).mean()
+        df[f'ema_{window}'] = df['Close'].ewm(span=window).mean()
+        
+        # Отклонение от скользящих средних
+        df[f'deviation_sma_{window}'] = (df['Close'] - df[f'sma_{window}']) / df[f'sma_{window}']
+        df[f'deviation_ema_{window}'] = (df['Close'] - df[f'ema_{window}']) / df[f'ema_{window}']
+        
+        # Максимумы и минимумы в окне
+        df[f'high_{window}'] = df['High'].rolling(window=window).max()
+        df[f'low_{window}'] = df['Low'].rolling(window=window).min()
+        
+        # Позиция цены относительно максимума и минимума
+        df[f'position_high_{window}'] = (df['Close'] - df[f'low_{window}']) / (df[f'high_{window}'] - df[f'low_{window}'])
+        
+        # RSI-подобный индикатор
+        gains = df['price_change'].where(df['price_change'] > 0, 0)
+        losses = -df['price_change'].where(df['price_change'] < 0, 0)
+        avg_gains = gains.rolling(window=window).mean()
+        avg_losses = losses.rolling(window=window).mean()
+        df[f'rsi_{window}'] = 100 - (100 / (1 + avg_gains / avg_losses))
+    
+    # Признаки тренда
+    df['trend_5'] = df['Close'] - df['Close'].shift(5)
+    df['trend_10'] = df['Close'] - df['Close'].shift(10)
+    df['trend_20'] = df['Close'] - df['Close'].shift(20)
+    
+    # Признаки импульса
+    df['momentum_5'] = df['Close'] / df['Close'].shift(5) - 1
+    df['momentum_10'] = df['Close'] / df['Close'].shift(10) - 1
+    df['momentum_20'] = df['Close'] / df['Close'].shift(20) - 1
+    
+    # Признаки объема (если есть)
+    if 'Volume' in df.columns:
+        df['volume_sma_20'] = df['Volume'].rolling(window=20).mean()
+        df['volume_ratio'] = df['Volume'] / df['volume_sma_20']
+    return df
+
+
+def legacy_helpers_indicators(data):
+    """Исходный calculate_indicators из src/utils/helpers."""
+    data = data.copy()
+    data['SMA_14'] = data['close'].rolling(window=14).mean()
+    data['SMA_50'] = data['close'].rolling(window=50).mean()
+    data['EMA_14'] = data['close'].ewm(span=14, adjust=False).mean()
+    data['EMA_50'] = data['close'].ewm(span=50, adjust=False).mean()
+    delta = data['close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    loss = loss.replace(0, 0.0001)
+    data['RSI'] = 100 - (100 / (1 + gain / loss))
+    sma = data['close'].rolling(window=20).mean()
+    std = data['close'].rolling(window=20).std()
+    data['BB_upper'] = sma + (std * 2)
+    data['BB_lower'] = sma - (std * 2)
+    return data
+
+
+def make_candles(n=3000, seed=0):
+    """OHLCV со случайным блужданием цены."""
+    rng = np.random.default_rng(seed)
+    close = 40000 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    open_ = close * (1 + rng.normal(0, 0.001, n))
+    spread = np.abs(rng.normal(0, 0.003, n)) * close
+    return pd.DataFrame({
+        'Open time': pd.date_range('2021-01-01', periods=n, freq='15min'),
+        'Open': open_,
+        'High': np.maximum(open_, close) + spread,
+        'Low': np.minimum(open_, close) - spread,
+        'Close': close,
+        'Volume': rng.uniform(10, 1000, n),
+    })
+
+
+@pytest.mark.skipif(not ENGINE_AVAILABLE, reason="feature_engine module not available")
+class TestFeatureEngine:
+    """Совпадение движка признаков с исходными реализациями."""
+
+    @pytest.mark.parametrize("seed", [0, 1])
+    def test_processor_matches_legacy(self, seed):
+        data = make_candles(seed=seed)
+        expected = legacy_processor_features(data)
+
+        result = add_features(data, processor_feature_set())
+
+        pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+    def test_processor_method_matches_legacy(self):
+        data = make_candles()
+        processor = ZigZag15MProcessor()
+        processor.data = data
+
+        assert processor.create_technical_features() is True
+        pd.testing.assert_frame_equal(processor.data, legacy_processor_features(data).dropna(), check_exact=True)
+
+    @pytest.mark.parametrize("window_sizes", [[5, 10, 20, 50], [7, 30]])
+    def test_ml_matches_legacy_with_existing_columns(self, window_sizes):
+        # ml_data уже содержит признаки процессора - часть колонок перезаписывается
+        data = legacy_processor_features(make_candles(seed=2)).dropna()
+        data['zigzag (1.0%)'] = 0
+        expected = legacy_ml_features(data, window_sizes)
+
+        result = add_features(data, ml_feature_set(window_sizes))
+
+        pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+    def test_ml_without_volume(self):
+        data = make_candles(seed=3).drop(columns=['Volume'])
+        expected = legacy_ml_features(data)
+
+        result = add_features(data, ml_feature_set(volume=False))
+
+        pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+    def test_intermediates_computed_once(self):
+        engine = FeatureEngine(make_candles(500))
+        engine.compute(processor_feature_set())
+
+        assert len(engine.computed) == len(set(engine.computed))
+        low_min_14 = ref('rolling_min', source=col('Low'), window=14)
+        sma_20 = ref('rolling_mean', source=col('Close'), window=20)
+        assert engine.computed.count(low_min_14) == 1
+        assert engine.computed.count(sma_20) == 1
+        # Ряды прибылей/убытков общие для всех окон RSI
+        assert sum(1 for node in engine.computed if node.name == 'gains') == 1
+
+    def test_unknown_names(self):
+        with pytest.raises(ValueError):
+            get_feature_set('nope')
+        with pytest.raises(ValueError):
+            FeatureEngine(make_candles(10)).get(ref('nope', source=col('Close')))
+
+
+@pytest.mark.skipif(not (ENGINE_AVAILABLE and HELPERS_AVAILABLE), reason="helpers module not available")
+class TestHelpersIndicators:
+    """src/utils/helpers работает через тот же движок."""
+
+    def test_calculate_indicators_matches_legacy(self):
+        data = make_candles(seed=4).rename(columns={'Close': 'close'})
+        expected = legacy_helpers_indicators(data)
+
+        result = calculate_indicators(data.copy())
+
+        pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+    def test_compute_functions(self):
+        close = make_candles(seed=5)['Close']
+        expected = legacy_helpers_indicators(pd.DataFrame({'close': close}))
+
+        np.testing.assert_array_equal(compute_rsi(close).values, expected['RSI'].values)
+        upper, lower = compute_bollinger_bands(close)
+        np.testing.assert_array_equal(upper.values, expected['BB_upper'].values)
+        np.testing.assert_array_equal(lower.values, expected['BB_lower'].values)
+
+
+@pytest.mark.skipif(not ENGINE_AVAILABLE, reason="feature_engine module not available")
+class TestIncrementalFeatures:
+    """Инкрементальный расчет совпадает с пакетным по всей истории."""
+
+    @pytest.mark.parametrize("feature_set", [
+        processor_feature_set() if ENGINE_AVAILABLE else None,
+        ml_feature_set() if ENGINE_AVAILABLE else None,
+        helpers_feature_set('Close') if ENGINE_AVAILABLE else None,
+    ], ids=['processor', 'ml_model', 'helpers'])
+    def test_append_matches_batch(self, feature_set):
+        data = make_candles(2500, seed=6)
+        data.loc[2200, 'Volume'] = np.nan
+
+        incremental = IncrementalFeatureEngine.from_frame(data.iloc[:2000], feature_set)
+        first = incremental.append(data.iloc[2000:2001])
+        rest = incremental.append(data.iloc[2001:])
+        result = pd.concat([first, rest])
+
+        expected = pd.DataFrame(FeatureEngine(data).compute(feature_set)).iloc[2000:]
+        assert list(result.columns) == list(expected.columns)
+        for name in expected.columns:
+            np.testing.assert_allclose(result[name].values, expected[name].values,
+                                       rtol=1e-9, atol=1e-10, err_msg=name)
+
+    def test_ema_state_is_exact(self):
+        data = make_candles(3000, seed=7)
+        feature_set = [('ema_20', ref('ewm_mean', source=col('Close'), span=20, adjust=True)),
+                       ('ema_50', ref('ewm_mean', source=col('Close'), span=50, adjust=False))]
+
+        incremental = IncrementalFeatureEngine.from_frame(data.iloc[:1000], feature_set)
+        result = incremental.append(data.iloc[1000:])
+
+        expected = pd.DataFrame(FeatureEngine(data).compute(feature_set)).iloc[1000:]
+        pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+    def test_ml_model_append_candles(self):
+        history = legacy_processor_features(make_candles(1500, seed=8)).dropna()
+        history['zigzag (1.0%)'] = 0
+        new_candles = make_candles(1600, seed=8).iloc[1500:]
+
+        model = ZigZagMLModel(dtype_profile='default')
+        model.data = history
+        model.create_features(keep_state=True)
+        X_new = model.append_candles(new_candles)
+
+        full = pd.concat([history, new_candles])
+        expected = add_features(full, processor_feature_set())
+        expected = add_features(expected, ml_feature_set()).loc[new_candles.index, model.feature_names]
+        assert list(X_new.columns) == model.feature_names
+        np.testing.assert_allclose(X_new.values, expected.values, rtol=1e-9, atol=1e-10)
+
+    def test_append_without_state(self):
+        model = ZigZagMLModel()
+        with pytest.raises(ValueError):
+            model.append_candles(make_candles(5))
+
+    def test_extrema_windows_share_one_pass(self):
+        engine = FeatureEngine(make_candles(500))
+        with pytest.MonkeyPatch.context() as mp:
+            import feature_engine
+            calls = []
+            original = feature_engine.rolling_extrema
+            mp.setattr(feature_engine, 'rolling_extrema',
+                       lambda values, windows, mode: calls.append((mode, sorted(windows))) or original(values, windows, mode))
+            engine.compute(ml_feature_set(window_sizes=(5, 10, 14, 20, 50)))
+
+        assert sorted(calls) == [('max', [5, 10, 14, 20, 50]), ('min', [5, 10, 14, 20, 50])]
+
+    def test_warmup_length(self):
+        close = col('Close')
+        assert warmup_length([('sma', sma(close, 20))]) == 19
+        assert warmup_length([('rsi', rsi(ref('pct_change', source=close), 14))]) == 14
+        assert warmup_length([('a', sma(ref('shift', source=close, periods=5), 3)), ('b', close)]) == 7
+        # EMA: вес отброшенной истории меньше 2^-106
+        alpha = 2 / 27
+        length = warmup_length([('ema', ema(close, 26))])
+        assert (1 - alpha) ** length < 2.0 ** -106 <= (1 - alpha) ** (length - 1)
@@ -0,0 +1,169 @@
+import pytest
+import numpy as np
+import json
+import sys
+import os
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+try:
+    import hyperparameter_search
+    from hyperparameter_search import HyperparameterSearch, parse_search_space
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import TimeSeriesSplit
+    from sklearn.tree import DecisionTreeClassifier
+    SEARCH_AVAILABLE = True
+except ImportError:
+    SEARCH_AVAILABLE = False
+
+
+MODELS = {
+    'Tree': DecisionTreeClassifier(random_state=0),
+    'Logistic Regression': LogisticRegression(max_iter=1000),
+} if SEARCH_AVAILABLE else {}
+
+SPACES = {
+    'Tree': {'max_depth': [2, 3, 4, 6, 8, 12], 'min_samples_leaf': [1, 5, 20, 50]},
+    'Logistic Regression': {'C': [0.001, 0.01, 0.1, 1.0, 10.0]},
+}
+
+
+def make_search(search_dir, **kwargs):
+    options = dict(spaces=SPACES, method='random', n_iter=4, cv=TimeSeriesSplit(n_splits=3, gap=10))
+    options.update(kwargs)
+    return HyperparameterSearch(MODELS, str(search_dir), **options)
+
+
+@pytest.mark.skipif(not SEARCH_AVAILABLE, reason="hyperparameter_search module not available")
+class TestSearchSpace:
+    """Пространства поиска из JSON."""
+
+    def test_parse(self):
+        spaces = parse_search_space({'Model': {'C': {'log-uniform': [0.01, 10]}, 'depth': {'int': [2, 4]},
+                                               'kind': ['a', 'b']}})
+        model = spaces['Model']
+        assert 0.01 <= model['C'].rvs(random_state=0) <= 10
+        assert set(model['depth'].rvs(size=200, random_state=0)) == {2, 3, 4}
+        assert model['kind'] == ['a', 'b']
+
+    @pytest.mark.parametrize("value", [[], {'normal': [0, 1]}, 3])
+    def test_invalid(self, value):
+        with pytest.raises(ValueError):
+            parse_search_space({'Model': {'C': value}})
+
+    def test_rungs(self, tmp_path):
+        assert make_search(tmp_path).rungs() == [1.0]
+        halving = make_search(tmp_path, method='halving', n_iter=9, factor=3)
+        assert halving.rungs() == pytest.approx([1 / 9, 1 / 3, 1.0])
+
+
+@pytest.mark.skipif(not SEARCH_AVAILABLE, reason="hyperparameter_search module not available")
+class TestSearch:
+    """Поиск, журнал на диске и продолжение после прерывания."""
+
+    def read_log(self, search_dir):
+        with open(search_dir / 'trials.jsonl', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_random_search_and_best_params(self, tmp_path, capsys, make_dataset):
+        X, y = make_dataset(noise=0.3)
+        search = make_search(tmp_path)
+
+        best = search.run(X, y)
+
+        log = self.read_log(tmp_path)
+        assert len(log) == 8
+        assert all(len(record['fold_scores']) == 3 and record['fit_time'] >= 0 for record in log)
+        assert set(best) == {'Tree', 'Logistic Regression'}
+        assert best['Tree']['score'] == max(r['score'] for r in log if r['model'] == 'Tree')
+
+        with open(search.save_best_params(), encoding='utf-8') as f:
+            params = json.load(f)
+        assert params['Tree'] == best['Tree']['params']
+
+    def test_resume_skips_logged_trials(self, tmp_path, monkeypatch, make_dataset):
+        X, y = make_dataset(noise=0.3)
+        expected = make_search(tmp_path / "full").run(X, y)
+
+        # Прерванный запуск: три кандидата записаны, четвертая строка недописана
+        search_dir = tmp_path / "resumed"
+        make_search(search_dir).run(X, y)
+        lines = (search_dir / 'trials.jsonl').read_text(encoding='utf-8').splitlines(keepends=True)
+        (search_dir / 'trials.jsonl').write_text(''.join(lines[:3]) + lines[3][:20], encoding='utf-8')
+
+        calls = []
+        original = hyperparameter_search.fit_job
+        monkeypatch.setattr(hyperparameter_search, 'fit_job',
+                            lambda *args, **kwargs: calls.append(1) or original(*args, **kwargs))
+        best = make_search(search_dir).run(X, y)
+
+        assert len(calls) == (8 - 3) * 3
+        assert {name: r['params'] for name, r in best.items()} == {name: r['params'] for name, r in expected.items()}
+
+        calls.clear()
+        make_search(search_dir).run(X, y)
+        assert calls == []
+
+    def test_changed_settings_rejected(self, tmp_path, make_dataset):
+        X, y = make_dataset(noise=0.3)
+        make_search(tmp_path).run(X, y)
+
+        with pytest.raises(ValueError, match='n_iter'):
+            make_search(tmp_path, n_iter=5).run(X, y)
+
+    def test_halving_parallel_matches_serial(self, tmp_path, make_dataset):
+        X, y = make_dataset(noise=0.3)
+        serial = make_search(tmp_path / "serial", method='halving', n_iter=9, factor=3)
+        serial_best = serial.run(X, y)
+        parallel = make_search(tmp_path / "parallel", method='halving', n_iter=9, factor=3, workers=2)
+        parallel_best = parallel.run(X, y)
+
+        log = self.read_log(tmp_path / "serial")
+        tree = [r for r in log if r['model'] == 'Tree']
+        assert [sum(r['rung'] == k for r in tree) for k in range(3)] == [9, 3, 1]
+        assert sorted({r['resource'] for r in tree}) == pytest.approx([1 / 9, 1 / 3, 1.0])
+        # Логистической регрессии хватает 5 вариантов: 5 -> 1 -> 1
+        assert [sum(r['rung'] == k for r in log if r['model'] == 'Logistic Regression')
+                for k in range(3)] == [5, 1, 1]
+        for name in serial_best:
+            assert parallel_best[name]['params'] == serial_best[name]['params']
+            assert parallel_best[name]['score'] == pytest.approx(serial_best[name]['score'])
+            assert serial_best[name]['rung'] == 2
+
+    def test_failed_trial_logged(self, tmp_path, make_dataset):
+        X, y = make_dataset(noise=0.3)
+        search = make_search(tmp_path, spaces={'Tree': {'max_depth': [2, -1]}}, n_iter=2)
+
+        best = search.run(X, y)
+
+        errors = [r for r in self.read_log(tmp_path) if 'error' in r]
+        assert len(errors) == 1 and errors[0]['score'] is None
+        assert best['Tree']['params'] == {'max_depth': 2}
+
+
+@pytest.mark.skipif(not SEARCH_AVAILABLE, reason="hyperparameter_search module not available")
+class TestSearchData:
+    """Масштабированная матрица признаков кешируется в каталоге поиска."""
+
+    def test_cached_between_runs(self, tmp_path, monkeypatch):
+        from zigzag_ml_model import ZigZagMLModel
+        from tests.test_plot_all_chart import make_ml_data
+
+        data_file = tmp_path / "ml_data.csv"
+        make_ml_data(3000).to_csv(data_file, index=False)
+        monkeypatch.setattr(ZigZagMLModel, 'check_zigzag_distances', lambda self: None)
+
+        X, y = ZigZagMLModel(str(data_file)).search_data(str(tmp_path / "hpo"), embargo=10)
+
+        model = ZigZagMLModel(str(data_file))
+        monkeypatch.setattr(ZigZagMLModel, 'prepare_data', lambda self, **kwargs: pytest.fail("признаки из кеша"))
+        X_cached, y_cached = model.search_data(str(tmp_path / "hpo"), embargo=10)
+
+        np.testing.assert_array_equal(X_cached, X)
+        np.testing.assert_array_equal(y_cached, np.asarray(y))
+        assert model.feature_names and hasattr(model.scaler, 'mean_')
+
+        # Другие настройки разделения - кеш не подходит
+        with pytest.raises(pytest.fail.Exception):
+            model.search_data(str(tmp_path / "hpo"), embargo=20)
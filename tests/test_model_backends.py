@@ -0,0 +1,79 @@
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+try:
+    import joblib
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    from model_backends import BACKENDS, TimeOrderedHistGradientBoosting, build_models, hist_gradient_boosting
+    from model_tournament import run_tournament
+    from walk_forward import WalkForwardSplit
+    BACKENDS_AVAILABLE = True
+except ImportError:
+    BACKENDS_AVAILABLE = False
+
+
+@pytest.mark.skipif(not BACKENDS_AVAILABLE, reason="model_backends module not available")
+class TestBuildModels:
+    """Наборы моделей турнира."""
+
+    def test_backends(self):
+        assert list(build_models('sklearn')) == ['Random Forest', 'Gradient Boosting', 'Logistic Regression']
+        assert list(build_models('hist')) == ['Random Forest', 'Hist Gradient Boosting', 'Logistic Regression']
+        assert len(build_models('all')) == 4
+        assert set(BACKENDS) == {'sklearn', 'hist', 'all'}
+        with pytest.raises(ValueError):
+            build_models('xgboost')
+
+    def test_hist_settings(self):
+        model = build_models('hist')['Hist Gradient Boosting']
+        assert isinstance(model, HistGradientBoostingClassifier)
+        assert model.early_stopping is True
+        assert model.class_weight == 'balanced'
+
+
+@pytest.mark.skipif(not BACKENDS_AVAILABLE, reason="model_backends module not available")
+class TestTimeOrderedHistGradientBoosting:
+    """Ранняя остановка по последним строкам выборки."""
+
+    def test_validation_on_tail(self, make_dataset):
+        X, y = make_dataset(4000, noise=0.5, threshold=1.8)
+        model = hist_gradient_boosting(max_iter=300).fit(X, y)
+
+        split = len(y) - int(np.ceil(len(y) * 0.1))
+        expected = HistGradientBoostingClassifier(max_iter=300, early_stopping=True, n_iter_no_change=10,
+                                                  class_weight='balanced', random_state=42)
+        expected.fit(X[:split], y[:split], X_val=X[split:], y_val=y[split:])
+
+        assert model.n_iter_ == expected.n_iter_ < 300
+        np.testing.assert_array_equal(model.predict(X), expected.predict(X))
+
+    def test_class_weight_raises_rare_recall(self, make_dataset):
+        X, y = make_dataset(4000, noise=0.5, threshold=1.8)
+        balanced = hist_gradient_boosting().fit(X[:3000], y[:3000])
+        plain = hist_gradient_boosting(class_weight=None).fit(X[:3000], y[:3000])
+
+        rare = y[3000:] != 0
+        recall = lambda model: np.mean(model.predict(X[3000:])[rare] == y[3000:][rare])
+        assert recall(balanced) > recall(plain)
+
+    def test_tournament_warm_start_and_pickle(self, tmp_path, make_dataset):
+        X, y = make_dataset(4000, noise=0.5, threshold=1.8)
+        models = {'Hist Gradient Boosting': hist_gradient_boosting(max_iter=40, n_iter_no_change=1000)}
+        splitter = WalkForwardSplit(test_window=500, train_window=2000, embargo=10)
+
+        results = run_tournament(models, X, y, cv=splitter, refit=False, warm_start=True)
+
+        fold_models = results['Hist Gradient Boosting']['fold_models']
+        assert [model.max_iter for model in fold_models] == [40, 50, 60]
+        assert [model.n_iter_ for model in fold_models] == [40, 50, 60]
+
+        path = tmp_path / "model.pkl"
+        joblib.dump(results['Hist Gradient Boosting']['model'], path)
+        loaded = joblib.load(path)
+        np.testing.assert_array_equal(loaded.predict(X[:100]), results['Hist Gradient Boosting']['model'].predict(X[:100]))
+        assert isinstance(fold_models[0], TimeOrderedHistGradientBoosting)
@@ -0,0 +1,181 @@
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+try:
+    from sklearn.base import clone
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import TimeSeriesSplit, cross_val_score
+    from model_tournament import (SharedArray, fit_job, load_oof_results, print_timing_table, run_tournament,
+                                  save_oof_results)
+    TOURNAMENT_AVAILABLE = True
+except ImportError:
+    TOURNAMENT_AVAILABLE = False
+
+
+def make_models():
+    return {
+        'Random Forest': RandomForestClassifier(n_estimators=20, random_state=42),
+        'Logistic Regression': LogisticRegression(random_state=42, max_iter=1000),
+    }
+
+
+@pytest.mark.skipif(not TOURNAMENT_AVAILABLE, reason="model_tournament module not available")
+class TestSharedArray:
+    """Массив в разделяемой памяти виден по описанию."""
+
+    def test_attach_round_trip(self, make_dataset):
+        X, _ = make_dataset(100, features=8)
+        with SharedArray(X) as shared:
+            shm, view = SharedArray.attach(shared.descriptor)
+            np.testing.assert_array_equal(view, X)
+            assert view.dtype == np.float32
+            del view
+            shm.close()
+
+
+@pytest.mark.skipif(not TOURNAMENT_AVAILABLE, reason="model_tournament module not available")
+class TestTournament:
+    """Параллельный турнир дает те же оценки, что и cross_val_score."""
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_matches_cross_val_score(self, workers, make_dataset):
+        X, y = make_dataset(1500, features=8)
+        models = make_models()
+
+        results = run_tournament(models, X, y, cv=5, workers=workers)
+
+        for name, model in models.items():
+            expected = cross_val_score(model, X, y, cv=5)
+            np.testing.assert_allclose(results[name]['cv_scores'], expected)
+            assert results[name]['jobs'] == 6
+            assert results[name]['cpu_time'] > 0
+            assert results[name]['wall_time'] > 0
+            # Итоговая модель обучена на всей выборке и не совпадает с исходным объектом
+            full = results[name]['model']
+            assert full is not model
+            np.testing.assert_array_equal(full.predict(X), clone(model).fit(X, y).predict(X))
+
+    def test_fit_job_scores_fold(self, make_dataset):
+        X, y = make_dataset(1500, features=8)
+        job = fit_job(LogisticRegression(max_iter=1000), np.arange(1000), np.arange(1000, 1500), X, y)
+
+        assert job['model'] is None
+        assert 0 < job['score'] <= 1
+        assert job['fit_time'] >= 0 and job['cpu_time'] >= 0
+
+    def test_timing_table(self, capsys, make_dataset):
+        X, y = make_dataset(300, features=8)
+        results = run_tournament(make_models(), X, y, cv=3)
+
+        print_timing_table(results, total_time=1.0)
+
+        out = capsys.readouterr().out
+        assert 'Random Forest' in out and 'Всего' in out
+
+    @pytest.mark.filterwarnings("ignore::sklearn.exceptions.FitFailedWarning")
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_failed_fold_scored_nan(self, workers, capsys, make_dataset):
+        X, y = make_dataset(1500, features=8)
+        y[:400] = 0  # в первом окне разбиения по времени только один класс
+        models = make_models()
+        cv = TimeSeriesSplit(n_splits=5)
+
+        results = run_tournament(models, X, y, cv=cv, workers=workers)
+
+        for name, model in models.items():
+            expected = cross_val_score(model, X, y, cv=cv, error_score=np.nan)
+            np.testing.assert_allclose(results[name]['cv_scores'], expected)
+        assert np.isnan(results['Logistic Regression']['cv_scores'][0])
+        assert not np.isnan(results['Logistic Regression']['cv_scores'][1:]).any()
+        assert results['Logistic Regression']['model'] is not None
+        assert 'Logistic Regression, фолд 1' in capsys.readouterr().out
+
+    def test_fit_job_raises_by_default(self, make_dataset):
+        X, y = make_dataset(1500, features=8)
+        with pytest.raises(ValueError):
+            fit_job(LogisticRegression(), np.arange(100), np.arange(100, 200), X, np.zeros_like(y))
+
+
+@pytest.mark.skipif(not TOURNAMENT_AVAILABLE, reason="model_tournament module not available")
+class TestOutOfFold:
+    """Оценка по моделям фолдов без повторного обучения."""
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_oof_matches_fold_models(self, workers, make_dataset):
+        X, y = make_dataset(1500, features=8)
+        models = make_models()
+
+        results = run_tournament(models, X, y, cv=5, workers=workers, refit=False)
+
+        for name, model in models.items():
+            result = results[name]
+            assert result['jobs'] == 5
+            np.testing.assert_allclose(result['cv_scores'], cross_val_score(model, X, y, cv=5))
+            assert (result['oof_fold'] >= 0).all()
+            assert not np.isnan(result['oof_proba']).any()
+            np.testing.assert_allclose(result['oof_proba'].sum(axis=1), 1.0, rtol=1e-6)
+            # OOF-вероятности строки - от модели того фолда, где строка была проверочной
+            fold = 2
+            rows = np.flatnonzero(result['oof_fold'] == fold)
+            np.testing.assert_allclose(result['oof_proba'][rows],
+                                       result['fold_models'][fold].predict_proba(X[rows]))
+            assert result['oof_score'] == pytest.approx(np.mean(result['oof_pred'] == y))
+            assert (result['fold_fit_time'] > 0).all()
+
+    def test_fold_ensemble(self, make_dataset):
+        X, y = make_dataset(1500, features=8)
+        results = run_tournament(make_models(), X, y, cv=3, refit=False)
+        ensemble = results['Random Forest']['model']
+
+        proba = ensemble.predict_proba(X[:50])
+        expected = np.mean([m.predict_proba(X[:50]) for m in results['Random Forest']['fold_models']], axis=0)
+        np.testing.assert_allclose(proba, expected)
+        np.testing.assert_array_equal(ensemble.predict(X[:50]), ensemble.classes_[expected.argmax(axis=1)])
+        assert ensemble.feature_importances_.shape == (X.shape[1],)
+        assert not hasattr(results['Logistic Regression']['model'], 'feature_importances_')
+        with pytest.raises(ValueError):
+            type(ensemble)([], ensemble.classes_).predict_proba(X[:50])
+
+    def test_save_and_load(self, tmp_path, make_dataset):
+        X, y = make_dataset(600, features=8)
+        results = run_tournament(make_models(), X, y, cv=3, refit=False)
+        path = str(tmp_path / "oof.npz")
+
+        save_oof_results(results, path, index=np.arange(1000, 1600))
+        loaded, shared = load_oof_results(path)
+
+        assert list(loaded) == ['Random Forest', 'Logistic Regression']
+        np.testing.assert_array_equal(shared['index'], np.arange(1000, 1600))
+        np.testing.assert_array_equal(shared['oof_fold'], results['Random Forest']['oof_fold'])
+        for name, result in results.items():
+            np.testing.assert_allclose(loaded[name]['oof_proba'], result['oof_proba'])
+            np.testing.assert_allclose(loaded[name]['fold_fit_time'], result['fold_fit_time'])
+            np.testing.assert_array_equal(loaded[name]['classes'], [-1, 0, 1])
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_single_class_fold_left_nan(self, workers, capsys, make_dataset):
+        from model_backends import hist_gradient_boosting
+        X, y = make_dataset(1500, features=8)
+        y[:400] = 0  # первое окно walk-forward обучается на одном классе
+        models = {'Hist Gradient Boosting': hist_gradient_boosting(max_iter=20), **make_models()}
+        cv = TimeSeriesSplit(n_splits=5)
+
+        results = run_tournament(models, X, y, cv=cv, workers=workers, refit=False)
+
+        first = np.flatnonzero(results['Random Forest']['oof_fold'] == 0)
+        for name, result in results.items():
+            assert np.isnan(result['cv_scores'][0]) and not np.isnan(result['cv_scores'][1:]).any()
+            assert result['fold_models'][0] is None
+            assert np.isnan(result['oof_proba'][first]).all()
+            scored = result['oof_fold'] > 0
+            assert not np.isnan(result['oof_proba'][scored]).any()
+            assert result['oof_score'] == pytest.approx(np.mean(result['oof_pred'][scored] == y[scored]))
+            assert len(result['model'].models) == 4
+            assert result['model'].predict_proba(X[:10]).shape == (10, 3)
+        assert 'Hist Gradient Boosting, фолд 1' in capsys.readouterr().out
@@ -0,0 +1,111 @@
+import pytest
+import sys
+import os
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+try:
+    import pipeline
+    from data_for_ml_maker import parse_deviations
+    from plot_all_chart import parse_selection
+    PIPELINE_AVAILABLE = True
+except ImportError:
+    PIPELINE_AVAILABLE = False
+
+
+@pytest.mark.skipif(not PIPELINE_AVAILABLE, reason="pipeline module not available")
+class TestBatchOptions:
+    """Разбор неинтерактивных параметров."""
+
+    def test_parse_deviations(self):
+        assert parse_deviations("1.0, 2,0.5") == [1.0, 2.0, 0.5]
+        with pytest.raises(ValueError):
+            parse_deviations("1,-2")
+
+    def test_parse_selection(self):
+        assert parse_selection('all', 4) == [0, 1, 2, 3]
+        assert parse_selection('3, 1', 4) == [2, 0]
+        with pytest.raises(ValueError):
+            parse_selection('5', 4)
+
+
+@pytest.mark.skipif(not PIPELINE_AVAILABLE, reason="pipeline module not available")
+class TestPipeline:
+    """Порядок этапов, пропуск актуальных и остановка на ошибке."""
+
+    @pytest.fixture
+    def calls(self, tmp_path, monkeypatch):
+        """Подменяет main() этапов: каждый записывает свои результаты и запоминает вызов."""
+        monkeypatch.chdir(tmp_path)
+        os.makedirs('data')
+        with open('data/raw.csv', 'w') as f:
+            f.write('raw')
+        calls = []
+
+        def stage(name, option):
+            def run(argv):
+                calls.append(name)
+                if option in argv:
+                    with open(argv[argv.index(option) + 1], 'w') as f:
+                        f.write(name)
+                if name == 'analyze':
+                    with open('zigzag_analysis_detailed.txt', 'w') as f:
+                        f.write(name)
+                return True
+            return run
+
+        monkeypatch.setattr(pipeline.data_corrector, 'main', stage('correct', '--output'))
+        monkeypatch.setattr(pipeline.data_for_ml_maker, 'main', stage('features', '--output'))
+        monkeypatch.setattr(pipeline.zigzag_ml_model, 'main', stage('train', '--model-file'))
+        monkeypatch.setattr(pipeline.zigzag_analyzer, 'main', stage('analyze', None))
+        monkeypatch.setattr(pipeline.plot_zigzag_chart, 'main', stage('periods', None))
+        monkeypatch.setattr(pipeline.plot_all_chart, 'main', stage('plot', None))
+        os.makedirs('processed_data')
+        return calls
+
+    def test_runs_all_then_skips_up_to_date(self, calls, capsys):
+        argv = ['--raw-file', 'data/raw.csv']
+        assert pipeline.main(argv)
+        assert calls == ['correct', 'features', 'train', 'analyze', 'periods', 'plot']
+        assert os.path.exists('processed_data/pipeline_state.json')
+
+        calls.clear()
+        capsys.readouterr()
+        assert pipeline.main(argv)
+        # Графики запускаются всегда, остальное актуально
+        assert calls == ['periods', 'plot']
+        assert capsys.readouterr().out.count('этап пропущен') == 4
+
+        # Другие аргументы этапа делают его и последующие этапы неактуальными
+        calls.clear()
+        assert pipeline.main(argv + ['--deviation', '2.0'])
+        assert calls == ['features', 'train', 'analyze', 'periods', 'plot']
+
+    def test_stage_selection(self, calls):
+        assert pipeline.main(['--raw-file', 'data/raw.csv', '--from', 'train', '--skip', 'plot'])
+        assert calls == ['train', 'analyze']
+
+        calls.clear()
+        assert pipeline.main(['--raw-file', 'data/raw.csv', '--stages', 'plot,correct', '--force'])
+        assert calls == ['correct', 'periods', 'plot']
+
+    def test_stops_on_failed_stage(self, calls, monkeypatch, capsys):
+        monkeypatch.setattr(pipeline.zigzag_ml_model, 'main', lambda argv: calls.append('train') or False)
+
+        assert not pipeline.main(['--raw-file', 'data/raw.csv'])
+        assert calls == ['correct', 'features', 'train']
+        assert '❌ Этап train завершился с ошибкой' in capsys.readouterr().out
+
+    @pytest.mark.parametrize("error", [RuntimeError("сбой"), SystemExit(2)])
+    def test_exception_is_failed_stage(self, calls, monkeypatch, capsys, error):
+        def failing(argv):
+            calls.append('features')
+            raise error
+
+        monkeypatch.setattr(pipeline.data_for_ml_maker, 'main', failing)
+
+        assert not pipeline.main(['--raw-file', 'data/raw.csv'])
+        assert calls == ['correct', 'features']
+        out = capsys.readouterr().out
+        assert '❌ Этап features завершился с ошибкой' in out and 'ВРЕМЯ ПО ЭТАПАМ' in out
@@ -0,0 +1,119 @@
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+try:
+    import pandas as pd
+    from pivot_index import PivotIndex, find_pivots, load_pivot_index, pivot_index_path
+    from data_for_ml_maker import ZigZag15MProcessor
+    from zigzag_analyzer import ZigZagAnalyzer
+    PIVOT_INDEX_AVAILABLE = True
+except ImportError:
+    PIVOT_INDEX_AVAILABLE = False
+
+
+def assert_pivots_equal(result, expected):
+    for field in expected._fields:
+        np.testing.assert_array_equal(getattr(result, field), getattr(expected, field), err_msg=field)
+
+
+@pytest.mark.skipif(not PIVOT_INDEX_AVAILABLE, reason="pivot_index module not available")
+class TestPivotIndex:
+    """Индекс вершин, сохраняемый рядом с ml_data."""
+
+    @pytest.fixture
+    def data(self, make_input):
+        data = make_input(500)
+        labels = np.zeros(len(data))
+        labels[[10, 60, 130, 220, 400]] = [-1, 1, -1, 1, -1]
+        data['zigzag (1.0%)'] = labels
+        return data
+
+    def test_find_pivots(self, data):
+        pivots = find_pivots(data, 'zigzag (1.0%)')
+
+        np.testing.assert_array_equal(pivots.row, [10, 60, 130, 220, 400])
+        np.testing.assert_array_equal(pivots.type, [-1, 1, -1, 1, -1])
+        np.testing.assert_array_equal(pivots.price[::2], data['High'].values[[10, 130, 400]])
+        np.testing.assert_array_equal(pivots.price[1::2], data['Low'].values[[60, 220]])
+        np.testing.assert_array_equal(pivots.close, data['Close'].values[pivots.row])
+
+        period = pivots.between(data['Open time'][60], data['Open time'][220])
+        np.testing.assert_array_equal(period.row, [60, 130])
+
+    def test_save_load_roundtrip(self, data, tmp_path):
+        table_path = tmp_path / "ml_data.csv"
+        data.to_csv(table_path, index=False)
+        index = PivotIndex.from_frame(data)
+        index.save(table_path)
+
+        loaded = load_pivot_index(table_path)
+
+        assert loaded is not None
+        assert loaded.rows == len(data)
+        assert loaded.columns == ['zigzag (1.0%)']
+        assert_pivots_equal(loaded['zigzag (1.0%)'], index['zigzag (1.0%)'])
+
+    def test_stale_after_table_changes(self, data, tmp_path):
+        table_path = tmp_path / "ml_data.csv"
+        data.to_csv(table_path, index=False)
+        PivotIndex.from_frame(data).save(table_path)
+
+        data.iloc[:-1].to_csv(table_path, index=False)
+
+        assert load_pivot_index(table_path) is None
+        assert load_pivot_index(tmp_path / "missing.csv") is None
+
+    def test_chunked_index_matches_in_memory(self, tmp_path, make_input):
+        csv_path = tmp_path / "input_data.csv"
+        make_input(2000).to_csv(csv_path, index=False)
+
+        processor = ZigZag15MProcessor(data_file=str(csv_path), deviation=1.0)
+        assert processor.load_data()
+        assert processor.calculate_zigzag_sweep([0.5, 1.0])
+        assert processor.create_technical_features()
+        assert processor.save_enhanced_data(str(tmp_path / "full.csv"))
+
+        chunked = ZigZag15MProcessor(data_file=str(csv_path), deviation=1.0)
+        assert chunked.process_in_chunks(str(tmp_path / "chunked.csv"), deviations=[0.5, 1.0], chunk_size=300)
+
+        expected = load_pivot_index(tmp_path / "full.csv")
+        result = load_pivot_index(tmp_path / "chunked.csv")
+        assert expected is not None and result is not None
+        assert result.rows == expected.rows
+        assert result.columns == expected.columns
+        for name in expected.columns:
+            assert_pivots_equal(result[name], expected[name])
+
+        # Индекс совпадает с вершинами, найденными в записанной таблице
+        table = pd.read_csv(tmp_path / "chunked.csv", parse_dates=['Open time'])
+        for name in expected.columns:
+            assert_pivots_equal(result[name], find_pivots(table, name))
+
+    def test_analyzer_uses_index(self, data, tmp_path, monkeypatch):
+        table_path = tmp_path / "ml_data.csv"
+        data.to_csv(table_path, index=False)
+        PivotIndex.from_frame(data).save(table_path)
+
+        expected = ZigZagAnalyzer(data_file=str(table_path))
+        expected.data = data
+        expected.zigzag_column = 'zigzag (1.0%)'
+        assert expected.analyze_zigzag_distances()
+
+        import zigzag_analyzer
+
+        def fail_load(*args, **kwargs):
+            raise AssertionError("полная таблица не должна загружаться")
+
+        monkeypatch.setattr(zigzag_analyzer, 'load_table', fail_load)
+        analyzer = ZigZagAnalyzer(data_file=str(table_path))
+        assert analyzer.load_data()
+        assert analyzer.analyze_zigzag_distances()
+
+        assert analyzer.data is None
+        pd.testing.assert_frame_equal(analyzer.pivot_pairs, expected.pivot_pairs)
+        assert os.path.exists(pivot_index_path(table_path))
@@ -0,0 +1,146 @@
+import pytest
+import numpy as np
+import sys
+import os
+from unittest.mock import patch
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+try:
+    import matplotlib
+    matplotlib.use('Agg')
+    import pandas as pd
+    from plot_all_chart import UniversalParameterPlotter
+    from pivot_index import PivotIndex
+    import data_store
+    from data_store import open_column_store
+    PLOTTER_AVAILABLE = True
+except ImportError:
+    PLOTTER_AVAILABLE = False
+
+
+def make_ml_data(n=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    close = np.round(40000 + np.cumsum(rng.normal(0, 150, n)), 2)
+    labels = np.zeros(n)
+    labels[np.arange(50, n, 400)] = -1
+    labels[np.arange(250, n, 400)] = 1
+    return pd.DataFrame({
+        'Open time': pd.date_range('2020-01-01', periods=n, freq='15min'),
+        'Open': close,
+        'High': close + 30,
+        'Low': close - 30,
+        'Close': close,
+        'Volume': rng.uniform(1, 100, n),
+        'rsi_14': rng.uniform(0, 100, n),
+        'zigzag (1.0%)': labels,
+    })
+
+
+@pytest.mark.skipif(not PLOTTER_AVAILABLE, reason="plot_all_chart module not available")
+class TestParallelCharts:
+    """Построение графиков в пуле процессов."""
+
+    def make_plotter(self, tmp_path, charts_dir):
+        table_path = tmp_path / "ml_data.csv"
+        if not table_path.exists():
+            data = make_ml_data()
+            data.to_csv(table_path, index=False)
+            PivotIndex.from_frame(data).save(table_path)
+        plotter = UniversalParameterPlotter(str(table_path))
+        plotter.load_data()
+        plotter.charts_base_dir = str(tmp_path / charts_dir)
+        plotter.dpi = 50
+        plotter.selected_parameters = ['rsi_14', 'ZIGZAG_PRICE_CHART']
+        plotter.selected_periods = plotter.get_time_periods(months=3)[:2]
+        return plotter
+
+    @staticmethod
+    def chart_files(charts_dir):
+        return sorted(os.path.relpath(os.path.join(root, name), charts_dir)
+                      for root, _, names in os.walk(charts_dir) for name in names)
+
+    def test_parallel_matches_serial_paths(self, tmp_path, capsys):
+        serial = self.make_plotter(tmp_path, "serial")
+        assert serial.create_all_charts(workers=1)
+        parallel = self.make_plotter(tmp_path, "parallel")
+        assert parallel.create_all_charts(workers=2)
+
+        files = self.chart_files(tmp_path / "parallel")
+        assert files == self.chart_files(tmp_path / "serial")
+        assert files == ['ZIGZAG_PRICE_CHART/ZigZag_Price_2020-01.png', 'ZIGZAG_PRICE_CHART/ZigZag_Price_2020-03.png',
+                         'chart_manifest.json', 'rsi_14/rsi_14_2020-01.png', 'rsi_14/rsi_14_2020-03.png']
+
+        out = capsys.readouterr().out
+        assert 'Успешно создано графиков: 4/4' in out
+        assert 'процессов: 2' in out
+
+    def test_worker_reads_column_store(self, tmp_path):
+        plotter = self.make_plotter(tmp_path, "charts")
+        period = plotter.selected_periods[0]
+
+        # Хранилище собирается из загруженных данных, таблица не читается заново
+        with patch.object(data_store, 'load_table', side_effect=AssertionError("table re-read")):
+            plotter.store = open_column_store(plotter.data_file, data=plotter.data.drop(columns='datetime'),
+                                              profile=plotter.dtype_profile)
+        frame = plotter._period_frame(period, ['rsi_14'])
+        plotter.store = None
+        expected = plotter._period_frame(period, ['rsi_14'])
+
+        np.testing.assert_array_equal(frame.index.values, expected.index.values)
+        # Те же типы, что у данных плоттера (компактный профиль)
+        assert frame['rsi_14'].dtype == expected['rsi_14'].dtype
+        np.testing.assert_array_equal(frame['rsi_14'].values, expected['rsi_14'].values)
+        np.testing.assert_array_equal(frame['datetime'].values, expected['datetime'].values)
+
+        # Хранилище с другим профилем пересобирается
+        default = open_column_store(plotter.data_file)
+        assert default.column('rsi_14').dtype == np.float64
+
+
+@pytest.mark.skipif(not PLOTTER_AVAILABLE, reason="plot_all_chart module not available")
+class TestChartCache:
+    """Перерисовываются только графики с изменившимися данными."""
+
+    def run(self, tmp_path, data, capsys, force=False):
+        table_path = tmp_path / "ml_data.csv"
+        data.to_csv(table_path, index=False)
+        plotter = UniversalParameterPlotter(str(table_path))
+        plotter.load_data()
+        plotter.charts_base_dir = str(tmp_path / "charts")
+        plotter.dpi = 50
+        plotter.selected_parameters = ['rsi_14']
+        plotter.selected_periods = plotter.get_time_periods(months=3)
+        capsys.readouterr()
+        assert plotter.create_all_charts(workers=1, force=force)
+        return capsys.readouterr().out
+
+    def test_only_changed_period_redrawn(self, tmp_path, capsys):
+        data = make_ml_data(21000)
+        history = data.iloc[:20000]
+
+        out = self.run(tmp_path, history, capsys)
+        assert 'Успешно создано графиков: 3/3' in out
+        assert os.path.exists(tmp_path / "charts" / "chart_manifest.json")
+
+        out = self.run(tmp_path, history, capsys)
+        assert 'Успешно создано графиков: 0/0' in out
+        assert 'Пропущено без изменений: 3' in out
+
+        # Новые свечи меняют только последний период
+        out = self.run(tmp_path, data, capsys)
+        assert 'Успешно создано графиков: 1/1' in out
+        assert '✓ 2020-06-' in out
+
+        out = self.run(tmp_path, data, capsys, force=True)
+        assert 'Успешно создано графиков: 3/3' in out
+
+    def test_missing_chart_redrawn(self, tmp_path, capsys):
+        data = make_ml_data(20000)
+        self.run(tmp_path, data, capsys)
+        os.remove(tmp_path / "charts" / "rsi_14" / "rsi_14_2020-01.png")
+
+        out = self.run(tmp_path, data, capsys)
+        assert 'Успешно создано графиков: 1/1' in out
+        assert os.path.exists(tmp_path / "charts" / "rsi_14" / "rsi_14_2020-01.png")
@@ -0,0 +1,82 @@
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+try:
+    import pandas as pd
+    from rolling_extrema import rolling_extrema, RollingExtremaState
+    EXTREMA_AVAILABLE = True
+except ImportError:
+    EXTREMA_AVAILABLE = False
+
+
+WINDOWS = [1, 2, 3, 5, 10, 14, 20, 50, 64, 100]
+
+
+def make_series(n, seed, nan_count=0):
+    """Случайное блуждание с плоскими участками и пропусками."""
+    rng = np.random.default_rng(seed)
+    values = np.round(np.cumsum(rng.normal(0, 1, n)), 1)
+    if nan_count:
+        values[rng.integers(0, n, nan_count)] = np.nan
+    return values
+
+
+def pandas_extrema(values, window, mode):
+    rolling = pd.Series(values).rolling(window=window)
+    return (rolling.max() if mode == 'max' else rolling.min()).values
+
+
+@pytest.mark.skipif(not EXTREMA_AVAILABLE, reason="rolling_extrema module not available")
+class TestRollingExtrema:
+    """Совпадение с pandas rolling().max()/min() для всех окон."""
+
+    @pytest.mark.parametrize("mode", ['max', 'min'])
+    @pytest.mark.parametrize("nan_count", [0, 30])
+    def test_batch_matches_pandas(self, mode, nan_count):
+        values = make_series(5000, 1, nan_count)
+
+        result = rolling_extrema(values, WINDOWS, mode)
+
+        assert sorted(result) == WINDOWS
+        for window in WINDOWS:
+            np.testing.assert_array_equal(result[window], pandas_extrema(values, window, mode))
+
+    @pytest.mark.parametrize("n", [0, 1, 4, 5, 6])
+    def test_short_series(self, n):
+        values = make_series(n, 2)
+
+        result = rolling_extrema(values, [5], 'max')
+
+        np.testing.assert_array_equal(result[5], pandas_extrema(values, 5, 'max'))
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            rolling_extrema([1.0, 2.0], [0], 'max')
+        with pytest.raises(ValueError):
+            rolling_extrema([1.0, 2.0], [2], 'median')
+
+    @pytest.mark.parametrize("mode", ['max', 'min'])
+    def test_streaming_matches_pandas(self, mode):
+        values = make_series(3000, 3, nan_count=20)
+        expected = {w: pandas_extrema(values, w, mode) for w in WINDOWS}
+
+        state = RollingExtremaState(WINDOWS, mode)
+        state.prime(values[:500])
+        for i in range(500, len(values)):
+            row = state.update(values[i])
+            for window in WINDOWS:
+                np.testing.assert_array_equal(row[window], expected[window][i])
+
+    def test_streaming_from_empty_history(self):
+        values = make_series(200, 4)
+        expected = pandas_extrema(values, 20, 'min')
+
+        state = RollingExtremaState([20], 'min')
+        result = [state.update(v)[20] for v in values]
+
+        np.testing.assert_array_equal(result, expected)
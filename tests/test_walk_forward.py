@@ -0,0 +1,131 @@
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+try:
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import KFold, StratifiedKFold, TimeSeriesSplit
+    from walk_forward import CANDLES_PER_DAY, WalkForwardSplit, check_forward_splits, contiguous_rows, time_split
+    from model_tournament import run_tournament
+    WALK_FORWARD_AVAILABLE = True
+except ImportError:
+    WALK_FORWARD_AVAILABLE = False
+
+
+@pytest.mark.skipif(not WALK_FORWARD_AVAILABLE, reason="walk_forward module not available")
+class TestWalkForwardSplit:
+    """Окна по времени: обучение раньше проверки, зазор embargo."""
+
+    def test_rolling_windows(self):
+        splitter = WalkForwardSplit(test_window=100, train_window=500, step=50, embargo=20)
+        splits = list(splitter.split(np.zeros((1200, 1))))
+
+        assert len(splits) == splitter.get_n_splits(np.zeros((1200, 1)))
+        for k, (train, test) in enumerate(splits):
+            assert len(train) == 500 and len(test) == 100
+            assert test[0] - train[-1] - 1 == 20
+            assert test[0] == 520 + 50 * k
+        assert splits[-1][1][-1] < 1200
+
+    def test_expanding_matches_time_series_split(self):
+        n, folds, test, gap = 1000, 4, 150, 10
+        splitter = WalkForwardSplit(test_window=test, embargo=gap, min_train=n - folds * test - gap)
+        expected = TimeSeriesSplit(n_splits=folds, test_size=test, gap=gap).split(np.zeros(n))
+
+        for (train, test_idx), (exp_train, exp_test) in zip(splitter.split(np.zeros(n)), expected, strict=True):
+            np.testing.assert_array_equal(train, exp_train)
+            np.testing.assert_array_equal(test_idx, exp_test)
+
+    def test_from_days(self):
+        splitter = WalkForwardSplit.from_days(test_days=7, train_days=30, embargo=4)
+        assert splitter.test_window == 7 * CANDLES_PER_DAY
+        assert splitter.train_window == 30 * CANDLES_PER_DAY
+        assert splitter.step == splitter.test_window
+
+    def test_invalid_windows(self):
+        with pytest.raises(ValueError):
+            WalkForwardSplit(test_window=0)
+        with pytest.raises(ValueError):
+            WalkForwardSplit(test_window=10, embargo=-1)
+
+    def test_time_split(self):
+        train, test = time_split(1000, test_size=0.2, embargo=30)
+        np.testing.assert_array_equal(test, np.arange(800, 1000))
+        np.testing.assert_array_equal(train, np.arange(770))
+        with pytest.raises(ValueError):
+            time_split(10, test_size=0.2, embargo=20)
+
+    def test_contiguous_rows(self):
+        assert contiguous_rows(np.arange(5, 20)) == slice(5, 20)
+        gapped = np.array([1, 2, 4])
+        assert contiguous_rows(gapped) is gapped or np.array_equal(contiguous_rows(gapped), gapped)
+        assert contiguous_rows(None) is None
+
+
+@pytest.mark.skipif(not WALK_FORWARD_AVAILABLE, reason="walk_forward module not available")
+class TestWalkForwardTournament:
+    """Турнир на окнах по времени и продолжение моделей между окнами."""
+
+    def models(self):
+        return {
+            'Random Forest': RandomForestClassifier(n_estimators=8, random_state=42),
+            'Logistic Regression': LogisticRegression(random_state=42, max_iter=1000),
+        }
+
+    def test_oof_covers_only_test_windows(self, make_dataset):
+        X, y = make_dataset()
+        splitter = WalkForwardSplit(test_window=400, train_window=1000, embargo=50)
+
+        results = run_tournament(self.models(), X, y, cv=splitter, refit=False)
+
+        oof_fold = results['Random Forest']['oof_fold']
+        assert (oof_fold[:1050] == -1).all()
+        assert np.isnan(results['Random Forest']['oof_proba'][:1050]).all()
+        covered = oof_fold >= 0
+        assert covered.sum() == 400 * splitter.get_n_splits(X)
+        assert not np.isnan(results['Random Forest']['oof_proba'][covered]).any()
+
+    def test_warm_start_grows_ensemble(self, make_dataset):
+        X, y = make_dataset()
+        splitter = WalkForwardSplit(test_window=400, train_window=1000, embargo=50)
+
+        results = run_tournament(self.models(), X, y, cv=splitter, refit=False, warm_start=True)
+
+        forests = results['Random Forest']['fold_models']
+        assert [len(model.estimators_) for model in forests] == [8, 10, 12, 14]
+        # Модели фолдов независимы: продолжалась копия
+        assert forests[0].estimators_[0] is not forests[1].estimators_[0]
+        assert all(model.warm_start for model in results['Logistic Regression']['fold_models'][1:])
+
+    @pytest.mark.parametrize("cv", [5, KFold(5, shuffle=True, random_state=0)])
+    def test_warm_start_rejects_k_fold(self, cv, make_dataset):
+        X, y = make_dataset(1500)
+
+        with pytest.raises(ValueError, match="warm start"):
+            run_tournament(self.models(), X, y, cv=cv, warm_start=True)
+
+    def test_check_forward_splits(self, make_dataset):
+        X, y = make_dataset(1500)
+
+        check_forward_splits(list(TimeSeriesSplit(n_splits=5).split(X)))
+        check_forward_splits(list(WalkForwardSplit(test_window=200, train_window=500, embargo=20).split(X)))
+        with pytest.raises(ValueError):
+            check_forward_splits(list(StratifiedKFold(5).split(X, y)))
+
+    @pytest.mark.parametrize("chain_length", [None, 2])
+    def test_parallel_chains_match_serial(self, chain_length, make_dataset):
+        X, y = make_dataset()
+        splitter = WalkForwardSplit(test_window=400, train_window=1000, embargo=50)
+
+        serial = run_tournament(self.models(), X, y, cv=splitter, warm_start=True, chain_length=chain_length)
+        parallel = run_tournament(self.models(), X, y, cv=splitter, warm_start=True, chain_length=chain_length,
+                                  workers=2)
+
+        for name in serial:
+            np.testing.assert_allclose(parallel[name]['cv_scores'], serial[name]['cv_scores'])
+            assert parallel[name]['jobs'] == serial[name]['jobs'] == 5
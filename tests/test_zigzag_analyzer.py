@@ -9,7 +9,8 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 try:
-    from zigzag_analyzer import ZigZagAnalyzer
+    from zigzag_analyzer import ZigZagAnalyzer, pivot_pair_table
+    from pivot_index import find_pivots
     ZIGZAG_AVAILABLE = True
 except ImportError:
     ZIGZAG_AVAILABLE = False
@@ -106,3 +107,65 @@ class TestZigZagAnalyzer:
         result = analyzer.check_minimum_distances(1.0)
         
         assert isinstance(result, bool)
+
+
+def legacy_pair_distances(data, zigzag_column):
+    """Исходный цикл analyze_zigzag_distances - эталон для таблицы пар."""
+    zigzag_points = data[data[zigzag_column] != 0]
+    result = []
+    for i in range(1, len(zigzag_points)):
+        prev_point = zigzag_points.iloc[i-1]
+        curr_point = zigzag_points.iloc[i]
+        prev_price = prev_point['High'] if prev_point[zigzag_column] == -1 else prev_point['Low']
+        curr_price = curr_point['High'] if curr_point[zigzag_column] == -1 else curr_point['Low']
+        result.append((abs(curr_price - prev_price),
+                       abs((curr_price - prev_price) / prev_price * 100),
+                       zigzag_points.index[i] - zigzag_points.index[i-1]))
+    return result
+
+
+@pytest.mark.skipif(not ZIGZAG_AVAILABLE, reason="ZigZagAnalyzer module not available")
+class TestPivotPairTable:
+    """Векторизованная таблица пар вершин совпадает с исходным циклом."""
+
+    @pytest.fixture
+    def data(self):
+        rng = np.random.default_rng(0)
+        n = 2000
+        close = 40000 + np.cumsum(rng.normal(0, 50, n))
+        data = pd.DataFrame({
+            'Open': close, 'High': close + rng.uniform(0, 30, n),
+            'Low': close - rng.uniform(0, 30, n), 'Close': close,
+            'zigzag (1.0%)': rng.choice([-1, 0, 1], n, p=[0.05, 0.9, 0.05]).astype(np.int8),
+        })
+        data.index = data.index + 50  # индекс после dropna начинается не с нуля
+        return data
+
+    def test_matches_legacy_loop(self, data):
+        pairs = pivot_pair_table(find_pivots(data, 'zigzag (1.0%)'))
+        expected = np.array(legacy_pair_distances(data, 'zigzag (1.0%)'))
+
+        np.testing.assert_array_equal(pairs['price_distance'].to_numpy(), expected[:, 0])
+        np.testing.assert_array_equal(pairs['percent_distance'].to_numpy(), expected[:, 1])
+        np.testing.assert_array_equal(pairs['candle_distance'].to_numpy(), expected[:, 2])
+
+    def test_pairs_reused_by_report_and_checks(self, data, tmp_path):
+        analyzer = ZigZagAnalyzer("test_data.csv")
+        analyzer.data = data
+        analyzer.zigzag_column = 'zigzag (1.0%)'
+        assert analyzer.analyze_zigzag_distances()
+
+        pairs = analyzer.pivot_pairs
+        assert analyzer.analysis_results['total_pairs'] == len(pairs)
+
+        # Повторный проход по колонке зигзага упал бы с KeyError
+        analyzer.data = data.drop(columns=['zigzag (1.0%)'])
+        report = tmp_path / "report.txt"
+        assert analyzer.print_analysis_table() is not None
+        assert analyzer.save_detailed_report(str(report))
+        lines = report.read_text(encoding='utf-8').splitlines()
+        assert lines[-1].split()[0] == str(len(pairs))
+
+        violations = int((pairs['percent_distance'] < 1.0).sum())
+        assert analyzer.check_minimum_distances(1.0) == (violations == 0)
+        assert analyzer.check_minimum_distances(0.0) is True
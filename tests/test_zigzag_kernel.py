@@ -0,0 +1,201 @@
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+try:
+    import pandas as pd
+    from zigzag_kernel import compute_zigzag, compute_zigzag_sweep, ZigZagState, NUMBA_AVAILABLE
+    from data_for_ml_maker import ZigZag15MProcessor
+    KERNEL_AVAILABLE = True
+except ImportError:
+    KERNEL_AVAILABLE = False
+    NUMBA_AVAILABLE = False
+
+
+def legacy_zigzag(high, low, deviation):
+    """Исходный цикл calculate_zigzag - эталон для сравнения движков."""
+    n = len(high)
+    zigzag_series = np.zeros(n)
+    zigzag_points = []
+    last_zigzag_price = low[0]
+    zigzag_series[0] = 1
+    zigzag_points.append((0, low[0], 1))
+    current_max_price = high[0]
+    current_max_idx = 0
+    max_candidate = False
+    current_min_price = low[0]
+    current_min_idx = 0
+    min_candidate = False
+    search_direction = -1
+    for i in range(1, n):
+        if search_direction == -1:
+            if high[i] > current_max_price:
+                current_max_price = high[i]
+                current_max_idx = i
+            if not max_candidate:
+                if (current_max_price - last_zigzag_price) / last_zigzag_price * 100 >= deviation:
+                    max_candidate = True
+            if max_candidate:
+                if (current_max_price - low[i]) / current_max_price * 100 >= deviation:
+                    zigzag_series[current_max_idx] = -1
+                    zigzag_series[i] = 1
+                    zigzag_points.append((current_max_idx, current_max_price, -1))
+                    zigzag_points.append((i, low[i], 1))
+                    last_zigzag_price = low[i]
+                    current_min_price = low[i]
+                    current_min_idx = i
+                    min_candidate = False
+                    search_direction = 1
+        else:
+            if low[i] < current_min_price:
+                current_min_price = low[i]
+                current_min_idx = i
+            if not min_candidate:
+                if (last_zigzag_price - current_min_price) / last_zigzag_price * 100 >= deviation:
+                    min_candidate = True
+            if min_candidate:
+                if (high[i] - current_min_price) / current_min_price * 100 >= deviation:
+                    zigzag_series[current_min_idx] = 1
+                    zigzag_series[i] = -1
+                    zigzag_points.append((current_min_idx, current_min_price, 1))
+                    zigzag_points.append((i, high[i], -1))
+                    last_zigzag_price = high[i]
+                    current_max_price = high[i]
+                    current_max_idx = i
+                    max_candidate = False
+                    search_direction = -1
+    return zigzag_series, zigzag_points
+
+
+def make_ohlc(n, seed):
+    """Случайное блуждание цены с High >= Low."""
+    rng = np.random.default_rng(seed)
+    close = 40000 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    spread = np.abs(rng.normal(0, 0.003, n)) * close
+    high = np.round(close + spread, 2)
+    low = np.round(close - spread, 2)
+    return high, low
+
+
+ENGINES = ['python', 'numpy'] + (['numba'] if NUMBA_AVAILABLE else [])
+
+
+@pytest.mark.skipif(not KERNEL_AVAILABLE, reason="zigzag_kernel module not available")
+class TestZigZagKernel:
+    """Побитовое совпадение всех движков с исходным алгоритмом."""
+
+    @pytest.mark.parametrize("engine", ENGINES)
+    @pytest.mark.parametrize("deviation", [0.5, 1.0, 2.0, 5.0])
+    @pytest.mark.parametrize("seed", [0, 1, 2])
+    def test_engine_matches_legacy(self, engine, deviation, seed):
+        high, low = make_ohlc(5000, seed)
+        expected_series, expected_points = legacy_zigzag(high, low, deviation)
+
+        series, points = compute_zigzag(high, low, deviation, engine=engine)
+
+        assert series.dtype == expected_series.dtype
+        assert np.array_equal(series, expected_series)
+        assert points == expected_points
+
+    @pytest.mark.parametrize("engine", ENGINES)
+    def test_flat_prices_overwrite_pivot(self, engine):
+        """Совпадение индексов экстремума и подтверждения должно сохраняться."""
+        high = np.array([100.0, 100.0, 103.0, 99.0, 99.0, 104.0, 104.0, 98.0])
+        low = np.array([99.0, 98.0, 101.0, 97.0, 98.0, 102.0, 95.0, 96.0])
+        expected_series, expected_points = legacy_zigzag(high, low, 1.0)
+
+        series, points = compute_zigzag(high, low, 1.0, engine=engine)
+
+        assert np.array_equal(series, expected_series)
+        assert points == expected_points
+
+    def test_unknown_engine(self):
+        high, low = make_ohlc(10, 0)
+        with pytest.raises(ValueError):
+            compute_zigzag(high, low, 1.0, engine='gpu')
+
+    @pytest.mark.parametrize("engine", ENGINES)
+    def test_processor_column_matches_legacy(self, engine):
+        high, low = make_ohlc(3000, 7)
+        processor = ZigZag15MProcessor(deviation=1.0)
+        processor.data = pd.DataFrame({'High': high, 'Low': low})
+
+        assert processor.calculate_zigzag(engine=engine) is True
+
+        expected_series, expected_points = legacy_zigzag(high, low, 1.0)
+        assert np.array_equal(processor.data['zigzag (1.0%)'].values, expected_series)
+        assert processor.zigzag_points == expected_points
+
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_sweep_matches_single_runs(self, workers):
+        high, low = make_ohlc(4000, 11)
+        deviations = [0.5, 1, 2, 5]
+
+        results = compute_zigzag_sweep(high, low, deviations, engine='numpy', workers=workers)
+
+        assert list(results.keys()) == [0.5, 1.0, 2.0, 5.0]
+        for deviation, (series, points) in results.items():
+            expected_series, expected_points = legacy_zigzag(high, low, deviation)
+            assert np.array_equal(series, expected_series)
+            assert points == expected_points
+
+    def test_processor_sweep_adds_all_columns(self):
+        high, low = make_ohlc(3000, 5)
+        processor = ZigZag15MProcessor(deviation=1.0)
+        processor.data = pd.DataFrame({'High': high, 'Low': low})
+
+        assert processor.calculate_zigzag_sweep([0.5, 1.0, 2.0]) is True
+
+        for deviation in [0.5, 1.0, 2.0]:
+            expected_series, _ = legacy_zigzag(high, low, deviation)
+            assert np.array_equal(processor.data[f'zigzag ({deviation}%)'].values, expected_series)
+        assert processor.zigzag_points == processor.sweep_points[1.0]
+
+
+@pytest.mark.skipif(not KERNEL_AVAILABLE, reason="zigzag_kernel module not available")
+class TestZigZagState:
+    """Потоковое состояние зигзага."""
+
+    @pytest.mark.parametrize("deviation", [0.5, 1.0, 5.0])
+    def test_streaming_matches_batch(self, deviation):
+        high, low = make_ohlc(4000, 3)
+        expected_series, expected_points = compute_zigzag(high, low, deviation, engine='python')
+
+        state = ZigZagState(deviation)
+        points = []
+        for h, l in zip(high, low):
+            points.extend(state.update(h, l))
+
+        series = np.zeros(len(high))
+        for idx, _, kind in points:
+            series[idx] = kind
+        assert points == expected_points
+        assert np.array_equal(series, expected_series)
+
+    def test_checkpoint_resume(self, tmp_path):
+        high, low = make_ohlc(3000, 9)
+        _, expected_points = compute_zigzag(high, low, 1.0, engine='python')
+
+        state = ZigZagState(1.0)
+        points = state.update_many(high[:1700], low[:1700])
+        checkpoint = tmp_path / "zigzag_state.json"
+        state.save(checkpoint)
+
+        restored = ZigZagState.load(checkpoint)
+        points.extend(restored.update_many(high[1700:], low[1700:]))
+
+        assert restored.to_dict()['index'] == len(high) - 1
+        assert points == expected_points
+
+    def test_settled_index_never_rewritten(self):
+        high, low = make_ohlc(2000, 4)
+        state = ZigZagState(1.0)
+        settled = 0
+        for h, l in zip(high, low):
+            for idx, _, _ in state.update(h, l):
+                assert idx >= settled
+            settled = state.settled_index
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Разбиение по времени (walk-forward) для обучения на последовательных свечах.
+
+Обучающее окно всегда целиком раньше проверочного. Между ними пропускается
+embargo свечей: метка вершины зигзага становится известна только после
+разворота цены, поэтому свечи прямо перед проверочным окном несут
+информацию из него. Окна сдвигаются на step свечей. Обучающее окно либо
+фиксированной длины (скользящее), либо от начала истории (расширяющееся).
+
+WalkForwardSplit совместим с разбиениями sklearn (split/get_n_splits) и
+передается в run_tournament как cv. Индексы окон - непрерывные диапазоны,
+поэтому процессы берут строки срезом без копирования.
+"""
+
+import numpy as np
+
+CANDLES_PER_DAY = 96  # 15-минутные свечи
+DEFAULT_EMBARGO = CANDLES_PER_DAY
+
+
+class WalkForwardSplit:
+    """
+    Скользящие окна обучения и проверки по времени.
+    """
+
+    def __init__(self, test_window, train_window=None, step=None, embargo=DEFAULT_EMBARGO, min_train=None):
+        """
+        Параметры:
+        - test_window: длина проверочного окна в свечах
+        - train_window: длина обучающего окна в свечах (None - от начала истории)
+        - step: сдвиг окон в свечах (None - на длину проверочного окна)
+        - embargo: свечей между концом обучающего и началом проверочного окна
+        - min_train: минимальная длина обучающего окна для расширяющегося
+          варианта (по умолчанию - test_window)
+        """
+        if test_window <= 0:
+            raise ValueError("Длина проверочного окна должна быть положительной")
+        if train_window is not None and train_window <= 0:
+            raise ValueError("Длина обучающего окна должна быть положительной")
+        if embargo < 0:
+            raise ValueError("Embargo не может быть отрицательным")
+        self.test_window = int(test_window)
+        self.train_window = None if train_window is None else int(train_window)
+        self.step = int(step) if step else self.test_window
+        self.embargo = int(embargo)
+        self.min_train = int(min_train) if min_train else (self.train_window or self.test_window)
+
+    @classmethod
+    def from_days(cls, test_days, train_days=None, step_days=None, embargo=DEFAULT_EMBARGO):
+        """
+        Окна в днях 15-минутных свечей; embargo - в свечах.
+        """
+        def candles(days):
+            return None if days is None else int(round(days * CANDLES_PER_DAY))
+        return cls(candles(test_days), candles(train_days), candles(step_days), embargo)
+
+    def windows(self, n_samples):
+        """
+        Границы окон.
+
+        Возвращает:
+        - список (train_start, train_end, test_start, test_end), концы не включаются
+        """
+        windows = []
+        test_start = self.min_train + self.embargo
+        while test_start + self.test_window <= n_samples:
+            train_end = test_start - self.embargo
+            train_start = 0 if self.train_window is None else max(0, train_end - self.train_window)
+            windows.append((train_start, train_end, test_start, test_start + self.test_window))
+            test_start += self.step
+        return windows
+
+    def split(self, X, y=None, groups=None):
+        for train_start, train_end, test_start, test_end in self.windows(len(X)):
+            yield np.arange(train_start, train_end), np.arange(test_start, test_end)
+
+    def get_n_splits(self, X=None, y=None, groups=None):
+        if X is None:
+            raise ValueError("Для подсчета окон нужен X")
+        return len(self.windows(len(X)))
+
+    def __repr__(self):
+        return (f"WalkForwardSplit(test_window={self.test_window}, train_window={self.train_window}, "
+                f"step={self.step}, embargo={self.embargo})")
+
+
+def time_split(n_samples, test_size=0.2, embargo=DEFAULT_EMBARGO):
+    """
+    Делит последовательные строки на обучающие и тестовые без перемешивания.
+
+    Параметры:
+    - n_samples: количество строк
+    - test_size: доля последних строк в тестовой выборке
+    - embargo: строк между обучающей и тестовой выборкой (не используются)
+
+    Возвращает:
+    - (train_idx, test_idx)
+    """
+    test_start = n_samples - int(np.ceil(n_samples * test_size))
+    train_end = test_start - embargo
+    if train_end <= 0 or test_start >= n_samples:
+        raise ValueError(f"Слишком мало строк для разделения: {n_samples} (embargo {embargo})")
+    return np.arange(train_end), np.arange(test_start, n_samples)
+
+
+def contiguous_rows(indices):
+    """
+    Непрерывный возрастающий диапазон индексов как срез (строки без копирования).
+
+    Возвращает:
+    - slice или исходные индексы, если диапазон не непрерывный
+    """
+    if indices is None or isinstance(indices, slice):
+        return indices
+    indices = np.asarray(indices)
+    if len(indices) and indices[-1] - indices[0] + 1 == len(indices) and np.all(np.diff(indices) == 1):
+        return slice(int(indices[0]), int(indices[-1]) + 1)
+    return indices
+
+
+def check_forward_splits(splits):
+    """
+    Проверяет, что фолды идут вперед по времени: обучающие строки каждого
+    фолда раньше проверочных строк всех следующих фолдов (TimeSeriesSplit,
+    WalkForwardSplit). Только такие фолды можно обучать цепочкой warm start:
+    при k-fold следующий фолд продолжал бы модель, обученную на его
+    проверочных строках.
+
+    Параметры:
+    - splits: список (train_idx, test_idx)
+    """
+    earliest_test = np.inf
+    for fold in range(len(splits) - 1, -1, -1):
+        train_idx, test_idx = splits[fold]
+        if len(train_idx) and np.max(train_idx) >= earliest_test:
+            raise ValueError("warm start возможен только для разбиения по времени (TimeSeriesSplit, "
+                             f"WalkForwardSplit): обучающие строки фолда {fold + 1} не раньше "
+                             "проверочных строк следующих фолдов")
+        if len(test_idx):
+            earliest_test = min(earliest_test, np.min(test_idx))
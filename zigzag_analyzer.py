@@ -4,24 +4,67 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
+import argparse
 from datetime import datetime
+from data_store import load_table, resolve_table_path
+from data_schema import PROFILES
+from pivot_index import find_pivots, load_pivot_index, zigzag_columns
+
+
+def pivot_pair_table(pivots):
+    """
+    Таблица пар соседних вершин зигзага, рассчитанная за один проход по массивам.
+    
+    Параметры:
+    - pivots: вершины зигзага (pivot_index.Pivots)
+    
+    Возвращает:
+    - DataFrame с колонками prev_index, curr_index, prev_type, curr_type,
+      prev_price, curr_price, price_distance, percent_distance, candle_distance
+    """
+    index, types, prices = pivots.row, pivots.type, pivots.price
+    prev_price = prices[:-1]
+    curr_price = prices[1:]
+    return pd.DataFrame({
+        'prev_index': index[:-1],
+        'curr_index': index[1:],
+        'prev_type': types[:-1],
+        'curr_type': types[1:],
+        'prev_price': prev_price,
+        'curr_price': curr_price,
+        'price_distance': np.abs(curr_price - prev_price),
+        'percent_distance': np.abs((curr_price - prev_price) / prev_price * 100),
+        'candle_distance': index[1:] - index[:-1],
+    })
+
+
+def _direction(kind):
+    return "MAX" if kind == -1 else "MIN"
+
 
 class ZigZagAnalyzer:
     """
     Анализатор зигзагов для проверки расстояний между вершинами.
     """
     
-    def __init__(self, data_file="processed_data/ml_data.csv"):
+    def __init__(self, data_file="processed_data/ml_data.csv", dtype_profile='compact', memory_report=False):
         """
         Инициализация анализатора.
         
         Параметры:
         - data_file: путь к файлу с данными и зигзагами
+        - dtype_profile: профиль типов данных при загрузке ('default' или 'compact')
+        - memory_report: вывести отчет об экономии памяти при загрузке
         """
         self.data_file = data_file
+        self.dtype_profile = dtype_profile
+        self.memory_report = memory_report
         self.data = None
         self.zigzag_column = None
         self.analysis_results = {}
+        self.pivot_pairs = None
+        self.pivot_index = None
         
     def load_data(self):
         """
@@ -30,17 +73,29 @@ class ZigZagAnalyzer:
         print("Загрузка данных для анализа зигзага...")
         print("=" * 60)
         
-        if not os.path.exists(self.data_file):
+        if not os.path.exists(resolve_table_path(self.data_file)):
             raise FileNotFoundError(f"Файл {self.data_file} не найден!")
         
+        # Индекс вершин, сохраненный вместе с данными: полная таблица не нужна
+        pivot_index = load_pivot_index(self.data_file)
+        if pivot_index is not None and pivot_index.columns:
+            self.pivot_index = pivot_index
+            self.zigzag_column = pivot_index.columns[0]
+            types = pivot_index[self.zigzag_column].type
+            print(f"✓ Загружен индекс вершин: {pivot_index.rows} записей")
+            print(f"✓ Найдена колонка зигзага: {self.zigzag_column}")
+            self._print_label_stats(pivot_index.rows - len(types),
+                                    np.count_nonzero(types == -1), np.count_nonzero(types == 1))
+            return True
+        
         # Загружаем данные
-        self.data = pd.read_csv(self.data_file)
+        self.data = load_table(self.data_file, profile=self.dtype_profile, memory_report=self.memory_report)
         print(f"✓ Загружены данные: {len(self.data)} записей")
         
         # Ищем колонку зигзага
-        zigzag_columns = [col for col in self.data.columns if 'zigzag' in col.lower()]
-        if zigzag_columns:
-            self.zigzag_column = zigzag_columns[0]
+        zigzag_column_names = zigzag_columns(self.data.columns)
+        if zigzag_column_names:
+            self.zigzag_column = zigzag_column_names[0]
             print(f"✓ Найдена колонка зигзага: {self.zigzag_column}")
         else:
             raise ValueError("Колонка зигзага не найдена в файле!")
@@ -53,13 +108,19 @@ class ZigZagAnalyzer:
         
         # Показываем статистику зигзага
         zigzag_stats = self.data[self.zigzag_column].value_counts()
-        print(f"\nСтатистика зигзага:")
-        print(f"  - Обычные бары (0): {zigzag_stats.get(0, 0):,}")
-        print(f"  - Максимумы (-1): {zigzag_stats.get(-1, 0):,}")
-        print(f"  - Минимумы (1): {zigzag_stats.get(1, 0):,}")
+        self._print_label_stats(zigzag_stats.get(0, 0), zigzag_stats.get(-1, 0), zigzag_stats.get(1, 0))
         
         return True
     
+    def _print_label_stats(self, regular, maxima, minima):
+        print(f"\nСтатистика зигзага:")
+        print(f"  - Обычные бары (0): {regular:,}")
+        print(f"  - Максимумы (-1): {maxima:,}")
+        print(f"  - Минимумы (1): {minima:,}")
+    
+    def _total_rows(self):
+        return len(self.data) if self.data is not None else self.pivot_index.rows
+    
     def analyze_zigzag_distances(self):
         """
         Анализирует расстояния между вершинами зигзага.
@@ -67,67 +128,38 @@ class ZigZagAnalyzer:
         print(f"\nАнализ расстояний между вершинами зигзага...")
         print("-" * 50)
         
-        # Находим все точки зигзага
-        zigzag_points = self.data[self.data[self.zigzag_column] != 0].copy()
+        # Находим все точки зигзага и считаем все пары соседних вершин сразу
+        if self.pivot_index is not None and self.zigzag_column in self.pivot_index:
+            pivots = self.pivot_index[self.zigzag_column]
+        else:
+            pivots = find_pivots(self.data, self.zigzag_column)
+        index = pivots.row
         
-        if len(zigzag_points) < 2:
+        if len(index) < 2:
             print("❌ Недостаточно точек зигзага для анализа (найдено < 2)")
             return False
         
-        print(f"✓ Найдено {len(zigzag_points)} точек зигзага")
+        print(f"✓ Найдено {len(index)} точек зигзага")
         
-        # Списки для хранения расстояний
-        price_distances = []
-        percent_distances = []
-        candle_distances = []
+        pairs = pivot_pair_table(pivots)
         
-        # Анализируем каждую пару соседних точек
-        for i in range(1, len(zigzag_points)):
-            prev_point = zigzag_points.iloc[i-1]
-            curr_point = zigzag_points.iloc[i]
-            
-            # Получаем цены (для максимумов - High, для минимумов - Low)
-            if prev_point[self.zigzag_column] == -1:  # Максимум
-                prev_price = prev_point['High']
-            else:  # Минимум
-                prev_price = prev_point['Low']
-            
-            if curr_point[self.zigzag_column] == -1:  # Максимум
-                curr_price = curr_point['High']
-            else:  # Минимум
-                curr_price = curr_point['Low']
-            
-            # Вычисляем расстояния
-            price_distance = abs(curr_price - prev_price)
-            percent_distance = abs((curr_price - prev_price) / prev_price * 100)
-            
-            # Расстояние в свечах (индексах)
-            prev_idx = zigzag_points.index[i-1]
-            curr_idx = zigzag_points.index[i]
-            candle_distance = curr_idx - prev_idx
-            
-            # Сохраняем результаты
-            price_distances.append(price_distance)
-            percent_distances.append(percent_distance)
-            candle_distances.append(candle_distance)
-            
-            # Выводим детали для первых 5 пар
-            if i <= 5:
-                direction_prev = "MAX" if prev_point[self.zigzag_column] == -1 else "MIN"
-                direction_curr = "MAX" if curr_point[self.zigzag_column] == -1 else "MIN"
-                print(f"  {i:2d}. {direction_prev}({prev_idx}) -> {direction_curr}({curr_idx}): "
-                      f"{percent_distance:.2f}%, ${price_distance:.2f}, {candle_distance} свечей")
+        # Выводим детали для первых 5 пар
+        for i, pair in enumerate(pairs.head(5).itertuples(index=False), 1):
+            print(f"  {i:2d}. {_direction(pair.prev_type)}({pair.prev_index}) -> "
+                  f"{_direction(pair.curr_type)}({pair.curr_index}): "
+                  f"{pair.percent_distance:.2f}%, ${pair.price_distance:.2f}, {pair.candle_distance} свечей")
         
-        if len(zigzag_points) > 5:
-            print(f"  ... и еще {len(zigzag_points) - 5} пар")
+        if len(index) > 5:
+            print(f"  ... и еще {len(index) - 5} пар")
         
-        # Сохраняем результаты анализа
+        # Таблица пар кэшируется: статистика, отчет и проверки используют ее
+        self.pivot_pairs = pairs
         self.analysis_results = {
-            'total_points': len(zigzag_points),
-            'total_pairs': len(price_distances),
-            'price_distances': price_distances,
-            'percent_distances': percent_distances,
-            'candle_distances': candle_distances
+            'total_points': len(index),
+            'total_pairs': len(pairs),
+            'price_distances': pairs['price_distance'].to_numpy(),
+            'percent_distances': pairs['percent_distance'].to_numpy(),
+            'candle_distances': pairs['candle_distance'].to_numpy()
         }
         
         return True
@@ -191,7 +223,7 @@ class ZigZagAnalyzer:
         # Общая информация
         print(f"Файл данных: {self.data_file}")
         print(f"Колонка зигзага: {self.zigzag_column}")
-        print(f"Всего записей: {len(self.data):,}")
+        print(f"Всего записей: {self._total_rows():,}")
         print(f"Точек зигзага: {self.analysis_results['total_points']:,}")
         print(f"Анализируемых пар: {self.analysis_results['total_pairs']:,}")
         
@@ -218,11 +250,11 @@ class ZigZagAnalyzer:
         # Дополнительная информация
         percent_distances = self.analysis_results['percent_distances']
         print(f"\nДОПОЛНИТЕЛЬНАЯ ИНФОРМАЦИЯ:")
-        print(f"  - Самое маленькое изменение: {min(percent_distances):.3f}%")
-        print(f"  - Самое большое изменение: {max(percent_distances):.3f}%")
-        print(f"  - Количество изменений < 1%: {sum(1 for x in percent_distances if x < 1.0)}")
-        print(f"  - Количество изменений < 0.5%: {sum(1 for x in percent_distances if x < 0.5)}")
-        print(f"  - Количество изменений < 0.1%: {sum(1 for x in percent_distances if x < 0.1)}")
+        print(f"  - Самое маленькое изменение: {percent_distances.min():.3f}%")
+        print(f"  - Самое большое изменение: {percent_distances.max():.3f}%")
+        print(f"  - Количество изменений < 1%: {np.count_nonzero(percent_distances < 1.0)}")
+        print(f"  - Количество изменений < 0.5%: {np.count_nonzero(percent_distances < 0.5)}")
+        print(f"  - Количество изменений < 0.1%: {np.count_nonzero(percent_distances < 0.1)}")
         
         return stats
     
@@ -247,7 +279,7 @@ class ZigZagAnalyzer:
             stats = self.calculate_statistics()
             f.write("ОБЩАЯ СТАТИСТИКА\n")
             f.write("-" * 30 + "\n")
-            f.write(f"Всего записей: {len(self.data):,}\n")
+            f.write(f"Всего записей: {self._total_rows():,}\n")
             f.write(f"Точек зигзага: {self.analysis_results['total_points']:,}\n")
             f.write(f"Анализируемых пар: {self.analysis_results['total_pairs']:,}\n\n")
             
@@ -268,19 +300,15 @@ class ZigZagAnalyzer:
             f.write(f"{'№':<4} {'Тип1':<5} {'Тип2':<5} {'Процент%':<10} {'Цена$':<12} {'Свечи':<8}\n")
             f.write("-" * 50 + "\n")
             
-            zigzag_points = self.data[self.data[self.zigzag_column] != 0]
-            for i in range(1, len(zigzag_points)):
-                prev_point = zigzag_points.iloc[i-1]
-                curr_point = zigzag_points.iloc[i]
-                
-                type1 = "MAX" if prev_point[self.zigzag_column] == -1 else "MIN"
-                type2 = "MAX" if curr_point[self.zigzag_column] == -1 else "MIN"
-                
-                percent_dist = self.analysis_results['percent_distances'][i-1]
-                price_dist = self.analysis_results['price_distances'][i-1]
-                candle_dist = self.analysis_results['candle_distances'][i-1]
-                
-                f.write(f"{i:<4} {type1:<5} {type2:<5} {percent_dist:<10.3f} {price_dist:<12.2f} {candle_dist:<8}\n")
+            pairs = self.pivot_pairs
+            rows = zip(pairs['prev_type'].to_numpy(), pairs['curr_type'].to_numpy(),
+                       pairs['percent_distance'].to_numpy(), pairs['price_distance'].to_numpy(),
+                       pairs['candle_distance'].to_numpy())
+            f.writelines(
+                f"{i:<4} {_direction(type1):<5} {_direction(type2):<5} {percent_dist:<10.3f} "
+                f"{price_dist:<12.2f} {candle_dist:<8}\n"
+                for i, (type1, type2, percent_dist, price_dist, candle_dist) in enumerate(rows, 1)
+            )
         
         print(f"✓ Подробный отчет сохранен: {output_file}")
         return True
@@ -297,13 +325,13 @@ class ZigZagAnalyzer:
             return False
         
         percent_distances = self.analysis_results['percent_distances']
-        violations = [d for d in percent_distances if d < min_percent]
+        violations = percent_distances[percent_distances < min_percent]
         
         print(f"\n" + "=" * 60)
         print(f"ПРОВЕРКА МИНИМАЛЬНЫХ РАССТОЯНИЙ (>{min_percent}%)")
         print("=" * 60)
         
-        if violations:
+        if len(violations):
             print(f"❌ НАЙДЕНЫ НАРУШЕНИЯ: {len(violations)} расстояний меньше {min_percent}%")
             print(f"Нарушающие расстояния:")
             for i, violation in enumerate(violations[:10]):  # Показываем первые 10
@@ -311,24 +339,39 @@ class ZigZagAnalyzer:
             if len(violations) > 10:
                 print(f"  ... и еще {len(violations) - 10} нарушений")
             
-            print(f"\nСамое маленькое расстояние: {min(violations):.3f}%")
+            print(f"\nСамое маленькое расстояние: {violations.min():.3f}%")
             print(f"Процент нарушений: {len(violations)/len(percent_distances)*100:.1f}%")
         else:
             print(f"✓ ВСЕ РАССТОЯНИЯ БОЛЬШЕ {min_percent}%")
-            print(f"Минимальное расстояние: {min(percent_distances):.3f}%")
+            print(f"Минимальное расстояние: {percent_distances.min():.3f}%")
         
         return len(violations) == 0
 
-def main():
+def main(argv=None):
     """
     Основная функция для анализа зигзагов.
+    
+    Без --data-file путь к файлу запрашивается интерактивно.
+    
+    Возвращает:
+    - True, если анализ выполнен и отчет сохранен
     """
+    parser = argparse.ArgumentParser(description="Анализатор расстояний между вершинами зигзага")
+    parser.add_argument('--dtype-profile', choices=PROFILES, default='compact',
+                        help="профиль типов данных при загрузке (по умолчанию compact)")
+    parser.add_argument('--memory-report', action='store_true',
+                        help="вывести отчет об экономии памяти при загрузке")
+    parser.add_argument('--data-file', default=None,
+                        help="файл с данными (без вопроса; по умолчанию - спросить)")
+    args = parser.parse_args(argv)
+    
     print("Анализатор расстояний между вершинами зигзага")
     print("=" * 80)
     
     try:
         # Запрашиваем файл данных
-        while True:
+        data_file = args.data_file
+        while data_file is None:
             file_input = input("Введите путь к файлу с данными (по умолчанию processed_data/ml_data.csv): ").strip()
             if file_input == "":
                 data_file = "processed_data/ml_data.csv"
@@ -340,14 +383,15 @@ def main():
                 print(f"❌ Файл {file_input} не найден! Попробуйте еще раз.")
         
         # Создаем анализатор
-        analyzer = ZigZagAnalyzer(data_file)
+        analyzer = ZigZagAnalyzer(data_file, dtype_profile=args.dtype_profile,
+                                   memory_report=args.memory_report)
         
         # Загружаем данные
         analyzer.load_data()
         
         # Анализируем расстояния
         if not analyzer.analyze_zigzag_distances():
-            return
+            return False
         
         # Выводим таблицу результатов
         analyzer.print_analysis_table()
@@ -368,11 +412,13 @@ def main():
         print("\n" + "=" * 80)
         print("✓ Анализ завершен успешно!")
         print("✓ Подробный отчет сохранен в файл: zigzag_analysis_detailed.txt")
+        return True
         
     except Exception as e:
         print(f"❌ Ошибка при анализе: {e}")
         import traceback
         traceback.print_exc()
+        return False
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Вычислительные ядра зигзага.
+
+Алгоритм тот же, что и в ZigZag15MProcessor.calculate_zigzag:
+кандидат → фиксация при противоположном экстремуме, только High/Low.
+
+Доступные движки:
+- 'numba'  - скомпилированный JIT-цикл (если установлен numba)
+- 'numpy'  - поблочный векторизованный поиск фаз на NumPy
+- 'python' - эталонный посвечный цикл
+- 'auto'   - numba, если доступен, иначе numpy
+
+Все движки дают побитово одинаковый результат для конечных цен.
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+ZIGZAG_ENGINES = ('auto', 'numba', 'numpy', 'python')
+
+# Размер блока для NumPy-движка (удваивается, пока фаза не закончится)
+_NUMPY_BLOCK_MIN = 64
+_NUMPY_BLOCK_MAX = 1 << 20
+
+
+def _zigzag_loop(high, low, deviation):
+    """
+    Эталонный посвечный цикл зигзага.
+
+    Возвращает:
+    - zigzag_series: массив меток (-1/0/1) типа float64
+    - pivot_idx, pivot_price, pivot_type: массивы точек зигзага
+    - count: количество заполненных точек
+    """
+    n = len(high)
+    zigzag_series = np.zeros(n)
+    pivot_idx = np.zeros(2 * n, dtype=np.int64)
+    pivot_price = np.zeros(2 * n)
+    pivot_type = np.zeros(2 * n, dtype=np.int8)
+
+    # Первая точка - Low первой свечи (минимум)
+    last_zigzag_price = low[0]
+    zigzag_series[0] = 1
+    pivot_idx[0] = 0
+    pivot_price[0] = low[0]
+    pivot_type[0] = 1
+    count = 1
+
+    current_max_price = high[0]
+    current_max_idx = 0
+    max_candidate = False
+
+    current_min_price = low[0]
+    current_min_idx = 0
+    min_candidate = False
+
+    search_direction = -1  # -1 = ищем максимум, 1 = ищем минимум
+
+    for i in range(1, n):
+
+        if search_direction == -1:  # ИЩЕМ МАКСИМУМ
+
+            if high[i] > current_max_price:
+                current_max_price = high[i]
+                current_max_idx = i
+
+            if not max_candidate:
+                dev = (current_max_price - last_zigzag_price) / last_zigzag_price * 100
+                if dev >= deviation:
+                    max_candidate = True
+
+            if max_candidate:
+                deviation_down = (current_max_price - low[i]) / current_max_price * 100
+
+                if deviation_down >= deviation:
+                    # Фиксируем максимум и минимум
+                    zigzag_series[current_max_idx] = -1
+                    zigzag_series[i] = 1
+                    pivot_idx[count] = current_max_idx
+                    pivot_price[count] = current_max_price
+                    pivot_type[count] = -1
+                    pivot_idx[count + 1] = i
+                    pivot_price[count + 1] = low[i]
+                    pivot_type[count + 1] = 1
+                    count += 2
+
+                    last_zigzag_price = low[i]
+
+                    current_min_price = low[i]
+                    current_min_idx = i
+                    min_candidate = False
+                    search_direction = 1
+
+        else:  # ИЩЕМ МИНИМУМ
+
+            if low[i] < current_min_price:
+                current_min_price = low[i]
+                current_min_idx = i
+
+            if not min_candidate:
+                dev = (last_zigzag_price - current_min_price) / last_zigzag_price * 100
+                if dev >= deviation:
+                    min_candidate = True
+
+            if min_candidate:
+                deviation_up = (high[i] - current_min_price) / current_min_price * 100
+
+                if deviation_up >= deviation:
+                    # Фиксируем минимум и максимум
+                    zigzag_series[current_min_idx] = 1
+                    zigzag_series[i] = -1
+                    pivot_idx[count] = current_min_idx
+                    pivot_price[count] = current_min_price
+                    pivot_type[count] = 1
+                    pivot_idx[count + 1] = i
+                    pivot_price[count + 1] = high[i]
+                    pivot_type[count + 1] = -1
+                    count += 2
+
+                    last_zigzag_price = high[i]
+
+                    current_max_price = high[i]
+                    current_max_idx = i
+                    max_candidate = False
+                    search_direction = -1
+
+    return zigzag_series, pivot_idx, pivot_price, pivot_type, count
+
+
+if NUMBA_AVAILABLE:
+    # nogil позволяет запускать несколько отклонений параллельно в потоках
+    _zigzag_loop_jit = njit(cache=True, nogil=True)(_zigzag_loop)
+else:
+    _zigzag_loop_jit = None
+
+
+def _find_phase_end(extreme, opposite, start, last_price, seed, deviation, searching_max,
+                    block=_NUMPY_BLOCK_MIN):
+    """
+    Ищет конец одной фазы (поиск максимума или минимума) блоками NumPy.
+
+    Параметры:
+    - extreme: массив High (поиск максимума) или Low (поиск минимума)
+    - opposite: массив противоположных цен (Low или High)
+    - start: индекс последней зафиксированной точки (начало фазы)
+    - last_price: цена последней зафиксированной точки
+    - seed: начальное значение текущего экстремума
+    - deviation: отклонение в процентах
+    - searching_max: True для поиска максимума
+    - block: начальный размер блока
+
+    Возвращает:
+    - (индекс экстремума, цена экстремума, индекс подтверждения) или None
+    """
+    n = len(extreme)
+    current = seed
+    candidate = False
+    pos = start + 1
+
+    while pos < n:
+        stop = min(n, pos + block)
+        segment = extreme[pos:stop]
+
+        # Текущий экстремум на каждом шаге (строгие сравнения, как в цикле)
+        if searching_max:
+            running = np.fmax.accumulate(np.concatenate(([current], segment)))[1:]
+            cand_dev = (running - last_price) / last_price * 100
+            confirm_dev = (running - opposite[pos:stop]) / running * 100
+        else:
+            running = np.fmin.accumulate(np.concatenate(([current], segment)))[1:]
+            cand_dev = (last_price - running) / last_price * 100
+            confirm_dev = (opposite[pos:stop] - running) / running * 100
+
+        if candidate:
+            cand_mask = np.ones(len(segment), dtype=bool)
+        else:
+            cand_mask = np.logical_or.accumulate(cand_dev >= deviation)
+
+        hits = np.flatnonzero(cand_mask & (confirm_dev >= deviation))
+        if len(hits) > 0:
+            confirm = pos + hits[0]
+            price = running[hits[0]]
+            # Первое вхождение экстремума, начиная с точки начала фазы
+            window = extreme[start:confirm + 1]
+            extreme_idx = start + int(np.flatnonzero(window == price)[0])
+            return extreme_idx, price, confirm
+
+        current = running[-1]
+        candidate = candidate or bool(cand_mask[-1])
+        pos = stop
+        block = min(block * 2, _NUMPY_BLOCK_MAX)
+
+    return None
+
+
+def _zigzag_numpy(high, low, deviation):
+    """
+    Векторизованный движок: каждая фаза обрабатывается блоками NumPy.
+
+    Возвращает то же, что и _zigzag_loop.
+    """
+    n = len(high)
+    zigzag_series = np.zeros(n)
+    points = [(0, low[0], 1)]
+
+    start = 0
+    last_price = low[0]
+    searching_max = True
+    block = _NUMPY_BLOCK_MIN
+
+    while True:
+        if searching_max:
+            found = _find_phase_end(high, low, start, last_price, high[start],
+                                    deviation, True, block)
+        else:
+            found = _find_phase_end(low, high, start, last_price, low[start],
+                                    deviation, False, block)
+        if found is None:
+            break
+
+        extreme_idx, extreme_price, confirm = found
+        if searching_max:
+            points.append((extreme_idx, extreme_price, -1))
+            points.append((confirm, low[confirm], 1))
+            last_price = low[confirm]
+        else:
+            points.append((extreme_idx, extreme_price, 1))
+            points.append((confirm, high[confirm], -1))
+            last_price = high[confirm]
+
+        # Следующий блок подбираем по длине только что завершенной фазы
+        block = max(_NUMPY_BLOCK_MIN, 2 * (confirm - start))
+        start = confirm
+        searching_max = not searching_max
+
+    count = len(points)
+    pivot_idx = np.array([p[0] for p in points], dtype=np.int64)
+    pivot_price = np.array([p[1] for p in points], dtype=np.float64)
+    pivot_type = np.array([p[2] for p in points], dtype=np.int8)
+
+    # Записываем метки в том же порядке, что и цикл (важно при совпадении индексов)
+    for idx, kind in zip(pivot_idx, pivot_type):
+        zigzag_series[idx] = kind
+
+    return zigzag_series, pivot_idx, pivot_price, pivot_type, count
+
+
+def resolve_engine(engine='auto'):
+    """
+    Возвращает фактический движок для заданного имени.
+    """
+    if engine not in ZIGZAG_ENGINES:
+        raise ValueError(f"Неизвестный движок зигзага: {engine}. Доступны: {ZIGZAG_ENGINES}")
+    if engine == 'auto':
+        return 'numba' if NUMBA_AVAILABLE else 'numpy'
+    if engine == 'numba' and not NUMBA_AVAILABLE:
+        raise ImportError("numba не установлен, используйте engine='numpy'")
+    return engine
+
+
+def compute_zigzag(high, low, deviation, engine='auto'):
+    """
+    Вычисляет зигзаг по массивам High/Low.
+
+    Параметры:
+    - high, low: массивы цен
+    - deviation: минимальное отклонение в процентах
+    - engine: 'auto', 'numba', 'numpy' или 'python'
+
+    Возвращает:
+    - zigzag_series: метки (-1/0/1) типа float64
+    - zigzag_points: список (индекс, цена, тип) в порядке фиксации
+    """
+    high = np.ascontiguousarray(high, dtype=np.float64)
+    low = np.ascontiguousarray(low, dtype=np.float64)
+    deviation = float(deviation)
+    engine = resolve_engine(engine)
+
+    if engine == 'numba':
+        result = _zigzag_loop_jit(high, low, deviation)
+    elif engine == 'numpy':
+        result = _zigzag_numpy(high, low, deviation)
+    else:
+        result = _zigzag_loop(high, low, deviation)
+
+    zigzag_series, pivot_idx, pivot_price, pivot_type, count = result
+    zigzag_points = [
+        (int(pivot_idx[k]), pivot_price[k], int(pivot_type[k]))
+        for k in range(count)
+    ]
+    return zigzag_series, zigzag_points
+
+
+def compute_zigzag_sweep(high, low, deviations, engine='auto', workers=None):
+    """
+    Вычисляет зигзаг сразу для нескольких отклонений.
+
+    Массивы High/Low подготавливаются один раз и разделяются между
+    расчетами; при workers > 1 отклонения считаются параллельно в потоках
+    (numba-ядро отпускает GIL, NumPy-движок - внутри векторных операций).
+
+    Параметры:
+    - high, low: массивы цен
+    - deviations: список отклонений в процентах
+    - engine: движок, см. compute_zigzag
+    - workers: количество потоков (None = по числу отклонений, но не больше числа ядер)
+
+    Возвращает:
+    - словарь {отклонение: (zigzag_series, zigzag_points)} в порядке deviations
+    """
+    high = np.ascontiguousarray(high, dtype=np.float64)
+    low = np.ascontiguousarray(low, dtype=np.float64)
+    deviations = [float(d) for d in deviations]
+    engine = resolve_engine(engine)
+
+    if workers is None:
+        workers = min(len(deviations), os.cpu_count() or 1)
+
+    if workers <= 1 or len(deviations) <= 1:
+        results = [compute_zigzag(high, low, d, engine=engine) for d in deviations]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                lambda d: compute_zigzag(high, low, d, engine=engine), deviations))
+
+    return dict(zip(deviations, results))
+
+
+class ZigZagState:
+    """
+    Инкрементальное состояние зигзага для живых свечей.
+
+    Хранит последнюю точку, текущие кандидаты максимума/минимума и
+    направление поиска. update(high, low) обрабатывает одну свечу за O(1)
+    и возвращает только что зафиксированные точки. Последовательная подача
+    всей истории дает те же точки, что и compute_zigzag.
+
+    Состояние сохраняется в JSON (save/load), чтобы после перезапуска
+    не пересчитывать всю историю.
+    """
+
+    _FIELDS = (
+        'deviation', 'index', 'last_price',
+        'current_max_price', 'current_max_idx', 'max_candidate',
+        'current_min_price', 'current_min_idx', 'min_candidate',
+        'search_direction',
+    )
+
+    def __init__(self, deviation=1.0):
+        """
+        Параметры:
+        - deviation: минимальное отклонение в процентах
+        """
+        self.deviation = float(deviation)
+        self.index = -1                  # Индекс последней обработанной свечи
+        self.last_price = None           # Цена последней зафиксированной точки
+        self.current_max_price = None
+        self.current_max_idx = 0
+        self.max_candidate = False
+        self.current_min_price = None
+        self.current_min_idx = 0
+        self.min_candidate = False
+        self.search_direction = -1       # -1 = ищем максимум, 1 = ищем минимум
+
+    def update(self, high, low):
+        """
+        Обрабатывает новую свечу.
+
+        Возвращает:
+        - список новых точек (индекс, цена, тип); обычно пустой
+        """
+        high = float(high)
+        low = float(low)
+        self.index += 1
+        i = self.index
+
+        if i == 0:
+            # Первая точка - Low первой свечи
+            self.last_price = low
+            self.current_max_price = high
+            self.current_max_idx = 0
+            self.current_min_price = low
+            self.current_min_idx = 0
+            return [(0, low, 1)]
+
+        if self.search_direction == -1:  # ИЩЕМ МАКСИМУМ
+            if high > self.current_max_price:
+                self.current_max_price = high
+                self.current_max_idx = i
+
+            if not self.max_candidate:
+                dev = (self.current_max_price - self.last_price) / self.last_price * 100
+                if dev >= self.deviation:
+                    self.max_candidate = True
+
+            if self.max_candidate:
+                deviation_down = (self.current_max_price - low) / self.current_max_price * 100
+                if deviation_down >= self.deviation:
+                    pivots = [(self.current_max_idx, self.current_max_price, -1), (i, low, 1)]
+                    self.last_price = low
+                    self.current_min_price = low
+                    self.current_min_idx = i
+                    self.min_candidate = False
+                    self.search_direction = 1
+                    return pivots
+
+        else:  # ИЩЕМ МИНИМУМ
+            if low < self.current_min_price:
+                self.current_min_price = low
+                self.current_min_idx = i
+
+            if not self.min_candidate:
+                dev = (self.last_price - self.current_min_price) / self.last_price * 100
+                if dev >= self.deviation:
+                    self.min_candidate = True
+
+            if self.min_candidate:
+                deviation_up = (high - self.current_min_price) / self.current_min_price * 100
+                if deviation_up >= self.deviation:
+                    pivots = [(self.current_min_idx, self.current_min_price, 1), (i, high, -1)]
+                    self.last_price = high
+                    self.current_max_price = high
+                    self.current_max_idx = i
+                    self.max_candidate = False
+                    self.search_direction = -1
+                    return pivots
+
+        return []
+
+    def update_many(self, high, low):
+        """
+        Обрабатывает пачку свечей.
+
+        Возвращает:
+        - список всех новых точек в порядке фиксации
+        """
+        pivots = []
+        for h, l in zip(high, low):
+            pivots.extend(self.update(h, l))
+        return pivots
+
+    @property
+    def settled_index(self):
+        """
+        Индекс, до которого (не включая) метки уже окончательны:
+        новая точка не может оказаться раньше текущего кандидата экстремума.
+        """
+        if self.index < 0:
+            return 0
+        if self.search_direction == -1:
+            return self.current_max_idx
+        return self.current_min_idx
+
+    def to_dict(self):
+        """Состояние в виде словаря (для сериализации)."""
+        return {field: getattr(self, field) for field in self._FIELDS}
+
+    @classmethod
+    def from_dict(cls, state):
+        """Восстанавливает состояние из словаря."""
+        obj = cls(state['deviation'])
+        for field in cls._FIELDS:
+            setattr(obj, field, state[field])
+        return obj
+
+    def save(self, path):
+        """Сохраняет контрольную точку состояния в JSON."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Загружает контрольную точку состояния из JSON."""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
@@ -4,14 +4,25 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split, GridSearchCV, TimeSeriesSplit
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 from sklearn.preprocessing import StandardScaler
 import joblib
 import os
+import sys
+import argparse
+import json
+import time
 import warnings
+from data_store import load_table, resolve_table_path
+from pivot_index import find_pivots, load_pivot_index
+from hyperparameter_search import load_search_data, save_search_data
+from model_backends import BACKENDS, build_models
+from model_tournament import print_timing_table, run_tournament, save_oof_results
+from walk_forward import DEFAULT_EMBARGO, WalkForwardSplit, time_split
+from data_schema import PROFILES, apply_profile, print_memory_report
+from feature_engine import (FeatureEngine, IncrementalFeatureEngine, add_features, merge_feature_sets,
+                            ml_feature_set, processor_feature_set)
 warnings.filterwarnings('ignore')
 
 class ZigZagMLModel:
@@ -19,16 +30,20 @@ class ZigZagMLModel:
     Модель машинного обучения для предсказания вершин зигзага.
     """
     
-    def __init__(self, data_file=None, deviation=1.0):
+    def __init__(self, data_file=None, deviation=1.0, dtype_profile='compact', memory_report=False):
         """
         Инициализация модели.
         
         Параметры:
         - data_file: путь к файлу с данными и метками зигзага
         - deviation: отклонение зигзага в процентах
+        - dtype_profile: профиль типов данных при загрузке ('default' или 'compact')
+        - memory_report: вывести отчет об экономии памяти при загрузке
         """
         self.data_file = data_file or "processed_data/ml_data.csv"
         self.deviation = deviation
+        self.dtype_profile = dtype_profile
+        self.memory_report = memory_report
         self.zigzag_column = f"zigzag ({deviation}%)"
         self.data = None
         self.X = None
@@ -37,10 +52,18 @@ class ZigZagMLModel:
         self.X_test = None
         self.y_train = None
         self.y_test = None
+        self.X_train_scaled = None
+        self.X_test_scaled = None
+        self.split = None
+        self.embargo = DEFAULT_EMBARGO
         self.scaler = StandardScaler()
         self.models = {}
         self.best_model = None
+        self.best_model_name = None
+        self.tournament = None
         self.feature_names = []
+        self.feature_state = None
+        self.pivot_index = None
         
     def load_data(self):
         """
@@ -49,11 +72,12 @@ class ZigZagMLModel:
         print("Загрузка данных для обучения модели...")
         print("=" * 60)
         
-        if not os.path.exists(self.data_file):
+        if not os.path.exists(resolve_table_path(self.data_file)):
             raise FileNotFoundError(f"Файл {self.data_file} не найден!")
         
         # Загружаем данные
-        self.data = pd.read_csv(self.data_file)
+        self.pivot_index = load_pivot_index(self.data_file)
+        self.data = load_table(self.data_file, profile=self.dtype_profile, memory_report=self.memory_report)
         print(f"Загружены данные: {len(self.data)} записей")
         
         # Проверяем наличие колонки с метками
@@ -86,96 +110,59 @@ class ZigZagMLModel:
         """
         print(f"\nПроверка расстояний между зигзагами (минимум {self.deviation}%)...")
         
-        # Находим все точки зигзага
-        zigzag_points = self.data[self.data[self.zigzag_column] != 0]
+        # Вершины из индекса рядом с таблицей, иначе поиск по колонке меток
+        if self.pivot_index is not None and self.zigzag_column in self.pivot_index:
+            pivots = self.pivot_index[self.zigzag_column]
+        else:
+            pivots = find_pivots(self.data, self.zigzag_column)
         
-        if len(zigzag_points) < 2:
+        if len(pivots.row) < 2:
             print("✓ Найдено менее 2 точек зигзага, проверка не требуется")
             return
         
-        print(f"✓ Найдено {len(zigzag_points)} точек зигзага")
+        print(f"✓ Найдено {len(pivots.row)} точек зигзага")
         
-        # Проверяем расстояния между соседними точками
-        for i in range(1, len(zigzag_points)):
-            prev_idx = zigzag_points.index[i-1]
-            curr_idx = zigzag_points.index[i]
-            
-            prev_price = zigzag_points.iloc[i-1]['Close']
-            curr_price = zigzag_points.iloc[i]['Close']
-            
-            # Вычисляем процентное изменение
-            price_change_pct = abs((curr_price - prev_price) / prev_price * 100)
-            
-            if price_change_pct < self.deviation:
-                print(f"❌ ОШИБКА: Расстояние между зигзагами {price_change_pct:.2f}% меньше минимального {self.deviation}%")
-                print(f"   Индексы: {prev_idx} -> {curr_idx}")
-                print(f"   Цены: {prev_price:.2f} -> {curr_price:.2f}")
-                print(f"   Время: {zigzag_points.iloc[i-1]['Open time']} -> {zigzag_points.iloc[i]['Open time']}")
-                raise ValueError(f"Расстояние между зигзагами {price_change_pct:.2f}% меньше минимального {self.deviation}%")
+        # Процентное изменение цены закрытия между соседними точками
+        prev_close = pivots.close[:-1]
+        curr_close = pivots.close[1:]
+        changes = np.abs((curr_close - prev_close) / prev_close * 100)
+        violations = np.flatnonzero(changes < self.deviation)
+        
+        if len(violations):
+            i = violations[0]
+            price_change_pct = changes[i]
+            print(f"❌ ОШИБКА: Расстояние между зигзагами {price_change_pct:.2f}% меньше минимального {self.deviation}%")
+            print(f"   Индексы: {pivots.row[i]} -> {pivots.row[i + 1]}")
+            print(f"   Цены: {prev_close[i]:.2f} -> {curr_close[i]:.2f}")
+            print(f"   Время: {pd.Timestamp(pivots.time[i])} -> {pd.Timestamp(pivots.time[i + 1])}")
+            raise ValueError(f"Расстояние между зигзагами {price_change_pct:.2f}% меньше минимального {self.deviation}%")
         
         print(f"✓ Все расстояния между зигзагами больше {self.deviation}%")
     
-    def create_features(self, window_sizes=[5, 10, 20, 50]):
+    def create_features(self, window_sizes=[5, 10, 20, 50], keep_state=False):
         """
         Создает признаки для обучения модели.
         
         Параметры:
         - window_sizes: размеры окон для технических индикаторов
+        - keep_state: сохранить состояние индикаторов для append_candles
         """
         print("\nСоздание признаков для модели...")
         
         if self.data is None:
             self.load_data()
         
-        # Создаем копию данных
-        df = self.data.copy()
-        
-        # Базовые признаки цены
-        df['price_change'] = df['Close'].pct_change()
-        df['high_low_ratio'] = df['High'] / df['Low']
-        df['open_close_ratio'] = df['Open'] / df['Close']
+        # Признаки считаются движком (формулы общие с data_for_ml_maker и helpers)
+        features = ml_feature_set(window_sizes, volume='Volume' in self.data.columns)
+        engine = FeatureEngine(self.data)
+        df = add_features(self.data, features, engine)
         
-        # Волатильность
-        df['volatility'] = df['price_change'].rolling(window=20).std()
-        
-        # Технические индикаторы для разных окон
-        for window in window_sizes:
-            # Скользящие средние
-            df[f'sma_{window}'] = df['Close'].rolling(window=window).mean()
-            df[f'ema_{window}'] = df['Close'].ewm(span=window).mean()
-            
-            # Отклонение от скользящих средних
-            df[f'deviation_sma_{window}'] = (df['Close'] - df[f'sma_{window}']) / df[f'sma_{window}']
-            df[f'deviation_ema_{window}'] = (df['Close'] - df[f'ema_{window}']) / df[f'ema_{window}']
-            
-            # Максимумы и минимумы в окне
-            df[f'high_{window}'] = df['High'].rolling(window=window).max()
-            df[f'low_{window}'] = df['Low'].rolling(window=window).min()
-            
-            # Позиция цены относительно максимума и минимума
-            df[f'position_high_{window}'] = (df['Close'] - df[f'low_{window}']) / (df[f'high_{window}'] - df[f'low_{window}'])
-            
-            # RSI-подобный индикатор
-            gains = df['price_change'].where(df['price_change'] > 0, 0)
-            losses = -df['price_change'].where(df['price_change'] < 0, 0)
-            avg_gains = gains.rolling(window=window).mean()
-            avg_losses = losses.rolling(window=window).mean()
-            df[f'rsi_{window}'] = 100 - (100 / (1 + avg_gains / avg_losses))
-        
-        # Признаки тренда
-        df['trend_5'] = df['Close'] - df['Close'].shift(5)
-        df['trend_10'] = df['Close'] - df['Close'].shift(10)
-        df['trend_20'] = df['Close'] - df['Close'].shift(20)
-        
-        # Признаки импульса
-        df['momentum_5'] = df['Close'] / df['Close'].shift(5) - 1
-        df['momentum_10'] = df['Close'] / df['Close'].shift(10) - 1
-        df['momentum_20'] = df['Close'] / df['Close'].shift(20) - 1
-        
-        # Признаки объема (если есть)
-        if 'Volume' in df.columns:
-            df['volume_sma_20'] = df['Volume'].rolling(window=20).mean()
-            df['volume_ratio'] = df['Volume'] / df['volume_sma_20']
+        if keep_state:
+            # Для новых свечей нужны и признаки процессора, которые уже лежат в ml_data
+            live_features = features
+            if 'Volume' in self.data.columns:
+                live_features = merge_feature_sets(processor_feature_set(), features)
+            self.feature_state = IncrementalFeatureEngine.from_engine(engine, live_features)
         
         # Удаляем NaN значения
         df = df.dropna()
@@ -185,11 +172,18 @@ class ZigZagMLModel:
         if 'Volume' in df.columns:
             exclude_columns.append('Volume')
         
-        self.feature_names = [col for col in df.columns if col not in exclude_columns]
+        # Колонки зигзага с другими отклонениями (после sweep) - тоже метки, а не признаки
+        self.feature_names = [col for col in df.columns
+                              if col not in exclude_columns and 'zigzag' not in col.lower()]
         
-        # Подготавливаем данные для обучения
+        # Подготавливаем данные для обучения (признаки в типах профиля)
         self.X = df[self.feature_names]
-        self.y = df[self.zigzag_column]
+        if self.dtype_profile == 'compact':
+            # Единый float32, чтобы и масштабированная матрица осталась float32
+            self.X = self.X.astype(np.float32)
+        self.y = apply_profile(df[[self.zigzag_column]], self.dtype_profile)[self.zigzag_column]
+        if self.memory_report:
+            print_memory_report(df[self.feature_names], self.X, title=f"Память признаков ({self.dtype_profile})")
         
         print(f"Создано {len(self.feature_names)} признаков:")
         for i, feature in enumerate(self.feature_names[:10]):
@@ -199,9 +193,42 @@ class ZigZagMLModel:
         
         return self.X, self.y
     
-    def prepare_data(self, test_size=0.2, random_state=42):
+    def append_candles(self, candles):
+        """
+        Считает признаки модели для новых свечей без пересчета истории.
+        
+        Параметры:
+        - candles: DataFrame новых свечей с исходными колонками (OHLCV и т.п.)
+        
+        Возвращает:
+        - DataFrame признаков в порядке self.feature_names
+        """
+        if self.feature_state is None:
+            raise ValueError("Состояние признаков не сохранено: вызовите create_features(keep_state=True)")
+        
+        computed = self.feature_state.append(candles)
+        missing = [name for name in self.feature_names
+                   if name not in computed.columns and name not in candles.columns]
+        if missing:
+            raise ValueError(f"В новых свечах отсутствуют колонки: {missing}")
+        
+        X_new = pd.DataFrame({name: computed[name] if name in computed.columns else candles[name]
+                              for name in self.feature_names}, index=candles.index)
+        if self.dtype_profile == 'compact':
+            X_new = X_new.astype(np.float32)
+        return X_new
+    
+    def prepare_data(self, test_size=0.2, random_state=42, split='time', embargo=DEFAULT_EMBARGO):
         """
         Разделяет данные на обучающую и тестовую выборки.
+        
+        Параметры:
+        - test_size: доля тестовой выборки
+        - random_state: зерно для split='random'
+        - split: 'time' - тест из последних свечей, обучение только на более ранних;
+          'random' - перемешанное стратифицированное разделение (заглядывает в будущее)
+        - embargo: свечей между обучающей и тестовой выборкой при split='time';
+          по нему же делается зазор между фолдами кросс-валидации
         """
         print("\nПодготовка данных для обучения...")
         
@@ -209,9 +236,18 @@ class ZigZagMLModel:
             self.create_features()
         
         # Разделяем данные
-        self.X_train, self.X_test, self.y_train, self.y_test = train_test_split(
-            self.X, self.y, test_size=test_size, random_state=random_state, stratify=self.y
-        )
+        if split == 'time':
+            train_idx, test_idx = time_split(len(self.X), test_size=test_size, embargo=embargo)
+            self.X_train, self.X_test = self.X.iloc[train_idx], self.X.iloc[test_idx]
+            self.y_train, self.y_test = self.y.iloc[train_idx], self.y.iloc[test_idx]
+        elif split == 'random':
+            self.X_train, self.X_test, self.y_train, self.y_test = train_test_split(
+                self.X, self.y, test_size=test_size, random_state=random_state, stratify=self.y
+            )
+        else:
+            raise ValueError(f"Неизвестный способ разделения: {split} (доступны: time, random)")
+        self.split = split
+        self.embargo = embargo
         
         # Масштабируем признаки
         self.X_train_scaled = self.scaler.fit_transform(self.X_train)
@@ -219,6 +255,8 @@ class ZigZagMLModel:
         
         print(f"Обучающая выборка: {len(self.X_train)} записей")
         print(f"Тестовая выборка: {len(self.X_test)} записей")
+        if split == 'time':
+            print(f"Разделение по времени, зазор (embargo): {embargo} свечей")
         
         # Показываем распределение классов
         print(f"\nРаспределение классов в обучающей выборке:")
@@ -229,10 +267,66 @@ class ZigZagMLModel:
         
         return self.X_train_scaled, self.X_test_scaled, self.y_train, self.y_test
     
-    def train_models(self):
+    def search_data(self, search_dir, test_size=0.2, embargo=DEFAULT_EMBARGO, refresh=False):
+        """
+        Масштабированная обучающая выборка для подбора гиперпараметров.
+        
+        Матрица и scaler сохраняются в каталоге поиска и при следующих запусках
+        загружаются оттуда без расчета признаков, если файл данных не менялся.
+        
+        Параметры:
+        - search_dir: каталог поиска
+        - test_size: доля тестовой выборки (в поиске не используется)
+        - embargo: свечей между обучающей и тестовой выборкой
+        - refresh: пересчитать признаки, даже если кеш актуален
+        
+        Возвращает:
+        - (X_train_scaled, y_train)
+        """
+        data_path = resolve_table_path(self.data_file)
+        if not os.path.exists(data_path):
+            raise FileNotFoundError(f"Файл {self.data_file} не найден!")
+        stat = os.stat(data_path)
+        key = {'data_file': os.path.abspath(data_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+               'deviation': self.deviation, 'dtype_profile': self.dtype_profile,
+               'test_size': test_size, 'embargo': embargo}
+        
+        cached = None if refresh else load_search_data(search_dir, key)
+        if cached is not None:
+            self.X_train_scaled, self.y_train, self.scaler, self.feature_names = cached
+            print(f"✓ Признаки загружены из кеша поиска: {self.X_train_scaled.shape}")
+            return self.X_train_scaled, self.y_train
+        
+        self.prepare_data(test_size=test_size, split='time', embargo=embargo)
+        save_search_data(search_dir, key, self.X_train_scaled, self.y_train, self.scaler, self.feature_names)
+        print(f"✓ Признаки сохранены в кеш поиска: {search_dir}")
+        return self.X_train_scaled, self.y_train
+    
+    def train_models(self, workers=1, cv=5, evaluation='refit', warm_start=False, chain_length=None,
+                     backend='sklearn', params=None):
         """
         Обучает несколько моделей и выбирает лучшую.
+        
+        Параметры:
+        - workers: количество процессов для обучения (1 - последовательно, None - число ядер);
+          каждая пара модель × фолд кросс-валидации обучается отдельной задачей
+        - cv: число фолдов кросс-валидации или разбиение (например, WalkForwardSplit);
+          при разделении по времени число фолдов - расширяющиеся окна с зазором embargo
+        - evaluation: 'refit' - итоговая модель обучается заново на всей выборке,
+          лучшая выбирается по кросс-валидации; 'oof' - модели фолдов сохраняются,
+          итоговая модель - их ансамбль, лучшая выбирается по OOF-точности
+        - warm_start: модели следующих фолдов продолжают модели предыдущих
+          (для моделей с параметром warm_start); только при разделении по времени
+        - chain_length: фолдов в одной цепочке warm start (цепочки идут параллельно)
+        - backend: набор моделей (см. model_backends.BACKENDS); 'hist' - бустинг на
+          гистограммах с ранней остановкой и весами классов вместо Gradient Boosting
+        - params: гиперпараметры по моделям {название: {параметр: значение}},
+          например best_params.json из hyperparameter_search
         """
+        if evaluation not in ('refit', 'oof'):
+            raise ValueError(f"Неизвестный режим оценки: {evaluation} (доступны: refit, oof)")
+        if warm_start and self.split != 'time':
+            raise ValueError("warm start возможен только при разделении по времени (split='time')")
         print("\nОбучение моделей...")
         print("=" * 60)
         
@@ -240,20 +334,35 @@ class ZigZagMLModel:
             self.prepare_data()
         
         # Определяем модели для тестирования
-        models = {
-            'Random Forest': RandomForestClassifier(n_estimators=100, random_state=42),
-            'Gradient Boosting': GradientBoostingClassifier(n_estimators=100, random_state=42),
-            'Logistic Regression': LogisticRegression(random_state=42, max_iter=1000)
-        }
-        
-        # Обучаем модели и оцениваем их
+        models = build_models(backend)
+        for name, model_params in (params or {}).items():
+            if name not in models:
+                print(f"⚠️ Параметры для модели {name} пропущены: ее нет в наборе {backend}")
+                continue
+            models[name].set_params(**model_params)
+            print(f"✓ {name}: {model_params}")
+        
+        # Фолды по времени: обучение всегда раньше проверки
+        if self.split == 'time' and isinstance(cv, int):
+            cv = TimeSeriesSplit(n_splits=cv, gap=self.embargo)
+        if not isinstance(cv, int):
+            print(f"Кросс-валидация: {cv}, фолдов: {cv.get_n_splits(self.X_train_scaled)}")
+        
+        # Обучение на всей выборке и на фолдах - задачи одного пула процессов
+        started = time.perf_counter()
+        tournament = run_tournament(models, self.X_train_scaled, self.y_train, cv=cv, workers=workers,
+                                    refit=evaluation == 'refit', warm_start=warm_start,
+                                    chain_length=chain_length)
+        self.tournament = tournament
+        total_time = time.perf_counter() - started
+        
+        # Оцениваем модели
         results = {}
         
-        for name, model in models.items():
-            print(f"\nОбучение {name}...")
-            
-            # Обучаем модель
-            model.fit(self.X_train_scaled, self.y_train)
+        for name, trained in tournament.items():
+            print(f"\nМодель {name}:")
+            model = trained['model']
+            cv_scores = trained['cv_scores']
             
             # Предсказываем на тестовой выборке
             y_pred = model.predict(self.X_test_scaled)
@@ -261,22 +370,29 @@ class ZigZagMLModel:
             # Оцениваем точность
             accuracy = accuracy_score(self.y_test, y_pred)
             
-            # Кросс-валидация
-            cv_scores = cross_val_score(model, self.X_train_scaled, self.y_train, cv=5)
-            
             results[name] = {
                 'model': model,
                 'accuracy': accuracy,
-                'cv_mean': cv_scores.mean(),
-                'cv_std': cv_scores.std(),
-                'predictions': y_pred
+                # Фолды, на которых модель не обучилась, имеют оценку NaN
+                'cv_mean': np.nanmean(cv_scores),
+                'cv_std': np.nanstd(cv_scores),
+                'predictions': y_pred,
+                'wall_time': trained['wall_time'],
+                'cpu_time': trained['cpu_time']
             }
             
             print(f"  Точность на тестовой выборке: {accuracy:.4f}")
-            print(f"  Кросс-валидация: {cv_scores.mean():.4f} (+/- {cv_scores.std() * 2:.4f})")
+            print(f"  Кросс-валидация: {results[name]['cv_mean']:.4f} (+/- {results[name]['cv_std'] * 2:.4f})")
+            if 'oof_score' in trained:
+                results[name]['oof_score'] = trained['oof_score']
+                print(f"  OOF-точность: {trained['oof_score']:.4f}")
+        
+        print_timing_table(tournament, total_time)
         
-        # Выбираем лучшую модель
-        best_model_name = max(results.keys(), key=lambda x: results[x]['cv_mean'])
+        # Выбираем лучшую модель (в режиме oof - по OOF-точности, без повторного обучения)
+        score_key = 'oof_score' if evaluation == 'oof' else 'cv_mean'
+        best_model_name = max(results.keys(), key=lambda x: np.nan_to_num(results[x][score_key], nan=-np.inf))
+        self.best_model_name = best_model_name
         self.best_model = results[best_model_name]['model']
         self.models = results
         
@@ -305,8 +421,8 @@ class ZigZagMLModel:
         
         # Детальный отчет
         print("\nДетальный отчет:")
-        print(classification_report(self.y_test, y_pred, 
-                                  target_names=['Нет вершины', 'Минимум', 'Максимум']))
+        print(classification_report(self.y_test, y_pred, labels=[0, -1, 1],
+                                  target_names=['Нет вершины', 'Минимум', 'Максимум'], zero_division=0))
         
         # Важность признаков (для Random Forest и Gradient Boosting)
         if hasattr(model, 'feature_importances_'):
@@ -363,6 +479,16 @@ class ZigZagMLModel:
         joblib.dump(model_data, filename)
         print(f"✓ Модель сохранена: {filename}")
     
+    def save_oof(self, filename='zigzag_oof.npz'):
+        """
+        Сохраняет оценки и время фолдов и OOF-вероятности последнего обучения.
+        """
+        if self.tournament is None:
+            raise ValueError("Модель не обучена!")
+        
+        save_oof_results(self.tournament, filename, index=np.asarray(self.y_train.index))
+        print(f"✓ Результаты фолдов сохранены: {filename}")
+    
     def load_model(self, filename='zigzag_model.pkl'):
         """
         Загружает сохраненную модель.
@@ -408,7 +534,7 @@ class ZigZagMLModel:
         axes[0, 0].grid(True, alpha=0.3)
         
         # 2. Матрица ошибок лучшей модели
-        best_model_name = max(self.models.keys(), key=lambda x: self.models[x]['cv_mean'])
+        best_model_name = self.best_model_name or max(self.models.keys(), key=lambda x: self.models[x]['cv_mean'])
         y_pred = self.models[best_model_name]['predictions']
         cm = confusion_matrix(self.y_test, y_pred)
         
@@ -452,16 +578,65 @@ class ZigZagMLModel:
         print("✓ График результатов сохранен: zigzag_model_results.png")
         plt.show()
 
-def main():
+def main(argv=None):
     """
     Основная функция для обучения модели.
+    
+    Без --deviation отклонение запрашивается интерактивно.
+    
+    Возвращает:
+    - True, если модель обучена и сохранена
     """
+    parser = argparse.ArgumentParser(description="Обучение модели для предсказания вершин зигзага")
+    parser.add_argument('--dtype-profile', choices=PROFILES, default='compact',
+                        help="профиль типов данных при загрузке (по умолчанию compact)")
+    parser.add_argument('--memory-report', action='store_true',
+                        help="вывести отчет об экономии памяти при загрузке")
+    parser.add_argument('--deviation', type=float, default=None,
+                        help="отклонение зигзага в процентах (без вопроса)")
+    parser.add_argument('--data-file', default="processed_data/ml_data.csv",
+                        help="файл с признаками и метками зигзага")
+    parser.add_argument('--model-file', default='zigzag_model.pkl',
+                        help="куда сохранить обученную модель")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="процессов для обучения моделей и фолдов (по умолчанию 1, 0 - число ядер)")
+    parser.add_argument('--evaluation', choices=['refit', 'oof'], default='refit',
+                        help="refit - обучить лучшую модель заново на всей выборке, "
+                             "oof - использовать модели фолдов и OOF-оценки")
+    parser.add_argument('--oof-file', default=None,
+                        help="сохранить время фолдов и OOF-вероятности в .npz")
+    parser.add_argument('--split', choices=['time', 'random'], default='time',
+                        help="разделение на обучение и тест: по времени (по умолчанию) или перемешанное")
+    parser.add_argument('--embargo', type=int, default=DEFAULT_EMBARGO,
+                        help=f"свечей между обучением и проверкой (по умолчанию {DEFAULT_EMBARGO})")
+    parser.add_argument('--wf-test-days', type=float, default=None,
+                        help="walk-forward: длина проверочного окна в днях (вместо фолдов)")
+    parser.add_argument('--wf-train-days', type=float, default=None,
+                        help="walk-forward: длина обучающего окна в днях (по умолчанию - вся история до окна)")
+    parser.add_argument('--wf-step-days', type=float, default=None,
+                        help="walk-forward: сдвиг окон в днях (по умолчанию - длина проверочного окна)")
+    parser.add_argument('--backend', choices=BACKENDS, default='sklearn',
+                        help="набор моделей: sklearn, hist (бустинг на гистограммах) или all")
+    parser.add_argument('--params', default=None,
+                        help="JSON с гиперпараметрами по моделям (best_params.json из hyperparameter_search)")
+    parser.add_argument('--warm-start', action='store_true',
+                        help="продолжать модель предыдущего окна, где модель это поддерживает")
+    parser.add_argument('--chain-length', type=int, default=None,
+                        help="окон в одной цепочке warm start (цепочки обучаются параллельно)")
+    args = parser.parse_args(argv)
+    if args.warm_start and args.split != 'time':
+        parser.error("--warm-start возможен только с --split time")
+    
     print("Обучение модели для предсказания вершин зигзага")
     print("=" * 80)
     
     try:
         # Запрашиваем отклонение зигзага
-        while True:
+        deviation = args.deviation
+        if deviation is not None and deviation <= 0:
+            print("❌ Отклонение должно быть положительным числом!")
+            return False
+        while deviation is None:
             try:
                 deviation_input = input("Введите отклонение зигзага в процентах (по умолчанию 1.0): ").strip()
                 if deviation_input == "":
@@ -472,6 +647,7 @@ def main():
                     if deviation > 0:
                         break
                     else:
+                        deviation = None
                         print("❌ Отклонение должно быть положительным числом!")
             except ValueError:
                 print("❌ Введите корректное число!")
@@ -479,7 +655,8 @@ def main():
         print(f"✓ Используется отклонение: {deviation}%")
         
         # Создаем модель
-        model = ZigZagMLModel(deviation=deviation)
+        model = ZigZagMLModel(data_file=args.data_file, deviation=deviation, dtype_profile=args.dtype_profile,
+                              memory_report=args.memory_report)
         
         # Загружаем данные
         model.load_data()
@@ -487,30 +664,44 @@ def main():
         # Создаем признаки
         model.create_features()
         
+        params = None
+        if args.params:
+            with open(args.params, 'r', encoding='utf-8') as f:
+                params = json.load(f)
+        
         # Подготавливаем данные
-        model.prepare_data()
+        model.prepare_data(split=args.split, embargo=args.embargo)
         
         # Обучаем модели
-        results = model.train_models()
+        cv = 5
+        if args.wf_test_days:
+            cv = WalkForwardSplit.from_days(args.wf_test_days, args.wf_train_days, args.wf_step_days,
+                                            embargo=args.embargo)
+        model.train_models(workers=args.workers or None, cv=cv, evaluation=args.evaluation,
+                           warm_start=args.warm_start, chain_length=args.chain_length, backend=args.backend,
+                           params=params)
+        if args.oof_file:
+            model.save_oof(args.oof_file)
         
         # Оцениваем лучшую модель
-        best_model_name = max(results.keys(), key=lambda x: results[x]['cv_mean'])
-        model.evaluate_model(best_model_name)
+        model.evaluate_model(model.best_model_name)
         
         # Визуализируем результаты
         model.plot_results()
         
         # Сохраняем модель
-        model.save_model()
+        model.save_model(args.model_file)
         
         print("\n" + "=" * 80)
         print("✓ Обучение модели завершено успешно!")
         print("✓ Модель готова для предсказания вершин зигзага")
+        return True
         
     except Exception as e:
         print(f"Ошибка при обучении модели: {e}")
         import traceback
         traceback.print_exc()
+        return False
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(0 if main() else 1)